@@ -0,0 +1,31 @@
+"""
+Analyzes exported access logs of a websocket stage.
+
+Usage: python -m b_aws_websocket_api.access_log exported-logs/ [more files] [--top 10] [--output report.json]
+"""
+import argparse
+import json
+
+from b_aws_websocket_api.access_log.ws_access_log_analyzer import WsAccessLogAnalyzer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Websocket access log analyzer.')
+    parser.add_argument('paths', nargs='+', help='Log files (plain or gzip JSON lines) or directories of them.')
+    parser.add_argument('--top', type=int, default=10, help='Number of top talkers and error messages to report.')
+    parser.add_argument('--capacity', type=int, default=1000, help='Number of connections tracked as top talkers.')
+    parser.add_argument('--output', default=None, help='Write the report to this file instead of stdout.')
+    arguments = parser.parse_args()
+
+    report = WsAccessLogAnalyzer(top_talkers=arguments.capacity).add_files(arguments.paths).report(arguments.top)
+    document = json.dumps(report, indent=2)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            file.write(document)
+    else:
+        print(document)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,328 @@
+import gzip
+import json
+import math
+import os
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+# Relative width of latency histogram buckets, i.e. reported percentiles are at most 5% above the true value.
+BUCKET_GROWTH = 1.05
+
+
+class WsLatencyHistogram:
+    """
+    Histogram of latencies in milliseconds with logarithmic buckets, hence its memory is bounded by the
+    latency range rather than the number of measurements.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor.
+        """
+        self.__buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, milliseconds: float) -> None:
+        index = 0 if milliseconds < 1 else math.ceil(math.log(milliseconds, BUCKET_GROWTH))
+
+        self.__buckets[index] = self.__buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    @staticmethod
+    def upper_bound(index: int) -> float:
+        return 1.0 if index == 0 else BUCKET_GROWTH ** index
+
+    def percentile(self, percent: float) -> float:
+        """
+        Estimates a percentile (nearest-rank method) as the upper bound of its bucket.
+
+        :param percent: Percentile in range 0-100.
+
+        :return: Latency in milliseconds or 0 if there are no measurements.
+        """
+        if not self.count:
+            return 0.0
+
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+
+        for index in sorted(self.__buckets):
+            seen += self.__buckets[index]
+            if seen >= rank:
+                return min(self.upper_bound(index), self.max)
+
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            count=self.count,
+            mean_ms=round(self.total / self.count, 3) if self.count else 0.0,
+            p50_ms=round(self.percentile(50), 3),
+            p90_ms=round(self.percentile(90), 3),
+            p99_ms=round(self.percentile(99), 3),
+            max_ms=round(self.max, 3),
+            # Upper bounds of non-empty buckets to their counts.
+            buckets={f'{self.upper_bound(index):.3f}': count for index, count in sorted(self.__buckets.items())},
+        )
+
+
+class WsTopTalkers:
+    """
+    Approximate heavy hitters of a stream (Misra-Gries summary) with a fixed number of counters. Every key
+    with more than n / capacity occurrences is kept, and counts are underestimated by at most n / capacity.
+    """
+
+    def __init__(self, capacity: int = 1000) -> None:
+        """
+        Constructor.
+
+        :param capacity: Number of counters.
+        """
+        self.__capacity = capacity
+        self.__counts: Dict[str, int] = {}
+
+    def add(self, key: str) -> None:
+        counts = self.__counts
+
+        if key in counts:
+            counts[key] += 1
+        elif len(counts) < self.__capacity:
+            counts[key] = 1
+        else:
+            # Decrementing every counter is amortized by the increments that built them up.
+            for name in list(counts):
+                counts[name] -= 1
+                if not counts[name]:
+                    del counts[name]
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        return sorted(self.__counts.items(), key=lambda item: (-item[1], item[0]))[:n]
+
+
+class WsRouteStats:
+    """
+    Statistics of a single route.
+    """
+
+    def __init__(self, error_messages: int = 100) -> None:
+        """
+        Constructor.
+
+        :param error_messages: Number of error messages tracked as potentially most frequent ones.
+        """
+        self.count = 0
+        self.errors = 0
+        self.statuses: Dict[str, int] = {}
+        # Error messages may contain request-specific details, hence they are counted like top talkers.
+        self.error_messages = WsTopTalkers(error_messages)
+        self.integration_latency = WsLatencyHistogram()
+        self.response_latency = WsLatencyHistogram()
+        self.response_bytes = 0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.count if self.count else 0.0
+
+    def to_dict(self, top: int) -> Dict[str, Any]:
+        return dict(
+            count=self.count,
+            errors=self.errors,
+            error_rate=round(self.error_rate, 6),
+            statuses=dict(sorted(self.statuses.items())),
+            error_messages=dict(self.error_messages.top(top)),
+            integration_latency=self.integration_latency.to_dict(),
+            response_latency=self.response_latency.to_dict(),
+            response_bytes=self.response_bytes,
+        )
+
+
+def number(value: Any) -> Optional[float]:
+    """
+    Parses a logged number. API Gateway logs "-" for values that do not apply.
+
+    :param value: Logged value.
+
+    :return: Number or None.
+    """
+    if value is None or value == '-' or value == '':
+        return None
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def open_log(path: str) -> IO[str]:
+    """
+    Opens a log file as text. Gzip files are detected by their content, not their name.
+
+    :param path: File path.
+
+    :return: Text stream.
+    """
+    with open(path, 'rb') as file:
+        compressed = file.read(2) == b'\x1f\x8b'
+
+    if compressed:
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+
+    return open(path, 'rt', encoding='utf-8', errors='replace')
+
+
+def log_files(paths: Iterable[str]) -> Iterator[str]:
+    """
+    Expands directories (e.g. an S3 export prefix synced locally) to the files in them.
+
+    :param paths: File or directory paths.
+
+    :return: Generator of file paths in a stable order.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for directory, directories, files in os.walk(path):
+            directories.sort()
+            for name in sorted(files):
+                yield os.path.join(directory, name)
+
+
+class WsAccessLogAnalyzer:
+    """
+    Streams access logs of a stage, e.g. exported from CloudWatch Logs to S3 (gzip, one record per line, each
+    prefixed with its timestamp) or plain JSON lines, and aggregates per-route latency histograms, status and
+    error counts and the connections sending the most messages. Memory stays constant regardless of the log
+    size.
+
+    Latencies require the extended format (WsStage(..., extended_access_log=True)). Logs of the default
+    format still give counts, statuses and top talkers.
+    """
+
+    def __init__(self, top_talkers: int = 1000) -> None:
+        """
+        Constructor.
+
+        :param top_talkers: Number of connections tracked as potential top talkers.
+        """
+        self.__routes: Dict[str, WsRouteStats] = {}
+        self.__talkers = WsTopTalkers(top_talkers)
+        self.lines = 0
+        self.records = 0
+        self.malformed = 0
+
+    @property
+    def routes(self) -> Dict[str, WsRouteStats]:
+        return self.__routes
+
+    def add_files(self, paths: Iterable[str]) -> 'WsAccessLogAnalyzer':
+        """
+        Analyzes log files.
+
+        :param paths: File or directory paths.
+
+        :return: The analyzer.
+        """
+        for path in log_files(paths):
+            with open_log(path) as lines:
+                self.add_lines(lines)
+
+        return self
+
+    def add_lines(self, lines: Iterable[str]) -> 'WsAccessLogAnalyzer':
+        """
+        Analyzes log lines.
+
+        :param lines: Log lines (consumed lazily).
+
+        :return: The analyzer.
+        """
+        for line in lines:
+            self.lines += 1
+
+            line = line.strip()
+            if not line:
+                continue
+
+            # Exported records are prefixed with their timestamp.
+            start = line.find('{')
+            try:
+                record = json.loads(line[start:]) if start >= 0 else None
+            except ValueError:
+                record = None
+
+            if not isinstance(record, dict):
+                self.malformed += 1
+                continue
+
+            self.add_record(record)
+
+        return self
+
+    def add_record(self, record: Dict[str, Any]) -> None:
+        """
+        Adds a single parsed access log record.
+
+        :param record: Record.
+
+        :return: No return.
+        """
+        self.records += 1
+
+        route_key = record.get('routeKey') or '-'
+        stats = self.__routes.get(route_key)
+        if stats is None:
+            stats = self.__routes[route_key] = WsRouteStats()
+
+        stats.count += 1
+
+        status = str(record.get('status', '-'))
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+
+        error = record.get('error')
+        error = None if error in (None, '-', '') else str(error)
+
+        status_code = number(status)
+        if error or (status_code is not None and status_code >= 400):
+            stats.errors += 1
+            if error:
+                stats.error_messages.add(error)
+
+        integration_latency = number(record.get('integrationLatency'))
+        if integration_latency is not None:
+            stats.integration_latency.add(integration_latency)
+
+        response_latency = number(record.get('responseLatency'))
+        if response_latency is not None:
+            stats.response_latency.add(response_latency)
+
+        response_length = number(record.get('responseLength'))
+        if response_length is not None:
+            stats.response_bytes += int(response_length)
+
+        connection_id = record.get('connectionId')
+        if connection_id and connection_id != '-':
+            self.__talkers.add(connection_id)
+
+    def report(self, top: int = 10) -> Dict[str, Any]:
+        """
+        Summarizes the analyzed logs.
+
+        :param top: Number of top talkers and error messages per route to report.
+
+        :return: JSON-serializable report.
+        """
+        return dict(
+            lines=self.lines,
+            records=self.records,
+            malformed=self.malformed,
+            routes={
+                route_key: stats.to_dict(top)
+                for route_key, stats in sorted(self.__routes.items(), key=lambda item: -item[1].count)
+            },
+            top_talkers=[dict(connectionId=key, messages=count) for key, count in self.__talkers.top(top)],
+        )
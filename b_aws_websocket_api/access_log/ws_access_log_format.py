@@ -0,0 +1,45 @@
+import json
+from typing import Dict
+
+# Format of access logs created with WsStage(create_default_access_log_settings=True).
+DEFAULT_ACCESS_LOG_FORMAT = (
+    "{"
+    "\"requestId\":\"$context.requestId\", "
+    "\"ip\": \"$context.identity.sourceIp\", "
+    "\"caller\":\"$context.identity.caller\", "
+    "\"user\":\"$context.identity.user\","
+    "\"requestTime\":\"$context.requestTime\", "
+    "\"eventType\":\"$context.eventType\","
+    "\"routeKey\":\"$context.routeKey\", "
+    "\"status\":\"$context.status\","
+    "\"connectionId\":\"$context.connectionId\""
+    "}"
+)
+
+# Fields of the extended format. Values are quoted, because API Gateway logs "-" for values that do not apply,
+# e.g. latencies of $disconnect. The error message is logged with messageString, which is quoted and escaped.
+EXTENDED_ACCESS_LOG_FIELDS: Dict[str, str] = {
+    'requestId': '"$context.requestId"',
+    'extendedRequestId': '"$context.extendedRequestId"',
+    'requestTimeEpoch': '"$context.requestTimeEpoch"',
+    'ip': '"$context.identity.sourceIp"',
+    'eventType': '"$context.eventType"',
+    'routeKey': '"$context.routeKey"',
+    'status': '"$context.status"',
+    'connectionId': '"$context.connectionId"',
+    'connectedAt': '"$context.connectedAt"',
+    'messageId': '"$context.messageId"',
+    'integrationLatency': '"$context.integrationLatency"',
+    'integrationStatus': '"$context.integration.status"',
+    'responseLatency': '"$context.responseLatency"',
+    'responseLength': '"$context.responseLength"',
+    'principalId': '"$context.authorizer.principalId"',
+    'error': '$context.error.messageString',
+    'errorType': '"$context.error.responseType"',
+    'integrationError': '"$context.integration.error"',
+}
+
+# Format of access logs created with WsStage(create_default_access_log_settings=True, extended_access_log=True).
+EXTENDED_ACCESS_LOG_FORMAT = '{' + ','.join(
+    f'{json.dumps(name)}:{value}' for name, value in EXTENDED_ACCESS_LOG_FIELDS.items()
+) + '}'
@@ -0,0 +1,44 @@
+"""
+Runs a websocket API of a synthesized stack locally.
+
+Usage: python -m b_aws_websocket_api.emulator cdk.out [--stack NAME] [--port 8080] [--management-port 8081]
+"""
+import argparse
+import asyncio
+import logging
+
+from b_aws_websocket_api.emulator.ws_emulator import WsEmulator
+from b_aws_websocket_api.emulator.ws_template import WsTemplate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Local websocket API emulator.')
+    parser.add_argument('path', help='Template file or cloud assembly directory (cdk.out).')
+    parser.add_argument('--stack', default=None, help='Stack name if the cloud assembly has several stacks.')
+    parser.add_argument('--api', default=None, help='Logical id of the API if the stack has several.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--management-port', type=int, default=8081)
+    parser.add_argument('--stage', default='local')
+    parser.add_argument('--processes', type=int, default=0, help='Invoke functions in process pools of this size.')
+    arguments = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    emulator = WsEmulator(
+        template=WsTemplate.from_path(arguments.path, arguments.stack, arguments.api),
+        host=arguments.host,
+        port=arguments.port,
+        management_port=arguments.management_port,
+        stage=arguments.stage,
+        process_pool_workers=arguments.processes,
+    )
+
+    try:
+        asyncio.run(emulator.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
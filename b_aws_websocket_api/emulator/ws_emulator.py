@@ -0,0 +1,442 @@
+import asyncio
+import base64
+import http
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import websockets
+from websockets.server import WebSocketServerProtocol
+
+from b_aws_websocket_api.emulator.ws_function_loader import (
+    apply_environment,
+    invoke_function,
+    restore_environment,
+    WsLambdaContext,
+)
+from b_aws_websocket_api.emulator.ws_template import WsTemplate, WsRouteSpec
+from b_aws_websocket_api.runtime.ws_fanout import CONNECTIONS_URL_ENV
+from b_aws_websocket_api.runtime.ws_route_selection import compile_selection_expression
+
+logger = logging.getLogger(__name__)
+
+WsRouteHandler = Callable[[Dict[str, Any], Any], Any]
+
+
+class _WsConnection:
+    def __init__(self, connection_id: str, source_ip: str, user_agent: str) -> None:
+        self.connection_id = connection_id
+        self.source_ip = source_ip
+        self.user_agent = user_agent
+        self.connected_at = time.time()
+        self.last_active_at = self.connected_at
+        self.socket: Optional[WebSocketServerProtocol] = None
+
+
+class WsEmulator:
+    """
+    Local asyncio emulator of an API Gateway websocket API read from a synthesized stack.
+
+    Frames are routed with the API route selection expression to the functions behind the routes,
+    which are invoked in-process (thread pool) or in process pools. The @connections management
+    API (POST, GET, DELETE) is served on a separate http port.
+
+    Functions invoked in-process share the environment of the emulator process, hence their environments
+    must not conflict. Functions with different values of the same variable need process pools, one per
+    distinct environment.
+    """
+
+    def __init__(
+            self,
+            template: WsTemplate,
+            host: str = '127.0.0.1',
+            port: int = 0,
+            management_port: int = 0,
+            stage: str = 'local',
+            handlers: Optional[Dict[str, WsRouteHandler]] = None,
+            environment: Optional[Dict[str, str]] = None,
+            process_pool_workers: int = 0,
+            thread_pool_workers: int = 64
+    ) -> None:
+        """
+        Constructor.
+
+        :param template: Synthesized websocket API.
+        :param host: Interface to listen on.
+        :param port: Websocket port. A free port is picked if 0.
+        :param management_port: @connections management API port. A free port is picked if 0.
+        :param stage: Stage name used in urls and events.
+        :param handlers: Route key to handler overrides, e.g. for routes with non-lambda integrations.
+        :param environment: Environment overrides for all functions. WS_CONNECTIONS_URL is set to the
+        local management API automatically.
+        :param process_pool_workers: Invoke functions in pools of this many processes (a pool per distinct function
+        environment). Functions are invoked in-process (in a thread pool) if 0.
+        :param thread_pool_workers: Size of the in-process thread pool.
+        """
+        self.__template = template
+        self.__host = host
+        self.__port = port
+        self.__management_port = management_port
+        self.__stage = stage
+        self.__handlers = handlers or {}
+        self.__environment = environment or {}
+        self.__process_pool_workers = process_pool_workers
+        self.__thread_pool_workers = thread_pool_workers
+
+        self.__routes: Dict[str, WsRouteSpec] = {route.route_key: route for route in template.routes()}
+        self.__select_route = compile_selection_expression(template.route_selection_expression)
+        self.__connections: Dict[str, _WsConnection] = {}
+
+        self.__threads: Optional[Executor] = None
+        # Function logical id to the process pool with its environment.
+        self.__processes: Dict[str, Executor] = {}
+        # Values of the emulator process environment before functions invoked in-process changed them.
+        self.__previous_environment: Dict[str, Optional[str]] = {}
+        # Frames being handled. Referenced, hence their tasks are not garbage-collected while running.
+        self.__tasks: Set[asyncio.Task] = set()
+        self.__ws_server = None
+        self.__management_server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f'ws://{self.__host}:{self.__port}'
+
+    @property
+    def connections_url(self) -> str:
+        return f'http://{self.__host}:{self.__management_port}/{self.__stage}/@connections'
+
+    @property
+    def route_keys(self):
+        return sorted(set(self.__routes) | set(self.__handlers))
+
+    @property
+    def connection_count(self) -> int:
+        return len(self.__connections)
+
+    async def __aenter__(self) -> 'WsEmulator':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        """
+        Starts the websocket and management servers.
+
+        :return: No return.
+        """
+        self.__management_server = await asyncio.start_server(
+            self.__serve_management,
+            self.__host,
+            self.__management_port,
+            backlog=1024
+        )
+        self.__management_port = self.__management_server.sockets[0].getsockname()[1]
+        self.__environment.setdefault(CONNECTIONS_URL_ENV, self.connections_url)
+
+        self.__threads = ThreadPoolExecutor(self.__thread_pool_workers)
+
+        try:
+            self.__start_functions()
+        except ValueError:
+            await self.stop()
+            raise
+
+        emulator = self
+
+        class Protocol(WebSocketServerProtocol):
+            async def process_request(self, path: str, request_headers: Any) -> Optional[Tuple]:
+                return await emulator._handshake(self, path, request_headers)
+
+        self.__ws_server = await websockets.serve(
+            self.__serve_socket,
+            self.__host,
+            self.__port,
+            create_protocol=Protocol,
+            backlog=1024,
+        )
+        self.__port = next(iter(self.__ws_server.sockets)).getsockname()[1]
+
+        logger.info(f'Emulating {self.__template.name} on {self.url}, management API on {self.connections_url}.')
+
+    async def stop(self) -> None:
+        """
+        Closes all connections, stops the servers and restores the environment of the emulator process.
+
+        :return: No return.
+        """
+        if self.__ws_server:
+            self.__ws_server.close()
+            await self.__ws_server.wait_closed()
+
+        if self.__management_server:
+            self.__management_server.close()
+            await self.__management_server.wait_closed()
+
+        for task in list(self.__tasks):
+            task.cancel()
+
+        for executor in [self.__threads, *set(self.__processes.values())]:
+            if executor:
+                executor.shutdown(wait=False)
+
+        self.__processes = {}
+
+        restore_environment(self.__previous_environment)
+        self.__previous_environment = {}
+
+    def __start_functions(self) -> None:
+        functions = {route.function.logical_id: route.function for route in self.__routes.values() if route.function}
+        environments = {
+            logical_id: {key: str(value) for key, value in {**spec.environment, **self.__environment}.items()}
+            for logical_id, spec in functions.items()
+        }
+
+        if self.__process_pool_workers:
+            pools: Dict[Tuple, Executor] = {}
+
+            for logical_id, environment in environments.items():
+                key = tuple(sorted(environment.items()))
+                if key not in pools:
+                    pools[key] = ProcessPoolExecutor(
+                        self.__process_pool_workers,
+                        initializer=apply_environment,
+                        initargs=(environment,),
+                    )
+                self.__processes[logical_id] = pools[key]
+
+            return
+
+        merged: Dict[str, str] = {}
+        owners: Dict[str, str] = {}
+        conflicts: List[str] = []
+
+        for logical_id, environment in environments.items():
+            for key, value in environment.items():
+                if key in merged and merged[key] != value:
+                    conflicts.append(f'{key} ({owners[key]}, {logical_id})')
+                merged.setdefault(key, value)
+                owners.setdefault(key, logical_id)
+
+        if conflicts:
+            raise ValueError(
+                f'Functions set different values of {", ".join(conflicts)} and can not share the emulator process. '
+                f'Invoke them in processes with process_pool_workers > 0.'
+            )
+
+        self.__previous_environment = apply_environment(merged)
+
+    async def serve_forever(self) -> None:
+        async with self:
+            await asyncio.Future()
+
+    async def _handshake(self, socket: WebSocketServerProtocol, path: str, headers: Any) -> Optional[Tuple]:
+        connection = _WsConnection(
+            connection_id=base64.b64encode(os.urandom(11)).decode('ascii'),
+            source_ip=(socket.remote_address or ('127.0.0.1',))[0],
+            user_agent=headers.get('User-Agent', ''),
+        )
+
+        event = self.__event(connection, '$connect', 'CONNECT')
+        event['headers'] = {key: value for key, value in headers.raw_items()}
+        event['queryStringParameters'] = dict(parse_qsl(urlsplit(path).query)) or None
+
+        try:
+            result = await self.__invoke('$connect', event)
+        except Exception:
+            logger.exception('$connect handler failed.')
+            return http.HTTPStatus.INTERNAL_SERVER_ERROR, [], b'Internal server error'
+
+        status = result.get('statusCode', 200) if isinstance(result, dict) else 200
+        if not 200 <= int(status) < 300:
+            return http.HTTPStatus(int(status)), [], b''
+
+        socket.ws_connection = connection
+        self.__connections[connection.connection_id] = connection
+
+        return None
+
+    async def __serve_socket(self, socket: WebSocketServerProtocol, *args) -> None:
+        connection: _WsConnection = socket.ws_connection
+        connection.socket = socket
+
+        try:
+            async for frame in socket:
+                connection.last_active_at = time.time()
+                task = asyncio.ensure_future(self.__on_frame(connection, frame))
+                self.__tasks.add(task)
+                task.add_done_callback(self.__tasks.discard)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.__connections.pop(connection.connection_id, None)
+            try:
+                await self.__invoke('$disconnect', self.__event(connection, '$disconnect', 'DISCONNECT'))
+            except Exception:
+                logger.exception('$disconnect handler failed.')
+
+    async def __on_frame(self, connection: _WsConnection, frame: Any) -> None:
+        if isinstance(frame, bytes):
+            route_key = None
+            body, is_base64 = base64.b64encode(frame).decode('ascii'), True
+        else:
+            route_key = self.__select_route(frame)
+            body, is_base64 = frame, False
+
+            # Like API Gateway, never select $connect, $disconnect or $default for a message.
+            if route_key is not None and route_key.startswith('$'):
+                route_key = None
+
+        if route_key not in self.__routes and route_key not in self.__handlers:
+            route_key = '$default'
+
+        event = self.__event(connection, route_key, 'MESSAGE')
+        event['body'] = body
+        event['isBase64Encoded'] = is_base64
+        event['requestContext']['messageId'] = str(uuid.uuid4())
+
+        if route_key not in self.__routes and route_key not in self.__handlers:
+            await self.__send(connection, json.dumps(dict(
+                message='Forbidden',
+                connectionId=connection.connection_id,
+                requestId=event['requestContext']['requestId'],
+            )))
+            return
+
+        try:
+            result = await self.__invoke(route_key, event)
+        except Exception:
+            logger.exception(f'{route_key} handler failed.')
+            await self.__send(connection, json.dumps(dict(
+                message='Internal server error',
+                connectionId=connection.connection_id,
+                requestId=event['requestContext']['requestId'],
+            )))
+            return
+
+        route = self.__routes.get(route_key)
+        two_way = route.has_route_response if route else True
+
+        if two_way and isinstance(result, dict) and result.get('body') is not None:
+            body = result['body']
+            if result.get('isBase64Encoded'):
+                body = base64.b64decode(body)
+            await self.__send(connection, body)
+
+    async def __invoke(self, route_key: str, event: Dict[str, Any]) -> Any:
+        loop = asyncio.get_running_loop()
+
+        if route_key in self.__handlers:
+            context = WsLambdaContext(route_key)
+            return await loop.run_in_executor(self.__threads, self.__handlers[route_key], event, context)
+
+        route = self.__routes.get(route_key)
+        if not route:
+            return None
+
+        if not route.function:
+            logger.warning(f'Route {route_key} has a {route.integration_type} integration which is not emulated.')
+            return None
+
+        executor = self.__processes.get(route.function.logical_id, self.__threads)
+
+        return await loop.run_in_executor(executor, invoke_function, route.function, event)
+
+    async def __send(self, connection: _WsConnection, data: Any) -> bool:
+        if not connection.socket:
+            return False
+
+        try:
+            await connection.socket.send(data)
+            return True
+        except websockets.ConnectionClosed:
+            return False
+
+    def __event(self, connection: _WsConnection, route_key: str, event_type: str) -> Dict[str, Any]:
+        now = time.time()
+
+        return dict(
+            requestContext=dict(
+                routeKey=route_key,
+                eventType=event_type,
+                messageDirection='IN',
+                stage=self.__stage,
+                connectedAt=int(connection.connected_at * 1000),
+                requestTimeEpoch=int(now * 1000),
+                requestTime=time.strftime('%d/%b/%Y:%H:%M:%S +0000', time.gmtime(now)),
+                requestId=str(uuid.uuid4()),
+                extendedRequestId=str(uuid.uuid4()),
+                identity=dict(sourceIp=connection.source_ip, userAgent=connection.user_agent),
+                domainName=f'{self.__host}:{self.__management_port}',
+                apiId='local',
+                connectionId=connection.connection_id,
+            ),
+            isBase64Encoded=False,
+        )
+
+    async def __serve_management(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get('content-length', '0')))
+                status, payload = await self.__manage(method, unquote(urlsplit(target).path), body)
+
+                writer.write(
+                    f'HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\n'
+                    f'content-type: application/json\r\n'
+                    f'content-length: {len(payload)}\r\n\r\n'.encode('latin-1') + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def __manage(self, method: str, path: str, body: bytes) -> Tuple[int, bytes]:
+        prefix = f'/{self.__stage}/@connections/'
+        if not path.startswith(prefix):
+            return 404, b'{"message": "Not Found"}'
+
+        connection = self.__connections.get(path[len(prefix):])
+        if not connection:
+            return 410, b'{"message": "Gone"}'
+
+        if method == 'POST':
+            try:
+                data: Any = body.decode('utf-8')
+            except UnicodeDecodeError:
+                data = body
+            return (200, b'') if await self.__send(connection, data) else (410, b'{"message": "Gone"}')
+
+        if method == 'GET':
+            return 200, json.dumps(dict(
+                connectedAt=time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(connection.connected_at)),
+                lastActiveAt=time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(connection.last_active_at)),
+                identity=dict(sourceIp=connection.source_ip, userAgent=connection.user_agent),
+            )).encode('utf-8')
+
+        if method == 'DELETE':
+            if connection.socket:
+                await connection.socket.close()
+            return 204, b''
+
+        return 405, b'{"message": "Method Not Allowed"}'
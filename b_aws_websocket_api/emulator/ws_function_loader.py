@@ -0,0 +1,120 @@
+import importlib
+import importlib.util
+import os
+import sys
+import time
+import types
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from b_aws_websocket_api.emulator.ws_template import WsFunctionSpec
+
+# Loaded handlers of the current process (each process pool worker keeps its own).
+_handlers: Dict[str, Callable[[Dict[str, Any], Any], Any]] = {}
+
+
+class WsLambdaContext:
+    """
+    Minimal stand-in of the lambda context object.
+    """
+
+    def __init__(self, function_name: str, timeout_seconds: float = 30.0) -> None:
+        """
+        Constructor.
+
+        :param function_name: Function name.
+        :param timeout_seconds: Function timeout used by get_remaining_time_in_millis().
+        """
+        self.function_name = function_name
+        self.function_version = '$LATEST'
+        self.invoked_function_arn = f'arn:aws:lambda:local:000000000000:function:{function_name}'
+        self.memory_limit_in_mb = 128
+        self.aws_request_id = str(uuid.uuid4())
+        self.log_group_name = f'/aws/lambda/{function_name}'
+        self.log_stream_name = 'local'
+        self.__deadline = time.time() + timeout_seconds
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self.__deadline - time.time()) * 1000))
+
+
+def load_handler(spec: WsFunctionSpec) -> Callable[[Dict[str, Any], Any], Any]:
+    """
+    Loads (once per process) the handler of a function from its inline code or code asset.
+
+    :param spec: Function specification.
+
+    :return: Handler callable.
+    """
+    if spec.logical_id in _handlers:
+        return _handlers[spec.logical_id]
+
+    if spec.runtime and not spec.runtime.startswith('python'):
+        raise ValueError(f'Function {spec.logical_id} has a non-python runtime {spec.runtime}.')
+
+    module_path, _, function_name = spec.handler.rpartition('.')
+
+    if spec.inline_code is not None:
+        module = types.ModuleType(f'ws_emulated_{spec.logical_id}')
+        exec(compile(spec.inline_code, f'<{spec.logical_id}>', 'exec'), module.__dict__)
+    elif spec.asset_path:
+        if spec.asset_path not in sys.path:
+            sys.path.insert(0, spec.asset_path)
+
+        if '.' in module_path:
+            module = importlib.import_module(module_path)
+        else:
+            # Top level modules (e.g. "index") of different assets would clash by name, hence load them by path.
+            file_path = os.path.join(spec.asset_path, f'{module_path}.py')
+            module_spec = importlib.util.spec_from_file_location(f'ws_emulated_{spec.logical_id}', file_path)
+            module = importlib.util.module_from_spec(module_spec)
+            module_spec.loader.exec_module(module)
+    else:
+        raise ValueError(f'Function {spec.logical_id} has neither inline code nor a code asset.')
+
+    _handlers[spec.logical_id] = getattr(module, function_name)
+
+    return _handlers[spec.logical_id]
+
+
+def apply_environment(environment: Dict[str, str]) -> Dict[str, Optional[str]]:
+    """
+    Sets the environment of the functions of the current process. Module level, hence usable as a process pool
+    initializer.
+
+    :param environment: Environment variables.
+
+    :return: Previous values of the variables (None if unset), e.g. for restore_environment().
+    """
+    previous = {key: os.environ.get(key) for key in environment}
+    os.environ.update(environment)
+
+    return previous
+
+
+def restore_environment(previous: Dict[str, Optional[str]]) -> None:
+    """
+    Restores variables changed by apply_environment().
+
+    :param previous: Previous values of the variables (None if unset).
+
+    :return: No return.
+    """
+    for key, value in previous.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+
+
+def invoke_function(spec: WsFunctionSpec, event: Dict[str, Any]) -> Any:
+    """
+    Invokes a function in the current process. Module level, hence usable with a process pool.
+    The function environment has to be applied to the process beforehand (see apply_environment()).
+
+    :param spec: Function specification.
+    :param event: Lambda event.
+
+    :return: Handler result.
+    """
+    return load_handler(spec)(event, WsLambdaContext(spec.logical_id))
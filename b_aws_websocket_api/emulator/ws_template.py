@@ -0,0 +1,235 @@
+import glob
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class WsFunctionSpec:
+    """
+    Everything needed to load a lambda function of a synthesized stack locally.
+    """
+
+    def __init__(
+            self,
+            logical_id: str,
+            handler: str,
+            runtime: Optional[str],
+            inline_code: Optional[str] = None,
+            asset_path: Optional[str] = None,
+            environment: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param logical_id: Logical id of the function resource.
+        :param handler: Handler string, e.g. index.handler.
+        :param runtime: Lambda runtime identifier.
+        :param inline_code: Inline (ZipFile) source code.
+        :param asset_path: Absolute path of the code asset directory.
+        :param environment: Environment variables. Unresolvable CloudFormation tokens are left out.
+        """
+        self.logical_id = logical_id
+        self.handler = handler
+        self.runtime = runtime
+        self.inline_code = inline_code
+        self.asset_path = asset_path
+        self.environment = environment or {}
+
+
+class WsRouteSpec:
+    """
+    A route of a synthesized websocket API.
+    """
+
+    def __init__(
+            self,
+            route_key: str,
+            integration_type: Optional[str],
+            function: Optional[WsFunctionSpec],
+            has_route_response: bool
+    ) -> None:
+        """
+        Constructor.
+
+        :param route_key: Route key.
+        :param integration_type: Integration type, e.g. AWS_PROXY.
+        :param function: Lambda function behind a proxy integration.
+        :param has_route_response: Whether integration responses are returned to the client (two-way route).
+        """
+        self.route_key = route_key
+        self.integration_type = integration_type
+        self.function = function
+        self.has_route_response = has_route_response
+
+
+class WsTemplate:
+    """
+    Reads a websocket API (WsApi, WsRoute, WsLambdaIntegration, WsFunction resources)
+    from a synthesized CloudFormation template.
+    """
+
+    def __init__(
+            self,
+            template: Dict[str, Any],
+            asset_root: Optional[str] = None,
+            api_logical_id: Optional[str] = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param template: Parsed CloudFormation template.
+        :param asset_root: Directory asset paths are relative to (usually cdk.out).
+        :param api_logical_id: Logical id of the API if the template contains several.
+        """
+        self.__resources: Dict[str, Dict[str, Any]] = template.get('Resources', {})
+        self.__asset_root = asset_root
+
+        apis = [logical_id for logical_id, _ in self.__of_type('AWS::ApiGatewayV2::Api')]
+
+        if api_logical_id is None:
+            if len(apis) != 1:
+                raise ValueError(f'Expected exactly one websocket API in the template, found {apis}.')
+            api_logical_id = apis[0]
+
+        self.__api_logical_id = api_logical_id
+        self.__api = self.__resources[api_logical_id]['Properties']
+
+    @classmethod
+    def from_path(
+            cls,
+            path: str,
+            stack_name: Optional[str] = None,
+            api_logical_id: Optional[str] = None
+    ) -> 'WsTemplate':
+        """
+        Loads a template from a template file or a cloud assembly directory (cdk.out).
+
+        :param path: Template file or cloud assembly directory.
+        :param stack_name: Stack to pick from a cloud assembly with several stacks.
+        :param api_logical_id: Logical id of the API if the template contains several.
+
+        :return: Template.
+        """
+        if os.path.isdir(path):
+            candidates = sorted(glob.glob(os.path.join(path, '*.template.json')))
+            if stack_name:
+                candidates = [
+                    item for item in candidates
+                    if os.path.basename(item) == f'{stack_name}.template.json'
+                ]
+            if len(candidates) != 1:
+                raise ValueError(f'Expected exactly one template in {path}, found {candidates}.')
+            path = candidates[0]
+
+        with open(path) as file:
+            template = json.load(file)
+
+        return cls(template, os.path.dirname(os.path.abspath(path)), api_logical_id)
+
+    @property
+    def name(self) -> str:
+        return self.__api.get('Name') or self.__api_logical_id
+
+    @property
+    def route_selection_expression(self) -> str:
+        return self.__api.get('RouteSelectionExpression', '$request.body.action')
+
+    def routes(self) -> List[WsRouteSpec]:
+        """
+        Lists routes of the API.
+
+        :return: Route specifications.
+        """
+        route_responses = {
+            self.__first_ref(properties.get('RouteId'))
+            for _, properties in self.__of_type('AWS::ApiGatewayV2::RouteResponse')
+        }
+
+        routes = []
+
+        for logical_id, properties in self.__of_type('AWS::ApiGatewayV2::Route'):
+            if self.__first_ref(properties.get('ApiId')) != self.__api_logical_id:
+                continue
+
+            integration_type, function = None, None
+
+            integration_id = self.__first_ref(properties.get('Target'), 'AWS::ApiGatewayV2::Integration')
+            if integration_id:
+                integration = self.__resources[integration_id]['Properties']
+                integration_type = integration.get('IntegrationType')
+                function_id = self.__resolve_function(integration.get('IntegrationUri'))
+                if function_id:
+                    function = self.function(function_id)
+
+            routes.append(WsRouteSpec(
+                route_key=properties['RouteKey'],
+                integration_type=integration_type,
+                function=function,
+                has_route_response=logical_id in route_responses,
+            ))
+
+        return routes
+
+    def function(self, logical_id: str) -> WsFunctionSpec:
+        """
+        Reads a lambda function resource.
+
+        :param logical_id: Logical id of the function.
+
+        :return: Function specification.
+        """
+        resource = self.__resources[logical_id]
+        properties = resource['Properties']
+        code = properties.get('Code', {})
+
+        asset_path = (resource.get('Metadata') or {}).get('aws:asset:path')
+        if asset_path and self.__asset_root and not os.path.isabs(asset_path):
+            asset_path = os.path.join(self.__asset_root, asset_path)
+
+        variables = (properties.get('Environment') or {}).get('Variables') or {}
+
+        return WsFunctionSpec(
+            logical_id=logical_id,
+            handler=properties['Handler'],
+            runtime=properties.get('Runtime'),
+            inline_code=code.get('ZipFile') if isinstance(code.get('ZipFile'), str) else None,
+            asset_path=asset_path,
+            environment={key: value for key, value in variables.items() if isinstance(value, str)},
+        )
+
+    def __of_type(self, resource_type: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for logical_id, resource in self.__resources.items():
+            if resource.get('Type') == resource_type:
+                yield logical_id, resource.get('Properties', {})
+
+    def __resolve_function(self, value: Any) -> Optional[str]:
+        # Integration uris point either to a function or to an alias/version of a function.
+        for logical_id in self.__refs(value):
+            resource_type = self.__resources.get(logical_id, {}).get('Type')
+            if resource_type == 'AWS::Lambda::Function':
+                return logical_id
+            if resource_type in ('AWS::Lambda::Alias', 'AWS::Lambda::Version'):
+                return self.__resolve_function(self.__resources[logical_id]['Properties'].get('FunctionName'))
+
+        return None
+
+    def __first_ref(self, value: Any, resource_type: Optional[str] = None) -> Optional[str]:
+        for logical_id in self.__refs(value):
+            if resource_type is None or self.__resources.get(logical_id, {}).get('Type') == resource_type:
+                return logical_id
+
+        return None
+
+    def __refs(self, value: Any) -> Iterator[str]:
+        if isinstance(value, dict):
+            if 'Ref' in value and isinstance(value['Ref'], str):
+                yield value['Ref']
+            elif 'Fn::GetAtt' in value:
+                attribute = value['Fn::GetAtt']
+                yield attribute[0] if isinstance(attribute, list) else attribute.split('.')[0]
+            else:
+                for item in value.values():
+                    yield from self.__refs(item)
+        elif isinstance(value, list):
+            for item in value:
+                yield from self.__refs(item)
@@ -0,0 +1,27 @@
+from typing import Any, Dict, Optional
+
+from b_aws_websocket_api.runtime.ws_authorizer import WsTokenAuthorizer
+
+# Created once per container, hence keys and decisions are cached across warm invocations.
+_authorizer: Optional[WsTokenAuthorizer] = None
+
+
+def get_authorizer() -> WsTokenAuthorizer:
+    global _authorizer
+
+    if _authorizer is None:
+        _authorizer = WsTokenAuthorizer.from_environment()
+
+    return _authorizer
+
+
+def authorize(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """
+    $connect authorizer handler. Verifies the token of the request.
+
+    :param event: Raw authorizer event.
+    :param context: Lambda context.
+
+    :return: Authorizer response with an IAM policy.
+    """
+    return get_authorizer().authorize(event, context)
@@ -0,0 +1,115 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+from b_aws_websocket_api.runtime import ws_subscription_index_client, ws_codec
+from b_aws_websocket_api.runtime.ws_connection_cache import WsConnectionCache
+from b_aws_websocket_api.runtime.ws_connection_registry_client import WsConnectionRegistryClient, CODECS_ENV
+from b_aws_websocket_api.runtime.ws_event import WsEvent
+from b_aws_websocket_api.runtime.ws_subscription_index_client import WsSubscriptionIndexClient
+
+# Created once per container and reused by warm invocations.
+_registry: Optional[WsConnectionRegistryClient] = None
+_subscription_index: Optional[WsSubscriptionIndexClient] = None
+_connection_cache: Optional[WsConnectionCache] = None
+
+
+def get_registry() -> WsConnectionRegistryClient:
+    global _registry
+
+    if _registry is None:
+        _registry = WsConnectionRegistryClient()
+
+    return _registry
+
+
+def get_subscription_index() -> Optional[WsSubscriptionIndexClient]:
+    global _subscription_index
+
+    if _subscription_index is None and os.environ.get(ws_subscription_index_client.TABLE_NAME_ENV):
+        _subscription_index = WsSubscriptionIndexClient()
+
+    return _subscription_index
+
+
+def get_connection_cache() -> WsConnectionCache:
+    """
+    Metadata cache of registered connections for message handlers of the same function, e.g. behind a WsRouter.
+
+    :return: Cache.
+    """
+    global _connection_cache
+
+    if _connection_cache is None:
+        _connection_cache = WsConnectionCache(get_registry(), get_subscription_index())
+
+    return _connection_cache
+
+
+def connect(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """
+    $connect route handler. Negotiates the codec of the connection and registers it.
+
+    :param event: Raw Lambda event.
+    :param context: Lambda context.
+
+    :return: Lambda proxy response.
+    """
+    ws_event = WsEvent(event)
+    attributes: Dict[str, Any] = {}
+    response: Dict[str, Any] = dict(statusCode=200)
+
+    # Offered subprotocols must be answered with one of them, hence they take precedence over the query string.
+    headers = {name.lower(): value for name, value in ws_event.headers.items()}
+    protocols = headers.get(ws_codec.CODEC_HEADER.lower())
+    supported = os.environ.get(CODECS_ENV)
+
+    codec = ws_codec.negotiate(
+        protocols or ws_event.query_parameters.get(ws_codec.CODEC_QUERY_PARAMETER),
+        supported.split(',') if supported else None,
+    )
+
+    if codec is None:
+        return dict(statusCode=400, body=json.dumps(dict(message='None of the requested codecs is supported.')))
+
+    attributes[ws_codec.CODEC_ATTRIBUTE] = codec.name
+    if protocols:
+        response['headers'] = {ws_codec.CODEC_HEADER: codec.name}
+
+    if ws_event.request_time_epoch:
+        attributes['connectedAt'] = ws_event.request_time_epoch // 1000
+
+    principal_id = (ws_event.request_context.get('authorizer') or {}).get('principalId')
+    if principal_id:
+        attributes['principalId'] = principal_id
+
+    source_ip = (ws_event.request_context.get('identity') or {}).get('sourceIp')
+    if source_ip:
+        attributes['sourceIp'] = source_ip
+
+    get_registry().register(ws_event.connection_id, attributes)
+
+    return response
+
+
+def disconnect(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """
+    $disconnect route handler. Removes the connection and its topic subscriptions.
+
+    :param event: Raw Lambda event.
+    :param context: Lambda context.
+
+    :return: Lambda proxy response.
+    """
+    connection_id = WsEvent(event).connection_id
+
+    get_registry().unregister(connection_id)
+
+    if _connection_cache is not None:
+        _connection_cache.invalidate(connection_id)
+
+    subscription_index = get_subscription_index()
+    if subscription_index:
+        subscription_index.unsubscribe_all([connection_id])
+
+    return dict(statusCode=200)
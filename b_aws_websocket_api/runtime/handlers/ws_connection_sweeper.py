@@ -0,0 +1,38 @@
+import os
+import time
+from typing import Any, Dict, Optional
+
+from b_aws_websocket_api.runtime.ws_connection_pruner import WsConnectionPruner, MIN_AGE_SECONDS_ENV
+
+# Created once per container and reused by warm invocations.
+_pruner: Optional[WsConnectionPruner] = None
+
+# Time left to finish the current page before the function times out.
+SAFETY_MARGIN_SECONDS = 20
+
+
+def get_pruner() -> WsConnectionPruner:
+    global _pruner
+
+    if _pruner is None:
+        _pruner = WsConnectionPruner.from_environment()
+
+    return _pruner
+
+
+def sweep(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """
+    Scheduled handler. Validates old registered connections and removes the gone ones.
+
+    :param event: Scheduled event.
+    :param context: Lambda context.
+
+    :return: Sweep statistics.
+    """
+    deadline = None
+    if context is not None:
+        deadline = time.time() + context.get_remaining_time_in_millis() / 1000 - SAFETY_MARGIN_SECONDS
+
+    stats = get_pruner().sweep(min_age_seconds=int(os.environ.get(MIN_AGE_SECONDS_ENV, 600)), deadline=deadline)
+
+    return stats.to_dict()
@@ -0,0 +1,80 @@
+import os
+from typing import Any, Dict, Optional
+
+from b_aws_websocket_api.runtime import ws_connection_registry_client, ws_subscription_index_client, ws_fanout
+from b_aws_websocket_api.runtime.ws_connection_pruner import WsConnectionPruner
+from b_aws_websocket_api.runtime.ws_connection_registry_client import WsConnectionRegistryClient
+from b_aws_websocket_api.runtime.ws_fanout import WsFanoutSplitter, WsFanoutSender, WsFanoutProgress
+from b_aws_websocket_api.runtime.ws_metrics import get_metrics
+from b_aws_websocket_api.runtime.ws_subscription_index_client import WsSubscriptionIndexClient
+
+# Created once per container and reused by warm invocations.
+_splitter: Optional[WsFanoutSplitter] = None
+_sender: Optional[WsFanoutSender] = None
+
+
+def get_progress() -> Optional[WsFanoutProgress]:
+    return WsFanoutProgress() if os.environ.get(ws_fanout.PROGRESS_TABLE_ENV) else None
+
+
+def get_splitter() -> WsFanoutSplitter:
+    global _splitter
+
+    if _splitter is None:
+        registry = None
+        if os.environ.get(ws_connection_registry_client.TABLE_NAME_ENV):
+            registry = WsConnectionRegistryClient()
+
+        subscription_index = None
+        if os.environ.get(ws_subscription_index_client.TABLE_NAME_ENV):
+            subscription_index = WsSubscriptionIndexClient()
+
+        _splitter = WsFanoutSplitter(registry=registry, subscription_index=subscription_index, progress=get_progress())
+
+    return _splitter
+
+
+def get_sender() -> WsFanoutSender:
+    global _sender
+
+    if _sender is None:
+        _sender = WsFanoutSender(progress=get_progress(), pruner=WsConnectionPruner.from_environment())
+
+    return _sender
+
+
+def split(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """
+    Publish queue handler. Splits published messages into shards.
+
+    :param event: Lambda SQS event.
+    :param context: Lambda context.
+
+    :return: Number of created shards.
+    """
+    try:
+        return dict(shards=sum(get_splitter().split(message) for message in ws_fanout.records(event)))
+    finally:
+        get_metrics().flush()
+
+
+def send(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """
+    Shard queue handler. Sends shards to their connections.
+
+    :param event: Lambda SQS event.
+    :param context: Lambda context.
+
+    :return: Aggregated statistics.
+    """
+    totals = dict(sent=0, gone=0, throttled=0, failed=0, pruned=0)
+
+    try:
+        for shard in ws_fanout.records(event):
+            stats = get_sender().send(shard)
+            for key in totals:
+                totals[key] += getattr(stats, key)
+    finally:
+        get_metrics().flush()
+
+    return totals
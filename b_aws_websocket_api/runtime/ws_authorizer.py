@@ -0,0 +1,274 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from b_aws_websocket_api.runtime.ws_event import WsEvent
+from b_aws_websocket_api.runtime.ws_jwt import WsJwks, WsJwtError, WsJwtVerifier
+
+logger = logging.getLogger(__name__)
+
+ISSUER_ENV = 'WS_AUTHORIZER_ISSUER'
+AUDIENCE_ENV = 'WS_AUTHORIZER_AUDIENCE'
+JWKS_URL_ENV = 'WS_AUTHORIZER_JWKS_URL'
+JWKS_TTL_ENV = 'WS_AUTHORIZER_JWKS_TTL'
+ALGORITHMS_ENV = 'WS_AUTHORIZER_ALGORITHMS'
+CACHE_SIZE_ENV = 'WS_AUTHORIZER_CACHE_SIZE'
+CACHE_TTL_ENV = 'WS_AUTHORIZER_CACHE_TTL'
+TOKEN_QUERY_PARAMETER_ENV = 'WS_AUTHORIZER_TOKEN_QUERY_PARAMETER'
+
+
+class WsDecision:
+    """
+    Outcome of a token verification.
+    """
+
+    def __init__(
+            self,
+            allowed: bool,
+            principal_id: str,
+            context: Optional[Dict[str, Any]] = None,
+            expires_at: float = 0.0
+    ) -> None:
+        """
+        Constructor.
+
+        :param allowed: Whether the token is valid.
+        :param principal_id: Principal of the token, e.g. its sub claim.
+        :param context: Authorizer context passed to integrations (strings, numbers and booleans only).
+        :param expires_at: Epoch time in seconds until which the decision may be cached.
+        """
+        self.allowed = allowed
+        self.principal_id = principal_id
+        self.context = context or {}
+        self.expires_at = expires_at
+
+
+class WsDecisionCache:
+    """
+    In-container LRU cache of decisions keyed by the SHA-256 digest of a token, hence tokens themselves are
+    not kept in memory. Decisions of valid tokens live until the token expires or the TTL elapses, whichever
+    comes first. Denials are cached shortly, hence a client retrying an invalid token is cheap as well.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0, negative_ttl: float = 30.0) -> None:
+        """
+        Constructor.
+
+        :param max_size: Maximum number of cached decisions.
+        :param ttl: Maximum lifetime of a cached allow decision in seconds.
+        :param negative_ttl: Lifetime of a cached deny decision in seconds.
+        """
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__negative_ttl = negative_ttl
+        self.__entries: 'OrderedDict[bytes, WsDecision]' = OrderedDict()
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token: str) -> Optional[WsDecision]:
+        """
+        Looks a live decision up.
+
+        :param token: Token.
+
+        :return: Decision or None.
+        """
+        key = self.key(token)
+
+        with self.__lock:
+            decision = self.__entries.get(key)
+
+            if decision is not None and decision.expires_at > time.time():
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return decision
+
+            if decision is not None:
+                del self.__entries[key]
+
+            self.misses += 1
+
+        return None
+
+    def put(self, token: str, decision: WsDecision) -> WsDecision:
+        """
+        Caches a decision, evicting the least recently used one if the cache is full.
+
+        :param token: Token.
+        :param decision: Decision. Its expiry is capped by the TTL of the cache.
+
+        :return: The decision.
+        """
+        now = time.time()
+        ttl = self.__ttl if decision.allowed else self.__negative_ttl
+        decision.expires_at = min(decision.expires_at or now + ttl, now + ttl)
+
+        key = self.key(token)
+
+        with self.__lock:
+            self.__entries[key] = decision
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+
+        return decision
+
+
+class WsTokenAuthorizer:
+    """
+    Lambda REQUEST authorizer of the $connect route verifying JWTs from a query string parameter
+    (browsers can not set headers on websocket requests) or a bearer authorization header.
+
+    Keys and decisions are cached in the container, hence a reconnect storm after a deployment verifies
+    every distinct token once and fetches the key set once.
+    """
+
+    def __init__(
+            self,
+            verifier: WsJwtVerifier,
+            cache: Optional[WsDecisionCache] = None,
+            token_query_parameter: str = 'token',
+            principal_claim: str = 'sub',
+            context_claims: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param verifier: Token verifier.
+        :param cache: Decision cache. A default one is created if not given.
+        :param token_query_parameter: Query string parameter holding the token.
+        :param principal_claim: Claim used as the principal id.
+        :param context_claims: Claims passed to integrations as the authorizer context. All scalar claims if not
+        given.
+        """
+        self.__verifier = verifier
+        self.__cache = cache if cache is not None else WsDecisionCache()
+        self.__token_query_parameter = token_query_parameter
+        self.__principal_claim = principal_claim
+        self.__context_claims = list(context_claims) if context_claims is not None else None
+
+    @classmethod
+    def from_environment(cls) -> 'WsTokenAuthorizer':
+        """
+        Creates an authorizer configured by the WsAuthorizer construct.
+
+        :return: Authorizer.
+        """
+        audience = os.environ.get(AUDIENCE_ENV)
+
+        verifier = WsJwtVerifier(
+            issuer=os.environ.get(ISSUER_ENV),
+            audience=audience.split(',') if audience else None,
+            jwks=WsJwks(os.environ[JWKS_URL_ENV], ttl=float(os.environ.get(JWKS_TTL_ENV, 600))),
+            algorithms=os.environ.get(ALGORITHMS_ENV, 'RS256').split(','),
+        )
+
+        cache = WsDecisionCache(
+            max_size=int(os.environ.get(CACHE_SIZE_ENV, 10000)),
+            ttl=float(os.environ.get(CACHE_TTL_ENV, 300)),
+        )
+
+        return cls(verifier, cache, token_query_parameter=os.environ.get(TOKEN_QUERY_PARAMETER_ENV, 'token'))
+
+    @property
+    def cache(self) -> WsDecisionCache:
+        return self.__cache
+
+    def token(self, event: WsEvent) -> Optional[str]:
+        """
+        Extracts the token of a $connect request.
+
+        :param event: Parsed event.
+
+        :return: Token or None.
+        """
+        token = event.query_parameters.get(self.__token_query_parameter)
+        if token:
+            return token
+
+        for name, value in event.headers.items():
+            if name.lower() == 'authorization' and value[:7].lower() == 'bearer ':
+                return value[7:].strip()
+
+        return None
+
+    def decide(self, token: Optional[str]) -> WsDecision:
+        """
+        Verifies a token, or returns the cached decision of it.
+
+        :param token: Token.
+
+        :return: Decision.
+        """
+        if not token:
+            return WsDecision(False, 'anonymous')
+
+        decision = self.__cache.get(token)
+        if decision is not None:
+            return decision
+
+        try:
+            claims = self.__verifier.verify(token)
+        except WsJwtError as ex:
+            logger.info(f'Denied a token: {ex}')
+            return self.__cache.put(token, WsDecision(False, 'anonymous'))
+
+        decision = WsDecision(
+            allowed=True,
+            principal_id=str(claims.get(self.__principal_claim, 'anonymous')),
+            context=self.__context(claims),
+            expires_at=float(claims['exp']) if 'exp' in claims else 0.0,
+        )
+
+        return self.__cache.put(token, decision)
+
+    def authorize(self, event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+        """
+        Lambda handler. Answers with an IAM policy allowing or denying the connection.
+
+        :param event: Raw authorizer event.
+        :param context: Lambda context.
+
+        :return: Authorizer response.
+        """
+        decision = self.decide(self.token(WsEvent(event)))
+
+        response = dict(
+            principalId=decision.principal_id,
+            policyDocument=dict(
+                Version='2012-10-17',
+                Statement=[dict(
+                    Action='execute-api:Invoke',
+                    Effect='Allow' if decision.allowed else 'Deny',
+                    Resource=event.get('methodArn', '*'),
+                )],
+            ),
+        )
+
+        if decision.allowed:
+            response['context'] = decision.context
+
+        return response
+
+    __call__ = authorize
+
+    def __context(self, claims: Dict[str, Any]) -> Dict[str, Any]:
+        names = self.__context_claims if self.__context_claims is not None else claims.keys()
+
+        return {
+            name: claims[name] for name in names
+            if isinstance(claims.get(name), (str, int, float, bool))
+        }
@@ -0,0 +1,258 @@
+import base64
+import json
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WsFrame:
+    """
+    A single websocket frame delivered by a service integration (WsSqsIntegration, WsKinesisIntegration,
+    or WsEventBridgeIntegration through a queue) in an envelope with its connection and route.
+    """
+
+    def __init__(self, record_id: str, envelope: Dict[str, Any]) -> None:
+        """
+        Constructor.
+
+        :param record_id: Identifier of the record in the batch (SQS message id or Kinesis sequence number).
+        :param envelope: Parsed frame envelope.
+        """
+        self.__record_id = record_id
+        self.__envelope = envelope
+        self.__json = None
+
+    @property
+    def record_id(self) -> str:
+        return self.__record_id
+
+    @property
+    def connection_id(self) -> Optional[str]:
+        return self.__envelope.get('connectionId')
+
+    @property
+    def route_key(self) -> Optional[str]:
+        return self.__envelope.get('routeKey')
+
+    @property
+    def request_id(self) -> Optional[str]:
+        return self.__envelope.get('requestId')
+
+    @property
+    def request_time_epoch(self) -> Optional[int]:
+        return self.__envelope.get('requestTimeEpoch')
+
+    @property
+    def body(self) -> str:
+        """
+        Raw frame payload.
+        """
+        return self.__envelope.get('body') or ''
+
+    def json(self) -> Any:
+        """
+        Parses the frame payload as JSON. The result is cached.
+
+        :return: Parsed document.
+        """
+        if self.__json is None:
+            self.__json = json.loads(self.body)
+
+        return self.__json
+
+
+class WsFrameGroup:
+    """
+    Frames of a batch sent by a single connection to a single route, in arrival order.
+    """
+
+    def __init__(self, connection_id: Optional[str], route_key: Optional[str]) -> None:
+        """
+        Constructor.
+
+        :param connection_id: Connection that sent the frames.
+        :param route_key: Route the frames arrived through.
+        """
+        self.connection_id = connection_id
+        self.route_key = route_key
+        self.frames: List[WsFrame] = []
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __iter__(self):
+        return iter(self.frames)
+
+
+# Processes a group. May return frames that failed, all frames of the group fail if it raises.
+WsBatchHandler = Callable[[WsFrameGroup, Any], Optional[Iterable[WsFrame]]]
+
+
+def parse_record(record: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Extracts the record id and the frame envelope of an SQS or Kinesis record.
+
+    :param record: Record of a Lambda SQS or Kinesis event.
+
+    :return: Record id and parsed envelope.
+    """
+    if 'kinesis' in record:
+        record_id = record['kinesis']['sequenceNumber']
+        envelope = json.loads(base64.b64decode(record['kinesis']['data']))
+    else:
+        record_id = record['messageId']
+        envelope = json.loads(record['body'])
+
+    # Events of WsEventBridgeIntegration routed to a queue carry the envelope as their detail.
+    if isinstance(envelope, dict) and 'detail' in envelope and 'connectionId' not in envelope:
+        envelope = envelope['detail']
+
+    if not isinstance(envelope, dict):
+        raise ValueError('Record is not a frame envelope.')
+
+    return record_id, envelope
+
+
+def group_frames(frames: Iterable[WsFrame]) -> List[WsFrameGroup]:
+    """
+    Groups frames by connection and route key. Groups are ordered by their first frame.
+
+    :param frames: Frames in arrival order.
+
+    :return: Frame groups.
+    """
+    groups: Dict[Tuple[Optional[str], Optional[str]], WsFrameGroup] = {}
+
+    for frame in frames:
+        key = (frame.connection_id, frame.route_key)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = WsFrameGroup(*key)
+        group.frames.append(frame)
+
+    return list(groups.values())
+
+
+class WsBatchProcessor:
+    """
+    Processes Lambda SQS or Kinesis batches of websocket frames. Frames are grouped by connection and route key
+    and every group is handed to the handler of its route. Failed frames are reported as partial batch
+    failures, together with all later frames of their connection, hence frames of a connection are retried
+    in order.
+
+    Instances are callable with a Lambda (event, context) signature, hence a module level
+    processor can be used as a Lambda function handler directly (see WsBatchConsumer).
+    """
+
+    def __init__(self, default_handler: Optional[WsBatchHandler] = None) -> None:
+        """
+        Constructor.
+
+        :param default_handler: Handler for route keys that have no handler registered.
+        Frames without a handler fail.
+        """
+        self.__handlers: Dict[str, WsBatchHandler] = {}
+        self.__default_handler = default_handler
+
+    def route(self, route_key: str) -> Callable[[WsBatchHandler], WsBatchHandler]:
+        """
+        Decorator that registers a handler for a route key.
+
+        :param route_key: Route key.
+
+        :return: Decorator.
+        """
+        def decorator(handler: WsBatchHandler) -> WsBatchHandler:
+            self.add_route(route_key, handler)
+            return handler
+
+        return decorator
+
+    def add_route(self, route_key: str, handler: WsBatchHandler) -> None:
+        """
+        Registers a handler for a route key.
+
+        :param route_key: Route key.
+        :param handler: Callable accepting a frame group and a Lambda context.
+
+        :return: No return.
+        """
+        if route_key in self.__handlers:
+            raise ValueError(f'Handler for route {route_key} is already registered.')
+
+        self.__handlers[route_key] = handler
+
+    def process(self, event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+        """
+        Processes a raw Lambda SQS or Kinesis event.
+
+        :param event: Raw Lambda event.
+        :param context: Lambda context.
+
+        :return: Partial batch failure response.
+        """
+        failed: List[str] = []
+        frames: List[WsFrame] = []
+        # Record ids and connections in arrival order.
+        arrivals: List[Tuple[str, Optional[str]]] = []
+
+        for record in event.get('Records', []):
+            try:
+                frame = WsFrame(*parse_record(record))
+                frames.append(frame)
+                arrivals.append((frame.record_id, frame.connection_id))
+            except (KeyError, ValueError) as ex:
+                record_id = record.get('messageId') or (record.get('kinesis') or {}).get('sequenceNumber')
+                # A failure without an item identifier would fail the whole batch, hence such records are dropped.
+                if not record_id:
+                    logger.error(f'Dropped record without message id or sequence number: {repr(ex)}.')
+                    continue
+                logger.error(f'Malformed record {record_id}: {repr(ex)}.')
+                failed.append(record_id)
+                # Service integrations group and partition records by connection.
+                connection_id = (record.get('attributes') or {}).get('MessageGroupId')
+                arrivals.append((record_id, connection_id or (record.get('kinesis') or {}).get('partitionKey')))
+
+        for group in group_frames(frames):
+            handler = self.__handlers.get(group.route_key) or self.__default_handler
+
+            if handler is None:
+                logger.error(f'No handler for route {group.route_key}.')
+                failed.extend(frame.record_id for frame in group)
+                continue
+
+            try:
+                failed.extend(frame.record_id for frame in handler(group, context) or [])
+            except Exception as ex:
+                logger.exception(f'Failed to process {len(group)} frames of route {group.route_key}: {repr(ex)}.')
+                failed.extend(frame.record_id for frame in group)
+
+        failed = self.__ordered(arrivals, failed)
+
+        return dict(batchItemFailures=[dict(itemIdentifier=record_id) for record_id in failed])
+
+    @staticmethod
+    def __ordered(arrivals: List[Tuple[str, Optional[str]]], failed: List[str]) -> List[str]:
+        """
+        Extends failures to all later records of the same connection, in arrival order. Otherwise later frames
+        of a connection would be deleted and the failed frame redelivered after them, e.g. of FIFO queues.
+
+        :param arrivals: Record ids and connections in arrival order.
+        :param failed: Failed record ids.
+
+        :return: Record ids to report as failed.
+        """
+        failed_ids = set(failed)
+        blocked = set()
+        ordered = []
+
+        for record_id, connection_id in arrivals:
+            if record_id in failed_ids or (connection_id is not None and connection_id in blocked):
+                ordered.append(record_id)
+                if connection_id is not None:
+                    blocked.add(connection_id)
+
+        return ordered
+
+    __call__ = process
@@ -0,0 +1,395 @@
+import asyncio
+import math
+import random
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from b_aws_websocket_api.runtime.ws_codec import CODEC_ATTRIBUTE, DEFAULT_CODEC, get_codec
+from b_aws_websocket_api.runtime.ws_connection_pruner import WsConnectionPruner
+from b_aws_websocket_api.runtime.ws_connections_client import WsConnectionsClient
+from b_aws_websocket_api.runtime.ws_event import WsEvent
+from b_aws_websocket_api.runtime.ws_metrics import WsMetrics, get_metrics
+from b_aws_websocket_api.runtime.ws_payload import WsPayload
+from b_aws_websocket_api.runtime.ws_sigv4 import WsSigV4Signer
+from b_aws_websocket_api.runtime.ws_tracing import WsTracer, get_tracer
+
+
+class WsBroadcastStats:
+    """
+    Statistics of a single broadcast call.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor.
+        """
+        self.sent = 0
+        self.gone = 0
+        self.throttled = 0
+        self.failed = 0
+        self.gone_connection_ids: List[str] = []
+        self.failed_connection_ids: List[str] = []
+        self.latencies: List[float] = []
+        self.duration = 0.0
+        # Gone connections removed from the registry and subscription index.
+        self.pruned = 0
+
+    @property
+    def total(self) -> int:
+        return self.sent + self.gone + self.failed
+
+    @property
+    def p50(self) -> float:
+        return self.percentile(50)
+
+    @property
+    def p99(self) -> float:
+        return self.percentile(99)
+
+    def percentile(self, percent: float) -> float:
+        """
+        Calculates a latency percentile (nearest-rank method).
+
+        :param percent: Percentile in range 0-100.
+
+        :return: Latency in seconds or 0 if nothing was sent.
+        """
+        if not self.latencies:
+            return 0.0
+
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))
+
+        return ordered[index]
+
+    def merge(self, other: 'WsBroadcastStats') -> 'WsBroadcastStats':
+        """
+        Adds statistics of another broadcast to these.
+
+        :param other: Statistics to add.
+
+        :return: Self.
+        """
+        self.sent += other.sent
+        self.gone += other.gone
+        self.throttled += other.throttled
+        self.failed += other.failed
+        self.gone_connection_ids.extend(other.gone_connection_ids)
+        self.failed_connection_ids.extend(other.failed_connection_ids)
+        self.latencies.extend(other.latencies)
+        self.duration += other.duration
+        self.pruned += other.pruned
+
+        return self
+
+    def to_dict(self) -> dict:
+        return dict(
+            sent=self.sent,
+            gone=self.gone,
+            throttled=self.throttled,
+            failed=self.failed,
+            p50=self.p50,
+            p99=self.p99,
+            duration=self.duration,
+            pruned=self.pruned,
+        )
+
+
+class WsBroadcaster:
+    """
+    Sends a message to many websocket connections concurrently through the @connections management API.
+    """
+
+    def __init__(
+            self,
+            connections_url: str,
+            region: Optional[str] = None,
+            signer: Optional[WsSigV4Signer] = None,
+            max_in_flight: int = 100,
+            max_attempts: int = 5,
+            backoff_base: float = 0.05,
+            backoff_cap: float = 2.0,
+            timeout: float = 10.0,
+            pruner: Optional[WsConnectionPruner] = None,
+            tracer: Optional[WsTracer] = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param connections_url: The @connections endpoint of a stage, i.e. the value of WsStage.connections_url
+        (usually passed to a function through an environment variable).
+        :param region: AWS region. Parsed from the url if not given.
+        :param signer: Request signer. Created from the environment credentials if not given.
+        :param max_in_flight: Maximum number of concurrent requests (and pooled keep-alive connections).
+        :param max_attempts: Maximum number of attempts for a throttled send.
+        :param backoff_base: Base delay of the exponential backoff in seconds.
+        :param backoff_cap: Maximum delay of the exponential backoff in seconds.
+        :param timeout: Timeout of a single request in seconds.
+        :param pruner: Removes gone connections from the registry and subscription index after every broadcast.
+        :param tracer: Tracer of broadcasts. Defaults to the shared tracer of the container.
+        """
+        self.__connections_url = connections_url
+        self.__region = region
+        self.__signer = signer
+        self.__max_in_flight = max_in_flight
+        self.__max_attempts = max_attempts
+        self.__backoff_base = backoff_base
+        self.__backoff_cap = backoff_cap
+        self.__timeout = timeout
+        self.__pruner = pruner
+        self.__tracer = tracer
+
+    @classmethod
+    def from_event(cls, event: WsEvent, **kwargs) -> 'WsBroadcaster':
+        """
+        Creates a broadcaster for the stage that delivered the given event.
+
+        :param event: Parsed websocket event.
+        :param kwargs: Additional constructor arguments.
+
+        :return: Broadcaster.
+        """
+        return cls(connections_url=event.connections_url, **kwargs)
+
+    def broadcast(self, data: Union[bytes, str, WsPayload], connection_ids: Iterable[str]) -> WsBroadcastStats:
+        """
+        Synchronous wrapper of broadcast_async(), convenient in Lambda handlers.
+
+        :param data: Message to send. Pass a WsPayload to reuse an encoded message across broadcasts
+        or to patch per-recipient fields.
+        :param connection_ids: Target connection ids. Consumed lazily, hence generators are welcome.
+
+        :return: Broadcast statistics.
+        """
+        return asyncio.run(self.broadcast_async(data, connection_ids))
+
+    async def broadcast_async(
+            self,
+            data: Union[bytes, str, WsPayload],
+            connection_ids: Iterable[str]
+    ) -> WsBroadcastStats:
+        """
+        Sends a message to all given connections keeping at most max_in_flight requests running.
+        The message is encoded and hashed once, not once per recipient.
+
+        With tracing enabled, the broadcast is a ws.broadcast span annotated with its outcome counts. Only
+        throttled and failed requests get a ws.post_to_connection child span, hence traces of large broadcasts
+        stay small while slow ones still point at the calls that held them up.
+
+        :param data: Message to send. Pass a WsPayload to reuse an encoded message across broadcasts
+        or to patch per-recipient fields.
+        :param connection_ids: Target connection ids. Consumed lazily, hence generators are welcome.
+
+        :return: Broadcast statistics.
+        """
+        payload = data if isinstance(data, WsPayload) else WsPayload(raw=data)
+        tracer = self.__tracer or get_tracer()
+
+        with tracer.span('ws.broadcast', annotations=dict(max_in_flight=self.__max_in_flight)) as span:
+            stats = WsBroadcastStats()
+            started = time.perf_counter()
+            ids = enumerate(connection_ids)
+
+            client = WsConnectionsClient(
+                connections_url=self.__connections_url,
+                region=self.__region,
+                signer=self.__signer,
+                max_connections=self.__max_in_flight,
+                timeout=self.__timeout
+            )
+
+            # Worker tasks copy the current context, hence their request spans are children of the broadcast.
+            async with client:
+                await asyncio.gather(*[
+                    self.__worker(client, payload, ids, stats)
+                    for _ in range(self.__max_in_flight)
+                ])
+
+            if self.__pruner and stats.gone_connection_ids:
+                # Batched deletes are blocking calls, hence run them outside of the event loop.
+                loop = asyncio.get_running_loop()
+                stats.pruned = await loop.run_in_executor(None, self.__pruner.prune, stats.gone_connection_ids)
+
+            stats.duration = time.perf_counter() - started
+
+            for key in ('sent', 'gone', 'throttled', 'failed', 'pruned'):
+                span.annotate(key, getattr(stats, key))
+            span.annotate('connections', stats.total)
+            span.annotate('p99_ms', round(stats.p99 * 1000, 3))
+
+        self.record_metrics(stats)
+
+        return stats
+
+    @staticmethod
+    def record_metrics(
+            stats: WsBroadcastStats,
+            metrics: Optional[WsMetrics] = None,
+            dimensions: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Records outcome counts and send latencies of management API requests of a broadcast.
+
+        :param stats: Broadcast statistics.
+        :param metrics: Metrics to record to. Defaults to the shared metrics of the container.
+        :param dimensions: Metric dimensions, e.g. a topic.
+
+        :return: No return.
+        """
+        metrics = metrics or get_metrics()
+
+        if not metrics.enabled:
+            return
+
+        for name, value in [
+            ('ConnectionsSent', stats.sent),
+            ('ConnectionsGone', stats.gone),
+            ('ConnectionsThrottled', stats.throttled),
+            ('ConnectionsFailed', stats.failed),
+            ('ConnectionsPruned', stats.pruned),
+        ]:
+            metrics.count(name, value, dimensions)
+
+        for latency in stats.latencies:
+            metrics.record('SendLatency', latency * 1000, dimensions=dimensions)
+
+        metrics.record('BroadcastDuration', stats.duration * 1000, dimensions=dimensions)
+
+    def broadcast_document(
+            self,
+            document: Any,
+            connections: Iterable[Union[str, Dict[str, Any]]]
+    ) -> WsBroadcastStats:
+        """
+        Synchronous wrapper of broadcast_document_async(), convenient in Lambda handlers.
+
+        :param document: Document to send.
+        :param connections: Target connection ids or registry items with negotiated codecs.
+
+        :return: Broadcast statistics.
+        """
+        return asyncio.run(self.broadcast_document_async(document, connections))
+
+    async def broadcast_document_async(
+            self,
+            document: Any,
+            connections: Iterable[Union[str, Dict[str, Any]]]
+    ) -> WsBroadcastStats:
+        """
+        Sends a document to all given connections, encoded with the codec every connection negotiated
+        at $connect (see WsConnectionRegistryClient.connection_codecs). The document is encoded once per codec.
+
+        :param document: Document to send.
+        :param connections: Target connection ids (JSON) or registry items with connectionId and codec attributes.
+
+        :return: Broadcast statistics.
+        """
+        groups: Dict[str, List[str]] = {}
+
+        for connection in connections:
+            if isinstance(connection, str):
+                groups.setdefault(DEFAULT_CODEC, []).append(connection)
+            else:
+                name = connection.get(CODEC_ATTRIBUTE) or DEFAULT_CODEC
+                groups.setdefault(name, []).append(connection['connectionId'])
+
+        stats = WsBroadcastStats()
+
+        # Groups are sent one after another, hence at most max_in_flight requests run at any time.
+        for name, connection_ids in groups.items():
+            payload = WsPayload(document, codec=get_codec(name))
+            stats.merge(await self.broadcast_async(payload, connection_ids))
+
+        return stats
+
+    async def __worker(
+            self,
+            client: WsConnectionsClient,
+            payload: WsPayload,
+            ids: Iterator[Tuple[int, str]],
+            stats: WsBroadcastStats
+    ) -> None:
+        # Workers share a single iterator which is safe since there is no await between next() calls.
+        for sequence, connection_id in ids:
+            data = payload.for_recipient(connection_id, sequence)
+            await self.__send(client, data, payload.digest, connection_id, stats)
+
+    async def __send(
+            self,
+            client: WsConnectionsClient,
+            data: bytes,
+            digest: Optional[str],
+            connection_id: str,
+            stats: WsBroadcastStats
+    ) -> None:
+        began = time.time()
+        throttled = 0
+        status = None
+
+        for attempt in range(self.__max_attempts):
+            started = time.perf_counter()
+
+            try:
+                response = await client.post_to_connection(connection_id, data, digest)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                status = None
+            else:
+                status = response.status
+
+            latency = time.perf_counter() - started
+
+            if status is not None and 200 <= status < 300:
+                stats.sent += 1
+                stats.latencies.append(latency)
+
+                if throttled:
+                    self.__trace_send(connection_id, status, attempt + 1, throttled, began, failed=False)
+                return
+
+            if status == 410:
+                stats.gone += 1
+                stats.gone_connection_ids.append(connection_id)
+                return
+
+            if status == 429:
+                stats.throttled += 1
+                throttled += 1
+            elif status is not None and status < 500:
+                break
+
+            # Full jitter backoff spreads retries of many workers apart.
+            if attempt + 1 < self.__max_attempts:
+                await asyncio.sleep(random.uniform(0, min(self.__backoff_cap, self.__backoff_base * 2 ** attempt)))
+
+        stats.failed += 1
+        stats.failed_connection_ids.append(connection_id)
+
+        self.__trace_send(connection_id, status, attempt + 1, throttled, began, failed=True)
+
+    @staticmethod
+    def __trace_send(
+            connection_id: str,
+            status: Optional[int],
+            attempts: int,
+            throttled: int,
+            began: float,
+            failed: bool
+    ) -> None:
+        # Recorded after the fact, hence successful calls cost no span at all.
+        parent = WsTracer.current_span()
+        if parent is None:
+            return
+
+        span = parent.tracer.span('ws.post_to_connection', annotations=dict(
+            connection_id=connection_id,
+            status=status or 0,
+            attempts=attempts,
+            throttled=throttled,
+        ))
+        span.start_time = began
+        span.throttled = throttled > 0
+
+        if failed:
+            span.error = f'Failed to send to {connection_id} after {attempts} attempts (status {status}).'
+
+        span.end()
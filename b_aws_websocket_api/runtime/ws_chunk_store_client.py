@@ -0,0 +1,150 @@
+import hashlib
+import os
+import time
+from typing import Any, Dict, Optional, Union
+
+from b_aws_websocket_api.runtime import ws_dynamodb
+from b_aws_websocket_api.runtime.ws_chunking import WsChunk, WsChunkError, parse_chunk
+
+TABLE_NAME_ENV = 'WS_CHUNK_STORE_TABLE'
+TTL_SECONDS_ENV = 'WS_CHUNK_STORE_TTL'
+MAX_MESSAGE_BYTES_ENV = 'WS_CHUNK_STORE_MAX_MESSAGE_BYTES'
+
+PARTITION_KEY = 'messageKey'
+SORT_KEY = 'seq'
+TTL_ATTRIBUTE = 'expiresAt'
+
+# Sort key of the item that tracks received chunks of a message.
+STATE_SEQ = -1
+
+
+class WsChunkStoreClient:
+    """
+    Runtime API of a chunk store table created by the WsChunkStore construct. Reassembles messages that clients
+    upload as chunk frames (see split_message) across any number of invocations.
+
+    Every chunk is stored as its own item, and a state item collects the received sequence numbers (a number set,
+    hence retried frames are counted once). The invocation that completes the set claims the message and
+    reassembles it. Items expire after a short TTL, hence abandoned uploads clean themselves up.
+    """
+
+    def __init__(
+            self,
+            table_name: Optional[str] = None,
+            ttl_seconds: Optional[int] = None,
+            max_message_bytes: Optional[int] = None,
+            client: Any = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param table_name: Chunk store table name. Read from the environment if not given.
+        :param ttl_seconds: Lifetime of stored chunks. Read from the environment if not given.
+        :param max_message_bytes: Maximum size of an uploaded message. Read from the environment if not given.
+        :param client: Low-level DynamoDB client. A default boto3 client is created if not given.
+        """
+        self.__table_name = table_name or os.environ[TABLE_NAME_ENV]
+        self.__ttl_seconds = int(ttl_seconds or os.environ.get(TTL_SECONDS_ENV, 15 * 60))
+        self.__max_message_bytes = int(max_message_bytes or os.environ.get(MAX_MESSAGE_BYTES_ENV, 64 * 1024 * 1024))
+        self.__client = ws_dynamodb.create_client(client)
+
+    @property
+    def table_name(self) -> str:
+        return self.__table_name
+
+    @staticmethod
+    def message_key(connection_id: str, message_id: str) -> str:
+        # Scoped by connection, hence clients can not write into uploads of other clients.
+        return f'{connection_id}#{message_id}'
+
+    def add(self, connection_id: str, frame: Union[bytes, str, Dict[str, Any], WsChunk]) -> Optional[bytearray]:
+        """
+        Stores a received chunk frame.
+
+        :param connection_id: Connection that sent the frame.
+        :param frame: Raw chunk frame, its parsed document or a parsed chunk.
+
+        :return: Reassembled message if this chunk completed it, otherwise None.
+        """
+        chunk = frame if isinstance(frame, WsChunk) else parse_chunk(frame)
+
+        if chunk.size > self.__max_message_bytes:
+            raise WsChunkError(f'Message {chunk.id} of {chunk.size} bytes exceeds {self.__max_message_bytes}.')
+
+        message_key = self.message_key(connection_id, chunk.id)
+        expires_at = int(time.time()) + self.__ttl_seconds
+
+        self.__client.put_item(TableName=self.__table_name, Item=ws_dynamodb.serialize_item({
+            PARTITION_KEY: message_key,
+            SORT_KEY: chunk.seq,
+            'offset': chunk.offset,
+            'data': chunk.data,
+            TTL_ATTRIBUTE: expires_at,
+        }))
+
+        response = self.__client.update_item(
+            TableName=self.__table_name,
+            Key=ws_dynamodb.serialize_item({PARTITION_KEY: message_key, SORT_KEY: STATE_SEQ}),
+            UpdateExpression='ADD #received :seq SET #ttl = :ttl, #count = :count, #size = :size, #sha256 = :sha256',
+            ExpressionAttributeNames={
+                '#received': 'received',
+                '#ttl': TTL_ATTRIBUTE,
+                '#count': 'count',
+                '#size': 'size',
+                '#sha256': 'sha256',
+            },
+            ExpressionAttributeValues={
+                ':seq': {'NS': [str(chunk.seq)]},
+                ':ttl': ws_dynamodb.serialize(expires_at),
+                ':count': ws_dynamodb.serialize(chunk.count),
+                ':size': ws_dynamodb.serialize(chunk.size),
+                ':sha256': ws_dynamodb.serialize(chunk.sha256),
+            },
+            ReturnValues='UPDATED_NEW',
+        )
+
+        received = response.get('Attributes', {}).get('received', {}).get('NS', [])
+        if len(received) < chunk.count:
+            return None
+
+        # Retried frames of a completed message must not reassemble it again.
+        try:
+            self.__client.update_item(
+                TableName=self.__table_name,
+                Key=ws_dynamodb.serialize_item({PARTITION_KEY: message_key, SORT_KEY: STATE_SEQ}),
+                UpdateExpression='SET #claimed = :claimed',
+                ConditionExpression='attribute_not_exists(#claimed)',
+                ExpressionAttributeNames={'#claimed': 'claimed'},
+                ExpressionAttributeValues={':claimed': ws_dynamodb.serialize(True)},
+            )
+        except Exception as ex:
+            if ws_dynamodb.is_conditional_check_failure(ex):
+                return None
+            raise
+
+        return self.__reassemble(message_key, chunk)
+
+    def __reassemble(self, message_key: str, chunk: WsChunk) -> bytearray:
+        buffer = bytearray(chunk.size)
+        seen = set()
+
+        items = ws_dynamodb.parallel_query(
+            self.__client,
+            self.__table_name,
+            [message_key],
+            PARTITION_KEY,
+            ConsistentRead=True,
+        )
+
+        for item in items:
+            if item[SORT_KEY] == STATE_SEQ or item[SORT_KEY] in seen:
+                continue
+
+            data = bytes(item['data'])
+            buffer[item['offset']:item['offset'] + len(data)] = data
+            seen.add(item[SORT_KEY])
+
+        if len(seen) != chunk.count or hashlib.sha256(buffer).hexdigest() != chunk.sha256:
+            raise WsChunkError(f'Digest mismatch of message {chunk.id}.')
+
+        return buffer
@@ -0,0 +1,488 @@
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+import zlib
+from collections import OrderedDict, deque
+from typing import Any, Dict, Iterator, Optional, Union
+
+from b_aws_websocket_api.runtime.ws_connections_client import WsConnectionsClient
+from b_aws_websocket_api.runtime.ws_event import WsEvent
+from b_aws_websocket_api.runtime.ws_sigv4 import WsSigV4Signer
+
+# API Gateway limits a websocket frame to 32 KB and a message to 128 KB.
+MAX_FRAME_BYTES = 32 * 1024
+
+# Raw bytes per chunk. Base64 grows them to 32000 bytes, which leaves room for the header within a frame.
+DEFAULT_CHUNK_SIZE = 24000
+
+CHUNK_TYPE = 'chunk'
+
+
+class WsChunkError(ValueError):
+    """
+    A chunk or a reassembled message is malformed, corrupted or exceeds limits.
+    """
+
+
+class WsChunk:
+    """
+    A parsed chunk frame.
+
+    Frames are JSON documents {"type": "chunk", "id", "seq", "count", "offset", "size", "crc32", "sha256",
+    "data"} where data is the base64 encoded slice of the message starting at offset, crc32 is the checksum
+    of the slice and sha256 is the digest of the whole message of the given size. Additional fields
+    (e.g. "action" for route selection of inbound chunks) are allowed.
+    """
+
+    def __init__(self, document: Dict[str, Any]) -> None:
+        """
+        Constructor.
+
+        :param document: Parsed chunk frame.
+        """
+        try:
+            self.id = str(document['id'])
+            self.seq = int(document['seq'])
+            self.count = int(document['count'])
+            self.offset = int(document['offset'])
+            self.size = int(document['size'])
+            self.sha256 = str(document['sha256'])
+            self.data = base64.b64decode(document['data'], validate=True)
+            crc32 = int(document['crc32'])
+        except (KeyError, TypeError, ValueError) as ex:
+            raise WsChunkError(f'Malformed chunk: {repr(ex)}.')
+
+        if zlib.crc32(self.data) != crc32:
+            raise WsChunkError(f'Checksum mismatch of chunk {self.seq} of message {self.id}.')
+
+        if not 0 <= self.seq < self.count or self.offset < 0 or self.offset + len(self.data) > self.size:
+            raise WsChunkError(f'Chunk {self.seq} of message {self.id} is out of bounds.')
+
+
+def is_chunk(document: Any) -> bool:
+    return isinstance(document, dict) and document.get('type') == CHUNK_TYPE
+
+
+def parse_chunk(frame: Union[bytes, str, Dict[str, Any]]) -> WsChunk:
+    """
+    Parses and verifies a chunk frame.
+
+    :param frame: Raw frame or an already parsed document.
+
+    :return: Parsed chunk.
+    """
+    if not isinstance(frame, dict):
+        try:
+            frame = json.loads(frame)
+        except ValueError as ex:
+            raise WsChunkError(f'Malformed chunk: {repr(ex)}.')
+
+    if not is_chunk(frame):
+        raise WsChunkError('Frame is not a chunk.')
+
+    return WsChunk(frame)
+
+
+def chunk_count(size: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    return max(1, math.ceil(size / chunk_size))
+
+
+def split_message(
+        data: Union[bytes, str],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        message_id: Optional[str] = None,
+        fields: Optional[Dict[str, Any]] = None,
+        max_frame_bytes: int = MAX_FRAME_BYTES
+) -> Iterator[bytes]:
+    """
+    Splits a message into sequenced, checksummed chunk frames. Frames are encoded lazily,
+    hence only the frames in flight are held in memory besides the message itself.
+
+    :param data: Message.
+    :param chunk_size: Raw bytes per chunk.
+    :param message_id: Message id. Random if not given.
+    :param fields: Additional fields of every frame, e.g. {"action": "upload"} for route selection.
+    :param max_frame_bytes: Maximum encoded frame size.
+
+    :return: Generator of encoded frames.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+
+    if chunk_size <= 0:
+        raise ValueError('Chunk size must be positive.')
+
+    view = memoryview(data)
+    count = chunk_count(len(view), chunk_size)
+
+    header = dict(fields or {})
+    header.update(
+        type=CHUNK_TYPE,
+        id=message_id or uuid.uuid4().hex,
+        count=count,
+        size=len(view),
+        sha256=hashlib.sha256(view).hexdigest(),
+    )
+    # Encoded once, the per chunk part is appended as bytes.
+    prefix = json.dumps(header, separators=(',', ':'))[:-1].encode('utf-8')
+
+    for seq in range(count):
+        offset = seq * chunk_size
+        piece = view[offset:offset + chunk_size]
+
+        frame = b''.join([
+            prefix,
+            f',"seq":{seq},"offset":{offset},"crc32":{zlib.crc32(piece)},"data":"'.encode('ascii'),
+            base64.b64encode(piece),
+            b'"}',
+        ])
+
+        if len(frame) > max_frame_bytes:
+            raise ValueError(f'Chunk frame of {len(frame)} bytes exceeds {max_frame_bytes} bytes.')
+
+        yield frame
+
+
+class _WsPartialMessage:
+    def __init__(self, chunk: WsChunk, expires_at: float) -> None:
+        self.size = chunk.size
+        self.count = chunk.count
+        self.sha256 = chunk.sha256
+        self.buffer = bytearray(chunk.size)
+        self.received = set()
+        self.expires_at = expires_at
+
+
+class WsReassembler:
+    """
+    Reassembles messages from chunk frames (see split_message) arriving in any order, with bounded memory.
+
+    Every message is written into a single preallocated buffer at the offsets of its chunks, hence no chunk
+    lists are joined. Incomplete messages are dropped after a timeout, and the oldest ones are evicted when
+    the buffered bytes would exceed the limit.
+    """
+
+    def __init__(
+            self,
+            max_message_bytes: int = 64 * 1024 * 1024,
+            max_buffered_bytes: int = 128 * 1024 * 1024,
+            timeout: float = 60.0
+    ) -> None:
+        """
+        Constructor.
+
+        :param max_message_bytes: Maximum size of a single message.
+        :param max_buffered_bytes: Maximum total size of incomplete messages.
+        :param timeout: Seconds after which an incomplete message is dropped.
+        """
+        self.__max_message_bytes = max_message_bytes
+        self.__max_buffered_bytes = max_buffered_bytes
+        self.__timeout = timeout
+        self.__partial: 'OrderedDict[str, _WsPartialMessage]' = OrderedDict()
+        self.__buffered = 0
+        # Late duplicates of completed messages must not start a new message.
+        self.__completed = deque(maxlen=1024)
+        self.__completed_ids = set()
+
+    @property
+    def buffered_bytes(self) -> int:
+        return self.__buffered
+
+    @property
+    def pending(self) -> int:
+        return len(self.__partial)
+
+    def feed(self, frame: Union[bytes, str, Dict[str, Any]]) -> Optional[Union[bytes, bytearray, str, Dict]]:
+        """
+        Feeds a received frame.
+
+        :param frame: Received frame. Frames that are not chunks are returned unchanged.
+
+        :return: Reassembled message once its last chunk arrived, otherwise None.
+        """
+        document = frame
+        if not isinstance(frame, dict):
+            try:
+                document = json.loads(frame)
+            except ValueError:
+                return frame
+
+        if not is_chunk(document):
+            return frame
+
+        return self.add(WsChunk(document))
+
+    def add(self, chunk: WsChunk, now: Optional[float] = None) -> Optional[bytearray]:
+        """
+        Adds a parsed chunk.
+
+        :param chunk: Chunk.
+        :param now: Current monotonic time.
+
+        :return: Reassembled message once its last chunk arrived, otherwise None.
+        """
+        now = time.monotonic() if now is None else now
+        self.__expire(now)
+
+        if chunk.id in self.__completed_ids:
+            return None
+
+        message = self.__partial.get(chunk.id)
+
+        if message is None:
+            if chunk.size > self.__max_message_bytes:
+                raise WsChunkError(f'Message {chunk.id} of {chunk.size} bytes exceeds {self.__max_message_bytes}.')
+
+            while self.__partial and self.__buffered + chunk.size > self.__max_buffered_bytes:
+                self.__drop(next(iter(self.__partial)))
+
+            message = self.__partial[chunk.id] = _WsPartialMessage(chunk, now + self.__timeout)
+            self.__buffered += chunk.size
+        elif (chunk.size, chunk.count, chunk.sha256) != (message.size, message.count, message.sha256):
+            self.__drop(chunk.id)
+            raise WsChunkError(f'Chunks of message {chunk.id} disagree.')
+
+        if chunk.seq in message.received:
+            return None
+
+        message.buffer[chunk.offset:chunk.offset + len(chunk.data)] = chunk.data
+        message.received.add(chunk.seq)
+
+        if len(message.received) < message.count:
+            return None
+
+        self.__drop(chunk.id)
+        self.__complete(chunk.id)
+
+        if hashlib.sha256(message.buffer).hexdigest() != message.sha256:
+            raise WsChunkError(f'Digest mismatch of message {chunk.id}.')
+
+        return message.buffer
+
+    def __expire(self, now: float) -> None:
+        # Messages are ordered by their first chunk, hence by expiry.
+        while self.__partial:
+            message_id, message = next(iter(self.__partial.items()))
+            if message.expires_at > now:
+                break
+            self.__drop(message_id)
+
+    def __drop(self, message_id: str) -> None:
+        message = self.__partial.pop(message_id, None)
+        if message is not None:
+            self.__buffered -= message.size
+
+    def __complete(self, message_id: str) -> None:
+        if len(self.__completed) == self.__completed.maxlen:
+            self.__completed_ids.discard(self.__completed[0])
+        self.__completed.append(message_id)
+        self.__completed_ids.add(message_id)
+
+
+class WsChunkStats:
+    """
+    Statistics of a single chunked send.
+    """
+
+    def __init__(self, message_id: str, frames: int, size: int) -> None:
+        """
+        Constructor.
+
+        :param message_id: Message id.
+        :param frames: Number of chunk frames of the message.
+        :param size: Message size in bytes.
+        """
+        self.message_id = message_id
+        self.frames = frames
+        self.size = size
+        self.sent = 0
+        self.sent_bytes = 0
+        self.throttled = 0
+        self.gone = False
+        self.failed = False
+        self.duration = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.sent == self.frames
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.size / 1024 / 1024 / self.duration if self.duration else 0.0
+
+    def to_dict(self) -> dict:
+        return dict(
+            message_id=self.message_id,
+            frames=self.frames,
+            size=self.size,
+            sent=self.sent,
+            sent_bytes=self.sent_bytes,
+            throttled=self.throttled,
+            gone=self.gone,
+            failed=self.failed,
+            duration=self.duration,
+            megabytes_per_second=self.megabytes_per_second,
+        )
+
+
+class WsChunkSender:
+    """
+    Sends messages larger than the API Gateway limits to a websocket connection as chunk frames through
+    the @connections management API. Frames are pipelined (several requests in flight), hence they may
+    arrive out of order, which WsReassembler handles.
+    """
+
+    def __init__(
+            self,
+            connections_url: str,
+            region: Optional[str] = None,
+            signer: Optional[WsSigV4Signer] = None,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            max_in_flight: int = 8,
+            max_attempts: int = 5,
+            backoff_base: float = 0.05,
+            backoff_cap: float = 2.0,
+            timeout: float = 10.0
+    ) -> None:
+        """
+        Constructor.
+
+        :param connections_url: The @connections endpoint of a stage, i.e. the value of WsStage.connections_url.
+        :param region: AWS region. Parsed from the url if not given.
+        :param signer: Request signer. Created from the environment credentials if not given.
+        :param chunk_size: Raw bytes per chunk.
+        :param max_in_flight: Maximum number of frames in flight.
+        :param max_attempts: Maximum number of attempts of a throttled or failed frame.
+        :param backoff_base: Base delay of the exponential backoff in seconds.
+        :param backoff_cap: Maximum delay of the exponential backoff in seconds.
+        :param timeout: Timeout of a single request in seconds.
+        """
+        self.__connections_url = connections_url
+        self.__region = region
+        self.__signer = signer
+        self.__chunk_size = chunk_size
+        self.__max_in_flight = max_in_flight
+        self.__max_attempts = max_attempts
+        self.__backoff_base = backoff_base
+        self.__backoff_cap = backoff_cap
+        self.__timeout = timeout
+
+    @classmethod
+    def from_event(cls, event: WsEvent, **kwargs) -> 'WsChunkSender':
+        """
+        Creates a sender for the stage that delivered the given event.
+
+        :param event: Parsed websocket event.
+        :param kwargs: Additional constructor arguments.
+
+        :return: Sender.
+        """
+        return cls(connections_url=event.connections_url, **kwargs)
+
+    def send(
+            self,
+            connection_id: str,
+            data: Union[bytes, str],
+            message_id: Optional[str] = None,
+            fields: Optional[Dict[str, Any]] = None
+    ) -> WsChunkStats:
+        """
+        Synchronous wrapper of send_async(), convenient in Lambda handlers.
+
+        :param connection_id: Target connection id.
+        :param data: Message.
+        :param message_id: Message id. Random if not given.
+        :param fields: Additional fields of every frame.
+
+        :return: Send statistics.
+        """
+        return asyncio.run(self.send_async(connection_id, data, message_id, fields))
+
+    async def send_async(
+            self,
+            connection_id: str,
+            data: Union[bytes, str],
+            message_id: Optional[str] = None,
+            fields: Optional[Dict[str, Any]] = None
+    ) -> WsChunkStats:
+        """
+        Sends a message as chunk frames. Sending stops early if the connection is gone or a frame failed.
+
+        :param connection_id: Target connection id.
+        :param data: Message.
+        :param message_id: Message id. Random if not given.
+        :param fields: Additional fields of every frame.
+
+        :return: Send statistics.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        message_id = message_id or uuid.uuid4().hex
+        stats = WsChunkStats(message_id, chunk_count(len(data), self.__chunk_size), len(data))
+        frames = split_message(data, self.__chunk_size, message_id, fields)
+        started = time.perf_counter()
+
+        client = WsConnectionsClient(
+            connections_url=self.__connections_url,
+            region=self.__region,
+            signer=self.__signer,
+            max_connections=self.__max_in_flight,
+            timeout=self.__timeout
+        )
+
+        async with client:
+            await asyncio.gather(*[
+                self.__worker(client, connection_id, frames, stats)
+                for _ in range(min(self.__max_in_flight, stats.frames))
+            ])
+
+        stats.duration = time.perf_counter() - started
+
+        return stats
+
+    async def __worker(
+            self,
+            client: WsConnectionsClient,
+            connection_id: str,
+            frames: Iterator[bytes],
+            stats: WsChunkStats
+    ) -> None:
+        # Workers share a single generator which is safe since there is no await between next() calls.
+        for frame in frames:
+            if stats.gone or stats.failed:
+                return
+            await self.__send(client, connection_id, frame, stats)
+
+    async def __send(self, client: WsConnectionsClient, connection_id: str, frame: bytes, stats: WsChunkStats) -> None:
+        for attempt in range(self.__max_attempts):
+            try:
+                response = await client.post_to_connection(connection_id, frame)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                status = None
+            else:
+                status = response.status
+
+            if status is not None and 200 <= status < 300:
+                stats.sent += 1
+                stats.sent_bytes += len(frame)
+                return
+
+            if status == 410:
+                stats.gone = True
+                return
+
+            if status == 429:
+                stats.throttled += 1
+            elif status is not None and status < 500:
+                break
+
+            if attempt + 1 < self.__max_attempts:
+                await asyncio.sleep(random.uniform(0, min(self.__backoff_cap, self.__backoff_base * 2 ** attempt)))
+
+        stats.failed = True
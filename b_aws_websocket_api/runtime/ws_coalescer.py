@@ -0,0 +1,389 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Union
+
+from b_aws_websocket_api.runtime.ws_broadcaster import WsBroadcastStats
+from b_aws_websocket_api.runtime.ws_chunking import MAX_FRAME_BYTES
+from b_aws_websocket_api.runtime.ws_connection_pruner import WsConnectionPruner
+from b_aws_websocket_api.runtime.ws_connections_client import WsConnectionsClient
+from b_aws_websocket_api.runtime.ws_event import WsEvent
+from b_aws_websocket_api.runtime.ws_sigv4 import WsSigV4Signer
+
+BATCH_TYPE = 'batch'
+
+_BATCH_PREFIX = b'{"type":"batch","messages":['
+_BATCH_SUFFIX = b']}'
+
+
+def pack_batch(messages: List[bytes]) -> bytes:
+    """
+    Frames JSON messages as a single batch frame {"type": "batch", "messages": [...]}. The messages are
+    spliced in as they are, not parsed and encoded again. A single message is returned unframed.
+
+    :param messages: Encoded JSON messages.
+
+    :return: Frame.
+    """
+    if len(messages) == 1:
+        return messages[0]
+
+    return b''.join((_BATCH_PREFIX, b','.join(messages), _BATCH_SUFFIX))
+
+
+def unpack_batch(frame: Union[bytes, str, Any]) -> List[Any]:
+    """
+    Client side counterpart of pack_batch().
+
+    :param frame: Received frame or an already parsed document.
+
+    :return: Parsed messages of a batch frame or a list of the single parsed message.
+    """
+    document = json.loads(frame) if isinstance(frame, (bytes, str)) else frame
+
+    if isinstance(document, dict) and document.get('type') == BATCH_TYPE:
+        return list(document['messages'])
+
+    return [document]
+
+
+class WsCoalesceStats(WsBroadcastStats):
+    """
+    Statistics of a coalescer. Sent, gone and failed count messages, latencies hold the delays of delivered
+    messages from send() until @connections acknowledged them, i.e. including the coalescing window.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor.
+        """
+        super().__init__()
+
+        self.messages = 0
+        self.batches = 0
+        self.requests = 0
+
+    @property
+    def messages_per_request(self) -> float:
+        return self.messages / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> dict:
+        return dict(
+            super().to_dict(),
+            messages=self.messages,
+            batches=self.batches,
+            requests=self.requests,
+            messages_per_request=self.messages_per_request,
+        )
+
+
+class _WsBuffer:
+    """
+    Messages buffered for a single connection.
+    """
+
+    def __init__(self, connection_id: str) -> None:
+        self.connection_id = connection_id
+        self.messages: List[bytes] = []
+        self.enqueued: List[float] = []
+        self.size = len(_BATCH_PREFIX) + len(_BATCH_SUFFIX)
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+    def add(self, data: bytes, now: float) -> None:
+        self.messages.append(data)
+        self.enqueued.append(now)
+        self.size += len(data) + 1
+
+
+class WsCoalescer:
+    """
+    Coalesces many small messages to the same connection into batch frames (see pack_batch), hence into
+    fewer billed and throttled @connections calls. A connection's messages are flushed when the first of
+    them waited for the window, or as soon as a size or message count limit is reached. Batches of a
+    connection are sent one after another, in order.
+
+    Sending happens on a background event loop thread, hence send() never blocks. Call flush() (or use the
+    coalescer as a context manager) before a Lambda handler returns, since a frozen execution environment
+    does not send anything.
+    """
+
+    def __init__(
+            self,
+            connections_url: str,
+            region: Optional[str] = None,
+            signer: Optional[WsSigV4Signer] = None,
+            window: float = 0.02,
+            max_messages: int = 100,
+            max_bytes: int = MAX_FRAME_BYTES,
+            max_in_flight: int = 50,
+            max_attempts: int = 5,
+            backoff_base: float = 0.05,
+            backoff_cap: float = 2.0,
+            timeout: float = 10.0,
+            pruner: Optional[WsConnectionPruner] = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param connections_url: The @connections endpoint of a stage, i.e. the value of WsStage.connections_url.
+        :param region: AWS region. Parsed from the url if not given.
+        :param signer: Request signer. Created from the environment credentials if not given.
+        :param window: Maximum time in seconds a message waits for others to the same connection.
+        :param max_messages: Maximum number of messages in a batch.
+        :param max_bytes: Maximum size of a batch frame. Larger messages are sent on their own.
+        :param max_in_flight: Maximum number of concurrent requests (and pooled keep-alive connections).
+        :param max_attempts: Maximum number of attempts for a throttled send.
+        :param backoff_base: Base delay of the exponential backoff in seconds.
+        :param backoff_cap: Maximum delay of the exponential backoff in seconds.
+        :param timeout: Timeout of a single request in seconds.
+        :param pruner: Removes gone connections from the registry and subscription index on every flush.
+        """
+        self.__connections_url = connections_url
+        self.__region = region
+        self.__signer = signer
+        self.__window = window
+        self.__max_messages = max_messages
+        self.__max_bytes = max_bytes
+        self.__max_in_flight = max_in_flight
+        self.__max_attempts = max_attempts
+        self.__backoff_base = backoff_base
+        self.__backoff_cap = backoff_cap
+        self.__timeout = timeout
+        self.__pruner = pruner
+
+        self.__stats = WsCoalesceStats()
+        self.__gone: Set[str] = set()
+        # Buffers are filled by the sending threads, batches are sent by the event loop thread.
+        self.__lock = threading.Lock()
+        self.__buffers: Dict[str, _WsBuffer] = {}
+        self.__loop: Optional[asyncio.AbstractEventLoop] = None
+        self.__thread: Optional[threading.Thread] = None
+        self.__client: Optional[WsConnectionsClient] = None
+        # Last send task of every connection, which the next batch of that connection waits for.
+        self.__tails: Dict[str, asyncio.Task] = {}
+        self.__started = 0.0
+        # Number of gone connections handed to the pruner already.
+        self.__pruned = 0
+
+    @classmethod
+    def from_event(cls, event: WsEvent, **kwargs) -> 'WsCoalescer':
+        """
+        Creates a coalescer for the stage that delivered the given event.
+
+        :param event: Parsed websocket event.
+        :param kwargs: Additional constructor arguments.
+
+        :return: Coalescer.
+        """
+        return cls(connections_url=event.connections_url, **kwargs)
+
+    @property
+    def stats(self) -> WsCoalesceStats:
+        return self.__stats
+
+    def __enter__(self) -> 'WsCoalescer':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def send(self, connection_id: str, message: Union[bytes, str]) -> None:
+        """
+        Buffers a JSON message for a connection. Messages to connections known to be gone are dropped.
+
+        :param connection_id: Target connection id.
+        :param message: Encoded JSON message.
+
+        :return: No return.
+        """
+        data = message.encode('utf-8') if isinstance(message, str) else bytes(message)
+        now = time.perf_counter()
+
+        with self.__lock:
+            self.__start()
+            self.__stats.messages += 1
+
+            if connection_id in self.__gone:
+                self.__stats.gone += 1
+                return
+
+            buffer = self.__buffers.get(connection_id)
+
+            if buffer is not None and buffer.size + len(data) + 1 > self.__max_bytes:
+                self.__dispatch(self.__buffers.pop(connection_id))
+                buffer = None
+
+            if buffer is None:
+                buffer = self.__buffers[connection_id] = _WsBuffer(connection_id)
+                buffer.add(data, now)
+                # A single message may already hit the limits.
+                if len(buffer.messages) < self.__max_messages and buffer.size < self.__max_bytes:
+                    self.__loop.call_soon_threadsafe(self.__schedule, buffer)
+                    return
+            else:
+                buffer.add(data, now)
+
+            if len(buffer.messages) >= self.__max_messages or buffer.size >= self.__max_bytes:
+                self.__dispatch(self.__buffers.pop(connection_id))
+
+    def flush(self, timeout: Optional[float] = None) -> WsCoalesceStats:
+        """
+        Sends all buffered messages and waits until every batch is acknowledged.
+
+        :param timeout: Maximum time to wait in seconds.
+
+        :return: Cumulative statistics.
+        """
+        with self.__lock:
+            if self.__loop is None:
+                return self.__stats
+
+            buffers, self.__buffers = list(self.__buffers.values()), {}
+            for buffer in buffers:
+                self.__dispatch(buffer)
+
+            drained = asyncio.run_coroutine_threadsafe(self.__drain(), self.__loop)
+
+        drained.result(timeout)
+        self.__stats.duration = time.perf_counter() - self.__started
+
+        if self.__pruner:
+            with self.__lock:
+                gone = self.__stats.gone_connection_ids[self.__pruned:]
+                self.__pruned += len(gone)
+            self.__stats.pruned += self.__pruner.prune(gone)
+
+        return self.__stats
+
+    def close(self) -> WsCoalesceStats:
+        """
+        Flushes and stops the background thread. Sending again starts a new one.
+
+        :return: Cumulative statistics.
+        """
+        stats = self.flush()
+
+        with self.__lock:
+            if self.__loop is None:
+                return stats
+
+            loop, thread, self.__loop, self.__thread = self.__loop, self.__thread, None, None
+
+        asyncio.run_coroutine_threadsafe(self.__client.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+        return stats
+
+    def __start(self) -> None:
+        # Called with the lock held.
+        if self.__loop is not None:
+            return
+
+        self.__loop = asyncio.new_event_loop()
+        self.__client = WsConnectionsClient(
+            connections_url=self.__connections_url,
+            region=self.__region,
+            signer=self.__signer,
+            max_connections=self.__max_in_flight,
+            timeout=self.__timeout
+        )
+        self.__thread = threading.Thread(target=self.__loop.run_forever, name='WsCoalescer', daemon=True)
+        self.__thread.start()
+        self.__started = self.__started or time.perf_counter()
+
+    def __dispatch(self, buffer: _WsBuffer) -> None:
+        # Called with the lock held. A single wake-up of the event loop per batch, not per message.
+        self.__loop.call_soon_threadsafe(self.__post, buffer)
+
+    def __schedule(self, buffer: _WsBuffer) -> None:
+        # Runs on the event loop. The window starts with the first message of a buffer.
+        delay = max(0.0, buffer.enqueued[0] + self.__window - time.perf_counter())
+        buffer.timer = self.__loop.call_later(delay, self.__expire, buffer)
+
+    def __expire(self, buffer: _WsBuffer) -> None:
+        with self.__lock:
+            # The buffer may have been dispatched already because it reached a limit or was flushed.
+            if self.__buffers.get(buffer.connection_id) is not buffer:
+                return
+            del self.__buffers[buffer.connection_id]
+
+        self.__post(buffer)
+
+    def __post(self, buffer: _WsBuffer) -> None:
+        if buffer.timer is not None:
+            buffer.timer.cancel()
+
+        previous = self.__tails.get(buffer.connection_id)
+        task = self.__loop.create_task(self.__send(buffer, previous))
+        self.__tails[buffer.connection_id] = task
+        task.add_done_callback(lambda _: self.__release(buffer.connection_id, task))
+
+    def __release(self, connection_id: str, task: asyncio.Task) -> None:
+        if self.__tails.get(connection_id) is task:
+            del self.__tails[connection_id]
+
+    async def __drain(self) -> None:
+        # Dispatches scheduled by flush() run before this coroutine, hence every batch has a task by now.
+        while self.__tails:
+            await asyncio.wait(list(self.__tails.values()))
+
+    async def __send(self, buffer: _WsBuffer, previous: Optional[asyncio.Task]) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+
+        connection_id = buffer.connection_id
+        status: Optional[int] = 410
+        requests = throttled = 0
+
+        if connection_id not in self.__gone:
+            data = pack_batch(buffer.messages)
+
+            for attempt in range(self.__max_attempts):
+                requests += 1
+
+                try:
+                    response = await self.__client.post_to_connection(connection_id, data)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    status = None
+                else:
+                    status = response.status
+
+                if status is not None and (200 <= status < 300 or status == 410):
+                    break
+
+                if status == 429:
+                    throttled += 1
+                elif status is not None and status < 500:
+                    break
+
+                if attempt + 1 < self.__max_attempts:
+                    await asyncio.sleep(random.uniform(0, min(self.__backoff_cap, self.__backoff_base * 2 ** attempt)))
+
+        self.__record(buffer, status, requests, throttled)
+
+    def __record(self, buffer: _WsBuffer, status: Optional[int], requests: int, throttled: int) -> None:
+        now = time.perf_counter()
+        count = len(buffer.messages)
+        stats = self.__stats
+
+        # Statistics are shared with the sending threads.
+        with self.__lock:
+            stats.batches += 1 if requests else 0
+            stats.requests += requests
+            stats.throttled += throttled
+
+            if status is not None and 200 <= status < 300:
+                stats.sent += count
+                stats.latencies.extend(now - enqueued for enqueued in buffer.enqueued)
+            elif status == 410:
+                stats.gone += count
+                if buffer.connection_id not in self.__gone:
+                    self.__gone.add(buffer.connection_id)
+                    stats.gone_connection_ids.append(buffer.connection_id)
+            else:
+                stats.failed += count
+                stats.failed_connection_ids.append(buffer.connection_id)
@@ -0,0 +1,277 @@
+import importlib.util
+import json
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+# Query string parameter of $connect requests with comma separated codec names in order of preference,
+# e.g. wss://.../prod?codec=msgpack+zstd,json. The Sec-WebSocket-Protocol header is honoured as well.
+CODEC_QUERY_PARAMETER = 'codec'
+CODEC_HEADER = 'Sec-WebSocket-Protocol'
+# Registry attribute holding the negotiated codec of a connection.
+CODEC_ATTRIBUTE = 'codec'
+DEFAULT_CODEC = 'json'
+
+# Decompression bomb guard.
+DEFAULT_MAX_DECODED_BYTES = 16 * 1024 * 1024
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+class WsCodecError(ValueError):
+    """
+    A codec is unknown, not installed, or a frame can not be decoded.
+    """
+
+
+class WsCodec(ABC):
+    """
+    Encodes documents into frames and decodes frames into documents.
+    """
+
+    name = ''
+    # Binary codecs produce binary websocket frames.
+    binary = False
+    # Optional packages the codec needs.
+    requires: List[str] = []
+
+    @property
+    def available(self) -> bool:
+        return all(importlib.util.find_spec(module) is not None for module in self.requires)
+
+    @abstractmethod
+    def encode(self, document: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, data: Union[bytes, str]) -> Any:
+        pass
+
+
+class WsJsonCodec(WsCodec):
+    name = 'json'
+
+    def encode(self, document: Any) -> bytes:
+        return json.dumps(document, separators=(',', ':')).encode('utf-8')
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        try:
+            return json.loads(data)
+        except ValueError as ex:
+            raise WsCodecError(f'Malformed JSON frame: {repr(ex)}.')
+
+
+class WsMsgPackCodec(WsCodec):
+    name = 'msgpack'
+    binary = True
+    requires = ['msgpack']
+
+    def encode(self, document: Any) -> bytes:
+        import msgpack
+
+        return msgpack.packb(document, use_bin_type=True)
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        import msgpack
+
+        try:
+            return msgpack.unpackb(data.encode('utf-8') if isinstance(data, str) else data, raw=False)
+        except (ValueError, msgpack.UnpackException) as ex:
+            raise WsCodecError(f'Malformed MessagePack frame: {repr(ex)}.')
+
+
+class WsCompressedCodec(WsCodec):
+    """
+    Compresses frames of another codec with zlib or zstd.
+    """
+
+    binary = True
+
+    def __init__(
+            self,
+            codec: WsCodec,
+            compression: str,
+            level: Optional[int] = None,
+            max_decoded_bytes: int = DEFAULT_MAX_DECODED_BYTES
+    ) -> None:
+        """
+        Constructor.
+
+        :param codec: Codec of the compressed frames.
+        :param compression: Either zlib or zstd.
+        :param level: Compression level. Defaults to 6 (zlib) and 3 (zstd), both favour speed.
+        :param max_decoded_bytes: Maximum size of a decompressed frame.
+        """
+        if compression not in ('zlib', 'zstd'):
+            raise WsCodecError(f'Unknown compression {compression}.')
+
+        self.__codec = codec
+        self.__compression = compression
+        self.__level = level if level is not None else (6 if compression == 'zlib' else 3)
+        self.__max_decoded_bytes = max_decoded_bytes
+
+        self.name = f'{codec.name}+{compression}'
+        self.requires = list(codec.requires) + (['zstandard'] if compression == 'zstd' else [])
+
+    @property
+    def codec(self) -> WsCodec:
+        return self.__codec
+
+    def encode(self, document: Any) -> bytes:
+        data = self.__codec.encode(document)
+
+        if self.__compression == 'zlib':
+            return zlib.compress(data, self.__level)
+
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=self.__level).compress(data)
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        if isinstance(data, str):
+            raise WsCodecError(f'{self.name} frames must be binary.')
+
+        return self.__codec.decode(self.decompress(data))
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.__compression == 'zlib':
+            decompressor = zlib.decompressobj()
+            try:
+                decoded = decompressor.decompress(data, self.__max_decoded_bytes)
+            except zlib.error as ex:
+                raise WsCodecError(f'Malformed zlib frame: {repr(ex)}.')
+            if decompressor.unconsumed_tail:
+                raise WsCodecError(f'Frame exceeds {self.__max_decoded_bytes} bytes when decompressed.')
+            return decoded
+
+        import zstandard
+
+        try:
+            size = zstandard.frame_content_size(data)
+            if size > self.__max_decoded_bytes:
+                raise WsCodecError(f'Frame exceeds {self.__max_decoded_bytes} bytes when decompressed.')
+            return zstandard.ZstdDecompressor().decompress(data, max_output_size=self.__max_decoded_bytes)
+        except zstandard.ZstdError as ex:
+            raise WsCodecError(f'Malformed zstd frame: {repr(ex)}.')
+
+
+CODECS: Dict[str, WsCodec] = {}
+
+
+def register_codec(codec: WsCodec) -> WsCodec:
+    """
+    Makes a codec available for negotiation.
+
+    :param codec: Codec.
+
+    :return: The registered codec.
+    """
+    CODECS[codec.name] = codec
+
+    return codec
+
+
+for _codec in (WsJsonCodec(), WsMsgPackCodec()):
+    register_codec(_codec)
+    register_codec(WsCompressedCodec(_codec, 'zlib'))
+    register_codec(WsCompressedCodec(_codec, 'zstd'))
+
+
+def get_codec(name: Optional[str] = None) -> WsCodec:
+    """
+    Looks a registered codec up.
+
+    :param name: Codec name. Defaults to json.
+
+    :return: Codec.
+    """
+    codec = CODECS.get(name or DEFAULT_CODEC)
+
+    if codec is None:
+        raise WsCodecError(f'Unknown codec {name}.')
+
+    if not codec.available:
+        raise WsCodecError(f'Codec {name} requires {", ".join(codec.requires)} to be installed.')
+
+    return codec
+
+
+def negotiate(preferences: Optional[str], supported: Optional[Iterable[str]] = None) -> Optional[WsCodec]:
+    """
+    Picks the first codec of the client preferences which is registered, installed and supported.
+
+    :param preferences: Comma separated codec names in order of preference.
+    :param supported: Names of codecs the server allows. All registered codecs if not given.
+
+    :return: Codec, json if there are no preferences, or None if no preferred codec can be used.
+    """
+    # A + of an unencoded query string arrives as a space.
+    names = [name.strip().replace(' ', '+') for name in (preferences or '').split(',') if name.strip()]
+    if not names:
+        return get_codec(DEFAULT_CODEC)
+
+    supported = set(supported) if supported is not None else set(CODECS)
+
+    for name in names:
+        codec = CODECS.get(name)
+        if codec is not None and name in supported and codec.available:
+            return codec
+
+    return None
+
+
+def detect_codec(data: Union[bytes, str]) -> WsCodec:
+    """
+    Detects the codec of a received frame. Text frames are JSON, compressed binary frames are recognized by
+    their zlib or zstd header, and the decompressed (or uncompressed) content is JSON if it starts like a JSON
+    object or array, otherwise MessagePack.
+
+    :param data: Frame.
+
+    :return: Codec.
+    """
+    if isinstance(data, str):
+        return CODECS['json']
+
+    # Compressed frames are decompressed only as far as needed to see their first bytes.
+    if data[:4] == ZSTD_MAGIC:
+        import zstandard
+
+        try:
+            inner = zstandard.ZstdDecompressor().stream_reader(data).read(16)
+        except zstandard.ZstdError as ex:
+            raise WsCodecError(f'Malformed zstd frame: {repr(ex)}.')
+
+        return CODECS[f'{_detect_plain(inner).name}+zstd']
+
+    # Deflate method with a window of at most 32 KB and a valid header checksum.
+    if len(data) > 1 and data[0] & 0x0f == 8 and data[0] >> 4 <= 7 and (data[0] << 8 | data[1]) % 31 == 0:
+        try:
+            inner = zlib.decompressobj().decompress(data, 16)
+        except zlib.error as ex:
+            raise WsCodecError(f'Malformed zlib frame: {repr(ex)}.')
+
+        return CODECS[f'{_detect_plain(inner).name}+zlib']
+
+    return _detect_plain(data)
+
+
+def _detect_plain(data: bytes) -> WsCodec:
+    return CODECS['json'] if data.lstrip()[:1] in (b'{', b'[') else CODECS['msgpack']
+
+
+def decode(data: Union[bytes, str], codec: Optional[WsCodec] = None) -> Any:
+    """
+    Decodes a received frame.
+
+    :param data: Frame.
+    :param codec: Codec of the frame. Detected if not given.
+
+    :return: Document.
+    """
+    codec = codec or detect_codec(data)
+
+    if not codec.available:
+        raise WsCodecError(f'Codec {codec.name} requires {", ".join(codec.requires)} to be installed.')
+
+    return codec.decode(data)
@@ -0,0 +1,251 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from b_aws_websocket_api.runtime import ws_subscription_index_client
+from b_aws_websocket_api.runtime.ws_connection_registry_client import WsConnectionRegistryClient, VERSION_ATTRIBUTE
+from b_aws_websocket_api.runtime.ws_subscription_index_client import WsSubscriptionIndexClient
+
+MAX_SIZE_ENV = 'WS_CONNECTION_CACHE_SIZE'
+TTL_SECONDS_ENV = 'WS_CONNECTION_CACHE_TTL'
+MAX_AGE_SECONDS_ENV = 'WS_CONNECTION_CACHE_MAX_AGE'
+
+# Key of subscribed topics in cached metadata.
+TOPICS_KEY = 'topics'
+
+
+class WsConnectionCacheStats:
+    """
+    Counters of a connection metadata cache since its creation.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor.
+        """
+        # Served from memory without any I/O.
+        self.hits = 0
+        # Served from memory after a version-only read confirmed the entry.
+        self.revalidations = 0
+        # Loaded from the registry (and the subscription index).
+        self.misses = 0
+        # Entries dropped because their version stamp changed or the connection is gone.
+        self.stale = 0
+        self.evictions = 0
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.revalidations + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> dict:
+        return dict(
+            hits=self.hits,
+            revalidations=self.revalidations,
+            misses=self.misses,
+            stale=self.stale,
+            evictions=self.evictions,
+            hit_rate=self.hit_rate,
+        )
+
+
+class _Entry:
+    __slots__ = ('metadata', 'version', 'loaded_at', 'validated_at')
+
+    def __init__(self, metadata: Dict[str, Any], loaded_at: float) -> None:
+        self.metadata = metadata
+        self.version = metadata.get(VERSION_ATTRIBUTE, 0)
+        self.loaded_at = loaded_at
+        self.validated_at = loaded_at
+
+
+class WsConnectionCache:
+    """
+    In-container LRU cache of connection metadata (the registry item, e.g. principal and codec, and optionally
+    subscribed topics) for per-message handlers, hence frames of chatty connections are handled without
+    reading DynamoDB.
+
+    Entries are served without I/O for ttl seconds. Afterwards an entry is revalidated by reading only its
+    version stamp, which the registry writes at $connect and bump_version() changes on every subscription
+    change, and is reloaded only if the stamp changed or the connection is gone. Entries are reloaded
+    unconditionally after max_age seconds, which bounds staleness of changes made without a new stamp.
+    """
+
+    def __init__(
+            self,
+            registry: WsConnectionRegistryClient,
+            subscription_index: Optional[WsSubscriptionIndexClient] = None,
+            max_size: int = 10000,
+            ttl: float = 30.0,
+            max_age: float = 900.0
+    ) -> None:
+        """
+        Constructor.
+
+        :param registry: Connection registry to load metadata from.
+        :param subscription_index: Subscription index to load topics from. Topics are not cached if not given.
+        :param max_size: Maximum number of cached connections.
+        :param ttl: Time in seconds an entry is served without any I/O.
+        :param max_age: Time in seconds after which an entry is reloaded even if its version stamp is unchanged.
+        """
+        self.__registry = registry
+        self.__subscription_index = subscription_index
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__max_age = max_age
+        self.__entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__stats = WsConnectionCacheStats()
+
+    @classmethod
+    def from_environment(cls, **kwargs) -> 'WsConnectionCache':
+        """
+        Creates a cache of the registry (and subscription index) configured in the environment.
+
+        :param kwargs: Additional constructor arguments.
+
+        :return: Cache.
+        """
+        subscription_index = None
+        if os.environ.get(ws_subscription_index_client.TABLE_NAME_ENV):
+            subscription_index = WsSubscriptionIndexClient()
+
+        kwargs.setdefault('max_size', int(os.environ.get(MAX_SIZE_ENV, 10000)))
+        kwargs.setdefault('ttl', float(os.environ.get(TTL_SECONDS_ENV, 30)))
+        kwargs.setdefault('max_age', float(os.environ.get(MAX_AGE_SECONDS_ENV, 900)))
+
+        return cls(registry=WsConnectionRegistryClient(), subscription_index=subscription_index, **kwargs)
+
+    @property
+    def stats(self) -> WsConnectionCacheStats:
+        return self.__stats
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, connection_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Gets metadata of a connection. The returned dictionary is shared by later calls and must not be modified.
+
+        :param connection_id: Connection id, e.g. event.connection_id.
+
+        :return: Registry item (with a topics list if a subscription index is given) or None if the connection
+        is not registered.
+        """
+        now = time.monotonic()
+
+        with self.__lock:
+            entry = self.__entries.get(connection_id)
+
+            if entry is not None and now - entry.validated_at < self.__ttl:
+                self.__entries.move_to_end(connection_id)
+                self.__stats.hits += 1
+                return entry.metadata
+
+        if entry is not None and now - entry.loaded_at < self.__max_age:
+            version = self.__registry.version(connection_id)
+
+            if version is not None and version == entry.version:
+                with self.__lock:
+                    entry.validated_at = now
+                    self.__stats.revalidations += 1
+                return entry.metadata
+
+        with self.__lock:
+            if entry is not None:
+                self.__stats.stale += 1
+            self.__stats.misses += 1
+
+        return self.__load(connection_id)
+
+    def invalidate(self, connection_id: str) -> None:
+        """
+        Drops cached metadata of a connection, e.g. at $disconnect.
+
+        :param connection_id: Connection id.
+
+        :return: No return.
+        """
+        with self.__lock:
+            self.__entries.pop(connection_id, None)
+
+    def subscribe(self, connection_id: str, topic: str) -> None:
+        """
+        Subscribes a connection to a topic, and stamps a new version of the connection, hence other containers
+        reload its metadata. The cached entry of this container is updated in place, unless another container
+        changed the connection since it was loaded.
+
+        :param connection_id: Connection id.
+        :param topic: Topic name.
+
+        :return: No return.
+        """
+        self.__require_subscription_index().subscribe(connection_id, topic)
+        self.__changed(connection_id, lambda topics: topics + [topic] if topic not in topics else topics)
+
+    def unsubscribe(self, connection_id: str, topic: str) -> None:
+        """
+        Unsubscribes a connection from a topic, and stamps a new version of the connection.
+
+        :param connection_id: Connection id.
+        :param topic: Topic name.
+
+        :return: No return.
+        """
+        self.__require_subscription_index().unsubscribe(connection_id, topic)
+        self.__changed(connection_id, lambda topics: [name for name in topics if name != topic])
+
+    def __require_subscription_index(self) -> WsSubscriptionIndexClient:
+        if self.__subscription_index is None:
+            raise ValueError('A subscription index is required to change subscriptions.')
+
+        return self.__subscription_index
+
+    def __changed(self, connection_id: str, change: Callable[[List[str]], List[str]]) -> None:
+        with self.__lock:
+            entry = self.__entries.get(connection_id)
+
+        # The entry is only patched if no other container stamped a version since it was loaded, otherwise
+        # its change would be hidden by the new stamp.
+        version = self.__registry.bump_version(connection_id, entry.version) if entry is not None else None
+
+        if version is None:
+            self.invalidate(connection_id)
+            self.__registry.bump_version(connection_id)
+            return
+
+        with self.__lock:
+            # Cached metadata is shared with callers, hence it is replaced rather than modified.
+            metadata = dict(entry.metadata)
+            metadata[VERSION_ATTRIBUTE] = version
+            metadata[TOPICS_KEY] = change(list(metadata.get(TOPICS_KEY, [])))
+
+            entry.metadata = metadata
+            entry.version = version
+            entry.validated_at = time.monotonic()
+
+    def __load(self, connection_id: str) -> Optional[Dict[str, Any]]:
+        loaded_at = time.monotonic()
+        metadata = self.__registry.get(connection_id)
+
+        if metadata is None:
+            self.invalidate(connection_id)
+            return None
+
+        if self.__subscription_index is not None:
+            metadata[TOPICS_KEY] = self.__subscription_index.topics(connection_id)
+
+        with self.__lock:
+            self.__entries[connection_id] = _Entry(metadata, loaded_at)
+            self.__entries.move_to_end(connection_id)
+
+            while len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+                self.__stats.evictions += 1
+
+        return metadata
@@ -0,0 +1,251 @@
+import asyncio
+import os
+import random
+import time
+from typing import Iterable, Optional
+
+from b_aws_websocket_api.runtime import ws_connection_registry_client, ws_subscription_index_client, ws_dynamodb
+from b_aws_websocket_api.runtime.ws_connection_registry_client import WsConnectionRegistryClient
+from b_aws_websocket_api.runtime.ws_connections_client import WsConnectionsClient
+from b_aws_websocket_api.runtime.ws_sigv4 import WsSigV4Signer
+from b_aws_websocket_api.runtime.ws_subscription_index_client import WsSubscriptionIndexClient
+
+# The same variable the fan-out pipeline uses.
+CONNECTIONS_URL_ENV = 'WS_CONNECTIONS_URL'
+MIN_AGE_SECONDS_ENV = 'WS_SWEEPER_MIN_AGE'
+MAX_IN_FLIGHT_ENV = 'WS_SWEEPER_MAX_IN_FLIGHT'
+
+
+class WsSweepStats:
+    """
+    Statistics of a single sweep.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor.
+        """
+        self.checked = 0
+        self.live = 0
+        self.gone = 0
+        self.throttled = 0
+        self.failed = 0
+        self.pruned = 0
+        # False if the sweep stopped at its deadline before checking every connection.
+        self.complete = True
+        self.duration = 0.0
+
+    def to_dict(self) -> dict:
+        return dict(
+            checked=self.checked,
+            live=self.live,
+            gone=self.gone,
+            throttled=self.throttled,
+            failed=self.failed,
+            pruned=self.pruned,
+            complete=self.complete,
+            duration=self.duration,
+        )
+
+
+class WsConnectionPruner:
+    """
+    Removes stale connections, i.e. connections for which the @connections management API answered
+    410 Gone, from the connection registry and the subscription index with batched deletes. Hence later
+    broadcasts only pay for live connections.
+
+    Gone connections are reported by WsBroadcaster, WsCoalescer and WsFanoutSender when given a pruner.
+    sweep() additionally validates old registered connections proactively (see WsConnectionSweeper).
+    """
+
+    def __init__(
+            self,
+            registry: WsConnectionRegistryClient,
+            subscription_index: Optional[WsSubscriptionIndexClient] = None,
+            connections_url: Optional[str] = None,
+            region: Optional[str] = None,
+            signer: Optional[WsSigV4Signer] = None,
+            max_in_flight: int = 50,
+            max_attempts: int = 5,
+            backoff_base: float = 0.05,
+            backoff_cap: float = 2.0,
+            timeout: float = 10.0
+    ) -> None:
+        """
+        Constructor.
+
+        :param registry: Connection registry to remove connections from.
+        :param subscription_index: Subscription index to remove subscriptions of removed connections from.
+        :param connections_url: The @connections endpoint of a stage. Required to sweep.
+        :param region: AWS region. Parsed from the url if not given.
+        :param signer: Request signer. Created from the environment credentials if not given.
+        :param max_in_flight: Maximum number of concurrent validation requests of a sweep.
+        :param max_attempts: Maximum number of attempts of a throttled validation request.
+        :param backoff_base: Base delay of the exponential backoff in seconds.
+        :param backoff_cap: Maximum delay of the exponential backoff in seconds.
+        :param timeout: Timeout of a single request in seconds.
+        """
+        self.__registry = registry
+        self.__subscription_index = subscription_index
+        self.__connections_url = connections_url
+        self.__region = region
+        self.__signer = signer
+        self.__max_in_flight = max_in_flight
+        self.__max_attempts = max_attempts
+        self.__backoff_base = backoff_base
+        self.__backoff_cap = backoff_cap
+        self.__timeout = timeout
+
+    @classmethod
+    def from_environment(cls, **kwargs) -> Optional['WsConnectionPruner']:
+        """
+        Creates a pruner for the registry (and subscription index) configured in the environment.
+
+        :param kwargs: Additional constructor arguments.
+
+        :return: Pruner or None if no registry is configured.
+        """
+        if not os.environ.get(ws_connection_registry_client.TABLE_NAME_ENV):
+            return None
+
+        subscription_index = None
+        if os.environ.get(ws_subscription_index_client.TABLE_NAME_ENV):
+            subscription_index = WsSubscriptionIndexClient()
+
+        kwargs.setdefault('connections_url', os.environ.get(CONNECTIONS_URL_ENV))
+        kwargs.setdefault('max_in_flight', int(os.environ.get(MAX_IN_FLIGHT_ENV, 50)))
+
+        return cls(registry=WsConnectionRegistryClient(), subscription_index=subscription_index, **kwargs)
+
+    def prune(self, connection_ids: Iterable[str]) -> int:
+        """
+        Removes connections and their subscriptions with batched deletes.
+
+        :param connection_ids: Ids of gone connections. Duplicates are removed once.
+
+        :return: Number of removed connections.
+        """
+        connection_ids = list(dict.fromkeys(connection_ids))
+
+        if not connection_ids:
+            return 0
+
+        self.__registry.unregister_all(connection_ids)
+
+        if self.__subscription_index:
+            self.__subscription_index.unsubscribe_all(connection_ids)
+
+        return len(connection_ids)
+
+    def sweep(
+            self,
+            min_age_seconds: int = 10 * 60,
+            deadline: Optional[float] = None,
+            total_segments: int = 8,
+            page_size: int = 500
+    ) -> WsSweepStats:
+        """
+        Synchronous wrapper of sweep_async(), convenient in Lambda handlers.
+
+        :param min_age_seconds: Only connections older than this are validated.
+        :param deadline: Epoch time in seconds to stop at, e.g. derived from the remaining Lambda time.
+        :param total_segments: Number of parallel registry scan segments.
+        :param page_size: Number of connections validated (and their gone ones pruned) at a time.
+
+        :return: Sweep statistics.
+        """
+        return asyncio.run(self.sweep_async(min_age_seconds, deadline, total_segments, page_size))
+
+    async def sweep_async(
+            self,
+            min_age_seconds: int = 10 * 60,
+            deadline: Optional[float] = None,
+            total_segments: int = 8,
+            page_size: int = 500
+    ) -> WsSweepStats:
+        """
+        Validates registered connections older than the given age with GET @connections/{id} calls, keeping
+        at most max_in_flight requests running, and prunes gone ones page by page. The next page of the
+        registry scan is read while the current one is validated.
+
+        :param min_age_seconds: Only connections older than this are validated.
+        :param deadline: Epoch time in seconds to stop at, e.g. derived from the remaining Lambda time.
+        :param total_segments: Number of parallel registry scan segments.
+        :param page_size: Number of connections validated (and their gone ones pruned) at a time.
+
+        :return: Sweep statistics.
+        """
+        if not self.__connections_url:
+            raise ValueError('A connections url is required to sweep.')
+
+        loop = asyncio.get_running_loop()
+        stats = WsSweepStats()
+        started = time.perf_counter()
+
+        items = self.__registry.scan(
+            total_segments,
+            projection=ws_connection_registry_client.SORT_KEY,
+            connected_before=int(time.time()) - min_age_seconds,
+        )
+        pages = ws_dynamodb.chunks((item[ws_connection_registry_client.SORT_KEY] for item in items), page_size)
+
+        client = WsConnectionsClient(
+            connections_url=self.__connections_url,
+            region=self.__region,
+            signer=self.__signer,
+            max_connections=self.__max_in_flight,
+            timeout=self.__timeout
+        )
+
+        async with client:
+            # Scan pages are read in a worker thread, hence the event loop keeps validating meanwhile.
+            page = await loop.run_in_executor(None, next, pages, None)
+
+            while page is not None:
+                if deadline is not None and time.time() >= deadline:
+                    stats.complete = False
+                    break
+
+                upcoming = loop.run_in_executor(None, next, pages, None)
+                statuses = await asyncio.gather(*[self.__check(client, connection_id, stats) for connection_id in page])
+
+                gone = [connection_id for connection_id, status in zip(page, statuses) if status == 410]
+                stats.pruned += await loop.run_in_executor(None, self.prune, gone)
+
+                page = await upcoming
+
+        stats.duration = time.perf_counter() - started
+
+        return stats
+
+    async def __check(self, client: WsConnectionsClient, connection_id: str, stats: WsSweepStats) -> Optional[int]:
+        stats.checked += 1
+
+        for attempt in range(self.__max_attempts):
+            try:
+                response = await client.get_connection(connection_id)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                status = None
+            else:
+                status = response.status
+
+            if status is not None and 200 <= status < 300:
+                stats.live += 1
+                return status
+
+            if status == 410:
+                stats.gone += 1
+                return status
+
+            if status == 429:
+                stats.throttled += 1
+            elif status is not None and status < 500:
+                break
+
+            if attempt + 1 < self.__max_attempts:
+                await asyncio.sleep(random.uniform(0, min(self.__backoff_cap, self.__backoff_base * 2 ** attempt)))
+
+        # Connections that could not be validated are kept.
+        stats.failed += 1
+
+        return None
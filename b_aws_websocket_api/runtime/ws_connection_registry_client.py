@@ -0,0 +1,329 @@
+import os
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from b_aws_websocket_api.runtime import ws_dynamodb
+from b_aws_websocket_api.runtime.ws_codec import CODEC_ATTRIBUTE
+from b_aws_websocket_api.runtime.ws_metrics import get_metrics
+
+TABLE_NAME_ENV = 'WS_CONNECTION_REGISTRY_TABLE'
+SHARD_COUNT_ENV = 'WS_CONNECTION_REGISTRY_SHARDS'
+TTL_SECONDS_ENV = 'WS_CONNECTION_REGISTRY_TTL'
+# Comma separated codecs clients may negotiate at $connect. All registered codecs if not set.
+CODECS_ENV = 'WS_CONNECTION_REGISTRY_CODECS'
+
+PARTITION_KEY = 'pk'
+SORT_KEY = 'connectionId'
+TTL_ATTRIBUTE = 'expiresAt'
+# Changes whenever the connection or its subscriptions change, hence caches can revalidate with a tiny read.
+VERSION_ATTRIBUTE = 'version'
+
+
+def new_version() -> int:
+    return time.time_ns()
+
+
+class WsConnectionRegistryClient:
+    """
+    Runtime API of a connection registry table created by the WsConnectionRegistry construct.
+
+    Items are spread over a fixed number of write shards (partition key "shard#N" derived from
+    the connection id), hence a connect storm never concentrates on a single hot partition.
+    """
+
+    def __init__(
+            self,
+            table_name: Optional[str] = None,
+            shard_count: Optional[int] = None,
+            ttl_seconds: Optional[int] = None,
+            client: Any = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param table_name: Registry table name. Read from the environment if not given.
+        :param shard_count: Number of write shards. Read from the environment if not given.
+        :param ttl_seconds: Lifetime of a registered connection. Read from the environment if not given.
+        :param client: Low-level DynamoDB client. A default boto3 client is created if not given.
+        """
+        self.__table_name = table_name or os.environ[TABLE_NAME_ENV]
+        self.__shard_count = int(shard_count or os.environ.get(SHARD_COUNT_ENV, 16))
+        self.__ttl_seconds = int(ttl_seconds or os.environ.get(TTL_SECONDS_ENV, 2 * 60 * 60))
+        self.__client = ws_dynamodb.create_client(client)
+
+    @property
+    def table_name(self) -> str:
+        return self.__table_name
+
+    @property
+    def shard_count(self) -> int:
+        return self.__shard_count
+
+    @property
+    def client(self) -> Any:
+        return self.__client
+
+    def shard_key(self, connection_id: str) -> str:
+        """
+        Deterministically maps a connection id to its write shard.
+
+        :param connection_id: Connection id.
+
+        :return: Partition key value.
+        """
+        return f'shard#{zlib.crc32(connection_id.encode("utf-8")) % self.__shard_count}'
+
+    def key(self, connection_id: str) -> Dict[str, str]:
+        return {PARTITION_KEY: self.shard_key(connection_id), SORT_KEY: connection_id}
+
+    def register(
+            self,
+            connection_id: str,
+            attributes: Optional[Dict[str, Any]] = None,
+            ttl_seconds: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Stores a connection.
+
+        :param connection_id: Connection id.
+        :param attributes: Additional attributes to store with the connection.
+        :param ttl_seconds: Lifetime override of this connection.
+
+        :return: Stored item.
+        """
+        now = int(time.time())
+
+        item = dict(attributes or {})
+        item.update(self.key(connection_id))
+        item['connectedAt'] = item.get('connectedAt', now)
+        item[TTL_ATTRIBUTE] = now + (ttl_seconds or self.__ttl_seconds)
+        item[VERSION_ATTRIBUTE] = new_version()
+
+        self.__client.put_item(TableName=self.__table_name, Item=ws_dynamodb.serialize_item(item))
+
+        return item
+
+    def unregister(self, connection_id: str) -> None:
+        """
+        Removes a connection.
+
+        :param connection_id: Connection id.
+
+        :return: No return.
+        """
+        self.__client.delete_item(
+            TableName=self.__table_name,
+            Key=ws_dynamodb.serialize_item(self.key(connection_id))
+        )
+
+    def unregister_all(self, connection_ids: Iterable[str]) -> int:
+        """
+        Removes many connections with batched deletes.
+
+        :param connection_ids: Connection ids.
+
+        :return: Number of removed connections.
+        """
+        keys = (self.key(connection_id) for connection_id in connection_ids)
+
+        return ws_dynamodb.batch_write(self.__client, self.__table_name, deletes=keys)
+
+    def get(self, connection_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Gets a live connection.
+
+        :param connection_id: Connection id.
+
+        :return: Connection item or None if it does not exist or has expired.
+        """
+        with get_metrics().timer('RegistryLookupLatency', {'Operation': 'Get'}):
+            response = self.__client.get_item(
+                TableName=self.__table_name,
+                Key=ws_dynamodb.serialize_item(self.key(connection_id))
+            )
+
+        item = response.get('Item')
+        if not item:
+            return None
+
+        item = ws_dynamodb.deserialize_item(item)
+
+        return item if self.__is_live(item, time.time()) else None
+
+    def version(self, connection_id: str) -> Optional[int]:
+        """
+        Reads only the version stamp of a live connection.
+
+        :param connection_id: Connection id.
+
+        :return: Version stamp or None if the connection does not exist or has expired.
+        """
+        with get_metrics().timer('RegistryLookupLatency', {'Operation': 'Version'}):
+            response = self.__client.get_item(
+                TableName=self.__table_name,
+                Key=ws_dynamodb.serialize_item(self.key(connection_id)),
+                ProjectionExpression='#version, #ttl',
+                ExpressionAttributeNames={'#version': VERSION_ATTRIBUTE, '#ttl': TTL_ATTRIBUTE},
+            )
+
+        item = response.get('Item')
+        if not item:
+            return None
+
+        item = ws_dynamodb.deserialize_item(item)
+        if not self.__is_live(item, time.time()):
+            return None
+
+        return item.get(VERSION_ATTRIBUTE, 0)
+
+    def bump_version(self, connection_id: str, expected_version: Optional[int] = None) -> Optional[int]:
+        """
+        Writes a new version stamp of a connection, e.g. after its subscriptions changed, hence other containers
+        drop their cached metadata of it.
+
+        :param connection_id: Connection id.
+        :param expected_version: Only replaces this version stamp, e.g. of cached metadata, hence changes of
+        other containers since are never hidden.
+
+        :return: New version stamp or None if the connection is not registered or has another version stamp.
+        """
+        version = new_version()
+        condition = 'attribute_exists(#ttl)'
+        values = {':version': ws_dynamodb.serialize(version)}
+
+        if expected_version is not None:
+            condition += ' AND #version = :expected'
+            values[':expected'] = ws_dynamodb.serialize(expected_version)
+
+        try:
+            self.__client.update_item(
+                TableName=self.__table_name,
+                Key=ws_dynamodb.serialize_item(self.key(connection_id)),
+                UpdateExpression='SET #version = :version',
+                # Never create a partial item of an unregistered connection.
+                ConditionExpression=condition,
+                ExpressionAttributeNames={'#version': VERSION_ATTRIBUTE, '#ttl': TTL_ATTRIBUTE},
+                ExpressionAttributeValues=values,
+            )
+        except Exception as ex:
+            if ws_dynamodb.is_conditional_check_failure(ex):
+                return None
+            raise
+
+        return version
+
+    def add_usage(self, connection_id: str, usage: Dict[str, int]) -> Optional[Dict[str, int]]:
+        """
+        Atomically adds to usage counters of a connection, e.g. requests consumed from rate limits of it.
+
+        :param connection_id: Connection id.
+        :param usage: Counter attribute names to amounts (zero reads a counter).
+
+        :return: Totals of the counters or None if the connection is not registered.
+        """
+        names = {f'#c{i}': name for i, name in enumerate(usage)}
+        values = {f':c{i}': ws_dynamodb.serialize(amount) for i, amount in enumerate(usage.values())}
+
+        try:
+            response = self.__client.update_item(
+                TableName=self.__table_name,
+                Key=ws_dynamodb.serialize_item(self.key(connection_id)),
+                UpdateExpression='ADD ' + ', '.join(f'#c{i} :c{i}' for i in range(len(usage))),
+                ConditionExpression='attribute_exists(#ttl)',
+                ExpressionAttributeNames={**names, '#ttl': TTL_ATTRIBUTE},
+                ExpressionAttributeValues=values,
+                ReturnValues='UPDATED_NEW',
+            )
+        except Exception as ex:
+            if ws_dynamodb.is_conditional_check_failure(ex):
+                return None
+            raise
+
+        return ws_dynamodb.deserialize_item(response.get('Attributes', {}))
+
+    def batch_get(self, connection_ids: Iterable[str], projection: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Resolves many connections with BatchGetItem.
+
+        :param connection_ids: Connection ids (consumed lazily).
+        :param projection: Optional projection expression. It must include the TTL attribute.
+
+        :return: Generator of live connection items (in no particular order).
+        """
+        now = time.time()
+        keys = (self.key(connection_id) for connection_id in connection_ids)
+        found = 0
+
+        for item in ws_dynamodb.batch_get(self.__client, self.__table_name, keys, projection):
+            if self.__is_live(item, now):
+                found += 1
+                yield item
+
+        get_metrics().count('RegistryBatchLookupItems', found)
+
+    def scan(
+            self,
+            total_segments: int = 8,
+            projection: Optional[str] = None,
+            connected_before: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streams all live connections using a parallel scan.
+
+        :param total_segments: Number of parallel scan segments.
+        :param projection: Optional projection expression.
+        :param connected_before: Only connections established before this epoch second, e.g. to sweep old ones.
+
+        :return: Generator of connection items.
+        """
+        # Expired items linger until DynamoDB TTL removes them, hence filter them out explicitly.
+        kwargs: Dict[str, Any] = dict(
+            FilterExpression='#ttl > :now',
+            ExpressionAttributeNames={'#ttl': TTL_ATTRIBUTE},
+            ExpressionAttributeValues={':now': ws_dynamodb.serialize(int(time.time()))},
+        )
+
+        if connected_before is not None:
+            kwargs['FilterExpression'] += ' AND #connectedAt < :before'
+            kwargs['ExpressionAttributeNames']['#connectedAt'] = 'connectedAt'
+            kwargs['ExpressionAttributeValues'][':before'] = ws_dynamodb.serialize(int(connected_before))
+
+        if projection:
+            kwargs['ProjectionExpression'] = projection
+
+        return ws_dynamodb.parallel_scan(self.__client, self.__table_name, total_segments, **kwargs)
+
+    def connection_ids(self, total_segments: int = 8) -> Iterator[str]:
+        """
+        Streams ids of all live connections using a parallel scan.
+
+        :param total_segments: Number of parallel scan segments.
+
+        :return: Generator of connection ids.
+        """
+        for item in self.scan(total_segments, projection=SORT_KEY):
+            yield item[SORT_KEY]
+
+    def connection_codecs(self, total_segments: int = 8) -> Iterator[Dict[str, Any]]:
+        """
+        Streams ids and negotiated codecs of all live connections using a parallel scan,
+        e.g. for WsBroadcaster.broadcast_document().
+
+        :param total_segments: Number of parallel scan segments.
+
+        :return: Generator of items with connectionId and (if negotiated) codec attributes.
+        """
+        return ws_dynamodb.parallel_scan(
+            self.__client,
+            self.__table_name,
+            total_segments,
+            FilterExpression='#ttl > :now',
+            ProjectionExpression='#id, #codec, #ttl',
+            ExpressionAttributeNames={'#id': SORT_KEY, '#codec': CODEC_ATTRIBUTE, '#ttl': TTL_ATTRIBUTE},
+            ExpressionAttributeValues={':now': ws_dynamodb.serialize(int(time.time()))},
+        )
+
+    @staticmethod
+    def __is_live(item: Dict[str, Any], now: float) -> bool:
+        return TTL_ATTRIBUTE not in item or item[TTL_ATTRIBUTE] > now
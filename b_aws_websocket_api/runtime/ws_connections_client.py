@@ -0,0 +1,263 @@
+import asyncio
+import re
+import ssl
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from b_aws_websocket_api.runtime.ws_sigv4 import WsSigV4Signer
+
+
+class WsConnectionsResponse:
+    """
+    Response of a single @connections management API call.
+    """
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes) -> None:
+        """
+        Constructor.
+
+        :param status: HTTP status code.
+        :param headers: Response headers (lower-cased names).
+        :param body: Response body.
+        """
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    @property
+    def gone(self) -> bool:
+        return self.status == 410
+
+    @property
+    def throttled(self) -> bool:
+        return self.status == 429
+
+
+class _WsHttpConnection:
+    """
+    A single keep-alive HTTP/1.1 connection.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, head: bytes, body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        # Avoid concatenating (copying) a potentially large, shared body for every request.
+        self.writer.writelines([head, body])
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Connection closed by the remote host.')
+
+        status = int(status_line.split(b' ', 2)[1])
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks: List[bytes] = []
+            while True:
+                size = int((await self.reader.readline()).split(b';', 1)[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            payload = b''.join(chunks)
+        else:
+            payload = await self.reader.readexactly(int(headers.get('content-length', '0')))
+
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+
+        return status, headers, payload
+
+    @property
+    def closed(self) -> bool:
+        return self.writer.is_closing()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class WsConnectionsClient:
+    """
+    Asynchronous client for the API Gateway @connections management API.
+
+    Requests are SigV4-signed and sent over a bounded pool of keep-alive connections,
+    hence thousands of calls reuse a handful of TLS sessions.
+    """
+
+    def __init__(
+            self,
+            connections_url: str,
+            region: Optional[str] = None,
+            signer: Optional[WsSigV4Signer] = None,
+            max_connections: int = 50,
+            timeout: float = 10.0
+    ) -> None:
+        """
+        Constructor.
+
+        :param connections_url: The @connections endpoint, i.e. the value of WsStage.connections_url.
+        :param region: AWS region. Parsed from the url if not given.
+        :param signer: Request signer. Created from the environment credentials if not given.
+        If no credentials are available either, requests are sent unsigned (useful for local stand-ins).
+        :param max_connections: Maximum number of pooled connections (and hence in-flight requests).
+        :param timeout: Timeout of a single request in seconds.
+        """
+        parts = urlsplit(connections_url.rstrip('/'))
+
+        self.__secure = parts.scheme == 'https'
+        self.__hostname = parts.hostname
+        self.__port = parts.port or (443 if self.__secure else 80)
+        self.__host_header = parts.netloc
+        self.__base_path = parts.path
+        self.__timeout = timeout
+
+        if region is None:
+            match = re.search(r'\.execute-api\.([a-z0-9-]+)\.amazonaws\.com', parts.netloc)
+            region = match.group(1) if match else 'us-east-1'
+
+        self.__signer = signer or WsSigV4Signer.from_environment(region)
+
+        self.__ssl_context = ssl.create_default_context() if self.__secure else None
+        self.__idle: List[_WsHttpConnection] = []
+        self.__max_connections = max_connections
+        # Created lazily so that the semaphore binds to the running event loop.
+        self.__semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> 'WsConnectionsClient':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def post_to_connection(
+            self,
+            connection_id: str,
+            data: bytes,
+            payload_hash: Optional[str] = None
+    ) -> WsConnectionsResponse:
+        """
+        Sends data to a connection.
+
+        :param connection_id: Target connection id.
+        :param data: Raw message bytes.
+        :param payload_hash: Precomputed SHA-256 hex digest of the data.
+
+        :return: Response.
+        """
+        return await self.request('POST', connection_id, data, payload_hash)
+
+    async def get_connection(self, connection_id: str) -> WsConnectionsResponse:
+        """
+        Gets information about a connection.
+
+        :param connection_id: Connection id.
+
+        :return: Response.
+        """
+        return await self.request('GET', connection_id)
+
+    async def delete_connection(self, connection_id: str) -> WsConnectionsResponse:
+        """
+        Disconnects a client.
+
+        :param connection_id: Connection id.
+
+        :return: Response.
+        """
+        return await self.request('DELETE', connection_id)
+
+    async def request(
+            self,
+            method: str,
+            connection_id: str,
+            body: bytes = b'',
+            payload_hash: Optional[str] = None
+    ) -> WsConnectionsResponse:
+        """
+        Sends a signed request for a connection through the pool.
+
+        :param method: HTTP method.
+        :param connection_id: Connection id.
+        :param body: Request body.
+        :param payload_hash: Precomputed SHA-256 hex digest of the body.
+
+        :return: Response.
+        """
+        path = quote(f'{self.__base_path}/{connection_id}', safe='/~')
+
+        headers = {'content-length': str(len(body))}
+        if self.__signer:
+            headers = self.__signer.sign(method, self.__host_header, path, headers, body, payload_hash=payload_hash)
+        else:
+            headers['host'] = self.__host_header
+
+        head = (
+            f'{method} {path} HTTP/1.1\r\n' +
+            ''.join(f'{name}: {value}\r\n' for name, value in headers.items()) +
+            'connection: keep-alive\r\n\r\n'
+        ).encode('latin-1')
+
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.__max_connections)
+
+        async with self.__semaphore:
+            # A pooled connection might have been closed by the server meanwhile. Retry once on a fresh one.
+            for attempt in range(2):
+                connection = await self.__acquire(fresh=attempt > 0)
+                try:
+                    status, response_headers, payload = await asyncio.wait_for(
+                        connection.request(head, body),
+                        self.__timeout
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    connection.close()
+                    if attempt:
+                        raise
+                    continue
+                except BaseException:
+                    connection.close()
+                    raise
+
+                self.__release(connection)
+                return WsConnectionsResponse(status, response_headers, payload)
+
+    async def close(self) -> None:
+        """
+        Closes all pooled connections.
+
+        :return: No return.
+        """
+        while self.__idle:
+            self.__idle.pop().close()
+
+    async def __acquire(self, fresh: bool = False) -> _WsHttpConnection:
+        while self.__idle and not fresh:
+            connection = self.__idle.pop()
+            if not connection.closed:
+                return connection
+
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.__hostname, self.__port, ssl=self.__ssl_context),
+            self.__timeout
+        )
+
+        return _WsHttpConnection(reader, writer)
+
+    def __release(self, connection: _WsHttpConnection) -> None:
+        if not connection.closed:
+            self.__idle.append(connection)
@@ -0,0 +1,185 @@
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from b_aws_websocket_api.runtime.ws_event import WsEvent
+from b_aws_websocket_api.runtime.ws_metrics import WsMetrics, get_metrics
+from b_aws_websocket_api.runtime.ws_rate_limiter import WsRateLimiter
+from b_aws_websocket_api.runtime.ws_route_selection import compile_selection_expression
+from b_aws_websocket_api.runtime.ws_tracing import WsTracer, get_tracer
+
+WsHandler = Callable[[WsEvent, Any], Any]
+
+ROUTE_SELECTION_EXPRESSION_ENV = 'WS_ROUTE_SELECTION_EXPRESSION'
+
+
+class WsDispatcher:
+    """
+    Dispatches websocket events to handlers by their route key.
+
+    Instances are callable with a Lambda (event, context) signature, hence a module level
+    dispatcher can be used as a Lambda function handler directly.
+
+    Messages arriving through the $default route (e.g. of a collapsed WsRouter) are routed
+    by the route selection expression, which is compiled once into a field extractor.
+    """
+
+    def __init__(
+            self,
+            default_handler: Optional[WsHandler] = None,
+            selection_expression: Optional[str] = None,
+            rate_limiter: Optional[WsRateLimiter] = None,
+            metrics: Optional[WsMetrics] = None,
+            tracer: Optional[WsTracer] = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param default_handler: Handler for route keys that have no handler registered.
+        :param selection_expression: Route selection expression used to route $default messages.
+        Defaults to the WS_ROUTE_SELECTION_EXPRESSION environment variable (set by WsRouter).
+        :param rate_limiter: Rate limiter of messages. Rejected messages are answered with status 429 without
+        calling a handler.
+        :param metrics: Metrics of dispatched events. Defaults to the shared metrics of the container.
+        :param tracer: Tracer of dispatched events. Defaults to the shared tracer of the container.
+        """
+        self.__handlers: Dict[str, WsHandler] = {}
+        self.__default_handler = default_handler
+        self.__rate_limiter = rate_limiter
+        self.__metrics = metrics
+        self.__tracer = tracer
+
+        selection_expression = selection_expression or os.environ.get(ROUTE_SELECTION_EXPRESSION_ENV)
+        self.__select = compile_selection_expression(selection_expression) if selection_expression else None
+
+    def route(self, route_key: str) -> Callable[[WsHandler], WsHandler]:
+        """
+        Decorator that registers a handler for a route key.
+
+        :param route_key: Route key, e.g. $connect or sendMessage.
+
+        :return: Decorator.
+        """
+        def decorator(handler: WsHandler) -> WsHandler:
+            self.add_route(route_key, handler)
+            return handler
+
+        return decorator
+
+    def add_route(self, route_key: str, handler: WsHandler) -> None:
+        """
+        Registers a handler for a route key.
+
+        :param route_key: Route key.
+        :param handler: Callable accepting a parsed event and a Lambda context.
+
+        :return: No return.
+        """
+        if route_key in self.__handlers:
+            raise ValueError(f'Handler for route {route_key} is already registered.')
+
+        self.__handlers[route_key] = handler
+
+    @property
+    def route_keys(self) -> List[str]:
+        return list(self.__handlers)
+
+    def dispatch(self, event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+        """
+        Dispatches a raw Lambda event. With metrics enabled, records dispatch latency, message, rate limit
+        and handler error counts per route and flushes all buffered metrics of the invocation. With tracing
+        enabled, the handler runs in a ws.dispatch span annotated with the route key, hence messages it
+        publishes (e.g. to a fan-out queue) continue the trace of the invocation.
+
+        :param event: Raw Lambda event.
+        :param context: Lambda context.
+
+        :return: Lambda proxy response.
+        """
+        metrics = self.__metrics or get_metrics()
+        started = time.perf_counter()
+
+        ws_event = WsEvent(event)
+        route_key = ws_event.route_key
+        handler = None
+
+        # Messages of a collapsed router arrive through $default, hence are routed by the selection expression
+        # first. Only registered keys are taken over, anything else stays on $default.
+        if route_key == '$default' and ws_event.event_type == 'MESSAGE' and self.__select is not None:
+            selected = self.select_route(ws_event)
+            handler = self.__handlers.get(selected) if selected else None
+            route_key = selected if handler else route_key
+
+        handler = handler or self.__handlers.get(route_key) or self.__handlers.get('$default') or self.__default_handler
+        # Only registered (or API Gateway) route keys get here, never raw selection results, hence clients can
+        # not create new metric dimension values or rate limit buckets.
+        dimensions = {'Route': route_key or '-'}
+        tracer = self.__tracer or get_tracer()
+        annotations = dict(route_key=route_key or '-', event_type=ws_event.event_type or '-')
+
+        with tracer.span('ws.dispatch', annotations=annotations) as span:
+            try:
+                metrics.count('Messages', dimensions=dimensions)
+
+                if self.__rate_limiter is not None and ws_event.event_type == 'MESSAGE':
+                    if not self.__rate_limiter.allow(ws_event.connection_id, route_key):
+                        metrics.count('RateLimited', dimensions=dimensions)
+                        span.annotate('rate_limited', True)
+                        return dict(statusCode=429, body=json.dumps(dict(message='Too many requests.')))
+
+                if handler is None:
+                    return dict(statusCode=404, body=json.dumps(dict(message=f'Unknown route {ws_event.route_key}.')))
+
+                return self.to_response(handler(ws_event, context))
+            except Exception:
+                metrics.count('HandlerErrors', dimensions=dimensions)
+                raise
+            finally:
+                if metrics.enabled:
+                    metrics.record('DispatchLatency', (time.perf_counter() - started) * 1000, dimensions=dimensions)
+                    metrics.flush()
+
+    __call__ = dispatch
+
+    def select_route(self, event: WsEvent) -> Optional[str]:
+        """
+        Selects a route key of a message with the route selection expression. Like API Gateway, never selects
+        the predefined $connect, $disconnect and $default routes.
+
+        :param event: Parsed event.
+
+        :return: Route key or None if it can not be selected.
+        """
+        if self.__select is None or event.raw.get('isBase64Encoded'):
+            return None
+
+        try:
+            # Parsed document is cached on the event, hence handlers do not parse it again.
+            selected = self.__select(event.json())
+        except ValueError:
+            return None
+
+        return None if selected is None or selected.startswith('$') else selected
+
+    @staticmethod
+    def to_response(result: Any) -> Dict[str, Any]:
+        """
+        Converts a handler result to a Lambda proxy response.
+
+        :param result: None, a ready proxy response, text, bytes or a JSON-serializable object.
+
+        :return: Lambda proxy response.
+        """
+        if result is None:
+            return dict(statusCode=200)
+
+        if isinstance(result, dict) and 'statusCode' in result:
+            return result
+
+        if isinstance(result, bytes):
+            result = result.decode('utf-8')
+        elif not isinstance(result, str):
+            result = json.dumps(result, separators=(',', ':'))
+
+        return dict(statusCode=200, body=result)
@@ -0,0 +1,321 @@
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+
+def create_client(client: Any = None) -> Any:
+    """
+    Returns the given DynamoDB client or creates a default one.
+    boto3 is imported lazily, hence modules using this helper stay cheap to import.
+
+    :param client: Optional low-level DynamoDB client (e.g. pointing to a local DynamoDB stand-in).
+
+    :return: Low-level DynamoDB client.
+    """
+    if client is not None:
+        return client
+
+    import boto3
+
+    return boto3.client('dynamodb')
+
+
+def serialize(value: Any) -> Dict[str, Any]:
+    """
+    Converts a python value to a DynamoDB attribute value.
+
+    :param value: Python value.
+
+    :return: DynamoDB attribute value.
+    """
+    if value is None:
+        return {'NULL': True}
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, (int, float)):
+        return {'N': str(value)}
+    if isinstance(value, str):
+        return {'S': value}
+    if isinstance(value, (bytes, bytearray)):
+        return {'B': bytes(value)}
+    if isinstance(value, dict):
+        return {'M': serialize_item(value)}
+    if isinstance(value, (set, frozenset)):
+        return {'SS': sorted(value)}
+    if isinstance(value, (list, tuple)):
+        return {'L': [serialize(item) for item in value]}
+
+    raise TypeError(f'Unsupported type {type(value)}.')
+
+
+def deserialize(attribute: Dict[str, Any]) -> Any:
+    """
+    Converts a DynamoDB attribute value to a python value.
+
+    :param attribute: DynamoDB attribute value.
+
+    :return: Python value.
+    """
+    (kind, value), = attribute.items()
+
+    if kind == 'N':
+        return int(value) if value.lstrip('-').isdigit() else float(value)
+    if kind in ('S', 'B', 'BOOL'):
+        return value
+    if kind == 'NULL':
+        return None
+    if kind == 'M':
+        return deserialize_item(value)
+    if kind == 'L':
+        return [deserialize(item) for item in value]
+    if kind in ('SS', 'BS'):
+        return set(value)
+    if kind == 'NS':
+        return {int(item) if item.lstrip('-').isdigit() else float(item) for item in value}
+
+    raise TypeError(f'Unsupported attribute type {kind}.')
+
+
+def serialize_item(item: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return {key: serialize(value) for key, value in item.items()}
+
+
+def deserialize_item(item: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    return {key: deserialize(value) for key, value in item.items()}
+
+
+def is_conditional_check_failure(ex: Exception) -> bool:
+    response = getattr(ex, 'response', None) or {}
+    return response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException'
+
+
+def backoff(attempt: int, base: float = 0.05, cap: float = 2.0) -> None:
+    """
+    Sleeps with full jitter exponential backoff.
+
+    :param attempt: Zero-based attempt number.
+    :param base: Base delay in seconds.
+    :param cap: Maximum delay in seconds.
+
+    :return: No return.
+    """
+    time.sleep(random.uniform(0, min(cap, base * 2 ** attempt)))
+
+
+def chunks(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Splits an iterable into lists of at most the given size.
+
+    :param iterable: Any iterable (consumed lazily).
+    :param size: Maximum chunk size.
+
+    :return: Chunks generator.
+    """
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def batch_get(
+        client: Any,
+        table_name: str,
+        keys: Iterable[Dict[str, Any]],
+        projection: Optional[str] = None,
+        max_attempts: int = 8
+) -> Iterator[Dict[str, Any]]:
+    """
+    Resolves many keys with BatchGetItem (100 keys per call), retrying unprocessed keys.
+
+    :param client: Low-level DynamoDB client.
+    :param table_name: Table name.
+    :param keys: Python-typed primary keys.
+    :param projection: Optional projection expression.
+    :param max_attempts: Maximum attempts per batch for unprocessed keys.
+
+    :return: Generator of found items (in no particular order).
+    """
+    for chunk in chunks(keys, 100):
+        request: Dict[str, Any] = {'Keys': [serialize_item(key) for key in chunk]}
+        if projection:
+            request['ProjectionExpression'] = projection
+
+        pending = {table_name: request}
+
+        for attempt in range(max_attempts):
+            response = client.batch_get_item(RequestItems=pending)
+
+            for item in response.get('Responses', {}).get(table_name, []):
+                yield deserialize_item(item)
+
+            pending = response.get('UnprocessedKeys') or {}
+            if not pending:
+                break
+
+            backoff(attempt)
+        else:
+            raise RuntimeError(f'Failed to get {len(pending[table_name]["Keys"])} keys from {table_name}.')
+
+
+def batch_write(
+        client: Any,
+        table_name: str,
+        puts: Iterable[Dict[str, Any]] = (),
+        deletes: Iterable[Dict[str, Any]] = (),
+        max_attempts: int = 8
+) -> int:
+    """
+    Writes and deletes items with BatchWriteItem (25 requests per call), retrying unprocessed items.
+
+    :param client: Low-level DynamoDB client.
+    :param table_name: Table name.
+    :param puts: Python-typed items to put.
+    :param deletes: Python-typed primary keys to delete.
+    :param max_attempts: Maximum attempts per batch for unprocessed items.
+
+    :return: Number of written requests.
+    """
+    def requests():
+        for item in puts:
+            yield {'PutRequest': {'Item': serialize_item(item)}}
+        for key in deletes:
+            yield {'DeleteRequest': {'Key': serialize_item(key)}}
+
+    written = 0
+
+    for chunk in chunks(requests(), 25):
+        pending = {table_name: chunk}
+
+        for attempt in range(max_attempts):
+            response = client.batch_write_item(RequestItems=pending)
+
+            pending = response.get('UnprocessedItems') or {}
+            if not pending:
+                break
+
+            backoff(attempt)
+        else:
+            raise RuntimeError(f'Failed to write {len(pending[table_name])} requests to {table_name}.')
+
+        written += len(chunk)
+
+    return written
+
+
+def parallel_scan(
+        client: Any,
+        table_name: str,
+        total_segments: int = 8,
+        **scan_kwargs
+) -> Iterator[Dict[str, Any]]:
+    """
+    Scans a table with several segments in parallel threads and streams items as pages arrive.
+    Only a bounded number of pages is buffered, hence memory stays constant for any table size.
+
+    :param client: Low-level DynamoDB client (boto3 clients are thread-safe).
+    :param table_name: Table name.
+    :param total_segments: Number of parallel scan segments.
+    :param scan_kwargs: Additional Scan arguments (e.g. FilterExpression, Limit).
+
+    :return: Generator of items.
+    """
+    requests = [
+        dict(scan_kwargs, TableName=table_name, Segment=segment, TotalSegments=total_segments)
+        for segment in range(total_segments)
+    ]
+
+    return _parallel_pages(client.scan, requests)
+
+
+def parallel_query(
+        client: Any,
+        table_name: str,
+        key_values: Iterable[Any],
+        key_name: str,
+        **query_kwargs
+) -> Iterator[Dict[str, Any]]:
+    """
+    Queries several partitions (e.g. write shards of a single logical key) in parallel threads
+    and streams items as pages arrive.
+
+    :param client: Low-level DynamoDB client (boto3 clients are thread-safe).
+    :param table_name: Table name.
+    :param key_values: Partition key values to query.
+    :param key_name: Partition key attribute name.
+    :param query_kwargs: Additional Query arguments (e.g. IndexName, FilterExpression, Limit).
+
+    :return: Generator of items.
+    """
+    requests = []
+
+    for value in key_values:
+        names = dict(query_kwargs.get('ExpressionAttributeNames') or {}, **{'#pk': key_name})
+        values = dict(query_kwargs.get('ExpressionAttributeValues') or {}, **{':pk': serialize(value)})
+
+        requests.append(dict(
+            query_kwargs,
+            TableName=table_name,
+            KeyConditionExpression='#pk = :pk',
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        ))
+
+    return _parallel_pages(client.query, requests)
+
+
+def _parallel_pages(call: Callable[..., Dict[str, Any]], requests: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Runs paginated requests in parallel threads and streams their items through a bounded buffer.
+    """
+    pages: 'queue.Queue' = queue.Queue(maxsize=len(requests) * 2)
+    stopped = threading.Event()
+    done = object()
+
+    def put(value: Any) -> bool:
+        while not stopped.is_set():
+            try:
+                pages.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def paginate(kwargs: Dict[str, Any]) -> None:
+        try:
+            while True:
+                response = call(**kwargs)
+                if not put(response.get('Items', [])):
+                    return
+                if 'LastEvaluatedKey' not in response:
+                    break
+                kwargs = dict(kwargs, ExclusiveStartKey=response['LastEvaluatedKey'])
+        except Exception as ex:
+            put(ex)
+        finally:
+            put(done)
+
+    threads = [threading.Thread(target=paginate, args=(kwargs,), daemon=True) for kwargs in requests]
+
+    for thread in threads:
+        thread.start()
+
+    try:
+        remaining = len(threads)
+        while remaining:
+            page = pages.get()
+            if page is done:
+                remaining -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                for item in page:
+                    yield deserialize_item(item)
+    finally:
+        stopped.set()
@@ -0,0 +1,132 @@
+import base64
+import json
+from typing import Any, Dict, Optional
+
+from b_aws_websocket_api.runtime import ws_codec
+
+
+class WsEvent:
+    """
+    Lightweight view over an API Gateway websocket Lambda proxy event.
+    """
+
+    def __init__(self, event: Dict[str, Any]) -> None:
+        """
+        Constructor.
+
+        :param event: Raw Lambda event.
+        """
+        self.__event = event
+        self.__context: Dict[str, Any] = event.get('requestContext') or {}
+        self.__json = None
+        self.__document = None
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        return self.__event
+
+    @property
+    def request_context(self) -> Dict[str, Any]:
+        return self.__context
+
+    @property
+    def connection_id(self) -> Optional[str]:
+        return self.__context.get('connectionId')
+
+    @property
+    def route_key(self) -> Optional[str]:
+        return self.__context.get('routeKey')
+
+    @property
+    def event_type(self) -> Optional[str]:
+        """
+        Event type, i.e. CONNECT, MESSAGE or DISCONNECT.
+        """
+        return self.__context.get('eventType')
+
+    @property
+    def domain_name(self) -> Optional[str]:
+        return self.__context.get('domainName')
+
+    @property
+    def stage(self) -> Optional[str]:
+        return self.__context.get('stage')
+
+    @property
+    def request_time_epoch(self) -> Optional[int]:
+        return self.__context.get('requestTimeEpoch')
+
+    @property
+    def connections_url(self) -> Optional[str]:
+        """
+        The @connections endpoint of the stage that delivered this event.
+        Note, that for custom domain names the stage path mapping might differ.
+        API Gateway domain names never carry a port, hence domains with one (e.g. of the local emulator)
+        are served over plain http.
+        """
+        if not self.domain_name or not self.stage:
+            return None
+
+        scheme = 'http' if ':' in self.domain_name else 'https'
+
+        return f'{scheme}://{self.domain_name}/{self.stage}/@connections'
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return self.__event.get('headers') or {}
+
+    @property
+    def query_parameters(self) -> Dict[str, str]:
+        return self.__event.get('queryStringParameters') or {}
+
+    @property
+    def body(self) -> Optional[bytes]:
+        """
+        Raw frame payload (decoded from base64 for binary frames).
+        """
+        body = self.__event.get('body')
+
+        if body is None:
+            return None
+
+        if self.__event.get('isBase64Encoded'):
+            return base64.b64decode(body)
+
+        return body.encode('utf-8')
+
+    @property
+    def text(self) -> Optional[str]:
+        body = self.__event.get('body')
+
+        if body is None or not self.__event.get('isBase64Encoded'):
+            return body
+
+        return self.body.decode('utf-8')
+
+    def json(self) -> Any:
+        """
+        Parses the frame payload as JSON. The result is cached.
+
+        :return: Parsed payload or None if there is no payload.
+        """
+        if self.__json is None and self.__event.get('body') is not None:
+            self.__json = json.loads(self.text)
+
+        return self.__json
+
+    def document(self, codec: Optional[ws_codec.WsCodec] = None) -> Any:
+        """
+        Decodes the frame payload with any registered codec. Text frames are JSON, binary frames are
+        detected from their content (see ws_codec.detect_codec), so no registry lookup is needed. The result is cached.
+
+        :param codec: Codec of the frame. Detected if not given.
+
+        :return: Decoded payload or None if there is no payload.
+        """
+        body = self.__event.get('body')
+
+        if self.__document is None and body is not None:
+            data = self.body if self.__event.get('isBase64Encoded') else body
+            self.__document = ws_codec.decode(data, codec)
+
+        return self.__document
@@ -0,0 +1,413 @@
+import base64
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Union
+
+from b_aws_websocket_api.runtime import ws_dynamodb
+from b_aws_websocket_api.runtime.ws_broadcaster import WsBroadcaster, WsBroadcastStats
+from b_aws_websocket_api.runtime.ws_connection_pruner import WsConnectionPruner
+from b_aws_websocket_api.runtime.ws_connection_registry_client import WsConnectionRegistryClient
+from b_aws_websocket_api.runtime.ws_metrics import get_metrics
+from b_aws_websocket_api.runtime.ws_subscription_index_client import WsSubscriptionIndexClient
+from b_aws_websocket_api.runtime.ws_tracing import get_tracer
+
+PUBLISH_QUEUE_URL_ENV = 'WS_FANOUT_PUBLISH_QUEUE_URL'
+SHARD_QUEUE_URL_ENV = 'WS_FANOUT_SHARD_QUEUE_URL'
+PROGRESS_TABLE_ENV = 'WS_FANOUT_PROGRESS_TABLE'
+BATCH_SIZE_ENV = 'WS_FANOUT_BATCH_SIZE'
+MAX_ATTEMPTS_ENV = 'WS_FANOUT_MAX_ATTEMPTS'
+CONNECTIONS_URL_ENV = 'WS_CONNECTIONS_URL'
+MAX_IN_FLIGHT_ENV = 'WS_FANOUT_MAX_IN_FLIGHT'
+# Comma-separated topics recorded with their own Topic metric dimension.
+METRIC_TOPICS_ENV = 'WS_FANOUT_METRIC_TOPICS'
+
+PROGRESS_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# SQS limits the sum of all message bodies of a batch request.
+MAX_BATCH_BYTES = 256 * 1024
+
+
+def create_sqs_client(client: Any = None) -> Any:
+    """
+    Returns the given SQS client or lazily creates a default boto3 one.
+
+    :param client: Optional low-level SQS client (e.g. an in-process stand-in).
+
+    :return: Low-level SQS client.
+    """
+    if client is not None:
+        return client
+
+    import boto3
+
+    return boto3.client('sqs')
+
+
+def encode_data(data: Union[bytes, str]) -> Dict[str, str]:
+    if isinstance(data, bytes):
+        return dict(data=base64.b64encode(data).decode('ascii'), encoding='base64')
+
+    return dict(data=data, encoding='text')
+
+
+def decode_data(message: Dict[str, Any]) -> bytes:
+    if message.get('encoding') == 'base64':
+        return base64.b64decode(message['data'])
+
+    return message['data'].encode('utf-8')
+
+
+class WsFanoutProgress:
+    """
+    Records progress and failures of fan-out shards in a DynamoDB table (one item per shard), and the shards
+    a splitter has enqueued, hence a redelivered publish does not enqueue them again.
+    """
+
+    def __init__(self, table_name: Optional[str] = None, client: Any = None) -> None:
+        """
+        Constructor.
+
+        :param table_name: Progress table name. Read from the environment if not given.
+        :param client: Low-level DynamoDB client. A default boto3 client is created if not given.
+        """
+        self.__table_name = table_name or os.environ[PROGRESS_TABLE_ENV]
+        self.__client = ws_dynamodb.create_client(client)
+
+    def record_split(self, publish_id: str, shards: int, connections: int, duration: float) -> None:
+        self.__put(publish_id, 'summary', dict(shards=shards, connections=connections, duration=duration))
+
+    def record_enqueued(self, publish_id: str, shards: List[int]) -> None:
+        """
+        Records shards of a publish that were enqueued.
+
+        :param publish_id: Publish id.
+        :param shards: Numbers of the enqueued shards.
+
+        :return: No return.
+        """
+        self.__put(publish_id, f'enqueued#{shards[0]:06d}', dict(shards=shards))
+
+    def enqueued_shards(self, publish_id: str) -> Set[int]:
+        """
+        Reads the shards of a publish a previous (failed) split enqueued already.
+
+        :param publish_id: Publish id.
+
+        :return: Shard numbers.
+        """
+        return {
+            int(shard)
+            for item in self.shards(publish_id)
+            if item['progressKey'].startswith('enqueued#')
+            for shard in item['shards']
+        }
+
+    def record_shard(self, publish_id: str, shard: int, attempt: int, stats: WsBroadcastStats) -> None:
+        self.__put(publish_id, f'shard#{shard:06d}#{attempt}', dict(
+            sent=stats.sent,
+            gone=stats.gone,
+            throttled=stats.throttled,
+            failed=stats.failed,
+            p50=stats.p50,
+            p99=stats.p99,
+            duration=stats.duration,
+            # Keep items small; a full list of failed ids travels with the retry shard.
+            failedConnectionIds=stats.failed_connection_ids[:100],
+        ))
+
+    def shards(self, publish_id: str) -> List[Dict[str, Any]]:
+        """
+        Reads recorded items of a single publish.
+
+        :param publish_id: Publish id.
+
+        :return: Recorded items.
+        """
+        return list(ws_dynamodb.parallel_query(self.__client, self.__table_name, [publish_id], 'publishId'))
+
+    def __put(self, publish_id: str, key: str, attributes: Dict[str, Any]) -> None:
+        item = dict(attributes, publishId=publish_id, progressKey=key)
+        item['recordedAt'] = int(time.time())
+        item['expiresAt'] = item['recordedAt'] + PROGRESS_TTL_SECONDS
+
+        self.__client.put_item(TableName=self.__table_name, Item=ws_dynamodb.serialize_item(item))
+
+
+class WsFanoutPublisher:
+    """
+    Publishes a message for a queue-driven fan-out. A single small queue message is sent,
+    the splitter and sender functions of WsFanout do the rest. The message carries the trace context
+    of the publisher, hence splits and sends continue its trace.
+    """
+
+    def __init__(self, queue_url: Optional[str] = None, sqs_client: Any = None) -> None:
+        """
+        Constructor.
+
+        :param queue_url: Publish queue url. Read from the environment if not given.
+        :param sqs_client: Low-level SQS client. A default boto3 client is created if not given.
+        """
+        self.__queue_url = queue_url or os.environ[PUBLISH_QUEUE_URL_ENV]
+        self.__sqs = create_sqs_client(sqs_client)
+
+    def publish(
+            self,
+            data: Union[bytes, str],
+            topic: Optional[str] = None,
+            connection_ids: Optional[List[str]] = None
+    ) -> str:
+        """
+        Enqueues a message for fan-out.
+
+        :param data: Message to send to every target connection.
+        :param topic: Target subscribers of this topic only. All registered connections are targeted if not given.
+        :param connection_ids: Explicit target connections (overrides topic).
+
+        :return: Publish id to look progress up with.
+        """
+        publish_id = str(uuid.uuid4())
+        tracer = get_tracer()
+
+        with tracer.span('ws.fanout.publish', annotations=dict(publish_id=publish_id, topic=topic or '*')):
+            message = dict(id=publish_id, **encode_data(data))
+            if topic is not None:
+                message['topic'] = topic
+            if connection_ids is not None:
+                message['connectionIds'] = connection_ids
+
+            tracer.inject(message)
+            self.__sqs.send_message(QueueUrl=self.__queue_url, MessageBody=json.dumps(message))
+
+        return publish_id
+
+
+class WsFanoutSplitter:
+    """
+    Shards the target connection set of a published message into fixed-size batches on a queue.
+    """
+
+    def __init__(
+            self,
+            shard_queue_url: Optional[str] = None,
+            batch_size: Optional[int] = None,
+            registry: Optional[WsConnectionRegistryClient] = None,
+            subscription_index: Optional[WsSubscriptionIndexClient] = None,
+            progress: Optional[WsFanoutProgress] = None,
+            sqs_client: Any = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param shard_queue_url: Shard queue url. Read from the environment if not given.
+        :param batch_size: Number of connections per shard. Read from the environment if not given.
+        :param registry: Connection registry to enumerate all connections from.
+        :param subscription_index: Subscription index to enumerate topic subscribers from.
+        :param progress: Optional progress recorder.
+        :param sqs_client: Low-level SQS client. A default boto3 client is created if not given.
+        """
+        self.__shard_queue_url = shard_queue_url or os.environ[SHARD_QUEUE_URL_ENV]
+        self.__batch_size = int(batch_size or os.environ.get(BATCH_SIZE_ENV, 500))
+        self.__registry = registry
+        self.__subscription_index = subscription_index
+        self.__progress = progress
+        self.__sqs = create_sqs_client(sqs_client)
+
+    def targets(self, message: Dict[str, Any]) -> Iterator[str]:
+        if 'connectionIds' in message:
+            return iter(message['connectionIds'])
+
+        if message.get('topic') is not None:
+            if not self.__subscription_index:
+                raise ValueError('Topic publish requires a subscription index.')
+            return self.__subscription_index.subscriber_ids(message['topic'])
+
+        if not self.__registry:
+            raise ValueError('Broadcast publish requires a connection registry.')
+
+        return self.__registry.connection_ids()
+
+    def split(self, message: Dict[str, Any]) -> int:
+        """
+        Splits a published message into shard messages. Shard messages carry the trace context of the split,
+        hence every shard send is traced as its child.
+
+        With a progress recorder, splitting is idempotent: shards are numbered deterministically by their position
+        in the target set and every enqueued batch of shards is recorded, hence a redelivered publish (e.g. after a
+        timeout) skips the shards enqueued before. Only a batch enqueued right before a crash, but not recorded yet,
+        is enqueued twice. Targets that changed between deliveries shift shard boundaries accordingly.
+
+        :param message: Published message.
+
+        :return: Number of shards.
+        """
+        started = time.perf_counter()
+        payload = {key: message[key] for key in ('id', 'data', 'encoding')}
+        # Carried along for per-topic metrics of senders.
+        if message.get('topic') is not None:
+            payload['topic'] = message['topic']
+
+        tracer = get_tracer()
+        annotations = dict(publish_id=message['id'], topic=message.get('topic') or '*', batch_size=self.__batch_size)
+
+        with tracer.span('ws.fanout.split', parent=tracer.extract(message), annotations=annotations) as span:
+            enqueued = self.__progress.enqueued_shards(message['id']) if self.__progress else set()
+            shards = 0
+            connections = 0
+            entries = []
+
+            for shard, connection_ids in enumerate(ws_dynamodb.chunks(self.targets(message), self.__batch_size)):
+                shards += 1
+                connections += len(connection_ids)
+
+                if shard in enqueued:
+                    continue
+
+                body = json.dumps(tracer.inject(dict(payload, shard=shard, attempt=0, connectionIds=connection_ids)))
+
+                # Every shard carries the payload, hence large payloads fit fewer shards into a batch.
+                if entries and sum(len(entry['MessageBody']) for entry in entries) + len(body) > MAX_BATCH_BYTES:
+                    self.__send(message['id'], entries)
+                    entries = []
+
+                entries.append(dict(Id=str(shard), MessageBody=body))
+
+                if len(entries) == 10:
+                    self.__send(message['id'], entries)
+                    entries = []
+
+            if entries:
+                self.__send(message['id'], entries)
+
+            span.annotate('shards', shards)
+            span.annotate('connections', connections)
+            span.annotate('skipped', len(enqueued))
+
+        if self.__progress:
+            self.__progress.record_split(message['id'], shards, connections, time.perf_counter() - started)
+
+        return shards
+
+    def __send(self, publish_id: str, entries: List[Dict[str, str]]) -> None:
+        shards = [int(entry['Id']) for entry in entries]
+
+        for attempt in range(8):
+            response = self.__sqs.send_message_batch(QueueUrl=self.__shard_queue_url, Entries=entries)
+
+            failed = {item['Id'] for item in response.get('Failed', [])}
+            if not failed:
+                if self.__progress:
+                    self.__progress.record_enqueued(publish_id, shards)
+                return
+
+            # Sender faults, e.g. invalid or oversized messages, fail the same way on every attempt.
+            faults = [item for item in response.get('Failed', []) if item.get('SenderFault')]
+            if faults:
+                raise RuntimeError(f'Failed to enqueue {len(faults)} shards: {faults[0].get("Message")}.')
+
+            entries = [entry for entry in entries if entry['Id'] in failed]
+            ws_dynamodb.backoff(attempt)
+
+        raise RuntimeError(f'Failed to enqueue {len(entries)} shards.')
+
+
+class WsFanoutSender:
+    """
+    Sends a message to the connections of a single shard and records the outcome.
+    Connections that failed transiently are re-enqueued as a smaller retry shard.
+    """
+
+    def __init__(
+            self,
+            broadcaster: Optional[WsBroadcaster] = None,
+            shard_queue_url: Optional[str] = None,
+            max_attempts: Optional[int] = None,
+            progress: Optional[WsFanoutProgress] = None,
+            sqs_client: Any = None,
+            pruner: Optional[WsConnectionPruner] = None,
+            metric_topics: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param broadcaster: Broadcaster to send with. Created from the environment if not given.
+        :param shard_queue_url: Shard queue url for retry shards. Read from the environment if not given.
+        :param max_attempts: Maximum attempts of a shard. Read from the environment if not given.
+        :param progress: Optional progress recorder.
+        :param sqs_client: Low-level SQS client. A default boto3 client is created if not given.
+        :param pruner: Removes gone connections of every shard from the registry and subscription index.
+        Used by the default broadcaster only.
+        :param metric_topics: Topics recorded with their own Topic metric dimension. Every custom dimension value
+        is a separately billed metric, hence other topics are recorded as "*". Read from the environment if not given.
+        """
+        self.__broadcaster = broadcaster or WsBroadcaster(
+            connections_url=os.environ[CONNECTIONS_URL_ENV],
+            max_in_flight=int(os.environ.get(MAX_IN_FLIGHT_ENV, 100)),
+            pruner=pruner,
+        )
+        self.__shard_queue_url = shard_queue_url or os.environ[SHARD_QUEUE_URL_ENV]
+        self.__max_attempts = int(max_attempts or os.environ.get(MAX_ATTEMPTS_ENV, 3))
+        self.__progress = progress
+        self.__sqs = create_sqs_client(sqs_client)
+
+        if metric_topics is None:
+            metric_topics = filter(None, os.environ.get(METRIC_TOPICS_ENV, '').split(','))
+        self.__metric_topics = frozenset(metric_topics)
+
+    def send(self, shard: Dict[str, Any]) -> WsBroadcastStats:
+        """
+        Sends a shard. Traced as a ws.fanout.send span annotated with the shard, its attempt and outcome counts,
+        and continued by the retry shard of its failed connections.
+
+        :param shard: Shard message.
+
+        :return: Broadcast statistics of the shard.
+        """
+        tracer = get_tracer()
+        annotations = dict(
+            publish_id=shard['id'],
+            topic=shard.get('topic') or '*',
+            shard=shard['shard'],
+            attempt=shard['attempt'],
+            batch_size=len(shard['connectionIds']),
+        )
+
+        with tracer.span('ws.fanout.send', parent=tracer.extract(shard), annotations=annotations) as span:
+            stats = self.__broadcaster.broadcast(decode_data(shard), shard['connectionIds'])
+
+            for key in ('sent', 'gone', 'throttled', 'failed'):
+                span.annotate(key, getattr(stats, key))
+
+            retry = None
+            if stats.failed_connection_ids and shard['attempt'] + 1 < self.__max_attempts:
+                retry = dict(shard, attempt=shard['attempt'] + 1, connectionIds=stats.failed_connection_ids)
+                tracer.inject(retry)
+
+        metrics = get_metrics()
+        if metrics.enabled:
+            topic = shard.get('topic')
+            dimensions = {'Topic': topic if topic in self.__metric_topics else '*'}
+            metrics.count('FanoutShards', dimensions=dimensions)
+            metrics.count('FanoutConnectionsSent', stats.sent, dimensions)
+            metrics.count('FanoutConnectionsFailed', stats.failed, dimensions)
+            metrics.record('FanoutShardDuration', stats.duration * 1000, dimensions=dimensions)
+
+        if self.__progress:
+            self.__progress.record_shard(shard['id'], shard['shard'], shard['attempt'], stats)
+
+        if retry is not None:
+            self.__sqs.send_message(QueueUrl=self.__shard_queue_url, MessageBody=json.dumps(retry))
+
+        return stats
+
+
+def records(event: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    """
+    Parses bodies of a Lambda SQS event.
+
+    :param event: Lambda SQS event.
+
+    :return: Parsed message bodies.
+    """
+    return [json.loads(record['body']) for record in event.get('Records', [])]
@@ -0,0 +1,336 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# ASN.1 DigestInfo prefixes of EMSA-PKCS1-v1_5 signatures (RFC 8017, section 9.2).
+DIGEST_INFO_PREFIXES = {
+    'sha256': bytes.fromhex('3031300d060960864801650304020105000420'),
+    'sha384': bytes.fromhex('3041300d060960864801650304020205000430'),
+    'sha512': bytes.fromhex('3051300d060960864801650304020305000440'),
+}
+
+ALGORITHMS = {
+    'RS256': 'sha256',
+    'RS384': 'sha384',
+    'RS512': 'sha512',
+    'HS256': 'sha256',
+    'HS384': 'sha384',
+    'HS512': 'sha512',
+}
+
+
+class WsJwtError(ValueError):
+    """
+    A token is malformed, its signature is invalid or its claims are not acceptable.
+    """
+
+
+def base64url_decode(value: Union[str, bytes]) -> bytes:
+    value = value.encode('ascii') if isinstance(value, str) else value
+
+    try:
+        return base64.urlsafe_b64decode(value + b'=' * (-len(value) % 4))
+    except ValueError as ex:
+        raise WsJwtError(f'Malformed base64url value: {repr(ex)}.')
+
+
+def base64url_encode(value: bytes) -> str:
+    return base64.urlsafe_b64encode(value).rstrip(b'=').decode('ascii')
+
+
+def base64url_uint(value: str) -> int:
+    return int.from_bytes(base64url_decode(value), 'big')
+
+
+class WsRsaPublicKey:
+    """
+    RSA public key verifying RSASSA-PKCS1-v1_5 signatures (RS256, RS384 and RS512) with integer arithmetic
+    of the standard library, hence no cryptography package is needed in the function bundle.
+    """
+
+    def __init__(self, n: int, e: int) -> None:
+        """
+        Constructor.
+
+        :param n: Modulus.
+        :param e: Public exponent.
+        """
+        if n.bit_length() < 1024:
+            raise WsJwtError('RSA keys shorter than 1024 bits are not accepted.')
+
+        self.n = n
+        self.e = e
+        self.size = (n.bit_length() + 7) // 8
+
+    @classmethod
+    def from_jwk(cls, jwk: Dict[str, Any]) -> 'WsRsaPublicKey':
+        try:
+            return cls(base64url_uint(jwk['n']), base64url_uint(jwk['e']))
+        except KeyError as ex:
+            raise WsJwtError(f'Malformed RSA key: {repr(ex)}.')
+
+    def verify(self, message: bytes, signature: bytes, hash_name: str) -> bool:
+        """
+        Verifies a signature.
+
+        :param message: Signed message.
+        :param signature: Signature.
+        :param hash_name: Hash function, i.e. sha256, sha384 or sha512.
+
+        :return: Whether the signature is valid.
+        """
+        if len(signature) != self.size:
+            return False
+
+        value = int.from_bytes(signature, 'big')
+        if value >= self.n:
+            return False
+
+        encoded = pow(value, self.e, self.n).to_bytes(self.size, 'big')
+
+        digest_info = DIGEST_INFO_PREFIXES[hash_name] + hashlib.new(hash_name, message).digest()
+        padding = self.size - len(digest_info) - 3
+        if padding < 8:
+            return False
+
+        expected = b'\x00\x01' + b'\xff' * padding + b'\x00' + digest_info
+
+        return hmac.compare_digest(encoded, expected)
+
+
+def fetch_json(url: str, timeout: float = 3.0) -> Dict[str, Any]:
+    """
+    Fetches a JSON document, e.g. a JWKS, over HTTP(S).
+
+    :param url: Document url.
+    :param timeout: Timeout in seconds.
+
+    :return: Parsed document.
+    """
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+class WsJwks:
+    """
+    In-container cache of a JSON Web Key Set. Keys are refetched when the TTL expires or when a token
+    refers to an unknown key id (key rotation), at most once per refresh interval, hence a reconnect storm
+    costs a single fetch. If the identity provider is unavailable, the expired keys stay in use for a grace
+    period.
+    """
+
+    def __init__(
+            self,
+            url: str,
+            ttl: float = 600.0,
+            min_refresh_interval: float = 30.0,
+            stale_grace: float = 3600.0,
+            fetch: Optional[Callable[[str], Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param url: JWKS url, e.g. https://issuer/.well-known/jwks.json.
+        :param ttl: Lifetime of fetched keys in seconds.
+        :param min_refresh_interval: Minimum time between two fetches in seconds.
+        :param stale_grace: Time in seconds expired keys are used while fetches fail.
+        :param fetch: Callable fetching the JWKS document. Defaults to fetch_json().
+        """
+        self.__url = url
+        self.__ttl = ttl
+        self.__min_refresh_interval = min_refresh_interval
+        self.__stale_grace = stale_grace
+        self.__fetch = fetch or fetch_json
+
+        self.__keys: Dict[str, WsRsaPublicKey] = {}
+        self.__fetched_at = float('-inf')
+        self.__attempted_at = float('-inf')
+        self.__fetches = 0
+        # A single fetch at a time; concurrent callers wait for it instead of fetching as well.
+        self.__lock = threading.Lock()
+
+    @property
+    def fetches(self) -> int:
+        return self.__fetches
+
+    def key(self, kid: Optional[str]) -> WsRsaPublicKey:
+        """
+        Gets a verification key.
+
+        :param kid: Key id of a token header. A set with a single key matches tokens without a key id.
+
+        :return: Key.
+        """
+        now = time.monotonic()
+
+        if now - self.__fetched_at >= self.__ttl or self.__find(kid) is None:
+            with self.__lock:
+                self.__refresh(now)
+
+        key = self.__find(kid)
+
+        if key is None:
+            raise WsJwtError(f'Unknown key id {kid}.')
+
+        if time.monotonic() - self.__fetched_at >= self.__ttl + self.__stale_grace:
+            raise WsJwtError('Signing keys expired and can not be refreshed.')
+
+        return key
+
+    def __find(self, kid: Optional[str]) -> Optional[WsRsaPublicKey]:
+        if kid is None and len(self.__keys) == 1:
+            return next(iter(self.__keys.values()))
+
+        return self.__keys.get(kid)
+
+    def __refresh(self, now: float) -> None:
+        # Another caller may have refreshed while this one waited for the lock.
+        if self.__attempted_at >= now or now - self.__attempted_at < self.__min_refresh_interval:
+            return
+
+        self.__attempted_at = time.monotonic()
+        self.__fetches += 1
+
+        try:
+            document = self.__fetch(self.__url)
+        except Exception as ex:
+            logger.warning(f'Failed to fetch signing keys from {self.__url}: {repr(ex)}.')
+            return
+
+        keys = {}
+        for jwk in document.get('keys', []):
+            if jwk.get('kty') != 'RSA' or jwk.get('use', 'sig') != 'sig':
+                continue
+            try:
+                keys[jwk.get('kid')] = WsRsaPublicKey.from_jwk(jwk)
+            except WsJwtError as ex:
+                logger.warning(f'Skipping signing key {jwk.get("kid")}: {repr(ex)}.')
+
+        self.__keys = keys
+        self.__fetched_at = time.monotonic()
+
+
+class WsJwtVerifier:
+    """
+    Verifies JSON Web Tokens signed with RS256/384/512 (keys of a JWKS) or HS256/384/512 (a shared secret)
+    and validates their registered claims.
+    """
+
+    def __init__(
+            self,
+            issuer: Optional[str] = None,
+            audience: Optional[Union[str, Iterable[str]]] = None,
+            jwks: Optional[WsJwks] = None,
+            secret: Optional[bytes] = None,
+            algorithms: Iterable[str] = ('RS256',),
+            leeway: float = 30.0,
+            required_claims: Iterable[str] = ('exp',)
+    ) -> None:
+        """
+        Constructor.
+
+        :param issuer: Expected iss claim. Not validated if not given.
+        :param audience: Expected aud claim (any of them). Not validated if not given.
+        :param jwks: Key set of RS* tokens.
+        :param secret: Shared secret of HS* tokens.
+        :param algorithms: Accepted algorithms.
+        :param leeway: Tolerated clock skew in seconds.
+        :param required_claims: Claims every token must have.
+        """
+        unknown = set(algorithms) - set(ALGORITHMS)
+        if unknown:
+            raise ValueError(f'Unsupported algorithms {sorted(unknown)}.')
+
+        self.__issuer = issuer
+        self.__audience = {audience} if isinstance(audience, str) else set(audience or [])
+        self.__jwks = jwks
+        self.__secret = secret
+        self.__algorithms = set(algorithms)
+        self.__leeway = leeway
+        self.__required_claims = list(required_claims)
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Verifies a token.
+
+        :param token: Compact serialized token.
+
+        :return: Claims of a valid token.
+        """
+        try:
+            encoded_header, encoded_claims, encoded_signature = token.split('.')
+            header = json.loads(base64url_decode(encoded_header))
+            claims = json.loads(base64url_decode(encoded_claims))
+        except (ValueError, AttributeError) as ex:
+            raise WsJwtError(f'Malformed token: {repr(ex)}.')
+
+        if not isinstance(header, dict) or not isinstance(claims, dict):
+            raise WsJwtError('Malformed token.')
+
+        # Never let the token choose an algorithm that is not explicitly accepted (e.g. "none").
+        algorithm = header.get('alg')
+        if algorithm not in self.__algorithms:
+            raise WsJwtError(f'Algorithm {algorithm} is not accepted.')
+
+        message = f'{encoded_header}.{encoded_claims}'.encode('ascii')
+        signature = base64url_decode(encoded_signature)
+        hash_name = ALGORITHMS[algorithm]
+
+        if algorithm.startswith('HS'):
+            if self.__secret is None:
+                raise WsJwtError('No secret to verify HMAC tokens with.')
+            valid = hmac.compare_digest(hmac.new(self.__secret, message, hash_name).digest(), signature)
+        else:
+            if self.__jwks is None:
+                raise WsJwtError('No key set to verify RSA tokens with.')
+            valid = self.__jwks.key(header.get('kid')).verify(message, signature, hash_name)
+
+        if not valid:
+            raise WsJwtError('Invalid signature.')
+
+        self.__validate(claims)
+
+        return claims
+
+    def __validate(self, claims: Dict[str, Any]) -> None:
+        now = time.time()
+
+        for claim in self.__required_claims:
+            if claim not in claims:
+                raise WsJwtError(f'Missing claim {claim}.')
+
+        times = {}
+        for claim in ('exp', 'nbf', 'iat'):
+            if claim in claims:
+                try:
+                    times[claim] = float(claims[claim])
+                except (TypeError, ValueError) as ex:
+                    raise WsJwtError(f'Malformed time claim {claim}: {repr(ex)}.')
+
+        if 'exp' in times and now - self.__leeway >= times['exp']:
+            raise WsJwtError('Token expired.')
+        if 'nbf' in times and now + self.__leeway < times['nbf']:
+            raise WsJwtError('Token is not valid yet.')
+        if 'iat' in times and now + self.__leeway < times['iat']:
+            raise WsJwtError('Token is issued in the future.')
+
+        if self.__issuer is not None and claims.get('iss') != self.__issuer:
+            raise WsJwtError('Unexpected issuer.')
+
+        if self.__audience:
+            audience = claims.get('aud')
+            audience = audience if isinstance(audience, list) else [audience]
+            # Objects or nested lists would raise a TypeError instead of denying the token.
+            if not all(isinstance(value, str) for value in audience):
+                raise WsJwtError('Malformed audience claim.')
+            audience = set(audience)
+            if not audience & self.__audience:
+                raise WsJwtError('Unexpected audience.')
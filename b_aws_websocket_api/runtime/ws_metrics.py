@@ -0,0 +1,362 @@
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+NAMESPACE_ENV = 'WS_METRICS_NAMESPACE'
+# Dimensions added to every metric as a JSON object, e.g. {"Service": "chat"}.
+DIMENSIONS_ENV = 'WS_METRICS_DIMENSIONS'
+
+# Limits of a single Embedded Metric Format document.
+MAX_METRICS_PER_DOCUMENT = 100
+MAX_VALUES_PER_METRIC = 100
+
+Dimensions = Optional[Dict[str, str]]
+
+
+class WsStdoutSink:
+    """
+    Writes metric documents to standard output, which Lambda forwards to CloudWatch Logs where
+    the Embedded Metric Format documents are turned into metrics asynchronously.
+    """
+
+    def write(self, line: str) -> None:
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+
+
+class WsMemorySink:
+    """
+    Captures metric documents in memory, e.g. in tests.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor.
+        """
+        self.documents: List[Dict[str, Any]] = []
+
+    def write(self, line: str) -> None:
+        self.documents.append(json.loads(line))
+
+    def values(self, name: str, dimensions: Dimensions = None) -> List[float]:
+        """
+        Gets all flushed values of a metric.
+
+        :param name: Metric name.
+        :param dimensions: Only values with these dimension values if given.
+
+        :return: Values in flush order.
+        """
+        values = []
+
+        for document in self.documents:
+            if name not in document:
+                continue
+            if dimensions and any(document.get(key) != value for key, value in dimensions.items()):
+                continue
+
+            value = document[name]
+            values.extend(value if isinstance(value, list) else [value])
+
+        return values
+
+    def clear(self) -> None:
+        self.documents.clear()
+
+
+class _Metric:
+    __slots__ = ('unit', 'values', 'seen')
+
+    def __init__(self, unit: str) -> None:
+        self.unit = unit
+        self.values: List[float] = []
+        self.seen = 0
+
+
+class WsTimer:
+    """
+    Measures a block (as a context manager) or every call of a function (as a decorator) in milliseconds.
+    """
+
+    def __init__(self, metrics: 'WsMetrics', name: str, dimensions: Dimensions = None) -> None:
+        """
+        Constructor.
+
+        :param metrics: Metrics to record to.
+        :param name: Metric name.
+        :param dimensions: Metric dimensions.
+        """
+        self.__metrics = metrics
+        self.__name = name
+        self.__dimensions = dimensions
+        self.__started = 0.0
+
+    def __enter__(self) -> 'WsTimer':
+        self.__started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.__metrics.record(self.__name, (time.perf_counter() - self.__started) * 1000, dimensions=self.__dimensions)
+
+    def __call__(self, function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            # A new timer per call, hence concurrent and recursive calls are measured separately.
+            with WsTimer(self.__metrics, self.__name, self.__dimensions):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+
+class WsMetrics:
+    """
+    Buffers counters, timers and histograms in memory and writes them as CloudWatch Embedded Metric Format
+    log lines on flush(), typically once per invocation. No CloudWatch API is called, hence recording costs
+    microseconds and never blocks the hot path on the network.
+
+    Counters are summed per flush. Histogram values are kept as is (EMF documents carry at most 100 values of
+    a metric, larger sets are split over several documents) up to max_samples per metric and flush, beyond
+    which a uniform sample is kept.
+
+    Disabled metrics (e.g. WsMetrics.from_environment() without WS_METRICS_NAMESPACE) record nothing.
+    """
+
+    def __init__(
+            self,
+            namespace: str = 'WebsocketApi',
+            dimensions: Dimensions = None,
+            sink: Any = None,
+            enabled: bool = True,
+            max_samples: int = 1000
+    ) -> None:
+        """
+        Constructor.
+
+        :param namespace: CloudWatch namespace of the metrics.
+        :param dimensions: Dimensions added to every metric, e.g. the service name.
+        :param sink: Object with a write(line) method. Defaults to WsStdoutSink.
+        :param enabled: Whether metrics are recorded.
+        :param max_samples: Maximum number of histogram values of a metric per flush.
+        """
+        self.__namespace = namespace
+        self.__dimensions = dict(dimensions or {})
+        self.__sink = sink or WsStdoutSink()
+        self.__enabled = enabled
+        self.__max_samples = max_samples
+        self.__buffer: Dict[Tuple[Tuple[str, str], ...], Dict[str, _Metric]] = {}
+        self.__properties: Dict[str, Any] = {}
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls, **kwargs) -> 'WsMetrics':
+        """
+        Creates metrics configured in the environment. Metrics are enabled if a namespace is configured.
+
+        :param kwargs: Additional constructor arguments.
+
+        :return: Metrics.
+        """
+        namespace = os.environ.get(NAMESPACE_ENV)
+        dimensions = os.environ.get(DIMENSIONS_ENV)
+
+        kwargs.setdefault('namespace', namespace or 'WebsocketApi')
+        kwargs.setdefault('dimensions', json.loads(dimensions) if dimensions else None)
+        kwargs.setdefault('enabled', bool(namespace))
+
+        return cls(**kwargs)
+
+    @property
+    def enabled(self) -> bool:
+        return self.__enabled
+
+    @property
+    def sink(self) -> Any:
+        return self.__sink
+
+    def count(self, name: str, value: float = 1, dimensions: Dimensions = None) -> None:
+        """
+        Adds to a counter.
+
+        :param name: Metric name.
+        :param value: Amount to add.
+        :param dimensions: Metric dimensions.
+
+        :return: No return.
+        """
+        if not self.__enabled:
+            return
+
+        with self.__lock:
+            metric = self.__metric(name, 'Count', dimensions)
+
+            if metric.values:
+                metric.values[0] += value
+            else:
+                metric.values.append(value)
+
+    def record(self, name: str, value: float, unit: str = 'Milliseconds', dimensions: Dimensions = None) -> None:
+        """
+        Adds a value to a histogram, e.g. a latency.
+
+        :param name: Metric name.
+        :param value: Value.
+        :param unit: CloudWatch unit of the value.
+        :param dimensions: Metric dimensions.
+
+        :return: No return.
+        """
+        if not self.__enabled:
+            return
+
+        with self.__lock:
+            metric = self.__metric(name, unit, dimensions)
+            metric.seen += 1
+
+            if len(metric.values) < self.__max_samples:
+                metric.values.append(value)
+            else:
+                index = random.randrange(metric.seen)
+                if index < self.__max_samples:
+                    metric.values[index] = value
+
+    def timer(self, name: str, dimensions: Dimensions = None) -> WsTimer:
+        """
+        Creates a timer recording milliseconds, usable as a context manager or a decorator.
+
+        :param name: Metric name.
+        :param dimensions: Metric dimensions.
+
+        :return: Timer.
+        """
+        return WsTimer(self, name, dimensions)
+
+    def set_property(self, name: str, value: Any) -> None:
+        """
+        Adds a searchable non-metric field (e.g. a request id) to the documents of the next flush.
+
+        :param name: Field name.
+        :param value: JSON-serializable value.
+
+        :return: No return.
+        """
+        if self.__enabled:
+            with self.__lock:
+                self.__properties[name] = value
+
+    def flush(self) -> int:
+        """
+        Writes buffered metrics as Embedded Metric Format documents and clears the buffer.
+
+        :return: Number of written documents.
+        """
+        with self.__lock:
+            buffer, self.__buffer = self.__buffer, {}
+            properties, self.__properties = self.__properties, {}
+
+        documents = [
+            document
+            for dimensions, metrics in buffer.items()
+            for document in self.__documents(dict(dimensions), metrics, properties)
+        ]
+
+        for document in documents:
+            self.__sink.write(json.dumps(document, separators=(',', ':')))
+
+        return len(documents)
+
+    def handler(self, function: Callable) -> Callable:
+        """
+        Decorator of Lambda handlers flushing metrics after every invocation.
+
+        :param function: Handler.
+
+        :return: Wrapped handler.
+        """
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.flush()
+
+        return wrapper
+
+    def __metric(self, name: str, unit: str, dimensions: Dimensions) -> _Metric:
+        key = tuple(sorted({**self.__dimensions, **(dimensions or {})}.items()))
+        metrics = self.__buffer.setdefault(key, {})
+
+        metric = metrics.get(name)
+        if metric is None:
+            metric = metrics[name] = _Metric(unit)
+
+        return metric
+
+    def __documents(
+            self,
+            dimensions: Dict[str, str],
+            metrics: Dict[str, _Metric],
+            properties: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        documents = []
+        timestamp = int(time.time() * 1000)
+        names = list(metrics)
+
+        for start in range(0, len(names), MAX_METRICS_PER_DOCUMENT):
+            group = names[start:start + MAX_METRICS_PER_DOCUMENT]
+            rounds = max(len(metrics[name].values) for name in group)
+
+            for offset in range(0, rounds, MAX_VALUES_PER_METRIC):
+                values = {
+                    name: metrics[name].values[offset:offset + MAX_VALUES_PER_METRIC]
+                    for name in group
+                    if len(metrics[name].values) > offset
+                }
+
+                document: Dict[str, Any] = dict(properties)
+                document.update(dimensions)
+                document['_aws'] = dict(
+                    Timestamp=timestamp,
+                    CloudWatchMetrics=[dict(
+                        Namespace=self.__namespace,
+                        Dimensions=[list(dimensions)],
+                        Metrics=[dict(Name=name, Unit=metrics[name].unit) for name in values],
+                    )],
+                )
+
+                for name, chunk in values.items():
+                    document[name] = chunk[0] if len(chunk) == 1 else chunk
+
+                documents.append(document)
+
+        return documents
+
+
+# Shared by the instrumented runtime helpers of a container.
+_metrics: Optional[WsMetrics] = None
+
+
+def get_metrics() -> WsMetrics:
+    global _metrics
+
+    if _metrics is None:
+        _metrics = WsMetrics.from_environment()
+
+    return _metrics
+
+
+def set_metrics(metrics: Optional[WsMetrics]) -> None:
+    """
+    Replaces the metrics of the instrumented runtime helpers, e.g. with metrics writing to a WsMemorySink in tests.
+
+    :param metrics: Metrics or None to create them from the environment again.
+
+    :return: No return.
+    """
+    global _metrics
+
+    _metrics = metrics
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from b_aws_websocket_api.runtime.ws_codec import WsCodec
+
+WsVariables = Callable[[str, int], Dict[str, Any]]
+
+
+class WsField:
+    """
+    Placeholder of a per-recipient field inside a WsPayload document.
+    """
+
+    def __init__(self, name: str) -> None:
+        """
+        Constructor.
+
+        :param name: Field name used when rendering the payload.
+        """
+        self.name = name
+
+
+class WsPayload:
+    """
+    A message encoded once and sent many times.
+
+    The document is serialized a single time into an immutable bytes buffer. Documents containing
+    WsField placeholders are split into static segments around them, hence rendering a per-recipient
+    variant only encodes the small templated values instead of re-serializing the whole document.
+    """
+
+    def __init__(
+            self,
+            document: Any = None,
+            raw: Optional[Union[bytes, str]] = None,
+            variables: Optional[WsVariables] = None,
+            codec: Optional[WsCodec] = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param document: JSON-serializable document. May contain WsField placeholders.
+        :param raw: Already encoded message (mutually exclusive with document).
+        :param variables: Callable returning field values for a recipient (connection id, sequence number).
+        Required if the document contains WsField placeholders.
+        :param codec: Codec to encode the document with, e.g. MessagePack. Defaults to JSON text.
+        Templated documents support JSON only.
+        """
+        if (document is None) == (raw is None):
+            raise ValueError('Either a document or a raw message must be given.')
+
+        self.__variables = variables
+        self.__segments: List[bytes] = []
+        self.__fields: List[str] = []
+
+        if raw is not None:
+            self.__segments = [raw.encode('utf-8') if isinstance(raw, str) else bytes(raw)]
+        elif codec is not None and codec.name != 'json':
+            try:
+                self.__segments = [codec.encode(document)]
+            except TypeError as ex:
+                raise ValueError(f'Templated payloads support the json codec only: {repr(ex)}.')
+        else:
+            self.__compile(document)
+
+        if self.__fields and not variables:
+            raise ValueError('Templated payloads require a variables callable.')
+
+        self.__data = self.__segments[0] if not self.__fields else None
+        self.__digest = hashlib.sha256(self.__data).hexdigest() if self.__data is not None else None
+
+    @property
+    def templated(self) -> bool:
+        return bool(self.__fields)
+
+    @property
+    def data(self) -> bytes:
+        """
+        Encoded message of a non-templated payload.
+        """
+        if self.__data is None:
+            raise ValueError('Templated payloads have no single encoded form. Use render().')
+
+        return self.__data
+
+    @property
+    def digest(self) -> Optional[str]:
+        """
+        SHA-256 hex digest of a non-templated payload, reused when signing every request.
+        """
+        return self.__digest
+
+    def render(self, **values: Any) -> bytes:
+        """
+        Renders a per-recipient variant by patching templated fields.
+
+        :param values: Field values.
+
+        :return: Encoded message.
+        """
+        if self.__data is not None:
+            return self.__data
+
+        parts = [self.__segments[0]]
+        for field, segment in zip(self.__fields, self.__segments[1:]):
+            parts.append(json.dumps(values[field], separators=(',', ':')).encode('utf-8'))
+            parts.append(segment)
+
+        return b''.join(parts)
+
+    def for_recipient(self, connection_id: str, sequence: int) -> bytes:
+        """
+        Encoded message for a single recipient.
+
+        :param connection_id: Recipient connection id.
+        :param sequence: Zero-based sequence number of the recipient within a broadcast.
+
+        :return: Encoded message.
+        """
+        if self.__data is not None:
+            return self.__data
+
+        return self.render(**self.__variables(connection_id, sequence))
+
+    def __compile(self, document: Any) -> None:
+        marker = f'__ws_field_{uuid.uuid4().hex}_'
+        names: Dict[str, str] = {}
+
+        def placeholder(value: Any) -> str:
+            if isinstance(value, WsField):
+                names[f'{marker}{len(names)}'] = value.name
+                return f'{marker}{len(names) - 1}'
+            raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable.')
+
+        text = json.dumps(document, separators=(',', ':'), default=placeholder)
+
+        rest = text
+        for key, name in names.items():
+            before, rest = rest.split(f'"{key}"', 1)
+            self.__segments.append(before.encode('utf-8'))
+            self.__fields.append(name)
+
+        self.__segments.append(rest.encode('utf-8'))
@@ -0,0 +1,300 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from b_aws_websocket_api.runtime.ws_connection_registry_client import WsConnectionRegistryClient
+
+logger = logging.getLogger(__name__)
+
+RATE_ENV = 'WS_RATE_LIMIT_RATE'
+BURST_ENV = 'WS_RATE_LIMIT_BURST'
+# JSON object of route keys to [rate, burst] pairs.
+ROUTE_LIMITS_ENV = 'WS_RATE_LIMIT_ROUTES'
+RECONCILE_INTERVAL_ENV = 'WS_RATE_LIMIT_RECONCILE_INTERVAL'
+
+# Registry attribute of the connection-wide usage counter. Route counters are suffixed with "#{route key}".
+USAGE_ATTRIBUTE = 'usage'
+
+
+class WsTokenBucket:
+    """
+    Token bucket refilled at a steady rate up to a burst capacity.
+    """
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated_at', 'pending', 'shared_total')
+
+    def __init__(self, rate: float, burst: int, now: float) -> None:
+        """
+        Constructor.
+
+        :param rate: Tokens added per second.
+        :param burst: Capacity of the bucket. The bucket starts full.
+        :param now: Current monotonic time in seconds.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = now
+        # Tokens taken locally since the last reconciliation.
+        self.pending = 0
+        # Shared usage total seen at the last reconciliation.
+        self.shared_total: Optional[int] = None
+
+    def refill(self, now: float) -> float:
+        """
+        Adds tokens for the time elapsed since the last refill.
+
+        :param now: Current monotonic time in seconds.
+
+        :return: Available tokens.
+        """
+        elapsed = now - self.updated_at
+
+        if elapsed > 0:
+            self.tokens = min(float(self.burst), self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+        return self.tokens
+
+    def take(self, cost: int) -> None:
+        self.tokens -= cost
+        self.pending += cost
+
+    def settle(self, total: int, sent: int) -> None:
+        """
+        Deducts tokens other containers took from the same connection since the last reconciliation.
+
+        :param total: Shared usage total after adding this container's usage.
+        :param sent: Usage this container added.
+
+        :return: No return.
+        """
+        # The first total includes usage from before this container knew the connection, hence it is a baseline.
+        if self.shared_total is not None:
+            self.tokens -= max(0, total - self.shared_total - sent)
+
+        self.shared_total = total
+
+
+class _Connection:
+    __slots__ = ('buckets', 'reconciled_at')
+
+    def __init__(self) -> None:
+        self.buckets: Dict[Optional[str], WsTokenBucket] = {}
+        # The first allowed message reconciles at once, which reads the shared baseline.
+        self.reconciled_at = float('-inf')
+
+
+class WsRateLimitStats:
+    """
+    Counters of a rate limiter since its creation.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor.
+        """
+        self.allowed = 0
+        self.rejected = 0
+        self.reconciliations = 0
+        self.reconcile_failures = 0
+
+    def to_dict(self) -> dict:
+        return dict(
+            allowed=self.allowed,
+            rejected=self.rejected,
+            reconciliations=self.reconciliations,
+            reconcile_failures=self.reconcile_failures,
+        )
+
+
+class WsRateLimiter:
+    """
+    Handler-side rate limiter with a token bucket per connection, and optionally per route of a connection,
+    complementing stage throttling (see WsRouteThrottling) which all clients share. Decisions are made on
+    in-memory state, hence abusive connections are rejected without any I/O before backend work starts.
+
+    Messages of a connection can be handled by several containers. With a registry given, every container
+    periodically adds its usage of a connection to shared counters of the registry item and deducts the
+    usage of other containers from its buckets, hence the limit holds across containers within a
+    reconcile interval. Reconciliation only happens on allowed messages.
+    """
+
+    def __init__(
+            self,
+            rate: Optional[float] = None,
+            burst: Optional[int] = None,
+            route_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+            registry: Optional[WsConnectionRegistryClient] = None,
+            reconcile_interval: float = 1.0,
+            max_connections: int = 100000
+    ) -> None:
+        """
+        Constructor.
+
+        :param rate: Messages per second of a connection across all routes. Not limited if not given.
+        :param burst: Maximum number of messages of a connection in a burst. Defaults to the rate.
+        :param route_limits: Route keys to (rate, burst) limits of a connection, applied in addition.
+        :param registry: Connection registry to reconcile usage through. Limits are per container if not given.
+        :param reconcile_interval: Minimum time between two reconciliations of a connection in seconds.
+        :param max_connections: Maximum number of connections tracked in memory (least recently used are dropped).
+        """
+        self.__limits: Dict[Optional[str], Tuple[float, int]] = dict(route_limits or {})
+
+        if rate is not None:
+            self.__limits[None] = (rate, burst if burst is not None else max(1, int(rate)))
+
+        self.__registry = registry
+        self.__reconcile_interval = reconcile_interval
+        self.__max_connections = max_connections
+        self.__connections: 'OrderedDict[str, _Connection]' = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__stats = WsRateLimitStats()
+
+    @classmethod
+    def from_environment(cls, **kwargs) -> 'WsRateLimiter':
+        """
+        Creates a rate limiter configured in the environment.
+
+        :param kwargs: Additional constructor arguments, e.g. registry.
+
+        :return: Rate limiter.
+        """
+        default_rate, default_burst = os.environ.get(RATE_ENV), os.environ.get(BURST_ENV)
+        routes = os.environ.get(ROUTE_LIMITS_ENV)
+
+        kwargs.setdefault('rate', float(default_rate) if default_rate else None)
+        kwargs.setdefault('burst', int(default_burst) if default_burst else None)
+        kwargs.setdefault('route_limits', {
+            route_key: (float(rate), int(burst)) for route_key, (rate, burst) in json.loads(routes).items()
+        } if routes else None)
+        kwargs.setdefault('reconcile_interval', float(os.environ.get(RECONCILE_INTERVAL_ENV, 1.0)))
+
+        return cls(**kwargs)
+
+    @property
+    def stats(self) -> WsRateLimitStats:
+        return self.__stats
+
+    def allow(self, connection_id: str, route_key: Optional[str] = None, cost: int = 1) -> bool:
+        """
+        Takes tokens for a message from the buckets of its connection (and route).
+
+        :param connection_id: Connection id.
+        :param route_key: Route key of the message.
+        :param cost: Tokens the message costs.
+
+        :return: Whether the message is allowed. Tokens are only taken from buckets of allowed messages.
+        """
+        now = time.monotonic()
+        keys = [key for key in {None, route_key} if key in self.__limits]
+
+        if not keys:
+            return True
+
+        with self.__lock:
+            connection = self.__connection(connection_id)
+
+            buckets = []
+            for key in keys:
+                bucket = connection.buckets.get(key)
+                if bucket is None:
+                    rate, burst = self.__limits[key]
+                    bucket = connection.buckets[key] = WsTokenBucket(rate, burst, now)
+                buckets.append(bucket)
+
+            if any(bucket.refill(now) < cost for bucket in buckets):
+                self.__stats.rejected += 1
+                return False
+
+            for bucket in buckets:
+                bucket.take(cost)
+
+            self.__stats.allowed += 1
+
+            due = self.__registry is not None and now - connection.reconciled_at >= self.__reconcile_interval
+            if due:
+                connection.reconciled_at = now
+
+        if due:
+            self.reconcile(connection_id)
+
+        return True
+
+    def reconcile(self, connection_id: str) -> None:
+        """
+        Adds usage of a connection since the last reconciliation to the shared counters of the registry and
+        deducts usage of other containers from the buckets of the connection.
+
+        :param connection_id: Connection id.
+
+        :return: No return.
+        """
+        if self.__registry is None:
+            return
+
+        with self.__lock:
+            connection = self.__connections.get(connection_id)
+            if connection is None:
+                return
+
+            sent = {key: bucket.pending for key, bucket in connection.buckets.items()}
+            for bucket in connection.buckets.values():
+                bucket.pending = 0
+
+        try:
+            totals = self.__registry.add_usage(connection_id, {self.__attribute(key): n for key, n in sent.items()})
+        except Exception as ex:
+            logger.warning(f'Failed to reconcile usage of connection {connection_id}: {repr(ex)}.')
+
+            with self.__lock:
+                self.__stats.reconcile_failures += 1
+                # Sent again with the next reconciliation.
+                for key, amount in sent.items():
+                    if key in connection.buckets:
+                        connection.buckets[key].pending += amount
+            return
+
+        with self.__lock:
+            self.__stats.reconciliations += 1
+
+            if totals is None:
+                # The connection is gone, hence its state is not needed any more.
+                self.__connections.pop(connection_id, None)
+                return
+
+            for key, amount in sent.items():
+                if self.__attribute(key) in totals and key in connection.buckets:
+                    connection.buckets[key].settle(totals[self.__attribute(key)], amount)
+
+    def forget(self, connection_id: str) -> None:
+        """
+        Drops in-memory state of a connection, e.g. at $disconnect.
+
+        :param connection_id: Connection id.
+
+        :return: No return.
+        """
+        with self.__lock:
+            self.__connections.pop(connection_id, None)
+
+    def __connection(self, connection_id: str) -> _Connection:
+        connection = self.__connections.get(connection_id)
+
+        if connection is None:
+            connection = self.__connections[connection_id] = _Connection()
+
+            while len(self.__connections) > self.__max_connections:
+                self.__connections.popitem(last=False)
+        else:
+            self.__connections.move_to_end(connection_id)
+
+        return connection
+
+    @staticmethod
+    def __attribute(key: Optional[str]) -> str:
+        return USAGE_ATTRIBUTE if key is None else f'{USAGE_ATTRIBUTE}#{key}'
@@ -0,0 +1,46 @@
+import json
+import re
+from typing import Any, Callable, Optional
+
+WsRouteSelector = Callable[[Any], Optional[str]]
+
+_BODY_EXPRESSION = re.compile(r'^\$\{?request\.body\.([A-Za-z0-9_$.\-]+?)\}?$')
+
+
+def compile_selection_expression(expression: str) -> WsRouteSelector:
+    """
+    Compiles an API Gateway route selection expression (e.g. "$request.body.action")
+    into a field extractor. The expression is parsed once, extraction then is a plain dict walk.
+
+    :param expression: Route selection expression.
+
+    :return: Callable accepting a frame (text, bytes or an already parsed JSON document)
+    and returning the selected route key or None if it can not be selected.
+    """
+    match = _BODY_EXPRESSION.match(expression.strip())
+
+    if not match:
+        # Static expressions select the same route key for every frame.
+        static = expression.strip()
+        return lambda body: static
+
+    path = tuple(match.group(1).split('.'))
+
+    def select(body: Any) -> Optional[str]:
+        if isinstance(body, (str, bytes, bytearray)):
+            try:
+                body = json.loads(body)
+            except ValueError:
+                return None
+
+        for key in path:
+            if not isinstance(body, dict) or key not in body:
+                return None
+            body = body[key]
+
+        if isinstance(body, (dict, list)) or body is None:
+            return None
+
+        return body if isinstance(body, str) else json.dumps(body)
+
+    return select
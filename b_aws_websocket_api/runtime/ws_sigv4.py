@@ -0,0 +1,149 @@
+import hashlib
+import hmac
+import os
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+
+class WsSigV4Signer:
+    """
+    Signs requests with AWS Signature Version 4 using only the standard library.
+    """
+
+    def __init__(
+            self,
+            region: str,
+            access_key: str,
+            secret_key: str,
+            session_token: Optional[str] = None,
+            service: str = 'execute-api'
+    ) -> None:
+        """
+        Constructor.
+
+        :param region: AWS region of the signed endpoint.
+        :param access_key: AWS access key id.
+        :param secret_key: AWS secret access key.
+        :param session_token: Optional session token of temporary credentials.
+        :param service: Signing name of the service.
+        """
+        self.__region = region
+        self.__access_key = access_key
+        self.__secret_key = secret_key
+        self.__session_token = session_token
+        self.__service = service
+        self.__signing_key: Optional[Tuple[str, bytes]] = None
+
+    @classmethod
+    def from_environment(cls, region: str, service: str = 'execute-api') -> Optional['WsSigV4Signer']:
+        """
+        Creates a signer from the standard AWS credential environment variables
+        (they are always present inside a Lambda function).
+
+        :param region: AWS region of the signed endpoint.
+        :param service: Signing name of the service.
+
+        :return: Signer or None if no credentials are present in the environment.
+        """
+        access_key = os.environ.get('AWS_ACCESS_KEY_ID')
+        secret_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
+
+        if not access_key or not secret_key:
+            return None
+
+        return cls(
+            region=region,
+            access_key=access_key,
+            secret_key=secret_key,
+            session_token=os.environ.get('AWS_SESSION_TOKEN'),
+            service=service
+        )
+
+    @property
+    def region(self) -> str:
+        return self.__region
+
+    def sign(
+            self,
+            method: str,
+            host: str,
+            path: str,
+            headers: Optional[Dict[str, str]] = None,
+            body: bytes = b'',
+            query: str = '',
+            payload_hash: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Signs a request.
+
+        :param method: HTTP method.
+        :param host: Host header value.
+        :param path: Request path exactly as it is sent on the wire (already URI-encoded).
+        :param headers: Additional headers to sign.
+        :param body: Request body.
+        :param query: Canonical query string.
+        :param payload_hash: Precomputed SHA-256 hex digest of the body (saves hashing the same body repeatedly).
+
+        :return: Headers (including the authorization header) to send with the request.
+        """
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        date_stamp = amz_date[:8]
+
+        signed = {key.lower(): str(value).strip() for key, value in (headers or {}).items()}
+        signed['host'] = host
+        signed['x-amz-date'] = amz_date
+
+        if self.__session_token:
+            signed['x-amz-security-token'] = self.__session_token
+
+        signed_header_names = ';'.join(sorted(signed))
+        canonical_headers = ''.join(f'{name}:{signed[name]}\n' for name in sorted(signed))
+
+        canonical_request = '\n'.join([
+            method,
+            # Non-S3 services expect the path to be encoded twice.
+            quote(path, safe='/~'),
+            query,
+            canonical_headers,
+            signed_header_names,
+            payload_hash or hashlib.sha256(body).hexdigest(),
+        ])
+
+        credential_scope = f'{date_stamp}/{self.__region}/{self.__service}/aws4_request'
+
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256',
+            amz_date,
+            credential_scope,
+            hashlib.sha256(canonical_request.encode('utf-8')).hexdigest(),
+        ])
+
+        signature = hmac.new(
+            self.__get_signing_key(date_stamp),
+            string_to_sign.encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+
+        signed['authorization'] = (
+            f'AWS4-HMAC-SHA256 '
+            f'Credential={self.__access_key}/{credential_scope}, '
+            f'SignedHeaders={signed_header_names}, '
+            f'Signature={signature}'
+        )
+
+        return signed
+
+    def __get_signing_key(self, date_stamp: str) -> bytes:
+        # The derived key only changes once a day, hence cache it.
+        if self.__signing_key and self.__signing_key[0] == date_stamp:
+            return self.__signing_key[1]
+
+        key = f'AWS4{self.__secret_key}'.encode('utf-8')
+        for part in (date_stamp, self.__region, self.__service, 'aws4_request'):
+            key = hmac.new(key, part.encode('utf-8'), hashlib.sha256).digest()
+
+        self.__signing_key = (date_stamp, key)
+
+        return key
@@ -0,0 +1,170 @@
+import os
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from b_aws_websocket_api.runtime import ws_dynamodb
+
+TABLE_NAME_ENV = 'WS_SUBSCRIPTION_INDEX_TABLE'
+SHARD_COUNT_ENV = 'WS_SUBSCRIPTION_INDEX_SHARDS'
+TTL_SECONDS_ENV = 'WS_SUBSCRIPTION_INDEX_TTL'
+
+PARTITION_KEY = 'pk'
+SORT_KEY = 'connectionId'
+TTL_ATTRIBUTE = 'expiresAt'
+CONNECTION_INDEX = 'byConnection'
+
+
+class WsSubscriptionIndexClient:
+    """
+    Runtime API of a topic subscription index created by the WsSubscriptionIndex construct.
+
+    Subscribers of a topic are spread over a fixed number of partitions ("topic#N", derived from
+    the connection id), hence a popular topic never becomes a single hot key and its subscribers
+    can be read from all partitions in parallel.
+    """
+
+    def __init__(
+            self,
+            table_name: Optional[str] = None,
+            shard_count: Optional[int] = None,
+            ttl_seconds: Optional[int] = None,
+            client: Any = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param table_name: Index table name. Read from the environment if not given.
+        :param shard_count: Number of partitions per topic. Read from the environment if not given.
+        :param ttl_seconds: Lifetime of a subscription. Read from the environment if not given.
+        :param client: Low-level DynamoDB client. A default boto3 client is created if not given.
+        """
+        self.__table_name = table_name or os.environ[TABLE_NAME_ENV]
+        self.__shard_count = int(shard_count or os.environ.get(SHARD_COUNT_ENV, 16))
+        self.__ttl_seconds = int(ttl_seconds or os.environ.get(TTL_SECONDS_ENV, 2 * 60 * 60))
+        self.__client = ws_dynamodb.create_client(client)
+
+    @property
+    def table_name(self) -> str:
+        return self.__table_name
+
+    def shard_key(self, topic: str, connection_id: str) -> str:
+        """
+        Deterministically maps a subscription to its topic partition.
+
+        :param topic: Topic name.
+        :param connection_id: Connection id.
+
+        :return: Partition key value.
+        """
+        return f'{topic}#{zlib.crc32(connection_id.encode("utf-8")) % self.__shard_count}'
+
+    def subscribe(self, connection_id: str, topic: str, ttl_seconds: Optional[int] = None) -> None:
+        """
+        Subscribes a connection to a topic.
+
+        :param connection_id: Connection id.
+        :param topic: Topic name.
+        :param ttl_seconds: Lifetime override of this subscription.
+
+        :return: No return.
+        """
+        self.__client.put_item(
+            TableName=self.__table_name,
+            Item=ws_dynamodb.serialize_item({
+                PARTITION_KEY: self.shard_key(topic, connection_id),
+                SORT_KEY: connection_id,
+                'topic': topic,
+                TTL_ATTRIBUTE: int(time.time()) + (ttl_seconds or self.__ttl_seconds),
+            })
+        )
+
+    def unsubscribe(self, connection_id: str, topic: str) -> None:
+        """
+        Unsubscribes a connection from a topic.
+
+        :param connection_id: Connection id.
+        :param topic: Topic name.
+
+        :return: No return.
+        """
+        self.__client.delete_item(
+            TableName=self.__table_name,
+            Key=ws_dynamodb.serialize_item({
+                PARTITION_KEY: self.shard_key(topic, connection_id),
+                SORT_KEY: connection_id,
+            })
+        )
+
+    def topics(self, connection_id: str) -> List[str]:
+        """
+        Lists topics a connection is subscribed to.
+
+        :param connection_id: Connection id.
+
+        :return: Topic names.
+        """
+        items = ws_dynamodb.parallel_query(
+            self.__client,
+            self.__table_name,
+            [connection_id],
+            SORT_KEY,
+            IndexName=CONNECTION_INDEX,
+        )
+
+        return [item[PARTITION_KEY].rsplit('#', 1)[0] for item in items]
+
+    def unsubscribe_all(self, connection_ids: Iterable[str]) -> int:
+        """
+        Removes all subscriptions of the given connections with batched deletes.
+
+        :param connection_ids: Connection ids.
+
+        :return: Number of removed subscriptions.
+        """
+        keys = (
+            {PARTITION_KEY: item[PARTITION_KEY], SORT_KEY: item[SORT_KEY]}
+            for item in ws_dynamodb.parallel_query(
+                self.__client,
+                self.__table_name,
+                list(connection_ids),
+                SORT_KEY,
+                IndexName=CONNECTION_INDEX,
+            )
+        )
+
+        return ws_dynamodb.batch_write(self.__client, self.__table_name, deletes=keys)
+
+    def subscribers(self, topic: str, page_size: int = 1000) -> Iterator[List[str]]:
+        """
+        Streams connection ids subscribed to a topic in pages. All topic partitions are queried in parallel.
+
+        :param topic: Topic name.
+        :param page_size: Maximum number of connection ids per page.
+
+        :return: Generator of connection id pages.
+        """
+        items = ws_dynamodb.parallel_query(
+            self.__client,
+            self.__table_name,
+            [f'{topic}#{shard}' for shard in range(self.__shard_count)],
+            PARTITION_KEY,
+            ProjectionExpression='#sk, #ttl',
+            FilterExpression='#ttl > :now',
+            ExpressionAttributeNames={'#sk': SORT_KEY, '#ttl': TTL_ATTRIBUTE},
+            ExpressionAttributeValues={':now': ws_dynamodb.serialize(int(time.time()))},
+        )
+
+        for page in ws_dynamodb.chunks((item[SORT_KEY] for item in items), page_size):
+            yield page
+
+    def subscriber_ids(self, topic: str) -> Iterator[str]:
+        """
+        Streams connection ids subscribed to a topic. Convenient as an input of WsBroadcaster.
+
+        :param topic: Topic name.
+
+        :return: Generator of connection ids.
+        """
+        for page in self.subscribers(topic):
+            yield from page
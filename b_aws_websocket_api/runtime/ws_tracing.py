@@ -0,0 +1,416 @@
+import contextvars
+import json
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Set by Lambda for every invocation of a function with active tracing.
+TRACE_HEADER_ENV = '_X_AMZN_TRACE_ID'
+DAEMON_ADDRESS_ENV = 'AWS_XRAY_DAEMON_ADDRESS'
+# Service name of segments started from propagated contexts, e.g. by fan-out functions.
+SERVICE_NAME_ENV = 'AWS_LAMBDA_FUNCTION_NAME'
+
+# Key of the propagated trace header in queue messages of the runtime helpers.
+TRACE_HEADER_KEY = 'traceHeader'
+
+AnnotationValue = Union[str, int, float, bool]
+
+
+class WsTraceContext:
+    """
+    Position in a trace to continue from, serialized as an X-Ray trace header
+    (Root=1-5759e988-bd862e3fe1be46a994272793;Parent=53995c3f42cd8ad8;Sampled=1).
+    """
+
+    def __init__(self, trace_id: str, parent_id: Optional[str] = None, sampled: bool = True) -> None:
+        """
+        Constructor.
+
+        :param trace_id: X-Ray trace id.
+        :param parent_id: Id of the segment or subsegment to continue from.
+        :param sampled: Whether the trace is recorded.
+        """
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.sampled = sampled
+
+    @staticmethod
+    def new_trace_id() -> str:
+        return f'1-{int(time.time()):08x}-{os.urandom(12).hex()}'
+
+    @classmethod
+    def parse(cls, header: Optional[str]) -> Optional['WsTraceContext']:
+        """
+        Parses a trace header.
+
+        :param header: Trace header.
+
+        :return: Context or None if the header has no trace id.
+        """
+        if not header:
+            return None
+
+        fields = dict(
+            part.strip().split('=', 1) for part in header.split(';') if '=' in part
+        )
+
+        if not fields.get('Root'):
+            return None
+
+        return cls(fields['Root'], fields.get('Parent'), fields.get('Sampled', '1') != '0')
+
+    @classmethod
+    def from_environment(cls) -> Optional['WsTraceContext']:
+        return cls.parse(os.environ.get(TRACE_HEADER_ENV))
+
+    def to_header(self) -> str:
+        header = f'Root={self.trace_id}'
+
+        if self.parent_id:
+            header += f';Parent={self.parent_id}'
+
+        return header + f';Sampled={int(self.sampled)}'
+
+
+class WsSpan:
+    """
+    Timed operation of a trace. Spans continuing a propagated context are exported as X-Ray segments,
+    spans nested in another span or in the Lambda function segment as subsegments.
+    """
+
+    def __init__(
+            self,
+            tracer: 'WsTracer',
+            name: str,
+            trace_id: str,
+            parent_id: Optional[str],
+            sampled: bool,
+            remote: bool,
+            annotations: Optional[Dict[str, AnnotationValue]] = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param tracer: Tracer exporting the span.
+        :param name: Operation name.
+        :param trace_id: X-Ray trace id.
+        :param parent_id: Id of the parent segment or subsegment.
+        :param sampled: Whether the span is exported.
+        :param remote: Whether the parent was propagated from another process.
+        :param annotations: Indexed key-value pairs to filter traces by.
+        """
+        self.tracer = tracer
+        self.name = name
+        self.id = os.urandom(8).hex()
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.remote = remote
+        self.annotations: Dict[str, AnnotationValue] = {}
+        self.metadata: Dict[str, Any] = {}
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.error: Optional[str] = None
+        self.throttled = False
+        self.__token: Optional[contextvars.Token] = None
+
+        for key, value in (annotations or {}).items():
+            self.annotate(key, value)
+
+    @property
+    def context(self) -> WsTraceContext:
+        return WsTraceContext(self.trace_id, self.id, self.sampled)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_time or time.time()) - self.start_time
+
+    def annotate(self, key: str, value: AnnotationValue) -> None:
+        """
+        Adds an annotation. X-Ray only accepts alphanumeric and underscore keys, hence other characters are
+        replaced with underscores.
+
+        :param key: Annotation key.
+        :param value: String, number or boolean.
+
+        :return: No return.
+        """
+        self.annotations[re.sub(r'\W', '_', key)] = value if isinstance(value, (int, float, bool)) else str(value)
+
+    def __enter__(self) -> 'WsSpan':
+        self.__token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_value is not None:
+            self.error = repr(exc_value)
+
+        self.end()
+
+        if self.__token is not None:
+            _current_span.reset(self.__token)
+            self.__token = None
+
+    def end(self) -> None:
+        if self.end_time is None:
+            self.end_time = time.time()
+            self.tracer.export(self)
+
+    def to_document(self, service_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Converts the span to an X-Ray segment document.
+
+        :param service_name: Name of segments, i.e. of spans with a propagated parent.
+
+        :return: Segment document.
+        """
+        document: Dict[str, Any] = dict(
+            name=service_name if self.remote and service_name else self.name,
+            id=self.id,
+            trace_id=self.trace_id,
+            start_time=self.start_time,
+            end_time=self.end_time,
+        )
+
+        if self.parent_id:
+            document['parent_id'] = self.parent_id
+
+        if not self.remote:
+            document['type'] = 'subsegment'
+            document['namespace'] = 'local'
+
+        if self.annotations:
+            document['annotations'] = dict(self.annotations, operation=self.name)
+        if self.metadata:
+            document['metadata'] = {'default': self.metadata}
+        if self.error:
+            document['fault'] = True
+            document['cause'] = dict(exceptions=[dict(message=self.error)])
+        if self.throttled:
+            document['throttle'] = True
+            document['error'] = True
+
+        return document
+
+
+class _WsNoopSpan:
+    """
+    Span of a disabled tracer. Records nothing.
+    """
+
+    context = None
+    annotations: Dict[str, AnnotationValue] = {}
+
+    def annotate(self, key: str, value: AnnotationValue) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> '_WsNoopSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NOOP_SPAN = _WsNoopSpan()
+_current_span: contextvars.ContextVar[Optional[WsSpan]] = contextvars.ContextVar('ws_current_span', default=None)
+
+
+class WsInMemoryExporter:
+    """
+    Keeps finished spans in memory, e.g. in tests.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor.
+        """
+        self.spans: List[WsSpan] = []
+        self.__lock = threading.Lock()
+
+    def export(self, span: WsSpan) -> None:
+        with self.__lock:
+            self.spans.append(span)
+
+    def find(self, name: str) -> List[WsSpan]:
+        return [span for span in self.spans if span.name == name]
+
+    def children(self, span: WsSpan) -> List[WsSpan]:
+        return [child for child in self.spans if child.parent_id == span.id]
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class WsXRayExporter:
+    """
+    Sends finished spans to the X-Ray daemon (which Lambda runs for functions with active tracing)
+    over UDP, hence exporting never waits for the network.
+    """
+
+    def __init__(self, address: Optional[str] = None, service_name: Optional[str] = None) -> None:
+        """
+        Constructor.
+
+        :param address: Daemon address (host:port). Read from the environment if not given.
+        :param service_name: Name of segments. Defaults to the function name.
+        """
+        host, _, port = (address or os.environ.get(DAEMON_ADDRESS_ENV, '127.0.0.1:2000')).rpartition(':')
+
+        self.__address = (host or '127.0.0.1', int(port))
+        self.__service_name = service_name or os.environ.get(SERVICE_NAME_ENV, 'websocket')
+        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def export(self, span: WsSpan) -> None:
+        header = json.dumps(dict(format='json', version=1))
+        document = json.dumps(span.to_document(self.__service_name), separators=(',', ':'), default=str)
+
+        try:
+            self.__socket.sendto(f'{header}\n{document}'.encode('utf-8'), self.__address)
+        except OSError as ex:
+            logger.debug(f'Failed to export span {span.name}: {repr(ex)}.')
+
+
+class WsTracer:
+    """
+    Creates spans of the runtime helpers and carries trace contexts across the processes a message passes,
+    e.g. route handler, fan-out queues and @connections sends, hence they form a single trace.
+
+    The current span is tracked in a context variable, hence nested spans (also in asyncio tasks) find
+    their parent without passing it around. Disabled tracers create no-op spans.
+    """
+
+    def __init__(self, exporter: Any = None, enabled: bool = True) -> None:
+        """
+        Constructor.
+
+        :param exporter: Object with an export(span) method. Defaults to WsXRayExporter.
+        :param enabled: Whether spans are recorded.
+        """
+        self.__exporter = exporter
+        self.__enabled = enabled
+
+    @classmethod
+    def from_environment(cls) -> 'WsTracer':
+        """
+        Creates a tracer exporting to the X-Ray daemon if it is available (active tracing of the function).
+
+        :return: Tracer.
+        """
+        if not os.environ.get(DAEMON_ADDRESS_ENV):
+            return cls(enabled=False)
+
+        return cls(exporter=WsXRayExporter())
+
+    @property
+    def enabled(self) -> bool:
+        return self.__enabled
+
+    @property
+    def exporter(self) -> Any:
+        return self.__exporter
+
+    @staticmethod
+    def current_span() -> Optional[WsSpan]:
+        return _current_span.get()
+
+    def span(
+            self,
+            name: str,
+            parent: Optional[WsTraceContext] = None,
+            annotations: Optional[Dict[str, AnnotationValue]] = None
+    ) -> Union[WsSpan, _WsNoopSpan]:
+        """
+        Creates a span, to be used as a context manager.
+
+        :param name: Operation name.
+        :param parent: Propagated context to continue. Defaults to the current span, then to the segment of the
+        Lambda invocation, otherwise a new trace is started.
+        :param annotations: Indexed key-value pairs to filter traces by.
+
+        :return: Span.
+        """
+        if not self.__enabled:
+            return _NOOP_SPAN
+
+        current = _current_span.get()
+
+        if parent is not None:
+            return WsSpan(self, name, parent.trace_id, parent.parent_id, parent.sampled, True, annotations)
+
+        if current is not None:
+            return WsSpan(self, name, current.trace_id, current.id, current.sampled, False, annotations)
+
+        invocation = WsTraceContext.from_environment()
+        if invocation is not None:
+            return WsSpan(self, name, invocation.trace_id, invocation.parent_id, invocation.sampled, False, annotations)
+
+        return WsSpan(self, name, WsTraceContext.new_trace_id(), None, True, True, annotations)
+
+    def inject(self, carrier: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Adds the context of the current span (or of the Lambda invocation) to a message.
+
+        :param carrier: Message, e.g. a queue message body.
+
+        :return: The message.
+        """
+        if not self.__enabled:
+            return carrier
+
+        current = _current_span.get()
+        context = current.context if current is not None else WsTraceContext.from_environment()
+
+        if context is not None:
+            carrier[TRACE_HEADER_KEY] = context.to_header()
+
+        return carrier
+
+    @staticmethod
+    def extract(carrier: Dict[str, Any]) -> Optional[WsTraceContext]:
+        """
+        Reads a propagated context of a message.
+
+        :param carrier: Message.
+
+        :return: Context or None.
+        """
+        return WsTraceContext.parse(carrier.get(TRACE_HEADER_KEY))
+
+    def export(self, span: WsSpan) -> None:
+        if span.sampled and self.__exporter is not None:
+            self.__exporter.export(span)
+
+
+# Shared by the traced runtime helpers of a container.
+_tracer: Optional[WsTracer] = None
+
+
+def get_tracer() -> WsTracer:
+    global _tracer
+
+    if _tracer is None:
+        _tracer = WsTracer.from_environment()
+
+    return _tracer
+
+
+def set_tracer(tracer: Optional[WsTracer]) -> None:
+    """
+    Replaces the tracer of the runtime helpers, e.g. with a tracer exporting to a WsInMemoryExporter in tests.
+
+    :param tracer: Tracer or None to create it from the environment again.
+
+    :return: No return.
+    """
+    global _tracer
+
+    _tracer = tracer
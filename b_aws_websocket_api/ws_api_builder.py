@@ -0,0 +1,434 @@
+import copy
+import hashlib
+from collections import Counter
+from typing import Optional, Dict, List, Mapping, Union, Any, Tuple, Set
+
+from aws_cdk import Stack, Duration, CfnResource
+from aws_cdk.aws_apigatewayv2 import CfnStage
+from aws_cdk.aws_lambda import Code, Runtime, IFunction, ILayerVersion, Architecture, CfnPermission
+from constructs import Construct
+
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_deployment import WsDeployment
+from b_aws_websocket_api.ws_function import WsFunction
+from b_aws_websocket_api.ws_lambda_integration import WsLambdaIntegration
+from b_aws_websocket_api.ws_route import WsRoute, route_id
+from b_aws_websocket_api.ws_stage import WsStage
+
+
+class WsFunctionDefinition:
+    """
+    Declarative definition of a function serving one or more routes of a WsApiBuilder.
+
+    Definitions with equal settings (and the same Code instance) are deployed as a single function.
+    """
+
+    def __init__(
+            self,
+            code: Code,
+            handler: str,
+            runtime: Optional[Runtime] = None,
+            name: Optional[str] = None,
+            environment: Optional[Mapping[str, str]] = None,
+            layers: Optional[List[ILayerVersion]] = None,
+            memory_size: Optional[int] = None,
+            timeout: Optional[Duration] = None,
+            architecture: Optional[Architecture] = None,
+            reserved_concurrent_executions: Optional[int] = None,
+            provisioned_concurrent_executions: Optional[int] = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param code: The code for the function.
+        :param handler: The name of the method within your code that Lambda calls to execute your function.
+        :param runtime: The identifier of the function's runtime. Defaults to the builder runtime.
+        :param name: Name of the function (prefixed with the builder id). Derived from the handler by default.
+        :param environment: Environment variables of the function.
+        :param layers: Layers of the function.
+        :param memory_size: The amount of memory, in MB, that is allocated to the function.
+        :param timeout: The function execution time after which Lambda terminates the function.
+        :param architecture: The system architecture of the function.
+        :param reserved_concurrent_executions: Reserved concurrency of the function.
+        :param provisioned_concurrent_executions: Provisioned concurrency of the function alias.
+        """
+        self.code = code
+        self.handler = handler
+        self.runtime = runtime
+        self.name = name
+        self.environment = dict(environment or {})
+        self.layers = list(layers or [])
+        self.memory_size = memory_size
+        self.timeout = timeout
+        self.architecture = architecture
+        self.reserved_concurrent_executions = reserved_concurrent_executions
+        self.provisioned_concurrent_executions = provisioned_concurrent_executions
+
+    @property
+    def key(self) -> Tuple:
+        """
+        Identity of the deployed function. Definitions with equal keys share a function.
+        """
+        return (
+            id(self.code),
+            self.handler,
+            self.runtime.name if self.runtime else None,
+            self.name,
+            tuple(sorted(self.environment.items())),
+            tuple(id(layer) for layer in self.layers),
+            self.memory_size,
+            self.timeout.to_seconds() if self.timeout else None,
+            self.architecture.name if self.architecture else None,
+            self.reserved_concurrent_executions,
+            self.provisioned_concurrent_executions,
+        )
+
+
+class WsRouteDefinition:
+    """
+    Declarative definition of a route of a WsApiBuilder.
+    """
+
+    def __init__(
+            self,
+            function: Union[WsFunctionDefinition, IFunction],
+            two_way: bool = True,
+            authorization_type: Optional[str] = None,
+            authorizer_id: Optional[str] = None,
+            api_key_required: Optional[bool] = None,
+            operation_name: Optional[str] = None,
+            throttling_burst_limit: Optional[int] = None,
+            throttling_rate_limit: Optional[float] = None,
+            logging_level: Optional[str] = None,
+            data_trace_enabled: Optional[bool] = None,
+            detailed_metrics_enabled: Optional[bool] = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param function: Function definition or an existing function serving the route.
+        :param two_way: Whether integration responses are returned to the client.
+        :param authorization_type: Authorization type of the route (only applies to $connect).
+        :param authorizer_id: Authorizer of the route (only applies to $connect).
+        :param api_key_required: Specifies whether an API key is required for the route.
+        :param operation_name: The operation name for the route.
+        :param throttling_burst_limit: Route throttling burst limit.
+        :param throttling_rate_limit: Route throttling rate limit.
+        :param logging_level: Route logging level: ERROR, INFO or OFF.
+        :param data_trace_enabled: Whether full request and response logging is enabled for the route.
+        :param detailed_metrics_enabled: Whether detailed metrics are enabled for the route.
+        """
+        self.function = function
+        self.two_way = two_way
+        self.authorization_type = authorization_type
+        self.authorizer_id = authorizer_id
+        self.api_key_required = api_key_required
+        self.operation_name = operation_name
+        self.throttling_burst_limit = throttling_burst_limit
+        self.throttling_rate_limit = throttling_rate_limit
+        self.logging_level = logging_level
+        self.data_trace_enabled = data_trace_enabled
+        self.detailed_metrics_enabled = detailed_metrics_enabled
+
+    @property
+    def route_settings(self) -> Dict[str, Any]:
+        """
+        Stage route settings of the route (CloudFormation property names).
+        """
+        settings = {
+            'ThrottlingBurstLimit': self.throttling_burst_limit,
+            'ThrottlingRateLimit': self.throttling_rate_limit,
+            'LoggingLevel': self.logging_level,
+            'DataTraceEnabled': self.data_trace_enabled,
+            'DetailedMetricsEnabled': self.detailed_metrics_enabled,
+        }
+
+        return {key: value for key, value in settings.items() if value is not None}
+
+
+class WsApiBuilder(Construct):
+    """
+    Builds a complete web socket API (api, stage, functions, integrations, routes and deployment)
+    from a route table in one pass. Identical functions and their integrations are created once
+    and shared by all routes that use them. Fire-and-forget routes get no route response.
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            routes: Mapping[str, WsRouteDefinition],
+            stage_name: str = 'prod',
+            api_name: Optional[str] = None,
+            route_selection_expression: Optional[str] = None,
+            description: Optional[str] = None,
+            default_runtime: Optional[Runtime] = None,
+            default_route_settings: Optional[CfnStage.RouteSettingsProperty] = None,
+            create_default_access_log_settings: Optional[bool] = None,
+            compact: bool = False,
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param routes: Route key to route definition mapping.
+        :param stage_name: The stage name.
+        :param api_name: The name of the API. Defaults to the id.
+        :param route_selection_expression: The route selection expression for the API.
+        Defaults to $request.body.action.
+        :param description: The description of the API.
+        :param default_runtime: Runtime of function definitions that do not specify one.
+        :param default_route_settings: The default route settings for the stage.
+        :param create_default_access_log_settings: Indicate whether to create default access log settings.
+        :param compact: Compact template mode: functions get a single invoke permission scoped to this API, and
+        integrations of functions serving only fire-and-forget (not two-way) routes get no integration response.
+        """
+        super().__init__(
+            scope=scope,
+            id=id,
+        )
+
+        # Resources of the stack before the build, hence the report counts only resources created by the builder.
+        existing = self.__resource_paths(scope)
+
+        route_ids: Dict[str, str] = {}
+        for route_key in routes:
+            key_id = route_id(route_key)
+            if key_id in route_ids:
+                raise ValueError(f'Route keys {route_ids[key_id]} and {route_key} map to the same construct id.')
+            route_ids[key_id] = route_key
+
+        self.__api = WsApi(
+            scope=scope,
+            id=f'{id}Api',
+            name=api_name or id,
+            description=description,
+            route_selection_expression=route_selection_expression or '$request.body.action',
+        )
+
+        self.__stage = WsStage(
+            scope=scope,
+            id=f'{id}Stage',
+            ws_api=self.__api,
+            stage_name=stage_name,
+            auto_deploy=False,
+            default_route_settings=default_route_settings,
+            create_default_access_log_settings=create_default_access_log_settings,
+            route_settings={
+                route_key: definition.route_settings
+                for route_key, definition in routes.items()
+                if definition.route_settings
+            } or None,
+        )
+
+        self.__functions: Dict[str, IFunction] = {}
+        # Names of existing functions passed in by the caller, by construct path.
+        self.__external_names: Dict[str, str] = {}
+        self.__integrations: Dict[str, WsLambdaIntegration] = {}
+        self.__routes: Dict[str, WsRoute] = {}
+
+        functions_by_key: Dict[Any, IFunction] = {}
+        functions_by_route: Dict[str, IFunction] = {}
+        two_way_functions = set()
+
+        for route_key, definition in routes.items():
+            function = definition.function
+
+            if isinstance(function, WsFunctionDefinition):
+                if function.key not in functions_by_key:
+                    functions_by_key[function.key] = self.__create_function(
+                        scope, id, function, default_runtime, compact
+                    )
+                function = functions_by_key[function.key]
+
+            functions_by_route[route_key] = function
+            if definition.two_way:
+                two_way_functions.add(function.node.path)
+
+        integrations_by_function: Dict[str, WsLambdaIntegration] = {}
+
+        for route_key, definition in routes.items():
+            function = functions_by_route[route_key]
+            integration = integrations_by_function.get(function.node.path)
+
+            if integration is None:
+                name = self.__name_of(function)
+                integration = WsLambdaIntegration(
+                    scope=scope,
+                    id=f'{id}{name}Integration',
+                    integration_name=f'{id}{name}Integration',
+                    ws_api=self.__api,
+                    function=function,
+                    # Responses of fire-and-forget routes are never returned to the client.
+                    default_integration_response=not compact or function.node.path in two_way_functions,
+                )
+                integrations_by_function[function.node.path] = integration
+                self.__integrations[name] = integration
+
+            is_connect = route_key == '$connect'
+
+            self.__routes[route_key] = WsRoute(
+                scope=scope,
+                id=f'{id}{route_id(route_key)}Route',
+                ws_api=self.__api,
+                route_key=route_key,
+                authorization_type=(definition.authorization_type or 'NONE') if is_connect else 'NONE',
+                authorizer_id=definition.authorizer_id if is_connect else None,
+                api_key_required=definition.api_key_required,
+                operation_name=definition.operation_name,
+                route_response_selection_expression='$default' if definition.two_way else None,
+                target=f'integrations/{integration.ref}',
+                default_route_response=definition.two_way,
+            )
+
+        if compact:
+            # One permission per function, scoped to this API, instead of an unscoped one.
+            for name, function in self.__functions.items():
+                CfnPermission(
+                    scope=scope,
+                    id=f'{id}{name}InvokePermission',
+                    action='lambda:InvokeFunction',
+                    function_name=function.invoke_target.function_arn,
+                    principal='apigateway.amazonaws.com',
+                    source_arn=f'arn:aws:execute-api:{scope.region}:{scope.account}:{self.__api.ref}/*',
+                )
+
+        self.__deployment = WsDeployment(
+            scope=scope,
+            id=f'{id}Deployment',
+            ws_stage=self.__stage,
+        )
+
+        created = Counter(
+            resource.cfn_resource_type
+            for resource in Stack.of(scope).node.find_all()
+            if isinstance(resource, CfnResource) and resource.node.path not in existing
+        )
+        self.__resource_report = dict(sorted(created.items()), total=sum(created.values()))
+
+    @property
+    def api(self) -> WsApi:
+        return self.__api
+
+    @property
+    def stage(self) -> WsStage:
+        return self.__stage
+
+    @property
+    def deployment(self) -> WsDeployment:
+        return self.__deployment
+
+    @property
+    def functions(self) -> Dict[str, IFunction]:
+        """
+        Functions created from function definitions, by name.
+        """
+        return self.__functions
+
+    @property
+    def integrations(self) -> Dict[str, WsLambdaIntegration]:
+        return self.__integrations
+
+    @property
+    def routes(self) -> Dict[str, WsRoute]:
+        return self.__routes
+
+    @property
+    def resource_report(self) -> Dict[str, int]:
+        """
+        Number of CloudFormation resources created by the builder (including roles, policies, versions, aliases,
+        permissions and scaling resources of functions) by resource type, and their total.
+        Build per_route_layout() of a route table to compare with a hand-wired API.
+        """
+        return self.__resource_report
+
+    @staticmethod
+    def per_route_layout(routes: Mapping[str, WsRouteDefinition]) -> Dict[str, WsRouteDefinition]:
+        """
+        Converts a route table to the hand-wired layout, where every route has its own function and integration.
+
+        :param routes: Route key to route definition mapping.
+
+        :return: Route table without shared function definitions.
+        """
+        layout = {}
+
+        for route_key, definition in routes.items():
+            definition = copy.copy(definition)
+
+            if isinstance(definition.function, WsFunctionDefinition):
+                definition.function = copy.copy(definition.function)
+                definition.function.name = f'{definition.function.name or ""}{route_id(route_key)}'
+
+            layout[route_key] = definition
+
+        return layout
+
+    @staticmethod
+    def __resource_paths(scope: Construct) -> Set[str]:
+        return {
+            resource.node.path for resource in Stack.of(scope).node.find_all() if isinstance(resource, CfnResource)
+        }
+
+    def __create_function(
+            self,
+            scope: Stack,
+            id: str,
+            definition: WsFunctionDefinition,
+            default_runtime: Optional[Runtime],
+            compact: bool
+    ) -> WsFunction:
+        # Different definitions with the same handler (e.g. other settings) still need unique names.
+        unique_name = self.__unique_name(definition.name or route_id(definition.handler.replace('.', ' ').title()))
+
+        function = WsFunction(
+            scope=scope,
+            id=f'{id}{unique_name}Function',
+            function_name=self.__function_name(f'{id}{unique_name}'),
+            code=definition.code,
+            handler=definition.handler,
+            runtime=definition.runtime or default_runtime or Runtime.PYTHON_3_11,
+            environment=definition.environment or None,
+            layers=definition.layers or None,
+            memory_size=definition.memory_size,
+            timeout=definition.timeout,
+            architecture=definition.architecture,
+            reserved_concurrent_executions=definition.reserved_concurrent_executions,
+            provisioned_concurrent_executions=definition.provisioned_concurrent_executions,
+            api_invoke_permission=not compact,
+        )
+
+        self.__functions[unique_name] = function
+
+        return function
+
+    def __name_of(self, function: IFunction) -> str:
+        for name, item in self.__functions.items():
+            if item is function:
+                return name
+
+        # Existing functions passed in by the caller. Functions of different scopes may share a construct id.
+        path = function.node.path
+        if path not in self.__external_names:
+            self.__external_names[path] = self.__unique_name(route_id(function.node.id))
+
+        return self.__external_names[path]
+
+    def __unique_name(self, name: str) -> str:
+        taken = set(self.__functions) | set(self.__external_names.values())
+
+        unique_name, index = name, 2
+        while unique_name in taken:
+            unique_name, index = f'{name}{index}', index + 1
+
+        return unique_name
+
+    @staticmethod
+    def __function_name(name: str) -> str:
+        # Lambda function names are limited to 64 characters. Truncated names keep a hash of the full name,
+        # hence distinct long names stay distinct.
+        if len(name) <= 64:
+            return name
+
+        return f'{name[:55]}-{hashlib.sha256(name.encode("utf-8")).hexdigest()[:8]}'
@@ -0,0 +1,141 @@
+from typing import Optional, List
+
+from aws_cdk import Stack, Duration
+from aws_cdk.aws_apigatewayv2 import CfnAuthorizer
+from aws_cdk.aws_lambda import Code, Runtime, CfnPermission
+from constructs import Construct
+
+from b_aws_websocket_api.runtime.ws_authorizer import (
+    ISSUER_ENV,
+    AUDIENCE_ENV,
+    JWKS_URL_ENV,
+    JWKS_TTL_ENV,
+    ALGORITHMS_ENV,
+    CACHE_SIZE_ENV,
+    CACHE_TTL_ENV,
+    TOKEN_QUERY_PARAMETER_ENV
+)
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_function import WsFunction
+from b_aws_websocket_api.ws_runtime_layer import WsRuntimeLayer
+
+
+class WsAuthorizer(Construct):
+    """
+    Creates a Lambda REQUEST authorizer for the $connect route which verifies JWTs (RS256 keys of the
+    issuer's JWKS). Pass authorization_type='CUSTOM' and authorizer_id=authorizer.authorizer_id to the
+    $connect route.
+
+    API Gateway does not cache authorizer results of websocket APIs, hence the function caches signing keys
+    and decisions per container (see WsTokenAuthorizer). Provisioned concurrency (e.g. memory_size and
+    provisioned_concurrent_executions named arguments) keeps those caches warm through reconnect storms.
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            ws_api: WsApi,
+            issuer: str,
+            audience: Optional[List[str]] = None,
+            jwks_url: Optional[str] = None,
+            algorithms: Optional[List[str]] = None,
+            token_query_parameter: str = 'token',
+            identity_source: Optional[List[str]] = None,
+            jwks_ttl: Optional[Duration] = None,
+            decision_cache_size: int = 10000,
+            decision_cache_ttl: Optional[Duration] = None,
+            authorizer_name: Optional[str] = None,
+            runtime: Optional[Runtime] = None,
+            *args,
+            **kwargs
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param ws_api: Web socket API of the authorizer.
+        :param issuer: Expected iss claim of tokens.
+        :param audience: Accepted aud claims. Not validated if not given.
+        :param jwks_url: Url of the issuer's key set. Defaults to {issuer}/.well-known/jwks.json.
+        :param algorithms: Accepted signature algorithms. Defaults to RS256.
+        :param token_query_parameter: Query string parameter holding the token.
+        :param identity_source: Request parameters that must be present, otherwise API Gateway denies without
+        invoking the authorizer. Defaults to the token query string parameter.
+        :param jwks_ttl: Lifetime of cached signing keys. Defaults to 10 minutes.
+        :param decision_cache_size: Maximum number of cached decisions per container.
+        :param decision_cache_ttl: Maximum lifetime of a cached decision. Defaults to 5 minutes.
+        :param authorizer_name: Name of the authorizer.
+        :param runtime: Runtime of the authorizer function.
+        :param args: Additional arguments of WsFunction.
+        :param kwargs: Additional named arguments of WsFunction.
+        """
+        super().__init__(
+            scope=scope,
+            id=id,
+        )
+
+        environment = {
+            ISSUER_ENV: issuer,
+            JWKS_URL_ENV: jwks_url or f'{issuer.rstrip("/")}/.well-known/jwks.json',
+            JWKS_TTL_ENV: str(int((jwks_ttl or Duration.minutes(10)).to_seconds())),
+            ALGORITHMS_ENV: ','.join(algorithms or ['RS256']),
+            CACHE_SIZE_ENV: str(decision_cache_size),
+            CACHE_TTL_ENV: str(int((decision_cache_ttl or Duration.minutes(5)).to_seconds())),
+            TOKEN_QUERY_PARAMETER_ENV: token_query_parameter,
+        }
+
+        if audience:
+            environment[AUDIENCE_ENV] = ','.join(audience)
+
+        kwargs.setdefault('function_name', f'{id}Function')
+        kwargs.setdefault('memory_size', 512)
+        kwargs.setdefault('timeout', Duration.seconds(10))
+
+        self.__function = WsFunction(
+            scope=scope,
+            id=f'{id}Function',
+            code=Code.from_asset(WsRuntimeLayer.source_path()),
+            handler='b_aws_websocket_api.runtime.handlers.ws_authorizer.authorize',
+            runtime=runtime or Runtime.PYTHON_3_11,
+            environment={**environment, **kwargs.pop('environment', {})},
+            # Only authorizers of the API may invoke the function (see below).
+            api_invoke_permission=False,
+            *args,
+            **kwargs
+        )
+
+        function_arn = self.__function.invoke_target.function_arn
+        function_uri = f'arn:aws:apigateway:{scope.region}:lambda:path/2015-03-31/functions/{function_arn}/invocations'
+
+        self.__authorizer = CfnAuthorizer(
+            scope=scope,
+            id=f'{id}Authorizer',
+            api_id=ws_api.ref,
+            name=authorizer_name or id,
+            authorizer_type='REQUEST',
+            authorizer_uri=function_uri,
+            identity_source=identity_source or [f'route.request.querystring.{token_query_parameter}'],
+        )
+
+        CfnPermission(
+            scope=scope,
+            id=f'{id}InvokePermission',
+            action='lambda:InvokeFunction',
+            function_name=function_arn,
+            principal='apigateway.amazonaws.com',
+            source_arn=f'arn:aws:execute-api:{scope.region}:{scope.account}:{ws_api.ref}/authorizers/*',
+        )
+
+    @property
+    def function(self) -> WsFunction:
+        return self.__function
+
+    @property
+    def authorizer(self) -> CfnAuthorizer:
+        return self.__authorizer
+
+    @property
+    def authorizer_id(self) -> str:
+        return self.__authorizer.ref
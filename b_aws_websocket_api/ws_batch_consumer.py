@@ -0,0 +1,123 @@
+from typing import Optional
+
+from aws_cdk import Stack, Duration
+from aws_cdk.aws_kinesis import IStream
+from aws_cdk.aws_lambda import Code, Runtime, StartingPosition, IEventSource, IEventSourceDlq
+from aws_cdk.aws_lambda_event_sources import SqsEventSource, KinesisEventSource
+from aws_cdk.aws_sqs import IQueue
+from constructs import Construct
+
+from b_aws_websocket_api.ws_function import WsFunction
+
+
+class WsBatchConsumer(Construct):
+    """
+    Creates a function that drains frames of service integrations (WsSqsIntegration, WsKinesisIntegration)
+    in large batches with partial batch failure reporting. Use WsBatchProcessor as the handler, which hands
+    frames to route handlers grouped by connection and route key.
+
+    Additional named arguments are passed to WsFunction, hence e.g. architecture, memory size or provisioned
+    concurrency options carry over. The event source is attached to the alias of the function, if there is one.
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            code: Code,
+            handler: str,
+            queue: Optional[IQueue] = None,
+            stream: Optional[IStream] = None,
+            runtime: Optional[Runtime] = None,
+            batch_size: int = 500,
+            max_batching_window: Optional[Duration] = None,
+            parallelization_factor: Optional[int] = None,
+            max_concurrency: Optional[int] = None,
+            starting_position: StartingPosition = StartingPosition.LATEST,
+            retry_attempts: int = 3,
+            on_failure: Optional[IEventSourceDlq] = None,
+            *args,
+            **kwargs
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param code: The code for the function.
+        :param handler: The name of the method within your code that Lambda calls, usually a WsBatchProcessor.
+        :param queue: Queue to drain. Either a queue or a stream must be given.
+        :param stream: Kinesis stream to drain.
+        :param runtime: The identifier of the function's runtime.
+        :param batch_size: Maximum number of frames per invocation.
+        :param max_batching_window: Maximum time to gather a batch. Defaults to one second.
+        :param parallelization_factor: Concurrent batches per Kinesis shard (1-10). Stream only.
+        :param max_concurrency: Maximum concurrent invocations of the queue event source. Queue only.
+        :param starting_position: Where to start reading the stream. Stream only.
+        :param retry_attempts: Retries of a failed stream batch (halved on every retry). Stream only,
+        queues retry by their redrive policy.
+        :param on_failure: Destination of stream batches that exhausted retries. Stream only.
+        :param args: Additional arguments of WsFunction.
+        :param kwargs: Additional named arguments of WsFunction.
+        """
+        super().__init__(
+            scope=scope,
+            id=id,
+        )
+
+        if (queue is None) == (stream is None):
+            raise ValueError('Either a queue or a stream must be given.')
+
+        if queue is not None and parallelization_factor is not None:
+            raise ValueError('Parallelization factor applies to streams only.')
+
+        if stream is not None and max_concurrency is not None:
+            raise ValueError('Maximum concurrency applies to queues only.')
+
+        max_batching_window = max_batching_window or Duration.seconds(1)
+
+        kwargs.setdefault('function_name', f'{id}Function')
+        kwargs.setdefault('memory_size', 1024)
+        kwargs.setdefault('timeout', Duration.minutes(1))
+
+        self.__function = WsFunction(
+            scope=scope,
+            id=f'{id}Function',
+            code=code,
+            handler=handler,
+            runtime=runtime or Runtime.PYTHON_3_11,
+            api_invoke_permission=False,
+            *args,
+            **kwargs
+        )
+
+        if queue is not None:
+            self.__event_source: IEventSource = SqsEventSource(
+                queue,
+                batch_size=batch_size,
+                max_batching_window=max_batching_window,
+                max_concurrency=max_concurrency,
+                report_batch_item_failures=True,
+            )
+        else:
+            self.__event_source = KinesisEventSource(
+                stream,
+                starting_position=starting_position,
+                batch_size=batch_size,
+                max_batching_window=max_batching_window,
+                parallelization_factor=parallelization_factor,
+                retry_attempts=retry_attempts,
+                bisect_batch_on_error=True,
+                on_failure=on_failure,
+                report_batch_item_failures=True,
+            )
+
+        self.__function.invoke_target.add_event_source(self.__event_source)
+
+    @property
+    def function(self) -> WsFunction:
+        return self.__function
+
+    @property
+    def event_source(self) -> IEventSource:
+        return self.__event_source
@@ -0,0 +1,85 @@
+from typing import Optional, Dict
+
+from aws_cdk import Stack, Duration, RemovalPolicy
+from aws_cdk.aws_dynamodb import Table, Attribute, AttributeType, BillingMode
+from aws_cdk.aws_iam import IGrantable, Grant
+from constructs import Construct
+
+from b_aws_websocket_api.runtime.ws_chunk_store_client import (
+    TABLE_NAME_ENV,
+    TTL_SECONDS_ENV,
+    MAX_MESSAGE_BYTES_ENV,
+    PARTITION_KEY,
+    SORT_KEY,
+    TTL_ATTRIBUTE
+)
+
+
+class WsChunkStore(Construct):
+    """
+    Creates a short-lived DynamoDB chunk store that reassembles large messages uploaded by clients
+    as chunk frames (see WsChunkStoreClient).
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            ttl: Optional[Duration] = None,
+            max_message_bytes: int = 64 * 1024 * 1024,
+            table_name: Optional[str] = None,
+            removal_policy: Optional[RemovalPolicy] = None,
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param ttl: Lifetime of stored chunks, i.e. the time to complete an upload. Defaults to 15 minutes.
+        :param max_message_bytes: Maximum size of an uploaded message.
+        :param table_name: Name of the chunk table.
+        :param removal_policy: Removal policy of the chunk table.
+        """
+        super().__init__(
+            scope=scope,
+            id=id,
+        )
+
+        self.__ttl = ttl or Duration.minutes(15)
+        self.__max_message_bytes = max_message_bytes
+
+        self.__table = Table(
+            scope=scope,
+            id=f'{id}Table',
+            table_name=table_name,
+            partition_key=Attribute(name=PARTITION_KEY, type=AttributeType.STRING),
+            sort_key=Attribute(name=SORT_KEY, type=AttributeType.NUMBER),
+            billing_mode=BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute=TTL_ATTRIBUTE,
+            removal_policy=removal_policy or RemovalPolicy.DESTROY,
+        )
+
+    @property
+    def table(self) -> Table:
+        return self.__table
+
+    @property
+    def environment(self) -> Dict[str, str]:
+        """
+        Environment variables that configure WsChunkStoreClient in any function.
+        """
+        return {
+            TABLE_NAME_ENV: self.__table.table_name,
+            TTL_SECONDS_ENV: str(int(self.__ttl.to_seconds())),
+            MAX_MESSAGE_BYTES_ENV: str(self.__max_message_bytes),
+        }
+
+    def grant_read_write(self, grantee: IGrantable) -> Grant:
+        """
+        Grants permissions to store chunks and reassemble messages.
+
+        :param grantee: Principal to grant permissions to.
+
+        :return: Grant.
+        """
+        return self.__table.grant_read_write_data(grantee)
@@ -0,0 +1,199 @@
+from typing import Optional, Dict, List
+
+from aws_cdk import Stack, Duration, RemovalPolicy
+from aws_cdk.aws_dynamodb import Table, Attribute, AttributeType, BillingMode
+from aws_cdk.aws_iam import IGrantable, Grant
+from aws_cdk.aws_lambda import Code, Runtime
+from constructs import Construct
+
+from b_aws_websocket_api.runtime.ws_connection_registry_client import (
+    TABLE_NAME_ENV,
+    SHARD_COUNT_ENV,
+    TTL_SECONDS_ENV,
+    CODECS_ENV,
+    PARTITION_KEY,
+    SORT_KEY,
+    TTL_ATTRIBUTE
+)
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_function import WsFunction
+from b_aws_websocket_api.ws_lambda_integration import WsLambdaIntegration
+from b_aws_websocket_api.ws_route import WsRoute
+from b_aws_websocket_api.ws_runtime_layer import WsRuntimeLayer
+from b_aws_websocket_api.ws_subscription_index import WsSubscriptionIndex
+
+
+class WsConnectionRegistry(Construct):
+    """
+    Creates a DynamoDB connection registry with write-sharded keys and TTL-based expiry,
+    together with $connect and $disconnect routes that maintain it.
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            ws_api: WsApi,
+            shard_count: int = 16,
+            ttl: Optional[Duration] = None,
+            table_name: Optional[str] = None,
+            removal_policy: Optional[RemovalPolicy] = None,
+            runtime: Optional[Runtime] = None,
+            authorization_type: Optional[str] = None,
+            authorizer_id: Optional[str] = None,
+            subscription_index: Optional[WsSubscriptionIndex] = None,
+            codecs: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param ws_api: Web socket API for which to register connections.
+        :param shard_count: Number of write shards of the partition key.
+        :param ttl: Lifetime of a registered connection. Defaults to 2 hours which is the maximum
+        connection duration of API Gateway websockets.
+        :param table_name: Name of the registry table.
+        :param removal_policy: Removal policy of the registry table.
+        :param runtime: Runtime of the route handler functions.
+        :param authorization_type: Authorization type of the $connect route.
+        :param authorizer_id: Authorizer of the $connect route.
+        :param subscription_index: Subscription index to remove subscriptions of disconnected clients from.
+        :param codecs: Codecs clients may negotiate at $connect (see ws_codec). All installed codecs if not given.
+        MessagePack and zstd codecs need msgpack and zstandard packages, e.g. a layer added to connect_function.
+        """
+        super().__init__(
+            scope=scope,
+            id=id,
+        )
+
+        self.__shard_count = shard_count
+        self.__ttl = ttl or Duration.hours(2)
+        self.__subscription_index = subscription_index
+        self.__codecs = codecs
+
+        self.__table = Table(
+            scope=scope,
+            id=f'{id}Table',
+            table_name=table_name,
+            partition_key=Attribute(name=PARTITION_KEY, type=AttributeType.STRING),
+            sort_key=Attribute(name=SORT_KEY, type=AttributeType.STRING),
+            billing_mode=BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute=TTL_ATTRIBUTE,
+            removal_policy=removal_policy or RemovalPolicy.DESTROY,
+        )
+
+        code = Code.from_asset(WsRuntimeLayer.source_path())
+
+        self.__connect_function = WsFunction(
+            scope=scope,
+            id=f'{id}ConnectFunction',
+            function_name=f'{id}ConnectFunction',
+            code=code,
+            handler='b_aws_websocket_api.runtime.handlers.ws_connection_registry.connect',
+            runtime=runtime or Runtime.PYTHON_3_11,
+            environment=self.environment,
+        )
+
+        self.__disconnect_function = WsFunction(
+            scope=scope,
+            id=f'{id}DisconnectFunction',
+            function_name=f'{id}DisconnectFunction',
+            code=code,
+            handler='b_aws_websocket_api.runtime.handlers.ws_connection_registry.disconnect',
+            runtime=runtime or Runtime.PYTHON_3_11,
+            environment=self.environment,
+        )
+
+        self.__table.grant_write_data(self.__connect_function)
+        self.__table.grant_write_data(self.__disconnect_function)
+
+        if subscription_index:
+            subscription_index.grant_read_write(self.__disconnect_function)
+
+        self.__routes: List[WsRoute] = []
+
+        for route_key, function, route_id in [
+            ('$connect', self.__connect_function, 'Connect'),
+            ('$disconnect', self.__disconnect_function, 'Disconnect'),
+        ]:
+            integration = WsLambdaIntegration(
+                scope=scope,
+                id=f'{id}{route_id}Integration',
+                integration_name=f'{id}{route_id}Integration',
+                ws_api=ws_api,
+                function=function,
+            )
+
+            self.__routes.append(WsRoute(
+                scope=scope,
+                id=f'{id}{route_id}Route',
+                ws_api=ws_api,
+                route_key=route_key,
+                authorization_type=(authorization_type or 'NONE') if route_key == '$connect' else 'NONE',
+                authorizer_id=authorizer_id if route_key == '$connect' else None,
+                target=f'integrations/{integration.ref}',
+            ))
+
+    @property
+    def table(self) -> Table:
+        return self.__table
+
+    @property
+    def routes(self) -> List[WsRoute]:
+        """
+        Created routes. Add them as dependencies of a WsDeployment.
+        """
+        return self.__routes
+
+    @property
+    def subscription_index(self) -> Optional[WsSubscriptionIndex]:
+        return self.__subscription_index
+
+    @property
+    def connect_function(self) -> WsFunction:
+        return self.__connect_function
+
+    @property
+    def disconnect_function(self) -> WsFunction:
+        return self.__disconnect_function
+
+    @property
+    def environment(self) -> Dict[str, str]:
+        """
+        Environment variables that configure WsConnectionRegistryClient
+        (and WsSubscriptionIndexClient if an index is attached) in any function.
+        """
+        environment = {
+            TABLE_NAME_ENV: self.__table.table_name,
+            SHARD_COUNT_ENV: str(self.__shard_count),
+            TTL_SECONDS_ENV: str(int(self.__ttl.to_seconds())),
+        }
+
+        if self.__subscription_index:
+            environment.update(self.__subscription_index.environment)
+
+        if self.__codecs:
+            environment[CODECS_ENV] = ','.join(self.__codecs)
+
+        return environment
+
+    def grant_read(self, grantee: IGrantable) -> Grant:
+        """
+        Grants permissions to stream and batch-get connections.
+
+        :param grantee: Principal to grant permissions to.
+
+        :return: Grant.
+        """
+        return self.__table.grant_read_data(grantee)
+
+    def grant_read_write(self, grantee: IGrantable) -> Grant:
+        """
+        Grants permissions to read, register and remove connections.
+
+        :param grantee: Principal to grant permissions to.
+
+        :return: Grant.
+        """
+        return self.__table.grant_read_write_data(grantee)
@@ -0,0 +1,106 @@
+from typing import Optional
+
+from aws_cdk import Stack, Duration
+from aws_cdk.aws_events import Rule, Schedule
+from aws_cdk.aws_events_targets import LambdaFunction
+from aws_cdk.aws_iam import PolicyStatement
+from aws_cdk.aws_lambda import Code, Runtime
+from constructs import Construct
+
+from b_aws_websocket_api.runtime.ws_connection_pruner import (
+    CONNECTIONS_URL_ENV,
+    MIN_AGE_SECONDS_ENV,
+    MAX_IN_FLIGHT_ENV
+)
+from b_aws_websocket_api.ws_connection_registry import WsConnectionRegistry
+from b_aws_websocket_api.ws_function import WsFunction
+from b_aws_websocket_api.ws_runtime_layer import WsRuntimeLayer
+from b_aws_websocket_api.ws_stage import WsStage
+
+
+class WsConnectionSweeper(Construct):
+    """
+    Creates a scheduled function that validates old registry connections with GET @connections/{id}
+    calls and removes gone ones (and their subscriptions) with batched deletes. Complements pruning of
+    connections reported gone by broadcasts, e.g. of connections that are never broadcast to.
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            ws_stage: WsStage,
+            registry: WsConnectionRegistry,
+            schedule: Optional[Schedule] = None,
+            min_age: Optional[Duration] = None,
+            max_in_flight: int = 50,
+            memory_size: int = 512,
+            timeout: Optional[Duration] = None,
+            runtime: Optional[Runtime] = None,
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param ws_stage: Stage which connections to validate.
+        :param registry: Connection registry to sweep.
+        :param schedule: Schedule of sweeps. Defaults to every 30 minutes.
+        :param min_age: Only connections older than this are validated. Defaults to 10 minutes.
+        :param max_in_flight: Concurrent management API requests of a sweep.
+        :param memory_size: Memory size of the sweeper function.
+        :param timeout: Timeout of the sweeper function. Sweeps stop before it, the next sweep scans again.
+        :param runtime: Runtime of the sweeper function.
+        """
+        super().__init__(
+            scope=scope,
+            id=id,
+        )
+
+        environment = dict(registry.environment)
+        environment.update({
+            CONNECTIONS_URL_ENV: ws_stage.connections_url,
+            MIN_AGE_SECONDS_ENV: str(int((min_age or Duration.minutes(10)).to_seconds())),
+            MAX_IN_FLIGHT_ENV: str(max_in_flight),
+        })
+
+        self.__function = WsFunction(
+            scope=scope,
+            id=f'{id}Function',
+            function_name=f'{id}Function',
+            code=Code.from_asset(WsRuntimeLayer.source_path()),
+            handler='b_aws_websocket_api.runtime.handlers.ws_connection_sweeper.sweep',
+            runtime=runtime or Runtime.PYTHON_3_11,
+            environment=environment,
+            memory_size=memory_size,
+            timeout=timeout or Duration.minutes(5),
+            # Overlapping sweeps would validate the same connections twice.
+            reserved_concurrent_executions=1,
+            api_invoke_permission=False,
+        )
+
+        registry.grant_read_write(self.__function)
+
+        if registry.subscription_index:
+            registry.subscription_index.grant_read_write(self.__function)
+
+        # The sweeper checks connections with GET @connections/{id} calls only.
+        self.__function.add_to_role_policy(PolicyStatement(
+            actions=['execute-api:ManageConnections'],
+            resources=[ws_stage.connections_status_arn],
+        ))
+
+        self.__rule = Rule(
+            scope=scope,
+            id=f'{id}Schedule',
+            schedule=schedule or Schedule.rate(Duration.minutes(30)),
+            targets=[LambdaFunction(self.__function.invoke_target)],
+        )
+
+    @property
+    def function(self) -> WsFunction:
+        return self.__function
+
+    @property
+    def rule(self) -> Rule:
+        return self.__rule
@@ -1,16 +1,43 @@
-from typing import Optional
+import hashlib
+import json
+from typing import Optional, List, Any, Dict, Tuple
 
-from aws_cdk import Stack
-from b_stage_deployment.function import StageDeploymentSingletonFunction
-from b_stage_deployment.resource import StageDeploymentResource
-from constructs import Construct
+import jsii
+from aws_cdk import Stack, Aspects, IAspect, CfnResource
+from aws_cdk.aws_apigatewayv2 import (
+    CfnDeployment,
+    CfnRoute,
+    CfnRouteResponse,
+    CfnIntegration,
+    CfnIntegrationResponse,
+    CfnModel,
+    CfnAuthorizer,
+)
+from constructs import Construct, IConstruct
 
+from b_aws_websocket_api.ws_integration import WsIntegration
+from b_aws_websocket_api.ws_route import WsRoute
 from b_aws_websocket_api.ws_stage import WsStage
 
+# Resources that change what a deployment of the API serves.
+HASHED_RESOURCE_TYPES = (
+    CfnRoute,
+    CfnRouteResponse,
+    CfnIntegration,
+    CfnIntegrationResponse,
+    CfnModel,
+    CfnAuthorizer,
+)
+
 
 class WsDeployment(Construct):
     """
     Creates web socket api deployment.
+
+    The deployment logical id contains an aggregate content hash of all routes, route responses, integrations,
+    integration responses, models, authorizers and stage route settings of the API. Hence a new deployment
+    of the stage is created only when one of them changes, and stack updates without API changes
+    leave the stage untouched.
     """
 
     def __init__(
@@ -28,21 +55,116 @@ class WsDeployment(Construct):
         :param ws_stage: Web socket api stage to deploy.
         :param description: Deployment description.
         """
-        deployment_func = StageDeploymentSingletonFunction(
+        super().__init__(
             scope=scope,
-            name=f'{id}Function'
+            id=id,
         )
 
-        StageDeploymentResource(
+        self.__stage = ws_stage
+        self.__content_hash: Optional[str] = None
+
+        self.__deployment = CfnDeployment(
             scope=scope,
-            resource_name=f'{id}Resource',
-            deployment_function=deployment_func,
-            api_id=ws_stage.api_id,
+            id=f'{id}Resource',
+            api_id=ws_stage.api.ref,
             stage_name=ws_stage.stage_name,
-            description=description or f'Deployment for {ws_stage.stage_name}.'
+            description=description or f'Deployment for {ws_stage.stage_name}.',
         )
 
-        super().__init__(
-            scope=scope,
-            id=id,
-        )
+        self.__deployment.node.add_dependency(ws_stage)
+
+        Aspects.of(self).add(_WsDeploymentHashAspect(self))
+
+    @property
+    def deployment(self) -> CfnDeployment:
+        return self.__deployment
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        """
+        Aggregate content hash of the API. Available after synthesis.
+        """
+        return self.__content_hash
+
+    def calculate_hash(self) -> str:
+        """
+        Calculates the aggregate content hash of the API.
+
+        :return: Hex digest.
+        """
+        hashable = [[resource_type, properties] for resource_type, properties, _ in self.__api_resources()]
+        hashable.append(['RouteSettings', Stack.of(self.__deployment).resolve([
+            self.__stage.route_settings,
+            self.__stage.default_route_settings,
+        ])])
+
+        hashable.sort(key=lambda item: json.dumps(item, sort_keys=True, default=str))
+
+        return hashlib.sha256(json.dumps(hashable, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _prepare(self) -> None:
+        stack = Stack.of(self.__deployment)
+        resources = self.__api_resources()
+
+        self.__content_hash = self.calculate_hash()
+
+        # A changed logical id replaces the deployment, which redeploys the stage.
+        logical_id = stack.get_logical_id(self.__deployment)
+        self.__deployment.override_logical_id(f'{logical_id}{self.__content_hash[:10]}')
+
+        # API Gateway refuses deployments of APIs without routes, hence routes must exist first.
+        routes = [node for _, _, node in resources if isinstance(node, CfnRoute)]
+        if routes:
+            self.__deployment.node.add_dependency(*routes)
+
+    def __api_resources(self) -> List[Tuple[str, Dict[str, Any], CfnResource]]:
+        """
+        Collects resolved properties of the resources of the deployed API.
+
+        Every jsii call made during synthesis (i.e. from an aspect) deepens the node call stack, hence
+        properties of Ws* resources are taken from the python side and everything is resolved in a single call.
+        """
+        stack = Stack.of(self.__deployment)
+        nodes = stack.node.find_all()
+
+        owned_responses = {
+            id(node.response) for node in nodes
+            if isinstance(node, (WsRoute, WsIntegration)) and node.response is not None
+        }
+
+        resources = []
+
+        for node in nodes:
+            if not isinstance(node, HASHED_RESOURCE_TYPES) or id(node) in owned_responses:
+                continue
+
+            # Generated class name (e.g. CfnRoute), without a jsii call for the resource type.
+            resource_type = next(item for item in type(node).__mro__ if item.__module__.startswith('aws_cdk.')).__name__
+
+            if isinstance(node, (WsRoute, WsIntegration)):
+                properties = node.properties
+            else:
+                properties = dict(node._cfn_properties, id=node.node.path)
+                properties['api_id'] = properties.pop('apiId', None)
+
+            resources.append((resource_type, properties, node))
+
+        api_ref, resolved = stack.resolve([self.__stage.api.ref, [properties for _, properties, _ in resources]])
+
+        return [
+            (resource_type, properties, node)
+            for (resource_type, _, node), properties in zip(resources, resolved)
+            if properties.get('api_id') == api_ref
+        ]
+
+
+@jsii.implements(IAspect)
+class _WsDeploymentHashAspect:
+    def __init__(self, deployment: WsDeployment) -> None:
+        self.__deployment = deployment
+        self.__done = False
+
+    def visit(self, node: IConstruct) -> None:
+        if node is self.__deployment and not self.__done:
+            self.__done = True
+            self.__deployment._prepare()
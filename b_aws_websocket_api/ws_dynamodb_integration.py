@@ -0,0 +1,77 @@
+from typing import Optional
+
+from aws_cdk import Stack, Duration
+from aws_cdk.aws_dynamodb import ITable
+
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_service_integration import WsServiceIntegration
+
+
+class WsDynamoDbIntegration(WsServiceIntegration):
+    """
+    Creates web socket API route integration that writes every frame as an item to a DynamoDB table.
+    Items are keyed by connection id (partition key) and request time and id (sort key) and carry the route key
+    and the raw frame.
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            integration_name: str,
+            ws_api: WsApi,
+            table: ITable,
+            partition_key_name: str = 'pk',
+            sort_key_name: str = 'sk',
+            time_to_live: Optional[Duration] = None,
+            time_to_live_attribute_name: str = 'ttl',
+            *args,
+            **kwargs
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param integration_name: The name of the integration.
+        :param ws_api: Web socket API for with the integration is being done.
+        :param table: Table to write frames to. Both keys must be of string type.
+        :param partition_key_name: Partition key attribute of the table.
+        :param sort_key_name: Sort key attribute of the table.
+        :param time_to_live: Time after which items expire. Items do not expire if not given.
+        :param time_to_live_attribute_name: Time to live attribute of the table.
+        :param args: Additional arguments.
+        :param kwargs: Additional named arguments.
+        """
+        self.__table = table
+
+        attributes = [
+            f'"{partition_key_name}": {{"S": "$context.connectionId"}}',
+            f'"{sort_key_name}": {{"S": "$context.requestTimeEpoch#$context.requestId"}}',
+            '"routeKey": {"S": "$context.routeKey"}',
+            '"body": {"S": "$frame"}',
+        ]
+
+        template = ''
+        if time_to_live is not None:
+            template = f'#set($expires = $context.requestTimeEpoch / 1000 + {int(time_to_live.to_seconds())})\n'
+            attributes.append(f'"{time_to_live_attribute_name}": {{"N": "$expires"}}')
+
+        template += f'{{"TableName": "{table.table_name}", "Item": {{{", ".join(attributes)}}}}}'
+
+        super().__init__(
+            scope=scope,
+            id=id,
+            integration_name=integration_name,
+            ws_api=ws_api,
+            service_action='dynamodb:action/PutItem',
+            request_template=template,
+            grant=lambda grantee: table.grant(grantee, 'dynamodb:PutItem'),
+            content_type='application/x-amz-json-1.0',
+            *args,
+            **kwargs
+        )
+
+    @property
+    def table(self) -> ITable:
+        return self.__table
@@ -0,0 +1,63 @@
+from typing import Optional
+
+from aws_cdk import Stack
+from aws_cdk.aws_events import IEventBus
+
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_service_integration import WsServiceIntegration
+
+
+class WsEventBridgeIntegration(WsServiceIntegration):
+    """
+    Creates web socket API route integration that puts every frame as an event to an EventBridge event bus.
+    The detail type of events is the route key and the detail is the frame envelope.
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            integration_name: str,
+            ws_api: WsApi,
+            event_bus: IEventBus,
+            source: Optional[str] = None,
+            *args,
+            **kwargs
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param integration_name: The name of the integration.
+        :param ws_api: Web socket API for with the integration is being done.
+        :param event_bus: Event bus to put frames to.
+        :param source: Source of events. Defaults to the API name.
+        :param args: Additional arguments.
+        :param kwargs: Additional named arguments.
+        """
+        self.__event_bus = event_bus
+
+        super().__init__(
+            scope=scope,
+            id=id,
+            integration_name=integration_name,
+            ws_api=ws_api,
+            service_action='events:action/PutEvents',
+            request_template=(
+                '{"Entries": [{'
+                f'"EventBusName": "{event_bus.event_bus_name}", '
+                f'"Source": "{source or ws_api.name}", '
+                '"DetailType": "$context.routeKey", '
+                '"Detail": "$util.escapeJavaScript($envelope).replaceAll("\\\\\'", "\'")"'
+                '}]}'
+            ),
+            grant=event_bus.grant_put_events_to,
+            request_headers={'X-Amz-Target': 'AWSEvents.PutEvents'},
+            *args,
+            **kwargs
+        )
+
+    @property
+    def event_bus(self) -> IEventBus:
+        return self.__event_bus
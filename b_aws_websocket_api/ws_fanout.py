@@ -0,0 +1,230 @@
+from typing import Optional, Dict, List
+
+from aws_cdk import Stack, Duration, RemovalPolicy
+from aws_cdk.aws_dynamodb import Table, Attribute, AttributeType, BillingMode
+from aws_cdk.aws_iam import IGrantable, Grant, PolicyStatement
+from aws_cdk.aws_lambda import Code, Runtime, Tracing
+from aws_cdk.aws_lambda_event_sources import SqsEventSource
+from aws_cdk.aws_sqs import Queue, DeadLetterQueue
+from constructs import Construct
+
+from b_aws_websocket_api.runtime.ws_fanout import (
+    PUBLISH_QUEUE_URL_ENV,
+    SHARD_QUEUE_URL_ENV,
+    PROGRESS_TABLE_ENV,
+    BATCH_SIZE_ENV,
+    MAX_ATTEMPTS_ENV,
+    CONNECTIONS_URL_ENV,
+    MAX_IN_FLIGHT_ENV,
+    METRIC_TOPICS_ENV
+)
+from b_aws_websocket_api.ws_connection_registry import WsConnectionRegistry
+from b_aws_websocket_api.ws_function import WsFunction
+from b_aws_websocket_api.ws_runtime_layer import WsRuntimeLayer
+from b_aws_websocket_api.ws_stage import WsStage
+from b_aws_websocket_api.ws_subscription_index import WsSubscriptionIndex
+
+
+class WsFanout(Construct):
+    """
+    Creates a queue-driven parallel fan-out pipeline. A published message is split into fixed-size
+    connection batches (shards) on a queue which a pool of sender functions drains in parallel.
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            ws_stage: WsStage,
+            registry: Optional[WsConnectionRegistry] = None,
+            subscription_index: Optional[WsSubscriptionIndex] = None,
+            batch_size: int = 500,
+            sender_concurrency: int = 10,
+            sender_max_in_flight: int = 100,
+            sender_memory_size: int = 512,
+            sender_timeout: Optional[Duration] = None,
+            max_attempts: int = 3,
+            runtime: Optional[Runtime] = None,
+            tracing: Optional[Tracing] = None,
+            metric_topics: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param ws_stage: Stage which connections to send messages to.
+        :param registry: Connection registry to enumerate targets of broadcasts. Senders remove gone connections
+        from it (and from subscription indexes).
+        :param subscription_index: Subscription index to enumerate targets of topic publishes.
+        :param batch_size: Number of connections per shard.
+        :param sender_concurrency: Reserved concurrency of the sender function, i.e. number of parallel workers.
+        :param sender_max_in_flight: Concurrent management API requests inside a single sender.
+        :param sender_memory_size: Memory size of the sender function.
+        :param sender_timeout: Timeout of the sender function.
+        :param max_attempts: Maximum attempts of connections that failed transiently.
+        :param runtime: Runtime of the splitter and sender functions.
+        :param tracing: X-Ray tracing of the splitter and sender functions. With active tracing, splits and shard
+        sends continue the trace of the publisher (see WsTracer).
+        :param metric_topics: Topics whose fan-out metrics are recorded with their own Topic dimension. Other topics
+        share the "*" dimension value, hence clients can not create new (separately billed) metrics.
+        """
+        super().__init__(
+            scope=scope,
+            id=id,
+        )
+
+        sender_timeout = sender_timeout or Duration.minutes(5)
+
+        self.__publish_dead_letter_queue = Queue(
+            scope=scope,
+            id=f'{id}PublishDeadLetterQueue',
+            retention_period=Duration.days(14),
+        )
+
+        self.__publish_queue = Queue(
+            scope=scope,
+            id=f'{id}PublishQueue',
+            visibility_timeout=Duration.minutes(15),
+            # Poison publishes (e.g. a topic without a subscription index) are parked instead of retried until expiry.
+            dead_letter_queue=DeadLetterQueue(max_receive_count=3, queue=self.__publish_dead_letter_queue),
+        )
+
+        self.__shard_dead_letter_queue = Queue(
+            scope=scope,
+            id=f'{id}ShardDeadLetterQueue',
+            retention_period=Duration.days(14),
+        )
+
+        self.__shard_queue = Queue(
+            scope=scope,
+            id=f'{id}ShardQueue',
+            # AWS recommends at least 6 times the timeout of the consuming function.
+            visibility_timeout=Duration.seconds(sender_timeout.to_seconds() * 6),
+            dead_letter_queue=DeadLetterQueue(max_receive_count=3, queue=self.__shard_dead_letter_queue),
+        )
+
+        self.__progress_table = Table(
+            scope=scope,
+            id=f'{id}ProgressTable',
+            partition_key=Attribute(name='publishId', type=AttributeType.STRING),
+            sort_key=Attribute(name='progressKey', type=AttributeType.STRING),
+            billing_mode=BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute='expiresAt',
+            removal_policy=RemovalPolicy.DESTROY,
+        )
+
+        environment = {
+            SHARD_QUEUE_URL_ENV: self.__shard_queue.queue_url,
+            PROGRESS_TABLE_ENV: self.__progress_table.table_name,
+            BATCH_SIZE_ENV: str(batch_size),
+            MAX_ATTEMPTS_ENV: str(max_attempts),
+            CONNECTIONS_URL_ENV: ws_stage.connections_url,
+            MAX_IN_FLIGHT_ENV: str(sender_max_in_flight),
+        }
+
+        if metric_topics:
+            environment[METRIC_TOPICS_ENV] = ','.join(metric_topics)
+
+        if registry:
+            environment.update(registry.environment)
+
+        if subscription_index:
+            environment.update(subscription_index.environment)
+
+        code = Code.from_asset(WsRuntimeLayer.source_path())
+
+        self.__splitter_function = WsFunction(
+            scope=scope,
+            id=f'{id}SplitterFunction',
+            function_name=f'{id}SplitterFunction',
+            code=code,
+            handler='b_aws_websocket_api.runtime.handlers.ws_fanout.split',
+            runtime=runtime or Runtime.PYTHON_3_11,
+            environment=environment,
+            tracing=tracing,
+            memory_size=1024,
+            timeout=Duration.minutes(10),
+            events=[SqsEventSource(self.__publish_queue, batch_size=1)],
+        )
+
+        self.__sender_function = WsFunction(
+            scope=scope,
+            id=f'{id}SenderFunction',
+            function_name=f'{id}SenderFunction',
+            code=code,
+            handler='b_aws_websocket_api.runtime.handlers.ws_fanout.send',
+            runtime=runtime or Runtime.PYTHON_3_11,
+            environment=environment,
+            tracing=tracing,
+            memory_size=sender_memory_size,
+            timeout=sender_timeout,
+            reserved_concurrent_executions=sender_concurrency,
+            events=[SqsEventSource(self.__shard_queue, batch_size=1)],
+        )
+
+        if registry:
+            registry.grant_read(self.__splitter_function)
+            # Senders remove connections that are gone from the registry and their subscriptions.
+            registry.grant_read_write(self.__sender_function)
+            for index in (subscription_index, registry.subscription_index):
+                if index:
+                    index.grant_read_write(self.__sender_function)
+
+        if subscription_index:
+            subscription_index.grant_read(self.__splitter_function)
+
+        self.__shard_queue.grant_send_messages(self.__splitter_function)
+        self.__shard_queue.grant_send_messages(self.__sender_function)
+        # Splitters read enqueued shards of redelivered publishes.
+        self.__progress_table.grant_read_write_data(self.__splitter_function)
+        self.__progress_table.grant_write_data(self.__sender_function)
+
+        self.__sender_function.add_to_role_policy(PolicyStatement(
+            actions=['execute-api:ManageConnections'],
+            resources=[ws_stage.connections_arn],
+        ))
+
+    @property
+    def publish_queue(self) -> Queue:
+        return self.__publish_queue
+
+    @property
+    def publish_dead_letter_queue(self) -> Queue:
+        return self.__publish_dead_letter_queue
+
+    @property
+    def shard_queue(self) -> Queue:
+        return self.__shard_queue
+
+    @property
+    def progress_table(self) -> Table:
+        return self.__progress_table
+
+    @property
+    def splitter_function(self) -> WsFunction:
+        return self.__splitter_function
+
+    @property
+    def sender_function(self) -> WsFunction:
+        return self.__sender_function
+
+    @property
+    def environment(self) -> Dict[str, str]:
+        """
+        Environment variables that configure WsFanoutPublisher and WsFanoutProgress in any function.
+        """
+        return {
+            PUBLISH_QUEUE_URL_ENV: self.__publish_queue.queue_url,
+            PROGRESS_TABLE_ENV: self.__progress_table.table_name,
+        }
+
+    def grant_publish(self, grantee: IGrantable) -> Grant:
+        """
+        Grants permissions to publish messages for fan-out.
+
+        :param grantee: Principal to grant permissions to.
+
+        :return: Grant.
+        """
+        return self.__publish_queue.grant_send_messages(grantee)
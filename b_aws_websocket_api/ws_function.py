@@ -1,7 +1,8 @@
 import hashlib
-from typing import Optional, Mapping, List
+from typing import Optional, Mapping, List, Dict
 
 from aws_cdk import Stack, Duration
+from aws_cdk.aws_applicationautoscaling import ScalingSchedule
 from aws_cdk.aws_ec2 import ISecurityGroup, IVpc, SubnetSelection
 from aws_cdk.aws_iam import PolicyStatement, IRole
 from aws_cdk.aws_lambda import *
@@ -46,6 +47,13 @@ class WsFunction(Function):
             on_failure: Optional[IDestination] = None,
             on_success: Optional[IDestination] = None,
             retry_attempts: Optional[Number] = None,
+            architecture: Optional[Architecture] = None,
+            alias_name: Optional[str] = None,
+            provisioned_concurrent_executions: Optional[int] = None,
+            autoscaling_max_capacity: Optional[int] = None,
+            autoscaling_utilization_target: Optional[float] = None,
+            autoscaling_schedules: Optional[Dict[str, ScalingSchedule]] = None,
+            api_invoke_permission: Optional[bool] = None,
             *args,
             **kwargs
     ) -> None:
@@ -83,9 +91,24 @@ class WsFunction(Function):
         :param on_failure: The destination for failed invocations.
         :param on_success: The destination for successful invocations.
         :param retry_attempts: The maximum number of times to retry when the function returns an error.
+        :param architecture: The system architecture, e.g. Architecture.ARM_64.
+        :param alias_name: Publish a version with an alias of this name. Integrations and the API Gateway invoke
+        permission then target the alias. Defaults to "live" if provisioned concurrency is set.
+        :param provisioned_concurrent_executions: Provisioned concurrency of the alias
+        (the minimum capacity if autoscaling is enabled).
+        :param autoscaling_max_capacity: Enables autoscaling of the provisioned concurrency up to this capacity.
+        :param autoscaling_utilization_target: Target-tracking utilization of the provisioned concurrency.
+        Defaults to 0.7 if autoscaling is enabled without schedules. Requires autoscaling_max_capacity.
+        :param autoscaling_schedules: Scheduled provisioned concurrency capacities by schedule id.
+        Requires autoscaling_max_capacity.
+        :param api_invoke_permission: Specify whether to create an (unscoped) API Gateway invoke permission.
+        Disable it to grant a permission scoped to specific APIs instead.
         :param args: Additional arguments.
         :param kwargs: Additional named arguments.
         """
+        if not autoscaling_max_capacity and (autoscaling_utilization_target or autoscaling_schedules):
+            raise ValueError('Autoscaling utilization target and schedules require autoscaling_max_capacity.')
+
         self.__id = id
         self.__name = function_name
 
@@ -119,17 +142,61 @@ class WsFunction(Function):
             on_failure=on_failure,
             on_success=on_success,
             retry_attempts=retry_attempts,
+            architecture=architecture,
             *args,
             **kwargs
         )
 
-        CfnPermission(
-            scope=scope,
-            id=f'{function_name}WsApiInvokePermission',
-            action='lambda:InvokeFunction',
-            function_name=self.function_name,
-            principal='apigateway.amazonaws.com',
-        )
+        self.__alias: Optional[Alias] = None
+
+        if alias_name or provisioned_concurrent_executions or autoscaling_max_capacity:
+            self.__alias = Alias(
+                scope=scope,
+                id=f'{id}Alias',
+                alias_name=alias_name or 'live',
+                version=self.current_version,
+                provisioned_concurrent_executions=provisioned_concurrent_executions,
+            )
+
+        if autoscaling_max_capacity:
+            scaling = self.__alias.add_auto_scaling(
+                min_capacity=provisioned_concurrent_executions or 1,
+                max_capacity=autoscaling_max_capacity,
+            )
+
+            for schedule_id, schedule in (autoscaling_schedules or {}).items():
+                scaling.scale_on_schedule(
+                    schedule_id,
+                    schedule=schedule.schedule,
+                    min_capacity=schedule.min_capacity,
+                    max_capacity=schedule.max_capacity,
+                    start_time=schedule.start_time,
+                    end_time=schedule.end_time,
+                    time_zone=schedule.time_zone,
+                )
+
+            if autoscaling_utilization_target or not autoscaling_schedules:
+                scaling.scale_on_utilization(utilization_target=autoscaling_utilization_target or 0.7)
+
+        if api_invoke_permission in [True, None]:
+            CfnPermission(
+                scope=scope,
+                id=f'{function_name}WsApiInvokePermission',
+                action='lambda:InvokeFunction',
+                function_name=self.invoke_target.function_arn if self.__alias else self.function_name,
+                principal='apigateway.amazonaws.com',
+            )
+
+    @property
+    def alias(self) -> Optional[Alias]:
+        return self.__alias
+
+    @property
+    def invoke_target(self) -> IFunction:
+        """
+        Function or its alias which API Gateway integrations should invoke.
+        """
+        return self.__alias or self
 
     @property
     def hash(self):
@@ -1,4 +1,4 @@
-from typing import Optional, Any
+from typing import Optional, Any, Dict
 
 from aws_cdk import Stack
 from aws_cdk.aws_apigatewayv2 import CfnIntegration, CfnIntegrationResponse
@@ -31,6 +31,7 @@ class WsIntegration(CfnIntegration):
             template_selection_expression: Optional[str] = None,
             timeout_in_millis: Optional[Number] = None,
             default_integration_response: Optional[bool] = None,
+            integration_response_templates: Any = None,
             *args,
             **kwargs
     ) -> None:
@@ -63,10 +64,10 @@ class WsIntegration(CfnIntegration):
         :param template_selection_expression: The template selection expression for the integration.
         :param timeout_in_millis: Custom timeout between 50 and 29,000 milliseconds for WebSocket APIs.
         :param default_integration_response: Specify whether to create an integration response resource.
+        :param integration_response_templates: Velocity templates of the integration response, e.g. to map
+        a response of an AWS service to the frame returned to the client.
         """
-        super().__init__(
-            scope=scope,
-            id=id,
+        properties = dict(
             api_id=ws_api.ref,
             integration_type=integration_type,
             connection_type=connection_type,
@@ -80,15 +81,44 @@ class WsIntegration(CfnIntegration):
             request_templates=request_templates,
             template_selection_expression=template_selection_expression,
             timeout_in_millis=timeout_in_millis,
+        )
+
+        super().__init__(
+            scope=scope,
+            id=id,
             *args,
+            **properties,
             **kwargs
         )
 
+        self.__response: Optional[CfnIntegrationResponse] = None
+
         if default_integration_response in [True, None]:
-            CfnIntegrationResponse(
+            self.__response = CfnIntegrationResponse(
                 scope=scope,
                 id=f'{integration_name}Response',
                 api_id=ws_api.ref,
                 integration_id=self.ref,
                 integration_response_key='$default',
+                response_templates=integration_response_templates,
+                template_selection_expression='\\$default' if integration_response_templates else None,
             )
+
+        self.__properties = dict(
+            properties,
+            id=id,
+            default_integration_response=self.__response is not None,
+            integration_response_templates=integration_response_templates,
+            **kwargs
+        )
+
+    @property
+    def response(self) -> Optional[CfnIntegrationResponse]:
+        return self.__response
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        """
+        Properties the integration was created with (possibly containing unresolved tokens).
+        """
+        return self.__properties
@@ -0,0 +1,55 @@
+from aws_cdk import Stack
+from aws_cdk.aws_kinesis import IStream
+
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_service_integration import WsServiceIntegration
+
+
+class WsKinesisIntegration(WsServiceIntegration):
+    """
+    Creates web socket API route integration that puts every frame (wrapped into an envelope) as a record
+    to a Kinesis data stream. Records are partitioned by connection, hence frames of a connection stay ordered.
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            integration_name: str,
+            ws_api: WsApi,
+            stream: IStream,
+            *args,
+            **kwargs
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param integration_name: The name of the integration.
+        :param ws_api: Web socket API for with the integration is being done.
+        :param stream: Stream to put frames to.
+        :param args: Additional arguments.
+        :param kwargs: Additional named arguments.
+        """
+        self.__stream = stream
+
+        super().__init__(
+            scope=scope,
+            id=id,
+            integration_name=integration_name,
+            ws_api=ws_api,
+            service_action='kinesis:action/PutRecord',
+            request_template=(
+                f'{{"StreamName": "{stream.stream_name}", '
+                '"PartitionKey": "$context.connectionId", '
+                '"Data": "$util.base64Encode($envelope)"}'
+            ),
+            grant=lambda grantee: stream.grant(grantee, 'kinesis:PutRecord'),
+            *args,
+            **kwargs
+        )
+
+    @property
+    def stream(self) -> IStream:
+        return self.__stream
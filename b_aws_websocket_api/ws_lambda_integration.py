@@ -38,6 +38,11 @@ class WsLambdaIntegration(WsIntegration):
         self.__integration_name = integration_name
         self.__function = function
 
+        function_arn = function.function_arn
+        if isinstance(function, WsFunction):
+            # Provisioned concurrency is configured on an alias, hence invoke it instead of the unqualified function.
+            function_arn = function.invoke_target.function_arn
+
         super().__init__(
             scope=scope,
             id=id,
@@ -45,7 +50,7 @@ class WsLambdaIntegration(WsIntegration):
             ws_api=ws_api,
             description=f'Lambda proxy integration for Websocket API {ws_api.name}.',
             integration_type='AWS_PROXY',
-            integration_uri=f'arn:aws:apigateway:{scope.region}:lambda:path/2015-03-31/functions/{function.function_arn}/invocations',
+            integration_uri=f'arn:aws:apigateway:{scope.region}:lambda:path/2015-03-31/functions/{function_arn}/invocations',
             *args,
             **kwargs
         )
@@ -1,5 +1,5 @@
 import hashlib
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Dict
 
 from aws_cdk import Stack
 from aws_cdk.aws_apigatewayv2 import CfnRoute, CfnRouteResponse
@@ -7,6 +7,19 @@ from aws_cdk.aws_apigatewayv2 import CfnRoute, CfnRouteResponse
 from b_aws_websocket_api.ws_api import WsApi
 
 
+def route_id(route_key: str) -> str:
+    """
+    Converts a route key (e.g. $connect, sendMessage) into a construct id fragment (Connect, SendMessage).
+
+    :param route_key: Route key.
+
+    :return: Alphanumeric id fragment.
+    """
+    key_id = ''.join(character for character in route_key if character.isalnum())
+
+    return key_id[:1].upper() + key_id[1:]
+
+
 class WsRoute(CfnRoute):
     """
     Creates a route for a web socket API.
@@ -56,9 +69,7 @@ class WsRoute(CfnRoute):
         self.__id = id
         self.__route_key = route_key
 
-        super().__init__(
-            scope=scope,
-            id=id,
+        properties = dict(
             api_id=ws_api.ref,
             route_key=route_key,
             api_key_required=api_key_required,
@@ -71,12 +82,20 @@ class WsRoute(CfnRoute):
             request_parameters=request_parameters,
             route_response_selection_expression=route_response_selection_expression,
             target=target,
+        )
+
+        super().__init__(
+            scope=scope,
+            id=id,
             *args,
+            **properties,
             **kwargs
         )
 
+        self.__response: Optional[CfnRouteResponse] = None
+
         if default_route_response in [True, None]:
-            CfnRouteResponse(
+            self.__response = CfnRouteResponse(
                 scope=scope,
                 id=f'{id}Response',
                 api_id=ws_api.ref,
@@ -84,6 +103,19 @@ class WsRoute(CfnRoute):
                 route_response_key='$default',
             )
 
+        self.__properties = dict(properties, id=id, default_route_response=self.__response is not None, **kwargs)
+
+    @property
+    def response(self) -> Optional[CfnRouteResponse]:
+        return self.__response
+
+    @property
+    def properties(self) -> Dict[str, Any]:
+        """
+        Properties the route was created with (possibly containing unresolved tokens).
+        """
+        return self.__properties
+
     @property
     def hash(self):
         hashable = (
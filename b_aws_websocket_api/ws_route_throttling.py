@@ -0,0 +1,120 @@
+from typing import Any, Dict, Optional
+
+from aws_cdk.aws_apigatewayv2 import CfnStage
+
+# Default account-level throttling of API Gateway per region, the upper bound of any stage or route limit.
+ACCOUNT_RATE_LIMIT = 10000.0
+ACCOUNT_BURST_LIMIT = 5000
+
+# CloudFormation property names of route settings to attributes of CfnStage.RouteSettingsProperty.
+ROUTE_SETTINGS_ATTRIBUTES = {
+    'ThrottlingRateLimit': 'throttling_rate_limit',
+    'ThrottlingBurstLimit': 'throttling_burst_limit',
+    'LoggingLevel': 'logging_level',
+    'DataTraceEnabled': 'data_trace_enabled',
+    'DetailedMetricsEnabled': 'detailed_metrics_enabled',
+}
+
+
+class WsRouteThrottling:
+    """
+    Typed throttling settings of a single route (or the stage default) of a WsStage.
+
+    API Gateway throttles routes with a token bucket per route and stage which all clients share, hence
+    these limits protect backends but not clients from each other. Limit single connections with the
+    runtime WsRateLimiter as well.
+    """
+
+    def __init__(
+            self,
+            rate_limit: float,
+            burst_limit: int,
+            logging_level: Optional[str] = None,
+            data_trace_enabled: Optional[bool] = None,
+            detailed_metrics_enabled: Optional[bool] = None
+    ) -> None:
+        """
+        Constructor.
+
+        :param rate_limit: Steady-state requests per second of the route.
+        :param burst_limit: Maximum number of requests of the route in a burst.
+        :param logging_level: Route logging level: ERROR, INFO or OFF.
+        :param data_trace_enabled: Whether full request and response logging is enabled for the route.
+        :param detailed_metrics_enabled: Whether detailed metrics are enabled for the route.
+        """
+        if not 0 <= rate_limit <= ACCOUNT_RATE_LIMIT:
+            raise ValueError(f'Rate limit must be between 0 and {ACCOUNT_RATE_LIMIT}, got {rate_limit}.')
+
+        if not 0 <= burst_limit <= ACCOUNT_BURST_LIMIT or int(burst_limit) != burst_limit:
+            raise ValueError(f'Burst limit must be an integer between 0 and {ACCOUNT_BURST_LIMIT}, got {burst_limit}.')
+
+        if logging_level not in (None, 'ERROR', 'INFO', 'OFF'):
+            raise ValueError(f'Unknown logging level {logging_level}.')
+
+        self.rate_limit = rate_limit
+        self.burst_limit = int(burst_limit)
+        self.logging_level = logging_level
+        self.data_trace_enabled = data_trace_enabled
+        self.detailed_metrics_enabled = detailed_metrics_enabled
+
+    @property
+    def route_settings(self) -> Dict[str, Any]:
+        """
+        Stage route settings of the route (CloudFormation property names).
+        """
+        settings = {
+            'ThrottlingRateLimit': self.rate_limit,
+            'ThrottlingBurstLimit': self.burst_limit,
+            'LoggingLevel': self.logging_level,
+            'DataTraceEnabled': self.data_trace_enabled,
+            'DetailedMetricsEnabled': self.detailed_metrics_enabled,
+        }
+
+        return {key: value for key, value in settings.items() if value is not None}
+
+    def merge(self, settings: Optional[CfnStage.RouteSettingsProperty]) -> CfnStage.RouteSettingsProperty:
+        """
+        Applies the throttling to stage default route settings. Other given settings are kept.
+
+        :param settings: Existing default route settings.
+
+        :return: New default route settings.
+        """
+        def pick(name: str, value: Any) -> Any:
+            return value if value is not None else getattr(settings, name, None)
+
+        return CfnStage.RouteSettingsProperty(
+            throttling_rate_limit=self.rate_limit,
+            throttling_burst_limit=self.burst_limit,
+            logging_level=pick('logging_level', self.logging_level),
+            data_trace_enabled=pick('data_trace_enabled', self.data_trace_enabled),
+            detailed_metrics_enabled=pick('detailed_metrics_enabled', self.detailed_metrics_enabled),
+        )
+
+    def merge_route(self, settings: Any = None) -> Dict[str, Any]:
+        """
+        Applies the throttling to settings of a single route. Other given settings are kept.
+
+        :param settings: Existing route settings (see to_route_settings()).
+
+        :return: New route settings (CloudFormation property names).
+        """
+        return {**to_route_settings(settings), **self.route_settings}
+
+
+def to_route_settings(settings: Any) -> Dict[str, Any]:
+    """
+    Converts settings of a single route to a dictionary with CloudFormation property names.
+
+    :param settings: A CfnStage.RouteSettingsProperty or a dictionary with CloudFormation property names
+    (or camel case names, as read back from a stage).
+
+    :return: Route settings.
+    """
+    if isinstance(settings, CfnStage.RouteSettingsProperty):
+        return {
+            name: getattr(settings, attribute) for name, attribute in ROUTE_SETTINGS_ATTRIBUTES.items()
+            if getattr(settings, attribute) is not None
+        }
+
+    return {key[:1].upper() + key[1:]: value for key, value in (settings or {}).items()}
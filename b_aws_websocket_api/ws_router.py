@@ -0,0 +1,109 @@
+from typing import Optional, List, Union
+
+from aws_cdk import Stack
+from aws_cdk.aws_lambda import Function
+from constructs import Construct
+
+from b_aws_websocket_api.runtime.ws_dispatcher import ROUTE_SELECTION_EXPRESSION_ENV
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_function import WsFunction
+from b_aws_websocket_api.ws_lambda_integration import WsLambdaIntegration
+from b_aws_websocket_api.ws_route import WsRoute, route_id
+
+
+class WsRouter(Construct):
+    """
+    Serves many route keys with a single function and a single lambda integration.
+
+    Either every route key gets its own route targeting the shared integration (route-level authorization
+    and throttling stay available), or the routes are collapsed into a single $default route and
+    the function dispatches messages itself with WsDispatcher and a precompiled route selection expression.
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            ws_api: WsApi,
+            function: Union[Function, WsFunction],
+            route_keys: List[str],
+            collapse: bool = False,
+            authorization_type: Optional[str] = None,
+            authorizer_id: Optional[str] = None,
+            default_route_response: Optional[bool] = None,
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param ws_api: Web socket API for which to create the routes.
+        :param function: Function serving all routes. Use WsDispatcher as its handler.
+        :param route_keys: Route keys to serve. May include $connect and $disconnect.
+        :param collapse: Serve all message route keys through a single $default route.
+        Route keys starting with $ are still created as separate routes.
+        :param authorization_type: Authorization type of the $connect route.
+        :param authorizer_id: Authorizer of the $connect route.
+        :param default_route_response: Specify whether to create route response resources (two-way routes).
+        """
+        super().__init__(
+            scope=scope,
+            id=id,
+        )
+
+        if len(set(route_keys)) != len(route_keys):
+            raise ValueError(f'Route keys must be unique, got {route_keys}.')
+
+        self.__function = function
+        self.__route_keys = list(route_keys)
+
+        if collapse:
+            route_keys = [key for key in route_keys if key.startswith('$')]
+            if '$default' not in route_keys:
+                route_keys.append('$default')
+
+        selection_expression = ws_api.route_selection_expression or '$request.body.action'
+        function.add_environment(ROUTE_SELECTION_EXPRESSION_ENV, selection_expression)
+
+        self.__integration = WsLambdaIntegration(
+            scope=scope,
+            id=f'{id}Integration',
+            integration_name=f'{id}Integration',
+            ws_api=ws_api,
+            function=function,
+        )
+
+        self.__routes: List[WsRoute] = []
+
+        for route_key in route_keys:
+            is_connect = route_key == '$connect'
+
+            self.__routes.append(WsRoute(
+                scope=scope,
+                id=f'{id}{route_id(route_key)}Route',
+                ws_api=ws_api,
+                route_key=route_key,
+                authorization_type=(authorization_type or 'NONE') if is_connect else 'NONE',
+                authorizer_id=authorizer_id if is_connect else None,
+                target=f'integrations/{self.__integration.ref}',
+                default_route_response=default_route_response,
+            ))
+
+    @property
+    def function(self) -> Union[Function, WsFunction]:
+        return self.__function
+
+    @property
+    def integration(self) -> WsLambdaIntegration:
+        return self.__integration
+
+    @property
+    def routes(self) -> List[WsRoute]:
+        """
+        Created routes. Add them as dependencies of a WsDeployment.
+        """
+        return self.__routes
+
+    @property
+    def route_keys(self) -> List[str]:
+        return self.__route_keys
@@ -0,0 +1,115 @@
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Dict, Optional, List, Tuple
+
+from aws_cdk import Stack, RemovalPolicy
+from aws_cdk.aws_lambda import LayerVersion, Code, Runtime, Architecture
+
+# Build directories of this process keyed by prefix and content hash of the runtime subpackage.
+_build_dirs: Dict[Tuple[str, str], str] = {}
+
+
+@atexit.register
+def _remove_build_dirs() -> None:
+    for build_dir in _build_dirs.values():
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+
+class WsRuntimeLayer(LayerVersion):
+    """
+    Creates a lambda layer containing only the CDK-free runtime helpers (b_aws_websocket_api.runtime).
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            layer_version_name: Optional[str] = None,
+            compatible_runtimes: Optional[List[Runtime]] = None,
+            description: Optional[str] = None,
+            removal_policy: Optional[RemovalPolicy] = None,
+            *args,
+            **kwargs
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param layer_version_name: The name of the layer.
+        :param compatible_runtimes: The runtimes compatible with this layer.
+        :param description: The description of the layer.
+        :param removal_policy: Whether to retain this version of the layer when a new version is added
+        or when the stack is deleted.
+        :param args: Additional arguments.
+        :param kwargs: Additional named arguments.
+        """
+        super().__init__(
+            scope=scope,
+            id=id,
+            code=Code.from_asset(self.source_path(prefix='python')),
+            layer_version_name=layer_version_name,
+            compatible_runtimes=compatible_runtimes or [
+                Runtime.PYTHON_3_8,
+                Runtime.PYTHON_3_9,
+                Runtime.PYTHON_3_10,
+                Runtime.PYTHON_3_11,
+            ],
+            # Pure python, hence usable on both architectures.
+            compatible_architectures=[Architecture.X86_64, Architecture.ARM_64],
+            description=description or 'Runtime helpers of b_aws_websocket_api.',
+            removal_policy=removal_policy,
+            *args,
+            **kwargs
+        )
+
+    @staticmethod
+    def source_path(prefix: str = '') -> str:
+        """
+        Copies the runtime subpackage into a standalone build directory, so that
+        CDK modules of this package never end up in a lambda bundle. The directory is built once per process
+        and content of the subpackage, and removed when the process exits.
+
+        :param prefix: Directory inside the bundle to place the package in. Layers expect "python".
+
+        :return: Path to the build directory.
+        """
+        runtime_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'runtime')
+        key = (prefix, WsRuntimeLayer.__content_hash(runtime_dir))
+
+        if key in _build_dirs and os.path.isdir(_build_dirs[key]):
+            return _build_dirs[key]
+
+        build_dir = tempfile.mkdtemp(prefix='b-aws-websocket-api-runtime-')
+        package_dir = os.path.join(build_dir, prefix, 'b_aws_websocket_api')
+
+        shutil.copytree(
+            runtime_dir,
+            os.path.join(package_dir, 'runtime'),
+            ignore=shutil.ignore_patterns('__pycache__', '*.pyc')
+        )
+
+        # Intentionally empty package file, hence the CDK-based modules are never imported.
+        with open(os.path.join(package_dir, '__init__.py'), 'w'):
+            pass
+
+        _build_dirs[key] = build_dir
+
+        return build_dir
+
+    @staticmethod
+    def __content_hash(runtime_dir: str) -> str:
+        content = hashlib.sha256()
+
+        for root, dirs, files in os.walk(runtime_dir):
+            dirs[:] = sorted(directory for directory in dirs if directory != '__pycache__')
+            for file in sorted(file for file in files if not file.endswith('.pyc')):
+                path = os.path.join(root, file)
+                content.update(os.path.relpath(path, runtime_dir).encode('utf-8'))
+                with open(path, 'rb') as source:
+                    content.update(source.read())
+
+        return content.hexdigest()
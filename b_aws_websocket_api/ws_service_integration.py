@@ -0,0 +1,124 @@
+from typing import Any, Callable, Dict, Optional
+
+from aws_cdk import Stack
+from aws_cdk.aws_apigatewayv2 import CfnIntegrationResponse
+from aws_cdk.aws_iam import Role, ServicePrincipal, IGrantable
+
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_integration import WsIntegration
+
+# Sets $envelope to a JSON document with the connection, the route and the raw frame (as a JSON string), which is
+# what service integrations deliver. Velocity strings have no quote escapes, hence the quote variable.
+ENVELOPE_TEMPLATE = (
+    '#set($q = \'"\')\n'
+    '#set($frame = $util.escapeJavaScript($input.body).replaceAll("\\\\\'", "\'"))\n'
+    '#set($envelope = "{${q}connectionId${q}:${q}$context.connectionId${q},'
+    '${q}routeKey${q}:${q}$context.routeKey${q},'
+    '${q}requestId${q}:${q}$context.requestId${q},'
+    '${q}requestTimeEpoch${q}:$context.requestTimeEpoch,'
+    '${q}body${q}:${q}$frame${q}}")\n'
+)
+
+# Frames returned to clients of two-way routes.
+ACCEPTED_RESPONSE_TEMPLATE = '{"status": "accepted", "requestId": "$context.requestId"}'
+ERROR_RESPONSE_TEMPLATE = '{"message": "Internal server error", "requestId": "$context.requestId"}'
+ERROR_RESPONSE_KEY = '/[45]\\d\\d/'
+
+
+class WsServiceIntegration(WsIntegration):
+    """
+    Creates web socket API route integration that sends frames directly to an AWS service action (AWS integration
+    type) instead of invoking a lambda function. Frames are wrapped into an envelope with the connection id and
+    the route key. API Gateway assumes a dedicated role that is granted only the integrated action.
+
+    Two-way routes receive an "accepted" frame, or an error frame if the service refused the request.
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            integration_name: str,
+            ws_api: WsApi,
+            service_action: str,
+            request_template: str,
+            grant: Callable[[IGrantable], Any],
+            content_type: str = 'application/x-amz-json-1.1',
+            request_headers: Optional[Dict[str, str]] = None,
+            default_integration_response: Optional[bool] = None,
+            *args,
+            **kwargs
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param integration_name: The name of the integration.
+        :param ws_api: Web socket API for with the integration is being done.
+        :param service_action: Service and action (or path) part of the integration uri, e.g. kinesis:action/PutRecord.
+        :param request_template: Velocity template of the service request. $envelope is set beforehand.
+        :param grant: Grants the integration role the permissions of the service action.
+        :param content_type: Content type of the service request.
+        :param request_headers: Additional static headers of the service request.
+        :param default_integration_response: Specify whether to create integration response resources
+        (two-way routes).
+        :param args: Additional arguments.
+        :param kwargs: Additional named arguments.
+        """
+        self.__role = Role(
+            scope=scope,
+            id=f'{id}Role',
+            assumed_by=ServicePrincipal('apigateway.amazonaws.com'),
+            description=f'Allows Websocket API {ws_api.name} to call {service_action}.',
+        )
+
+        grant(self.__role)
+
+        headers = dict(request_headers or {}, **{'Content-Type': content_type})
+
+        super().__init__(
+            scope=scope,
+            id=id,
+            integration_name=integration_name,
+            ws_api=ws_api,
+            description=f'{service_action} integration for Websocket API {ws_api.name}.',
+            integration_type='AWS',
+            integration_method='POST',
+            integration_uri=f'arn:aws:apigateway:{scope.region}:{service_action}',
+            credentials_arn=self.__role.role_arn,
+            passthrough_behavior='NEVER',
+            request_parameters={
+                f'integration.request.header.{name}': f"'{value}'" for name, value in sorted(headers.items())
+            },
+            request_templates={'$default': ENVELOPE_TEMPLATE + request_template},
+            template_selection_expression='\\$default',
+            default_integration_response=default_integration_response,
+            integration_response_templates={'$default': ACCEPTED_RESPONSE_TEMPLATE},
+            *args,
+            **kwargs
+        )
+
+        self.__error_response: Optional[CfnIntegrationResponse] = None
+
+        if self.response is not None:
+            self.__error_response = CfnIntegrationResponse(
+                scope=scope,
+                id=f'{integration_name}ErrorResponse',
+                api_id=ws_api.ref,
+                integration_id=self.ref,
+                integration_response_key=ERROR_RESPONSE_KEY,
+                response_templates={'$default': ERROR_RESPONSE_TEMPLATE},
+                template_selection_expression='\\$default',
+            )
+
+    @property
+    def role(self) -> Role:
+        """
+        Role API Gateway assumes to call the service.
+        """
+        return self.__role
+
+    @property
+    def error_response(self) -> Optional[CfnIntegrationResponse]:
+        return self.__error_response
@@ -0,0 +1,57 @@
+from aws_cdk import Stack
+from aws_cdk.aws_sqs import IQueue
+
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_service_integration import WsServiceIntegration
+
+
+class WsSqsIntegration(WsServiceIntegration):
+    """
+    Creates web socket API route integration that sends every frame (wrapped into an envelope) as a message
+    to an SQS queue. FIFO queues group messages by connection.
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            integration_name: str,
+            ws_api: WsApi,
+            queue: IQueue,
+            *args,
+            **kwargs
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param integration_name: The name of the integration.
+        :param ws_api: Web socket API for with the integration is being done.
+        :param queue: Queue to send frames to.
+        :param args: Additional arguments.
+        :param kwargs: Additional named arguments.
+        """
+        self.__queue = queue
+
+        template = 'Action=SendMessage&MessageBody=$util.urlEncode($envelope)'
+        if queue.fifo:
+            template += '&MessageGroupId=$util.urlEncode($context.connectionId)'
+            template += '&MessageDeduplicationId=$util.urlEncode($context.requestId)'
+
+        super().__init__(
+            scope=scope,
+            id=id,
+            integration_name=integration_name,
+            ws_api=ws_api,
+            service_action=f'sqs:path/{queue.env.account}/{queue.queue_name}',
+            request_template=template,
+            grant=queue.grant_send_messages,
+            content_type='application/x-www-form-urlencoded',
+            *args,
+            **kwargs
+        )
+
+    @property
+    def queue(self) -> IQueue:
+        return self.__queue
@@ -4,7 +4,9 @@ from aws_cdk import CfnOutput, RemovalPolicy, Stack
 from aws_cdk.aws_apigatewayv2 import CfnStage
 from aws_cdk.aws_logs import RetentionDays, LogGroup
 
+from b_aws_websocket_api.access_log.ws_access_log_format import DEFAULT_ACCESS_LOG_FORMAT, EXTENDED_ACCESS_LOG_FORMAT
 from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_route_throttling import WsRouteThrottling, to_route_settings
 
 
 class WsStage(CfnStage):
@@ -27,6 +29,9 @@ class WsStage(CfnStage):
             route_settings: Optional[Dict[str, Any]] = None,
             stage_variables: Optional[Dict[str, Any]] = None,
             tags: Optional[Dict[str, Any]] = None,
+            default_throttling: Optional[WsRouteThrottling] = None,
+            route_throttling: Optional[Dict[str, WsRouteThrottling]] = None,
+            extended_access_log: Optional[bool] = None,
             *args,
             **kwargs
     ) -> None:
@@ -45,10 +50,15 @@ class WsStage(CfnStage):
         :param client_certificate_id: The identifier of a client certificate for a Stage.
         :param default_route_settings: The default route settings for the stage.
         :param description: The description for the API stage.
-        :param route_settings: Route settings for the stage.
+        :param route_settings: Route settings for the stage, per route key a CfnStage.RouteSettingsProperty or a
+        dictionary with CloudFormation property names.
         :param stage_variables: A map that defines the stage variables for a Stage. Variable names can have
         alphanumeric and underscore characters, and the values must match [A-Za-z0-9-._~:/?#&=,]+.
         :param tags: The collection of tags. Each tag element is associated with a given resource.
+        :param default_throttling: Throttling of routes without own throttling. Merged into default route settings.
+        :param route_throttling: Throttling per route key. Merged into route settings.
+        :param extended_access_log: Whether default access log settings use the extended format with latencies,
+        response lengths, message ids and error messages (see b_aws_websocket_api.access_log).
         """
         self.__scope = scope
         self.__ws_api = ws_api
@@ -59,9 +69,24 @@ class WsStage(CfnStage):
             logging_level='INFO',
         )
 
+        if default_throttling:
+            default_route_settings = default_throttling.merge(default_route_settings)
+
+        # Typed route settings are converted, since route settings are a plain map for CloudFormation.
+        if route_settings:
+            route_settings = {route_key: to_route_settings(settings) for route_key, settings in route_settings.items()}
+
+        if route_throttling:
+            route_settings = dict(route_settings or {})
+            for route_key, throttling in route_throttling.items():
+                route_settings[route_key] = throttling.merge_route(route_settings.get(route_key))
+
         if access_log_settings and create_default_access_log_settings:
             raise ValueError('Access log settings supplied. Can not request to create default ones.')
 
+        if extended_access_log and not create_default_access_log_settings:
+            raise ValueError('The extended access log format only applies to default access log settings.')
+
         if create_default_access_log_settings:
             log_group = LogGroup(
                 scope=scope,
@@ -73,19 +98,7 @@ class WsStage(CfnStage):
 
             access_log_settings = CfnStage.AccessLogSettingsProperty(
                 destination_arn=log_group.log_group_arn,
-                format=(
-                    "{"
-                    "\"requestId\":\"$context.requestId\", "
-                    "\"ip\": \"$context.identity.sourceIp\", "
-                    "\"caller\":\"$context.identity.caller\", "
-                    "\"user\":\"$context.identity.user\","
-                    "\"requestTime\":\"$context.requestTime\", "
-                    "\"eventType\":\"$context.eventType\","
-                    "\"routeKey\":\"$context.routeKey\", "
-                    "\"status\":\"$context.status\","
-                    "\"connectionId\":\"$context.connectionId\""
-                    "}"
-                )
+                format=EXTENDED_ACCESS_LOG_FORMAT if extended_access_log else DEFAULT_ACCESS_LOG_FORMAT
             )
 
         super().__init__(
@@ -129,6 +142,20 @@ class WsStage(CfnStage):
             export_name=f'{ws_api.name}HttpUrl'
         )
 
+    def throttle(self, route_key: str, throttling: WsRouteThrottling) -> None:
+        """
+        Sets throttling of a route, e.g. of a route added after the stage was created.
+
+        :param route_key: Route key.
+        :param throttling: Throttling settings.
+
+        :return: No return.
+        """
+        route_settings = dict(self.route_settings or {})
+        route_settings[route_key] = throttling.merge_route(route_settings.get(route_key))
+
+        self.route_settings = route_settings
+
     @property
     def ws_url(self):
         return f'wss://{self.api.ref}.execute-api.{self.__scope.region}.amazonaws.com/{self.ref}'
@@ -149,6 +176,15 @@ class WsStage(CfnStage):
     def connections_arn(self):
         return f'arn:aws:execute-api:{self.__scope.region}:{self.__scope.account}:{self.api.ref}/{self.stage_name}/POST/@connections/*'
 
+    @property
+    def connections_status_arn(self):
+        """
+        Arn of GET @connections calls, i.e. of connection status checks.
+
+        :return: Execute-api arn.
+        """
+        return f'arn:aws:execute-api:{self.__scope.region}:{self.__scope.account}:{self.api.ref}/{self.stage_name}/GET/@connections/*'
+
     @property
     def api(self):
         """
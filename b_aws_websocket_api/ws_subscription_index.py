@@ -0,0 +1,105 @@
+from typing import Optional, Dict
+
+from aws_cdk import Stack, Duration, RemovalPolicy
+from aws_cdk.aws_dynamodb import Table, Attribute, AttributeType, BillingMode, ProjectionType
+from aws_cdk.aws_iam import IGrantable, Grant
+from constructs import Construct
+
+from b_aws_websocket_api.runtime.ws_subscription_index_client import (
+    TABLE_NAME_ENV,
+    SHARD_COUNT_ENV,
+    TTL_SECONDS_ENV,
+    PARTITION_KEY,
+    SORT_KEY,
+    TTL_ATTRIBUTE,
+    CONNECTION_INDEX
+)
+
+
+class WsSubscriptionIndex(Construct):
+    """
+    Creates a topic to connection ids inverted index (DynamoDB table) with sharded topic partitions
+    for targeted pub-sub fan-out.
+    """
+
+    def __init__(
+            self,
+            scope: Stack,
+            id: str,
+            shard_count: int = 16,
+            ttl: Optional[Duration] = None,
+            table_name: Optional[str] = None,
+            removal_policy: Optional[RemovalPolicy] = None,
+    ) -> None:
+        """
+        Constructor.
+
+        :param scope: Cloud formation stack.
+        :param id: AWS-CDK-specific id.
+        :param shard_count: Number of partitions per topic. Increase for topics with very many subscribers.
+        :param ttl: Lifetime of a subscription. Defaults to 2 hours which is the maximum
+        connection duration of API Gateway websockets.
+        :param table_name: Name of the index table.
+        :param removal_policy: Removal policy of the index table.
+        """
+        super().__init__(
+            scope=scope,
+            id=id,
+        )
+
+        self.__shard_count = shard_count
+        self.__ttl = ttl or Duration.hours(2)
+
+        self.__table = Table(
+            scope=scope,
+            id=f'{id}Table',
+            table_name=table_name,
+            partition_key=Attribute(name=PARTITION_KEY, type=AttributeType.STRING),
+            sort_key=Attribute(name=SORT_KEY, type=AttributeType.STRING),
+            billing_mode=BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute=TTL_ATTRIBUTE,
+            removal_policy=removal_policy or RemovalPolicy.DESTROY,
+        )
+
+        # Reverse lookup (connection -> topics) for unsubscribing disconnected clients.
+        self.__table.add_global_secondary_index(
+            index_name=CONNECTION_INDEX,
+            partition_key=Attribute(name=SORT_KEY, type=AttributeType.STRING),
+            sort_key=Attribute(name=PARTITION_KEY, type=AttributeType.STRING),
+            projection_type=ProjectionType.KEYS_ONLY,
+        )
+
+    @property
+    def table(self) -> Table:
+        return self.__table
+
+    @property
+    def environment(self) -> Dict[str, str]:
+        """
+        Environment variables that configure WsSubscriptionIndexClient in any function.
+        """
+        return {
+            TABLE_NAME_ENV: self.__table.table_name,
+            SHARD_COUNT_ENV: str(self.__shard_count),
+            TTL_SECONDS_ENV: str(int(self.__ttl.to_seconds())),
+        }
+
+    def grant_read(self, grantee: IGrantable) -> Grant:
+        """
+        Grants permissions to stream subscribers of topics.
+
+        :param grantee: Principal to grant permissions to.
+
+        :return: Grant.
+        """
+        return self.__table.grant_read_data(grantee)
+
+    def grant_read_write(self, grantee: IGrantable) -> Grant:
+        """
+        Grants permissions to stream subscribers, subscribe and unsubscribe connections.
+
+        :param grantee: Principal to grant permissions to.
+
+        :return: Grant.
+        """
+        return self.__table.grant_read_write_data(grantee)
@@ -0,0 +1,72 @@
+"""
+Throughput benchmark of the chunking protocol for large messages: splitting into frames, client-side
+reassembly of shuffled frames (with its peak memory), pipelined sending through a local stand-in
+@connections endpoint and server-side reassembly of an upload through a stand-in chunk store.
+
+Usage: python -m b_aws_websocket_api_test.benchmarks.bench_chunking [sizes in MB...]
+"""
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict
+
+from b_aws_websocket_api.runtime.ws_chunk_store_client import WsChunkStoreClient
+from b_aws_websocket_api.runtime.ws_chunking import WsChunkSender, WsReassembler, split_message
+from b_aws_websocket_api_test.stand_ins.connections import ConnectionsStandIn
+from b_aws_websocket_api_test.stand_ins.dynamodb import DynamoDbStandIn
+
+
+def throughput(size: int, seconds: float) -> float:
+    return round(size / 1024 / 1024 / seconds, 1) if seconds else 0.0
+
+
+def run(megabytes: float, max_in_flight: int = 16) -> Dict[str, Any]:
+    """
+    Measures every stage of the protocol for a single message size.
+
+    :param megabytes: Message size in MB.
+    :param max_in_flight: Frames in flight of the sender.
+
+    :return: Measurements.
+    """
+    message = os.urandom(int(megabytes * 1024 * 1024))
+    result: Dict[str, Any] = dict(megabytes=megabytes)
+
+    started = time.perf_counter()
+    frames = list(split_message(message))
+    result['frames'] = len(frames)
+    result['split_mb_per_second'] = throughput(len(message), time.perf_counter() - started)
+
+    random.Random(0).shuffle(frames)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    reassembler = WsReassembler()
+    reassembled = [item for item in map(reassembler.feed, frames) if item is not None]
+    result['reassemble_mb_per_second'] = throughput(len(message), time.perf_counter() - started)
+    result['reassemble_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+    tracemalloc.stop()
+    assert reassembled == [message]
+    del reassembled
+
+    with ConnectionsStandIn() as stand_in:
+        stats = WsChunkSender(stand_in.connections_url, max_in_flight=max_in_flight).send('conn', message)
+    assert stats.ok
+    result['send_mb_per_second'] = round(stats.megabytes_per_second, 1)
+    result['send_frames_per_second'] = round(stats.frames / stats.duration, 1)
+
+    store = WsChunkStoreClient(table_name='Chunks', client=DynamoDbStandIn({'Chunks': ('messageKey', 'seq')}))
+    started = time.perf_counter()
+    uploaded = [item for item in (store.add('conn', frame) for frame in frames) if item is not None]
+    result['store_mb_per_second'] = throughput(len(message), time.perf_counter() - started)
+    assert uploaded == [message]
+
+    return result
+
+
+if __name__ == '__main__':
+    for size in [float(item) for item in sys.argv[1:]] or [1, 10, 50]:
+        print(json.dumps(run(size)))
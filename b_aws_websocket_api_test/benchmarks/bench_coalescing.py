@@ -0,0 +1,58 @@
+"""
+Benchmark of outbound message coalescing: a backend emits many tiny updates to a few connections,
+which are sent through a local stand-in @connections endpoint once per message (no coalescing)
+and with several coalescing windows. Reports @connections requests per message and the added
+delivery latency.
+
+Usage: python -m b_aws_websocket_api_test.benchmarks.bench_coalescing [windows in ms...]
+"""
+import json
+import sys
+import time
+from typing import Any, Dict
+
+from b_aws_websocket_api.runtime.ws_coalescer import WsCoalescer
+from b_aws_websocket_api_test.stand_ins.connections import ConnectionsStandIn
+
+
+def run(window: float, connections: int = 20, messages: int = 100, interval: float = 0.0002) -> Dict[str, Any]:
+    """
+    Emits messages round-robin to connections with a fixed interval between messages.
+
+    :param window: Coalescing window in seconds. Zero sends every message on its own.
+    :param connections: Number of target connections.
+    :param messages: Number of messages per connection.
+    :param interval: Time between two emitted messages in seconds.
+
+    :return: Measurements.
+    """
+    with ConnectionsStandIn() as stand_in:
+        coalescer = WsCoalescer(
+            stand_in.connections_url,
+            window=window,
+            max_messages=100 if window else 1,
+        )
+
+        with coalescer:
+            for i in range(messages):
+                for connection in range(connections):
+                    coalescer.send(f'live{connection}=', json.dumps({'seq': i, 'price': 12.5}))
+                    time.sleep(interval)
+
+    stats = coalescer.stats
+    assert stats.sent == connections * messages
+
+    return dict(
+        window_ms=window * 1000,
+        messages=stats.messages,
+        requests=stats.requests,
+        messages_per_request=round(stats.messages_per_request, 1),
+        p50_ms=round(stats.p50 * 1000, 2),
+        p99_ms=round(stats.p99 * 1000, 2),
+        duration=round(stats.duration, 2),
+    )
+
+
+if __name__ == '__main__':
+    for window_ms in [float(item) for item in sys.argv[1:]] or [0, 5, 20, 50]:
+        print(json.dumps(run(window_ms / 1000)))
@@ -0,0 +1,95 @@
+"""
+Local harness of the queue-driven fan-out pipeline. Runs the splitter and a pool of senders in-process
+against stand-in queues, a stand-in DynamoDB and a stand-in @connections endpoint.
+Everything shares one interpreter, hence numbers show the pipeline overhead rather than
+the scaling of independent Lambda workers.
+
+Usage: python -m b_aws_websocket_api_test.benchmarks.bench_fanout [connections] [batch size]
+"""
+import json
+import sys
+import threading
+import time
+from typing import Any, Dict
+
+from b_aws_websocket_api.runtime.ws_broadcaster import WsBroadcaster
+from b_aws_websocket_api.runtime.ws_fanout import WsFanoutPublisher, WsFanoutSplitter, WsFanoutSender, \
+    WsFanoutProgress, records
+from b_aws_websocket_api_test.stand_ins.connections import ConnectionsStandIn
+from b_aws_websocket_api_test.stand_ins.dynamodb import DynamoDbStandIn
+from b_aws_websocket_api_test.stand_ins.sqs import SqsStandIn
+
+PUBLISH_QUEUE = 'publish'
+SHARD_QUEUE = 'shards'
+
+
+def run_fanout(connections: int, workers: int, batch_size: int = 500, max_in_flight: int = 16) -> Dict[str, Any]:
+    """
+    Publishes one message to the given number of connections and drains all shards with a pool of senders.
+
+    :param connections: Number of target connections.
+    :param workers: Number of parallel senders (reserved concurrency of the sender function).
+    :param batch_size: Number of connections per shard.
+    :param max_in_flight: Concurrent requests inside a single sender.
+
+    :return: Measurements.
+    """
+    sqs = SqsStandIn()
+    dynamodb = DynamoDbStandIn({'Progress': ('publishId', 'progressKey')})
+    progress = WsFanoutProgress(table_name='Progress', client=dynamodb)
+
+    with ConnectionsStandIn() as stand_in:
+        publish_id = WsFanoutPublisher(PUBLISH_QUEUE, sqs).publish(
+            '{"message": "hello"}',
+            connection_ids=[f'conn{i}' for i in range(connections)]
+        )
+
+        started = time.perf_counter()
+
+        splitter = WsFanoutSplitter(SHARD_QUEUE, batch_size, progress=progress, sqs_client=sqs)
+        for message in records(sqs.receive_event(PUBLISH_QUEUE)):
+            splitter.split(message)
+
+        def worker() -> None:
+            sender = WsFanoutSender(
+                broadcaster=WsBroadcaster(stand_in.connections_url, max_in_flight=max_in_flight),
+                shard_queue_url=SHARD_QUEUE,
+                progress=progress,
+                sqs_client=sqs,
+            )
+
+            while True:
+                event = sqs.receive_event(SHARD_QUEUE, timeout=0.2)
+                if event is None:
+                    return
+                for shard in records(event):
+                    sender.send(shard)
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        duration = time.perf_counter() - started
+
+    shards = [item for item in progress.shards(publish_id) if item['progressKey'].startswith('shard#')]
+
+    return dict(
+        connections=connections,
+        workers=workers,
+        shards=len(shards),
+        sent=sum(item['sent'] for item in shards),
+        failed=sum(item['failed'] for item in shards),
+        received=len(stand_in.received),
+        seconds=round(duration, 3),
+        messages_per_second=round(connections / duration),
+    )
+
+
+if __name__ == '__main__':
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    for count in (1, 2, 4, 8):
+        print(json.dumps(run_fanout(total, count, size)))
@@ -0,0 +1,58 @@
+"""
+Benchmark of importing every runtime module in a fresh interpreter, i.e. of the cold start overhead
+the runtime helpers add to a Lambda function, against time and resident memory budgets.
+
+Usage: python -m b_aws_websocket_api_test.benchmarks.bench_import
+"""
+import json
+import subprocess
+import sys
+from typing import Any, Dict
+
+# Budgets for importing every runtime module in a fresh interpreter.
+IMPORT_TIME_BUDGET_SECONDS = 0.25
+IMPORT_MEMORY_BUDGET_KB = 20 * 1024
+
+BENCHMARK = '''
+import importlib
+import json
+import pkgutil
+import resource
+import sys
+import time
+
+memory_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+started = time.perf_counter()
+
+import b_aws_websocket_api.runtime as runtime
+for module in pkgutil.walk_packages(runtime.__path__, runtime.__name__ + '.'):
+    importlib.import_module(module.name)
+
+print(json.dumps(dict(
+    seconds=time.perf_counter() - started,
+    memory_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - memory_before,
+    modules=sorted(sys.modules),
+)))
+'''
+
+
+def run_import() -> Dict[str, Any]:
+    """
+    Imports the runtime subpackage in a fresh interpreter.
+
+    :return: Import time, resident memory growth and imported modules.
+    """
+    output = subprocess.run([sys.executable, '-c', BENCHMARK], check=True, capture_output=True, text=True).stdout
+
+    return json.loads(output)
+
+
+if __name__ == '__main__':
+    result = run_import()
+
+    print(json.dumps(dict(
+        seconds=round(result['seconds'], 4),
+        memory_kb=result['memory_kb'],
+        within_time_budget=result['seconds'] < IMPORT_TIME_BUDGET_SECONDS,
+        within_memory_budget=result['memory_kb'] < IMPORT_MEMORY_BUDGET_KB,
+    )))
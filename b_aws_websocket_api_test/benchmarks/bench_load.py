@@ -0,0 +1,309 @@
+"""
+Load generator of a websocket API. Opens N concurrent connections at a controlled ramp rate, then drives
+a weighted message mix over route keys from every connection and measures connect latency, round-trip
+latency percentiles (overall and per route), errors, throttles and messages per second.
+
+Works against any websocket url (deployed stage or a local emulator). With --emulator the given template
+or cloud assembly is served by a local emulator first, hence it runs offline, e.g. in CI.
+Opening thousands of sockets may require raising the open file limit (ulimit -n).
+
+Usage: python -m b_aws_websocket_api_test.benchmarks.bench_load wss://abc.execute-api.eu-central-1.amazonaws.com/prod \
+    --connections 1000 --ramp-rate 200 --messages 20 --mix '{"test": 9, "ping": 1}' --output result.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import websockets
+
+# Frame messages API Gateway sends back instead of an integration response.
+THROTTLE_MESSAGES = {'Too Many Requests', 'Limit Exceeded', 'Rate exceeded'}
+ERROR_MESSAGES = {'Forbidden', 'Internal server error', 'Endpoint request timed out'}
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """
+    Calculates a percentile (nearest-rank method).
+
+    :param values: Measurements.
+    :param percent: Percentile in range 0-100.
+
+    :return: Percentile or 0 if there are no measurements.
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))
+
+    return ordered[index]
+
+
+def summary(values: List[float]) -> Dict[str, float]:
+    return dict(
+        count=len(values),
+        p50_ms=round(percentile(values, 50) * 1000, 3),
+        p90_ms=round(percentile(values, 90) * 1000, 3),
+        p99_ms=round(percentile(values, 99) * 1000, 3),
+        max_ms=round(max(values, default=0.0) * 1000, 3),
+    )
+
+
+class WsLoadStats:
+    """
+    Measurements of a load run.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor.
+        """
+        self.connect_latencies: List[float] = []
+        self.round_trips: Dict[str, List[float]] = {}
+        self.connected = 0
+        self.connect_errors = 0
+        self.connect_throttled = 0
+        self.sent = 0
+        self.received = 0
+        self.errors = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.message_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        round_trips = [latency for latencies in self.round_trips.values() for latency in latencies]
+
+        return dict(
+            connected=self.connected,
+            connect_errors=self.connect_errors,
+            connect_throttled=self.connect_throttled,
+            connect_latency=summary(self.connect_latencies),
+            sent=self.sent,
+            received=self.received,
+            errors=self.errors,
+            throttled=self.throttled,
+            timeouts=self.timeouts,
+            round_trip=summary(round_trips),
+            routes={key: summary(values) for key, values in sorted(self.round_trips.items())},
+            message_seconds=round(self.message_seconds, 3),
+            messages_per_second=round(self.sent / self.message_seconds, 1) if self.message_seconds else 0.0,
+        )
+
+
+async def run_load_async(
+        url: str,
+        connections: int = 100,
+        ramp_rate: float = 100.0,
+        messages: int = 10,
+        mix: Optional[Dict[str, float]] = None,
+        one_way: Optional[Set[str]] = None,
+        interval: float = 0.0,
+        payload_bytes: int = 0,
+        timeout: float = 10.0,
+        seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Runs a load test.
+
+    :param url: Websocket url.
+    :param connections: Number of concurrent connections.
+    :param ramp_rate: Connections opened per second.
+    :param messages: Messages sent by every connection once all connections are opened.
+    :param mix: Route key to weight mapping. Messages are {"action": route key, "seq": n}.
+    :param one_way: Route keys that do not reply. Their messages are not waited for.
+    :param interval: Pause between messages of a single connection in seconds.
+    :param payload_bytes: Size of padding added to every message.
+    :param timeout: Seconds to wait for a connection or a reply.
+    :param seed: Seed of the route key choice.
+
+    :return: Run parameters and measurements.
+    """
+    mix = mix or {'test': 1.0}
+    one_way = one_way or set()
+    route_keys, weights = list(mix), list(mix.values())
+    padding = 'x' * payload_bytes
+
+    stats = WsLoadStats()
+    ramped = asyncio.Event()
+    pending = [connections]
+
+    async def client(index: int) -> None:
+        await asyncio.sleep(index / ramp_rate)
+
+        started = time.perf_counter()
+        try:
+            socket = await asyncio.wait_for(websockets.connect(url, max_queue=None), timeout)
+        except websockets.InvalidStatusCode as ex:
+            stats.connect_throttled += ex.status_code == 429
+            stats.connect_errors += ex.status_code != 429
+            socket = None
+        except (OSError, asyncio.TimeoutError, websockets.WebSocketException):
+            stats.connect_errors += 1
+            socket = None
+        else:
+            stats.connect_latencies.append(time.perf_counter() - started)
+            stats.connected += 1
+        finally:
+            pending[0] -= 1
+            if not pending[0]:
+                ramped.set()
+
+        if not socket:
+            return
+
+        try:
+            await ramped.wait()
+            await exchange(socket, random.Random(seed + index))
+        finally:
+            await socket.close()
+
+    async def exchange(socket: Any, choice: random.Random) -> None:
+        for seq in range(messages):
+            route_key = choice.choices(route_keys, weights)[0]
+            message = dict(action=route_key, seq=seq)
+            if padding:
+                message['padding'] = padding
+
+            started = time.perf_counter()
+            try:
+                await socket.send(json.dumps(message))
+                stats.sent += 1
+
+                if route_key not in one_way:
+                    reply = await asyncio.wait_for(socket.recv(), timeout)
+                    latency = time.perf_counter() - started
+                    stats.received += 1
+
+                    status = classify(reply)
+                    if status == 'throttled':
+                        stats.throttled += 1
+                    elif status == 'error':
+                        stats.errors += 1
+                    else:
+                        stats.round_trips.setdefault(route_key, []).append(latency)
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+            except websockets.ConnectionClosed:
+                stats.errors += 1
+                return
+
+            if interval:
+                await asyncio.sleep(interval)
+
+    started_at = time.time()
+    clients = [asyncio.ensure_future(client(index)) for index in range(connections)]
+
+    if connections:
+        await ramped.wait()
+    message_started = time.perf_counter()
+    await asyncio.gather(*clients)
+    stats.message_seconds = time.perf_counter() - message_started
+
+    return dict(
+        url=url,
+        started_at=started_at,
+        connections=connections,
+        ramp_rate=ramp_rate,
+        messages_per_connection=messages,
+        mix=mix,
+        one_way=sorted(one_way),
+        interval=interval,
+        payload_bytes=payload_bytes,
+        results=stats.to_dict(),
+    )
+
+
+def classify(reply: Any) -> str:
+    """
+    Tells API Gateway throttling and error frames apart from integration responses.
+
+    :param reply: Received frame.
+
+    :return: One of "ok", "throttled", "error".
+    """
+    if isinstance(reply, str) and reply.startswith('{') and '"message"' in reply:
+        try:
+            message = json.loads(reply).get('message')
+        except ValueError:
+            return 'ok'
+        if message in THROTTLE_MESSAGES:
+            return 'throttled'
+        if message in ERROR_MESSAGES:
+            return 'error'
+
+    return 'ok'
+
+
+def run_load(url: str, **kwargs: Any) -> Dict[str, Any]:
+    """
+    Runs a load test. See run_load_async for parameters.
+
+    :return: Run parameters and measurements.
+    """
+    return asyncio.run(run_load_async(url, **kwargs))
+
+
+async def run_against_emulator(path: str, **kwargs: Any) -> Dict[str, Any]:
+    """
+    Serves a synthesized template with a local emulator and runs a load test against it.
+
+    :param path: Template file or cloud assembly directory.
+
+    :return: Run parameters and measurements.
+    """
+    from b_aws_websocket_api.emulator.ws_emulator import WsEmulator
+    from b_aws_websocket_api.emulator.ws_template import WsTemplate
+
+    async with WsEmulator(WsTemplate.from_path(path)) as emulator:
+        return await run_load_async(emulator.url, **kwargs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Websocket API load generator.')
+    parser.add_argument('url', nargs='?', help='Websocket url of a stage.')
+    parser.add_argument('--emulator', help='Template file or cloud assembly to serve locally instead of a url.')
+    parser.add_argument('--connections', type=int, default=100)
+    parser.add_argument('--ramp-rate', type=float, default=100.0, help='Connections opened per second.')
+    parser.add_argument('--messages', type=int, default=10, help='Messages per connection.')
+    parser.add_argument('--mix', type=json.loads, default={'test': 1}, help='JSON route key to weight mapping.')
+    parser.add_argument('--one-way', nargs='*', default=[], help='Route keys that do not reply.')
+    parser.add_argument('--interval', type=float, default=0.0, help='Pause between messages in seconds.')
+    parser.add_argument('--payload-bytes', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='File to write JSON results to.')
+    arguments = parser.parse_args()
+
+    if not arguments.url and not arguments.emulator:
+        parser.error('Either a url or --emulator is required.')
+
+    kwargs = dict(
+        connections=arguments.connections,
+        ramp_rate=arguments.ramp_rate,
+        messages=arguments.messages,
+        mix=arguments.mix,
+        one_way=set(arguments.one_way),
+        interval=arguments.interval,
+        payload_bytes=arguments.payload_bytes,
+        timeout=arguments.timeout,
+        seed=arguments.seed,
+    )
+
+    if arguments.emulator:
+        result = asyncio.run(run_against_emulator(arguments.emulator, **kwargs))
+    else:
+        result = run_load(arguments.url, **kwargs)
+
+    text = json.dumps(result, indent=2)
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            file.write(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
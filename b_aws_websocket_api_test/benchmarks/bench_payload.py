@@ -0,0 +1,63 @@
+"""
+Micro-benchmark of per-recipient message preparation (encoding and request signing) during fan-out:
+naive per-recipient json.dumps versus a pre-encoded WsPayload, static and with a templated field.
+
+Usage: python -m b_aws_websocket_api_test.benchmarks.bench_payload
+"""
+import json
+import time
+from typing import Any, Callable, Dict
+
+from b_aws_websocket_api.runtime.ws_payload import WsPayload, WsField
+from b_aws_websocket_api.runtime.ws_sigv4 import WsSigV4Signer
+
+DOCUMENT = dict(
+    type='update',
+    items=[dict(id=i, name=f'item-{i}', price=i * 1.5, tags=['a', 'b', 'c']) for i in range(50)],
+)
+
+SIGNER = WsSigV4Signer('eu-central-1', 'AKIDEXAMPLE', 'secret')
+HOST = 'abc.execute-api.eu-central-1.amazonaws.com'
+
+
+def naive(recipients: int) -> None:
+    for i in range(recipients):
+        body = json.dumps(dict(DOCUMENT, seq=i)).encode('utf-8')
+        SIGNER.sign('POST', HOST, f'/prod/%40connections/conn{i}', body=body)
+
+
+def pre_encoded(recipients: int) -> None:
+    payload = WsPayload(DOCUMENT)
+    for i in range(recipients):
+        payload.for_recipient(f'conn{i}', i)
+        SIGNER.sign('POST', HOST, f'/prod/%40connections/conn{i}', payload_hash=payload.digest)
+
+
+def templated(recipients: int) -> None:
+    payload = WsPayload(dict(DOCUMENT, seq=WsField('seq')), variables=lambda connection_id, seq: dict(seq=seq))
+    for i in range(recipients):
+        body = payload.for_recipient(f'conn{i}', i)
+        SIGNER.sign('POST', HOST, f'/prod/%40connections/conn{i}', body=body)
+
+
+def measure(function: Callable[[int], None], recipients: int) -> float:
+    started = time.perf_counter()
+    function(recipients)
+    return time.perf_counter() - started
+
+
+def run(recipients: int) -> Dict[str, Any]:
+    result: Dict[str, Any] = dict(recipients=recipients)
+
+    for function in (naive, pre_encoded, templated):
+        result[f'{function.__name__}_seconds'] = round(measure(function, recipients), 4)
+
+    result['pre_encoded_speedup'] = round(result['naive_seconds'] / result['pre_encoded_seconds'], 2)
+    result['templated_speedup'] = round(result['naive_seconds'] / result['templated_seconds'], 2)
+
+    return result
+
+
+if __name__ == '__main__':
+    for count in (1000, 10000, 100000):
+        print(json.dumps(run(count)))
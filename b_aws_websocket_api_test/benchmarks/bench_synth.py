@@ -0,0 +1,152 @@
+"""
+Synthesis benchmark of large websocket APIs built with WsApiBuilder. For every route count the API is built
+and synthesized in a fresh interpreter (hence a fresh jsii runtime) and the wall time, peak memory
+(python heap and the jsii node process) and the template resource count and size are reported.
+
+Routes are spread over one function per ten routes, hence functions and integrations are deduplicated.
+Routes of every other function are fire-and-forget. Every size is built in standard and in compact mode.
+The 500 resources per stack limit is disabled, so that oversized templates are measured rather than rejected.
+
+Usage: python -m b_aws_websocket_api_test.benchmarks.bench_synth [route counts...]
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, Optional
+
+ROUTES_PER_FUNCTION = 10
+
+
+def node_peak_rss_mb() -> Optional[float]:
+    """
+    Reads the peak resident memory of the jsii node processes (the runtime wrapper spawns the kernel
+    as its own child), i.e. of all descendant processes. Linux only.
+
+    :return: Sum of peak memory of descendant processes in MB or None if not available.
+    """
+    if not os.path.isdir('/proc'):
+        return None
+
+    parents: Dict[int, int] = {}
+    for pid in filter(str.isdigit, os.listdir('/proc')):
+        try:
+            with open(f'/proc/{pid}/stat') as file:
+                parents[int(pid)] = int(file.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+
+    descendants, frontier = set(), {os.getpid()}
+    while frontier:
+        frontier = {pid for pid, parent in parents.items() if parent in frontier} - descendants
+        descendants |= frontier
+
+    peak = 0.0
+    for pid in descendants:
+        try:
+            with open(f'/proc/{pid}/status') as file:
+                for line in file:
+                    if line.startswith('VmHWM:'):
+                        peak += int(line.split()[1]) / 1024
+        except (OSError, ValueError, IndexError):
+            continue
+
+    return round(peak, 1)
+
+
+def synthesize(routes: int, compact: bool) -> Dict[str, Any]:
+    """
+    Builds and synthesizes an API with the given number of routes in the current process.
+
+    :param routes: Number of message routes.
+    :param compact: Build in compact template mode.
+
+    :return: Measurements.
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+
+    from aws_cdk import App, Stack
+    from aws_cdk.aws_lambda import Code
+    from b_aws_websocket_api.ws_api_builder import WsApiBuilder, WsFunctionDefinition, WsRouteDefinition
+
+    imported = time.perf_counter()
+
+    app = App(context={'@aws-cdk/core:stackResourceLimit': 0})
+    stack = Stack(app, 'BenchStack', env={'region': 'eu-central-1', 'account': '123456789012'})
+    code = Code.from_inline('def handler(event, context):\n    return {"statusCode": 200}\n')
+
+    definitions = [
+        WsFunctionDefinition(code=code, handler='index.handler', name=f'Handler{index}')
+        for index in range(max(1, routes // ROUTES_PER_FUNCTION))
+    ]
+
+    builder = WsApiBuilder(
+        scope=stack,
+        id='Bench',
+        compact=compact,
+        routes={
+            f'route{index}': WsRouteDefinition(
+                definitions[index % len(definitions)],
+                two_way=index % len(definitions) % 2 == 0,
+                throttling_rate_limit=100,
+            )
+            for index in range(routes)
+        },
+    )
+
+    template = app.synth().get_stack_by_name('BenchStack').template
+    finished = time.perf_counter()
+
+    _, python_peak = tracemalloc.get_traced_memory()
+    resources = template['Resources']
+
+    return dict(
+        routes=routes,
+        mode='compact' if compact else 'standard',
+        functions=len(definitions),
+        import_seconds=round(imported - started, 3),
+        synth_seconds=round(finished - imported, 3),
+        python_peak_mb=round(python_peak / 1024 / 1024, 1),
+        node_peak_rss_mb=node_peak_rss_mb(),
+        resources=len(resources),
+        template_bytes=len(json.dumps(template)),
+        resource_types=dict(Counter(resource['Type'] for resource in resources.values())),
+        resource_report=builder.resource_report,
+    )
+
+
+def run(routes: int, compact: bool) -> Dict[str, Any]:
+    """
+    Runs a single measurement in a fresh interpreter.
+
+    :param routes: Number of message routes.
+    :param compact: Build in compact template mode.
+
+    :return: Measurements.
+    """
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-m', __spec__.name if __spec__ else __name__, '--single', str(routes), str(int(compact))],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=dict(os.environ, JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION='1'),
+    ).stdout
+
+    result = json.loads(output.strip().splitlines()[-1])
+    result['wall_seconds'] = round(time.perf_counter() - started, 3)
+
+    return result
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--single']:
+        print(json.dumps(synthesize(int(sys.argv[2]), bool(int(sys.argv[3])))))
+    else:
+        for count in [int(item) for item in sys.argv[1:]] or [50, 200, 500]:
+            for mode in (False, True):
+                print(json.dumps(run(count, mode)))
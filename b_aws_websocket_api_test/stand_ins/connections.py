@@ -0,0 +1,96 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+
+class ConnectionsStandIn:
+    """
+    Local stand-in of the @connections management API running in a background thread.
+
+    Connection ids prefixed with "gone" return 410, ids prefixed with "slow" are throttled once
+    and ids prefixed with "fail" always fail with 500.
+    """
+
+    def __init__(self, stage: str = 'test') -> None:
+        """
+        Constructor.
+
+        :param stage: Stage name used in the endpoint path.
+        """
+        self.stage = stage
+        self.received: List[Dict] = []
+        self.throttled: Dict[str, int] = {}
+        self.deleted: List[str] = []
+        self.lock = threading.Lock()
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def connections_url(self) -> str:
+        return f'http://127.0.0.1:{self.server.server_port}/{self.stage}/@connections'
+
+    def __enter__(self) -> 'ConnectionsStandIn':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self) -> None:
+                connection_id = unquote(self.path).rsplit('/', 1)[-1]
+                body = self.rfile.read(int(self.headers['Content-Length']))
+
+                with stand_in.lock:
+                    if connection_id.startswith('gone'):
+                        status = 410
+                    elif connection_id.startswith('fail'):
+                        status = 500
+                    elif connection_id.startswith('slow') and connection_id not in stand_in.throttled:
+                        stand_in.throttled[connection_id] = 1
+                        status = 429
+                    else:
+                        status = 200
+                        stand_in.received.append(dict(
+                            connection_id=connection_id,
+                            body=body,
+                            authorization=self.headers.get('Authorization'),
+                        ))
+
+                self.respond(status)
+
+            def do_GET(self) -> None:
+                connection_id = unquote(self.path).rsplit('/', 1)[-1]
+                self.respond(410 if connection_id.startswith('gone') else 200, b'{"connectedAt": "now"}')
+
+            def do_DELETE(self) -> None:
+                connection_id = unquote(self.path).rsplit('/', 1)[-1]
+                with stand_in.lock:
+                    stand_in.deleted.append(connection_id)
+                self.respond(204)
+
+            def respond(self, status: int, body: bytes = b'') -> None:
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        class Server(ThreadingHTTPServer):
+            # Many pooled clients connect at once, the default backlog of 5 drops their handshakes.
+            request_queue_size = 1024
+            daemon_threads = True
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,214 @@
+import operator
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+OPERATORS = {
+    '=': operator.eq,
+    '<>': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+class ConditionalCheckFailed(Exception):
+    """
+    Mimics the botocore ClientError of a failed condition.
+    """
+
+    response = {'Error': {'Code': 'ConditionalCheckFailedException'}}
+
+
+class DynamoDbStandIn:
+    """
+    In-memory stand-in of the low-level DynamoDB client supporting the calls used by runtime helpers.
+    Batch calls deliberately leave some keys unprocessed to exercise retries.
+    """
+
+    def __init__(self, tables: Dict[str, Tuple[str, Optional[str]]], batch_limit: int = 40) -> None:
+        """
+        Constructor.
+
+        :param tables: Table name to (partition key, sort key) names.
+        :param batch_limit: Maximum number of keys processed in a single batch call.
+        """
+        self.schemas = tables
+        self.tables: Dict[str, Dict[tuple, Dict[str, Any]]] = {name: {} for name in tables}
+        self.batch_limit = batch_limit
+        self.calls: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def __key(self, table: str, item: Dict[str, Any]) -> tuple:
+        return tuple(str(item[name]) for name in self.schemas[table] if name)
+
+    def __count(self, name: str) -> None:
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def put_item(self, TableName: str, Item: Dict[str, Any], **kwargs) -> Dict:
+        self.__count('put_item')
+        self.tables[TableName][self.__key(TableName, Item)] = Item
+        return {}
+
+    def get_item(self, TableName: str, Key: Dict[str, Any], **kwargs) -> Dict:
+        self.__count('get_item')
+        item = self.tables[TableName].get(self.__key(TableName, Key))
+        return {'Item': item} if item else {}
+
+    def delete_item(self, TableName: str, Key: Dict[str, Any], **kwargs) -> Dict:
+        self.__count('delete_item')
+        self.tables[TableName].pop(self.__key(TableName, Key), None)
+        return {}
+
+    def update_item(
+            self,
+            TableName: str,
+            Key: Dict[str, Any],
+            UpdateExpression: str,
+            ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+            ExpressionAttributeValues: Optional[Dict[str, Any]] = None,
+            ConditionExpression: Optional[str] = None,
+            ReturnValues: str = 'NONE',
+            **kwargs
+    ) -> Dict:
+        """
+        Supports "ADD #a :v, ..." of numbers and number sets, "SET #a = :v, ..." and "attribute_(not_)exists(#a)"
+        and "#a = :v" conditions joined by AND.
+        """
+        self.__count('update_item')
+        names, values = ExpressionAttributeNames or {}, ExpressionAttributeValues or {}
+
+        with self.lock:
+            key = self.__key(TableName, Key)
+            item = self.tables[TableName].get(key) or dict(Key)
+
+            for condition in ConditionExpression.split(' AND ') if ConditionExpression else []:
+                if ' = ' in condition:
+                    name, _, value = condition.partition(' = ')
+                    if item.get(names.get(name, name)) != values[value]:
+                        raise ConditionalCheckFailed()
+                    continue
+                function, _, name = condition[:-1].partition('(')
+                if (names.get(name, name) in item) == (function == 'attribute_not_exists'):
+                    raise ConditionalCheckFailed()
+
+            updated = {}
+            for clause in UpdateExpression.replace(' SET ', '\nSET ').split('\n'):
+                action, _, assignments = clause.partition(' ')
+                for assignment in assignments.split(','):
+                    if action == 'ADD':
+                        name, value = assignment.split()
+                        name = names.get(name, name)
+                        if 'N' in values[value]:
+                            total = int(item.get(name, {}).get('N', 0)) + int(values[value]['N'])
+                            item[name] = updated[name] = {'N': str(total)}
+                            continue
+                        merged = set(item.get(name, {}).get('NS', [])) | set(values[value]['NS'])
+                        item[name] = updated[name] = {'NS': sorted(merged)}
+                    else:
+                        name, value = [part.strip() for part in assignment.split('=')]
+                        name = names.get(name, name)
+                        item[name] = updated[name] = values[value]
+
+            self.tables[TableName][key] = item
+
+        return {'Attributes': updated} if ReturnValues == 'UPDATED_NEW' else {}
+
+    def batch_get_item(self, RequestItems: Dict[str, Any]) -> Dict:
+        self.__count('batch_get_item')
+        responses, unprocessed = {}, {}
+
+        for table, request in RequestItems.items():
+            keys = request['Keys']
+            found = [self.tables[table].get(self.__key(table, key)) for key in keys[:self.batch_limit]]
+            responses[table] = [
+                self.__project(item, request.get('ProjectionExpression'), request.get('ExpressionAttributeNames'))
+                for item in found if item
+            ]
+            if keys[self.batch_limit:]:
+                unprocessed[table] = dict(request, Keys=keys[self.batch_limit:])
+
+        return {'Responses': responses, 'UnprocessedKeys': unprocessed}
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict]]) -> Dict:
+        self.__count('batch_write_item')
+        unprocessed = {}
+
+        for table, requests in RequestItems.items():
+            for request in requests[:self.batch_limit // 2]:
+                if 'PutRequest' in request:
+                    item = request['PutRequest']['Item']
+                    self.tables[table][self.__key(table, item)] = item
+                else:
+                    self.tables[table].pop(self.__key(table, request['DeleteRequest']['Key']), None)
+            if requests[self.batch_limit // 2:]:
+                unprocessed[table] = requests[self.batch_limit // 2:]
+
+        return {'UnprocessedItems': unprocessed}
+
+    def scan(self, TableName: str, Segment: int = 0, TotalSegments: int = 1, Limit: int = 100, **kwargs) -> Dict:
+        self.__count('scan')
+        items = sorted(
+            (key, item) for key, item in self.tables[TableName].items()
+            if zlib.crc32(repr(key).encode()) % TotalSegments == Segment
+        )
+        return self.__page(items, Limit, **kwargs)
+
+    def query(self, TableName: str, KeyConditionExpression: str, Limit: int = 100, **kwargs) -> Dict:
+        self.__count('query')
+        items = sorted(
+            (key, item) for key, item in self.tables[TableName].items()
+            if self.__matches(item, KeyConditionExpression, kwargs)
+        )
+        return self.__page(items, Limit, **kwargs)
+
+    def __page(self, items: List[tuple], limit: int, **kwargs) -> Dict:
+        start = kwargs.get('ExclusiveStartKey')
+        if start:
+            start = tuple(value for value in start.values())
+            items = [(key, item) for key, item in items if key > tuple(str(v) for v in start)]
+
+        page, rest = items[:limit], items[limit:]
+        result = [
+            self.__project(item, kwargs.get('ProjectionExpression'), kwargs.get('ExpressionAttributeNames'))
+            for _, item in page
+            if 'FilterExpression' not in kwargs or self.__matches(item, kwargs['FilterExpression'], kwargs)
+        ]
+
+        response = {'Items': result, 'Count': len(result)}
+        if rest and page:
+            last = page[-1][0]
+            response['LastEvaluatedKey'] = {f'k{i}': value for i, value in enumerate(last)}
+
+        return response
+
+    @staticmethod
+    def __matches(item: Dict[str, Any], expression: str, kwargs: Dict[str, Any]) -> bool:
+        names = kwargs.get('ExpressionAttributeNames') or {}
+        values = kwargs.get('ExpressionAttributeValues') or {}
+
+        for condition in expression.split(' AND '):
+            name, op, value = condition.split()
+            attribute = item.get(names.get(name, name))
+            if attribute is None:
+                return False
+            (kind, left), = attribute.items()
+            (_, right), = values[value].items()
+            if kind == 'N':
+                left, right = float(left), float(right)
+            if not OPERATORS[op](left, right):
+                return False
+
+        return True
+
+    @staticmethod
+    def __project(item: Dict[str, Any], projection: Optional[str], names: Optional[Dict[str, str]]) -> Dict:
+        if not projection:
+            return item
+
+        names = names or {}
+        fields = [names.get(field.strip(), field.strip()) for field in projection.split(',')]
+
+        return {key: value for key, value in item.items() if key in fields}
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from b_aws_websocket_api.runtime.ws_jwt import DIGEST_INFO_PREFIXES, base64url_encode
+
+SMALL_PRIMES = [p for p in range(3, 1000, 2) if all(p % d for d in range(3, int(p ** 0.5) + 1, 2))]
+
+
+def is_probable_prime(n: int, rng: random.Random, rounds: int = 24) -> bool:
+    if any(n % p == 0 for p in SMALL_PRIMES):
+        return n in SMALL_PRIMES
+
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+
+    for _ in range(rounds):
+        x = pow(rng.randrange(2, n - 1), d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+
+    return True
+
+
+def generate_rsa_key(bits: int, rng: random.Random, e: int = 65537) -> Tuple[int, int, int]:
+    """
+    Generates an RSA key pair for tests (not for production use).
+
+    :return: Modulus, public exponent and private exponent.
+    """
+    while True:
+        primes = []
+        while len(primes) < 2:
+            candidate = rng.getrandbits(bits // 2) | (1 << (bits // 2 - 1)) | (1 << (bits // 2 - 2)) | 1
+            if is_probable_prime(candidate, rng):
+                primes.append(candidate)
+
+        p, q = primes
+        phi = (p - 1) * (q - 1)
+        if p != q and phi % e and (p * q).bit_length() == bits:
+            return p * q, e, pow(e, -1, phi)
+
+
+class IdentityProviderStandIn:
+    """
+    Local identity provider issuing RS256 tokens and serving its key set over HTTP from a background thread.
+    Counts key set fetches.
+    """
+
+    def __init__(self, issuer: str = 'https://issuer.example.com', bits: int = 2048, seed: int = 0) -> None:
+        """
+        Constructor.
+
+        :param issuer: Issuer (iss claim) of tokens.
+        :param bits: RSA key size.
+        :param seed: Seed of key generation.
+        """
+        self.issuer = issuer
+        self.bits = bits
+        self.rng = random.Random(seed)
+        self.keys: Dict[str, Tuple[int, int, int]] = {}
+        self.fetches = 0
+        self.lock = threading.Lock()
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.rotate()
+
+    @property
+    def jwks_url(self) -> str:
+        return f'http://127.0.0.1:{self.server.server_port}/.well-known/jwks.json'
+
+    @property
+    def jwks(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {'keys': [
+            {'kty': 'RSA', 'use': 'sig', 'alg': 'RS256', 'kid': kid,
+             'n': base64url_encode(n.to_bytes((n.bit_length() + 7) // 8, 'big')),
+             'e': base64url_encode(e.to_bytes(3, 'big'))}
+            for kid, (n, e, _) in self.keys.items()
+        ]}
+
+    def rotate(self) -> str:
+        kid = f'key{len(self.keys)}'
+        self.keys[kid] = generate_rsa_key(self.bits, self.rng)
+        return kid
+
+    def issue(self, claims: Optional[Dict[str, Any]] = None, kid: Optional[str] = None, ttl: int = 3600) -> str:
+        """
+        Issues a signed token.
+
+        :param claims: Claims overriding the defaults (iss, sub, aud, iat and exp).
+        :param kid: Signing key id. The latest key if not given.
+        :param ttl: Lifetime of the token in seconds.
+
+        :return: Token.
+        """
+        kid = kid or list(self.keys)[-1]
+        n, _, d = self.keys[kid]
+        now = int(time.time())
+
+        payload = dict(iss=self.issuer, sub='user', aud='api', iat=now, exp=now + ttl)
+        payload.update(claims or {})
+
+        header = base64url_encode(json.dumps(dict(alg='RS256', typ='JWT', kid=kid)).encode())
+        body = base64url_encode(json.dumps(payload).encode())
+        message = f'{header}.{body}'.encode()
+
+        size = (n.bit_length() + 7) // 8
+        digest_info = DIGEST_INFO_PREFIXES['sha256'] + hashlib.sha256(message).digest()
+        encoded = b'\x00\x01' + b'\xff' * (size - len(digest_info) - 3) + b'\x00' + digest_info
+        signature = pow(int.from_bytes(encoded, 'big'), d, n).to_bytes(size, 'big')
+
+        return f'{header}.{body}.{base64url_encode(signature)}'
+
+    def __enter__(self) -> 'IdentityProviderStandIn':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                with stand_in.lock:
+                    stand_in.fetches += 1
+                    body = json.dumps(stand_in.jwks).encode()
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
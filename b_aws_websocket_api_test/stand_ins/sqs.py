@@ -0,0 +1,47 @@
+import queue
+import uuid
+from typing import Any, Dict, List, Optional
+
+
+class SqsStandIn:
+    """
+    In-memory stand-in of the low-level SQS client. Every queue url maps to an in-process queue.
+    """
+
+    def __init__(self) -> None:
+        self.queues: Dict[str, 'queue.Queue'] = {}
+        self.sent = 0
+        self.max_batch_bytes = 256 * 1024
+
+    def queue(self, queue_url: str) -> 'queue.Queue':
+        return self.queues.setdefault(queue_url, queue.Queue())
+
+    def send_message(self, QueueUrl: str, MessageBody: str, **kwargs) -> Dict[str, Any]:
+        message_id = str(uuid.uuid4())
+        self.queue(QueueUrl).put(dict(messageId=message_id, body=MessageBody, attributes=kwargs))
+        self.sent += 1
+        return dict(MessageId=message_id)
+
+    def send_message_batch(self, QueueUrl: str, Entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        assert len(Entries) <= 10
+        if sum(len(entry['MessageBody'].encode('utf-8')) for entry in Entries) > self.max_batch_bytes:
+            raise ValueError(f'BatchRequestTooLong: Batch requests cannot be longer than {self.max_batch_bytes} bytes.')
+        for entry in Entries:
+            self.send_message(QueueUrl, entry['MessageBody'])
+        return dict(Successful=[dict(Id=entry['Id']) for entry in Entries], Failed=[])
+
+    def receive_event(self, queue_url: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Receives a single message wrapped as a Lambda SQS event.
+
+        :param queue_url: Queue url.
+        :param timeout: Seconds to wait for a message.
+
+        :return: Lambda event or None if the queue is empty.
+        """
+        try:
+            record = self.queue(queue_url).get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+        return dict(Records=[dict(record, eventSource='aws:sqs')])
@@ -0,0 +1,68 @@
+from typing import Any, Dict
+
+HANDLER = '''
+import json
+
+def handler(event, context):
+    context_ = event['requestContext']
+    if context_['eventType'] != 'MESSAGE':
+        return {'statusCode': 200}
+    body = json.loads(event['body'])
+    return {'statusCode': 200, 'body': json.dumps({'route': context_['routeKey'], 'echo': body})}
+'''
+
+
+def echo_template(route_keys=('test',)) -> Dict[str, Any]:
+    """
+    Synthesized-like template of a websocket API with one inline python function
+    behind $connect and two-way routes echoing messages back.
+
+    :param route_keys: Two-way message routes.
+
+    :return: CloudFormation template.
+    """
+    api = {'Ref': 'Api'}
+    target = {'Fn::Join': ['', ['integrations/', {'Ref': 'Integration'}]]}
+
+    resources: Dict[str, Any] = {
+        'Api': {
+            'Type': 'AWS::ApiGatewayV2::Api',
+            'Properties': {
+                'Name': 'TestApi',
+                'ProtocolType': 'WEBSOCKET',
+                'RouteSelectionExpression': '$request.body.action',
+            },
+        },
+        'Function': {
+            'Type': 'AWS::Lambda::Function',
+            'Properties': {
+                'Code': {'ZipFile': HANDLER},
+                'Handler': 'index.handler',
+                'Runtime': 'python3.8',
+            },
+        },
+        'Integration': {
+            'Type': 'AWS::ApiGatewayV2::Integration',
+            'Properties': {
+                'ApiId': api,
+                'IntegrationType': 'AWS_PROXY',
+                'IntegrationUri': {'Fn::Join': ['', ['arn:', {'Fn::GetAtt': ['Function', 'Arn']}]]},
+            },
+        },
+        'ConnectRoute': {
+            'Type': 'AWS::ApiGatewayV2::Route',
+            'Properties': {'ApiId': api, 'RouteKey': '$connect', 'Target': target},
+        },
+    }
+
+    for index, route_key in enumerate(route_keys):
+        resources[f'Route{index}'] = {
+            'Type': 'AWS::ApiGatewayV2::Route',
+            'Properties': {'ApiId': api, 'RouteKey': route_key, 'Target': target},
+        }
+        resources[f'Route{index}Response'] = {
+            'Type': 'AWS::ApiGatewayV2::RouteResponse',
+            'Properties': {'ApiId': api, 'RouteId': {'Ref': f'Route{index}'}, 'RouteResponseKey': '$default'},
+        }
+
+    return {'Resources': resources}
@@ -0,0 +1,38 @@
+import asyncio
+
+from b_aws_websocket_api.emulator.ws_emulator import WsEmulator
+from b_aws_websocket_api.emulator.ws_template import WsTemplate
+from b_aws_websocket_api_test.benchmarks.bench_load import run_load_async
+from b_aws_websocket_api_test.stand_ins.templates import echo_template
+
+
+def test_bench_load() -> None:
+    """
+    Runs a small load test against a local emulator and checks the measurements.
+
+    :return: No return.
+    """
+    async def run() -> dict:
+        async with WsEmulator(WsTemplate(echo_template(('test', 'ping')))) as emulator:
+            return await run_load_async(
+                emulator.url,
+                connections=50,
+                ramp_rate=500,
+                messages=4,
+                mix={'test': 3, 'ping': 1, 'missing': 1},
+                timeout=5,
+            )
+
+    results = asyncio.run(run())['results']
+
+    assert results['connected'] == 50
+    assert results['connect_errors'] == 0
+    assert results['sent'] == 200
+    assert results['received'] == 200
+    assert results['timeouts'] == 0
+    # Messages to routes that do not exist are answered with a Forbidden frame.
+    assert results['errors'] > 0
+    assert results['round_trip']['count'] == 200 - results['errors']
+    assert set(results['routes']) == {'test', 'ping'}
+    assert 0 < results['round_trip']['p50_ms'] <= results['round_trip']['p99_ms']
+    assert results['messages_per_second'] > 0
@@ -0,0 +1,23 @@
+import logging
+
+from b_aws_websocket_api_test.benchmarks.bench_import import run_import
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+FORBIDDEN_MODULES = ['aws_cdk', 'jsii', 'constructs', 'b_stage_deployment']
+
+
+def test_runtime_import_budget() -> None:
+    """
+    Imports the runtime subpackage in a fresh interpreter and checks that it stays CDK-free. Time and memory
+    budgets depend on the machine, hence they are checked by the bench_import benchmark only.
+
+    :return: No return.
+    """
+    result = run_import()
+
+    logger.info(f'Runtime import took {result["seconds"]:.4f}s and {result["memory_kb"]}KB.')
+
+    imported = {name.split('.')[0] for name in result['modules']}
+    assert not imported.intersection(FORBIDDEN_MODULES)
@@ -0,0 +1,97 @@
+import gzip
+import json
+import random
+
+from aws_cdk import App, Stack
+
+from b_aws_websocket_api.access_log.ws_access_log_analyzer import WsAccessLogAnalyzer
+from b_aws_websocket_api.access_log.ws_access_log_format import EXTENDED_ACCESS_LOG_FIELDS
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_stage import WsStage
+
+
+def test_ws_access_log_format() -> None:
+    """
+    Creates default access log settings with the extended format.
+
+    :return: No return.
+    """
+    app = App()
+    stack = Stack(app, 'TestStack')
+    api = WsApi(stack, 'Api', name='Api', route_selection_expression='$request.body.action')
+    WsStage(stack, 'Stage', ws_api=api, stage_name='prod', create_default_access_log_settings=True,
+            extended_access_log=True)
+
+    resources = app.synth().get_stack_by_name('TestStack').template['Resources']
+    log_format = resources['Stage']['Properties']['AccessLogSettings']['Format']
+
+    for variable in ['integrationLatency', 'responseLatency', 'error.messageString', 'messageId', 'responseLength']:
+        assert f'$context.{variable}' in log_format
+
+    # Substituted values keep the format valid JSON.
+    record = json.loads(log_format.replace('$context.error.messageString', '"-"').replace('$context.', ''))
+    assert list(record) == list(EXTENDED_ACCESS_LOG_FIELDS)
+
+
+def test_ws_access_log_analyzer(tmp_path) -> None:
+    """
+    Streams gzip exports and plain files, and reports per-route latencies, error rates and top talkers.
+
+    :return: No return.
+    """
+    choice = random.Random(7)
+    latencies = {'sendMessage': [], 'upload': []}
+
+    export = tmp_path / 'exports' / 'stream'
+    export.mkdir(parents=True)
+
+    with gzip.open(export / '000000.gz', 'wt') as file:
+        for i in range(20000):
+            route_key = 'sendMessage' if i % 4 else 'upload'
+            latency = choice.uniform(5, 50) if route_key == 'sendMessage' else choice.uniform(100, 400)
+            latencies[route_key].append(latency)
+            failed = route_key == 'upload' and i % 40 == 0
+
+            record = dict(
+                routeKey=route_key,
+                status='500' if failed else '200',
+                connectionId='noisy' if i % 2 else f'conn{i}',
+                integrationLatency=str(round(latency, 3)),
+                responseLatency=str(round(latency + 2, 3)),
+                responseLength='100',
+                error='Internal server error' if failed else '-',
+            )
+            file.write(f'2026-10-18T12:00:00.000Z {json.dumps(record)}\n')
+
+        file.write('not a record\n')
+
+    (tmp_path / 'default.log').write_text(
+        '{"requestId":"a", "routeKey":"$disconnect", "status":"-","connectionId":"noisy"}\n'
+    )
+
+    report = WsAccessLogAnalyzer(top_talkers=100).add_files([str(tmp_path)]).report(top=3)
+
+    assert report['records'] == 20001 and report['malformed'] == 1
+    assert list(report['routes']) == ['sendMessage', 'upload', '$disconnect']
+
+    for route_key, values in latencies.items():
+        histogram = report['routes'][route_key]['integration_latency']
+        exact = sorted(values)[int(len(values) * 0.99) - 1]
+        assert histogram['count'] == len(values)
+        assert exact <= histogram['p99_ms'] <= exact * 1.06
+        assert sum(histogram['buckets'].values()) == len(values)
+
+    upload = report['routes']['upload']
+    assert upload['errors'] == 500 and upload['error_rate'] == 0.1
+    assert upload['error_messages'] == {'Internal server error': 500}
+    assert report['routes']['sendMessage']['response_bytes'] == 1500000
+    assert report['routes']['$disconnect']['integration_latency']['count'] == 0
+
+    assert report['top_talkers'][0]['connectionId'] == 'noisy'
+    assert report['top_talkers'][0]['messages'] >= 10001 - 20001 // 100
+
+    # Distinct error messages, e.g. with request ids in them, are tracked with a bounded number of counters.
+    analyzer = WsAccessLogAnalyzer()
+    for i in range(10000):
+        analyzer.add_record(dict(routeKey='upload', status='500', error=f'Request {i} failed.'))
+    assert len(analyzer.report(top=1000)['routes']['upload']['error_messages']) <= 100
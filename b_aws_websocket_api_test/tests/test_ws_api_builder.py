@@ -0,0 +1,152 @@
+from collections import Counter
+
+import pytest
+from aws_cdk import App, Stack
+from aws_cdk.aws_lambda import Code, Function, Runtime
+from constructs import Construct
+
+from b_aws_websocket_api.ws_api_builder import WsApiBuilder, WsFunctionDefinition, WsRouteDefinition
+
+
+def test_ws_api_builder() -> None:
+    """
+    Builds an API from a route table and checks that identical functions and integrations are shared.
+
+    :return: No return.
+    """
+    app = App()
+    stack = Stack(app, 'TestStack', env={'region': 'eu-central-1', 'account': '123456789012'})
+    code = Code.from_inline('def handler(event, context): pass')
+
+    chat = WsFunctionDefinition(code=code, handler='index.chat')
+    # Equal settings and the same code, hence deployed as the same function.
+    chat_copy = WsFunctionDefinition(code=code, handler='index.chat')
+    presence = WsFunctionDefinition(code=code, handler='index.presence', memory_size=256)
+
+    builder = WsApiBuilder(
+        scope=stack,
+        id='Test',
+        routes={
+            '$connect': WsRouteDefinition(presence, two_way=False),
+            '$disconnect': WsRouteDefinition(presence, two_way=False),
+            'sendMessage': WsRouteDefinition(chat, throttling_burst_limit=10, throttling_rate_limit=5),
+            'editMessage': WsRouteDefinition(chat_copy),
+            'typing': WsRouteDefinition(presence, two_way=False),
+        },
+    )
+
+    resources = app.synth().get_stack_by_name('TestStack').template['Resources']
+    types = Counter(resource['Type'] for resource in resources.values())
+
+    assert sorted(builder.functions) == ['IndexChat', 'IndexPresence']
+    assert types['AWS::Lambda::Function'] == 2
+    assert types['AWS::ApiGatewayV2::Integration'] == 2
+    assert types['AWS::ApiGatewayV2::Route'] == 5
+    assert types['AWS::ApiGatewayV2::RouteResponse'] == 2
+    assert types['AWS::ApiGatewayV2::Deployment'] == 1
+
+    stage, = [resource for resource in resources.values() if resource['Type'] == 'AWS::ApiGatewayV2::Stage']
+    assert stage['Properties']['RouteSettings'] == {
+        'sendMessage': {'ThrottlingBurstLimit': 10, 'ThrottlingRateLimit': 5}
+    }
+
+    deployment, = [resource for resource in resources.values() if resource['Type'] == 'AWS::ApiGatewayV2::Deployment']
+    assert len([item for item in deployment['DependsOn'] if item.startswith('Test') and item.endswith('Route')]) == 5
+
+
+def test_ws_api_builder_compact() -> None:
+    """
+    Builds the same route table hand-wired per route, in standard and in compact mode, and compares
+    the resource counts of the synthesized templates with the builder reports.
+
+    :return: No return.
+    """
+    counts = {}
+    reports = {}
+
+    for layout in ('per_route', 'standard', 'compact'):
+        app = App()
+        stack = Stack(app, 'TestStack', env={'region': 'eu-central-1', 'account': '123456789012'})
+        code = Code.from_inline('def handler(event, context): pass')
+
+        chat = WsFunctionDefinition(code=code, handler='index.chat', provisioned_concurrent_executions=1)
+        events = WsFunctionDefinition(code=code, handler='index.events')
+
+        routes = {f'chat{index}': WsRouteDefinition(chat) for index in range(5)}
+        routes.update({f'event{index}': WsRouteDefinition(events, two_way=False) for index in range(5)})
+
+        if layout == 'per_route':
+            routes = WsApiBuilder.per_route_layout(routes)
+
+        builder = WsApiBuilder(scope=stack, id='Test', routes=routes, compact=layout == 'compact')
+        resources = app.synth().get_stack_by_name('TestStack').template['Resources']
+        counts[layout] = Counter(resource['Type'] for resource in resources.values())
+        reports[layout] = builder.resource_report
+
+        assert reports[layout] == dict(counts[layout], total=len(resources))
+
+        permissions = [item for item in resources.values() if item['Type'] == 'AWS::Lambda::Permission']
+        assert len(permissions) == (10 if layout == 'per_route' else 2)
+        assert all(('SourceArn' in item['Properties']) == (layout == 'compact') for item in permissions)
+
+    assert counts['per_route']['AWS::Lambda::Function'] == 10 and counts['standard']['AWS::Lambda::Function'] == 2
+    assert counts['per_route']['AWS::Lambda::Alias'] == 5 and counts['standard']['AWS::Lambda::Alias'] == 1
+    assert counts['standard']['AWS::ApiGatewayV2::IntegrationResponse'] == 2
+    assert counts['compact']['AWS::ApiGatewayV2::IntegrationResponse'] == 1
+    assert counts['compact']['AWS::ApiGatewayV2::RouteResponse'] == 5
+    assert reports['per_route']['total'] > reports['standard']['total'] > reports['compact']['total']
+
+
+def test_ws_api_builder_route_id_collision() -> None:
+    """
+    Route keys that map to the same construct id are rejected.
+
+    :return: No return.
+    """
+    stack = Stack(App(), 'TestStack')
+    definition = WsFunctionDefinition(code=Code.from_inline('pass'), handler='index.handler')
+
+    with pytest.raises(ValueError):
+        WsApiBuilder(
+            scope=stack,
+            id='Test',
+            routes={'send-message': WsRouteDefinition(definition), 'sendmessage': WsRouteDefinition(definition)},
+        )
+
+
+def test_ws_api_builder_unique_names() -> None:
+    """
+    Functions of the caller with the same construct id, and long function names sharing a prefix, get distinct names.
+
+    :return: No return.
+    """
+    app = App()
+    stack = Stack(app, 'TestStack', env={'region': 'eu-central-1', 'account': '123456789012'})
+    code = Code.from_inline('def handler(event, context): pass')
+
+    existing = [
+        Function(Construct(stack, scope), 'Handler', code=code, handler='index.handler', runtime=Runtime.PYTHON_3_11)
+        for scope in ('Chat', 'Presence')
+    ]
+    prefix = 'Notification' * 5
+
+    builder = WsApiBuilder(
+        scope=stack,
+        id='Test',
+        routes={
+            'chat': WsRouteDefinition(existing[0]),
+            'presence': WsRouteDefinition(existing[1]),
+            'email': WsRouteDefinition(WsFunctionDefinition(code=code, handler='index.email', name=f'{prefix}Email')),
+            'sms': WsRouteDefinition(WsFunctionDefinition(code=code, handler='index.sms', name=f'{prefix}Sms')),
+        },
+    )
+
+    resources = app.synth().get_stack_by_name('TestStack').template['Resources']
+
+    assert sorted(builder.integrations) == sorted(['Handler', 'Handler2', f'{prefix}Email', f'{prefix}Sms'])
+
+    names = [
+        resource['Properties']['FunctionName'] for resource in resources.values()
+        if resource['Type'] == 'AWS::Lambda::Function' and 'FunctionName' in resource['Properties']
+    ]
+    assert len(names) == 2 and len(set(names)) == 2 and all(len(name) <= 64 for name in names)
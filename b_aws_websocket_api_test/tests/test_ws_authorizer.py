@@ -0,0 +1,148 @@
+import json
+import time
+
+import pytest
+from aws_cdk import App, Stack
+
+from b_aws_websocket_api.runtime.ws_authorizer import WsDecisionCache, WsTokenAuthorizer
+from b_aws_websocket_api.runtime.ws_jwt import WsJwks, WsJwtError, WsJwtVerifier, base64url_encode
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_authorizer import WsAuthorizer
+from b_aws_websocket_api.ws_route import WsRoute
+from b_aws_websocket_api_test.stand_ins.identity_provider import IdentityProviderStandIn
+
+METHOD_ARN = 'arn:aws:execute-api:eu-central-1:123456789012:api/prod/$connect'
+
+
+def connect_event(token: str) -> dict:
+    return dict(methodArn=METHOD_ARN, queryStringParameters={'token': token}, requestContext={})
+
+
+def test_ws_jwt_verifier() -> None:
+    """
+    Verifies RS256 tokens against a key set and rejects tampered, expired and foreign tokens.
+
+    :return: No return.
+    """
+    with IdentityProviderStandIn(bits=1024) as idp:
+        jwks = WsJwks(idp.jwks_url, min_refresh_interval=0.5)
+        verifier = WsJwtVerifier(issuer=idp.issuer, audience='api', jwks=jwks)
+
+        assert verifier.verify(idp.issue({'sub': 'alice'}))['sub'] == 'alice'
+
+        header, claims, signature = idp.issue().split('.')
+        forged = base64url_encode(json.dumps(dict(sub='admin', exp=9999999999, aud='api', iss=idp.issuer)).encode())
+        unsigned = base64url_encode(b'{"alg": "none"}')
+
+        for token in [
+            f'{header}.{forged}.{signature}',
+            f'{unsigned}.{claims}.',
+            idp.issue(ttl=-60),
+            idp.issue({'aud': 'other'}),
+            idp.issue({'iss': 'https://evil.example.com'}),
+            'not a token',
+        ]:
+            with pytest.raises(WsJwtError):
+                verifier.verify(token)
+
+        with pytest.raises(WsJwtError, match='Token expired.'):
+            verifier.verify(idp.issue(ttl=-60))
+        with pytest.raises(WsJwtError, match='Malformed time claim'):
+            verifier.verify(idp.issue({'exp': 'tomorrow'}))
+        for audience in [{'name': 'api'}, [['api']], ['api', 1]]:
+            with pytest.raises(WsJwtError, match='Malformed audience claim.'):
+                verifier.verify(idp.issue({'aud': audience}))
+        assert verifier.verify(idp.issue({'aud': ['web', 'api']}))['aud'] == ['web', 'api']
+
+        # Rotated keys are fetched when a token refers to an unknown key id, at most once per refresh interval.
+        rotated = idp.issue(kid=idp.rotate())
+        with pytest.raises(WsJwtError):
+            verifier.verify(rotated)
+        assert idp.fetches == 1
+
+        time.sleep(0.5)
+        for _ in range(10):
+            verifier.verify(rotated)
+        assert idp.fetches == 2 and jwks.fetches == 2
+
+        hmac_verifier = WsJwtVerifier(secret=b'secret', algorithms=['HS256'])
+        with pytest.raises(WsJwtError):
+            hmac_verifier.verify(rotated)
+
+
+def test_ws_token_authorizer() -> None:
+    """
+    Authorizes a reconnect storm with a single key set fetch and a single verification per token.
+
+    :return: No return.
+    """
+    with IdentityProviderStandIn(bits=1024) as idp:
+        cache = WsDecisionCache(max_size=50)
+        authorizer = WsTokenAuthorizer(
+            WsJwtVerifier(issuer=idp.issuer, audience=['api'], jwks=WsJwks(idp.jwks_url)),
+            cache=cache,
+        )
+
+        tokens = [idp.issue({'sub': f'user{i}', 'groups': ['a'], 'tier': 'gold'}) for i in range(40)]
+
+        for _ in range(5):
+            for token in tokens:
+                response = authorizer(connect_event(token))
+                assert response['policyDocument']['Statement'][0]['Effect'] == 'Allow'
+                assert response['policyDocument']['Statement'][0]['Resource'] == METHOD_ARN
+
+        assert idp.fetches == 1
+        assert cache.misses == 40 and cache.hits == 160
+        assert response['principalId'] == 'user39'
+        assert response['context'] == {
+            'iss': idp.issuer, 'sub': 'user39', 'aud': 'api', 'iat': response['context']['iat'],
+            'exp': response['context']['exp'], 'tier': 'gold',
+        }
+
+        # Denials are cached as well, and the least recently used decisions are evicted.
+        denied = authorizer(connect_event(tokens[0][:-4] + 'AAAA'))
+        assert denied['policyDocument']['Statement'][0]['Effect'] == 'Deny' and 'context' not in denied
+        assert len(cache) == 41
+
+        for i in range(20):
+            authorizer(connect_event(idp.issue({'sub': f'other{i}'})))
+        assert len(cache) == 50 and cache.get(tokens[0]) is None
+
+        header = dict(methodArn=METHOD_ARN, headers={'Authorization': f'Bearer {tokens[1]}'})
+        assert authorizer(header)['principalId'] == 'user1'
+        assert authorizer(dict(methodArn=METHOD_ARN))['policyDocument']['Statement'][0]['Effect'] == 'Deny'
+
+
+def test_ws_authorizer() -> None:
+    """
+    Creates a REQUEST authorizer which only the API may invoke.
+
+    :return: No return.
+    """
+    app = App()
+    stack = Stack(app, 'TestStack', env={'region': 'eu-central-1', 'account': '123456789012'})
+    api = WsApi(stack, 'Api', name='Api', route_selection_expression='$request.body.action')
+
+    authorizer = WsAuthorizer(stack, 'Auth', ws_api=api, issuer='https://issuer.example.com/', audience=['api'])
+    WsRoute(stack, 'Connect', ws_api=api, route_key='$connect', authorization_type='CUSTOM',
+            authorizer_id=authorizer.authorizer_id)
+
+    resources = app.synth().get_stack_by_name('TestStack').template['Resources']
+
+    def properties(kind: str) -> list:
+        return [item['Properties'] for item in resources.values() if item['Type'] == kind]
+
+    cfn_authorizer, = properties('AWS::ApiGatewayV2::Authorizer')
+    assert cfn_authorizer['AuthorizerType'] == 'REQUEST'
+    assert cfn_authorizer['IdentitySource'] == ['route.request.querystring.token']
+
+    function, = properties('AWS::Lambda::Function')
+    assert function['Environment']['Variables']['WS_AUTHORIZER_JWKS_URL'] == (
+        'https://issuer.example.com/.well-known/jwks.json'
+    )
+
+    permission, = properties('AWS::Lambda::Permission')
+    assert '/authorizers/*' in json.dumps(permission['SourceArn'])
+
+    route, = properties('AWS::ApiGatewayV2::Route')
+    assert route['AuthorizationType'] == 'CUSTOM' and 'Ref' in route['AuthorizerId']
@@ -0,0 +1,117 @@
+import base64
+import json
+
+from aws_cdk import App, Stack
+from aws_cdk.aws_kinesis import Stream
+from aws_cdk.aws_lambda import Code
+from aws_cdk.aws_sqs import Queue
+
+from b_aws_websocket_api.runtime.ws_batch import WsBatchProcessor
+from b_aws_websocket_api.ws_batch_consumer import WsBatchConsumer
+
+
+def envelope(connection_id: str, route_key: str, body: str) -> str:
+    return json.dumps(dict(connectionId=connection_id, routeKey=route_key, requestId='r', body=body))
+
+
+def test_ws_batch_processor() -> None:
+    """
+    Groups frames of a batch by connection and route and reports failed frames only.
+
+    :return: No return.
+    """
+    processor = WsBatchProcessor()
+    seen = []
+
+    @processor.route('telemetry')
+    def telemetry(group, context):
+        seen.append((group.connection_id, [frame.json()['n'] for frame in group]))
+        return [frame for frame in group if frame.json()['n'] < 0]
+
+    @processor.route('crash')
+    def crash(group, context):
+        raise RuntimeError('Boom.')
+
+    event = dict(Records=[
+        dict(messageId='1', body=envelope('a', 'telemetry', '{"n": 1}')),
+        dict(messageId='2', body=envelope('b', 'telemetry', '{"n": 2}')),
+        dict(messageId='3', body=envelope('a', 'telemetry', '{"n": 3}')),
+        dict(messageId='4', body=envelope('a', 'telemetry', '{"n": -4}')),
+        dict(messageId='5', body=envelope('a', 'crash', '{}')),
+        dict(messageId='6', body=envelope('a', 'unknown', '{}')),
+        dict(messageId='7', body='not an envelope'),
+        # Event bus events routed to a queue.
+        dict(messageId='8', body=json.dumps({'detail': json.loads(envelope('c', 'telemetry', '{"n": 8}'))})),
+        # Records without an identifier are dropped rather than failing the whole batch.
+        dict(body=envelope('a', 'telemetry', '{"n": 9}')),
+        dict(kinesis=dict(data='')),
+    ])
+
+    response = processor(event)
+
+    assert seen == [('a', [1, 3, -4]), ('b', [2]), ('c', [8])]
+    assert sorted(item['itemIdentifier'] for item in response['batchItemFailures']) == ['4', '5', '6', '7']
+
+    # Later frames of a connection with a failed frame are retried too, also of other routes.
+    @processor.route('echo')
+    def echo(group, context):
+        return []
+
+    ordered_event = dict(Records=[
+        dict(messageId='1', body=envelope('a', 'echo', '{}')),
+        dict(messageId='2', body=envelope('a', 'telemetry', '{"n": 2}')),
+        dict(messageId='3', body=envelope('a', 'telemetry', '{"n": -3}')),
+        dict(messageId='4', body=envelope('b', 'telemetry', '{"n": 4}')),
+        dict(messageId='5', body=envelope('a', 'echo', '{}')),
+        dict(messageId='6', body=envelope('a', 'telemetry', '{"n": 6}')),
+        dict(messageId='7', body='not an envelope', attributes={'MessageGroupId': 'b'}),
+        dict(messageId='8', body=envelope('b', 'echo', '{}')),
+    ])
+    assert processor(ordered_event)['batchItemFailures'] == [dict(itemIdentifier=str(i)) for i in (3, 5, 6, 7, 8)]
+
+    data = base64.b64encode(envelope('a', 'telemetry', '{"n": -1}').encode()).decode()
+    kinesis_event = dict(Records=[dict(kinesis=dict(sequenceNumber='100', data=data))])
+    assert processor(kinesis_event) == {'batchItemFailures': [{'itemIdentifier': '100'}]}
+
+
+def test_ws_batch_consumer() -> None:
+    """
+    Attaches batch event sources with partial batch failure reporting.
+
+    :return: No return.
+    """
+    app = App()
+    stack = Stack(app, 'TestStack', env={'region': 'eu-central-1', 'account': '123456789012'})
+    code = Code.from_inline('def handler(event, context): pass')
+
+    WsBatchConsumer(scope=stack, id='QueueConsumer', code=code, handler='index.handler', queue=Queue(stack, 'Queue'))
+    WsBatchConsumer(
+        scope=stack,
+        id='StreamConsumer',
+        code=code,
+        handler='index.handler',
+        stream=Stream(stack, 'Stream'),
+        parallelization_factor=4,
+        provisioned_concurrent_executions=2,
+    )
+
+    resources = app.synth().get_stack_by_name('TestStack').template['Resources']
+    mappings = [
+        resource['Properties'] for resource in resources.values()
+        if resource['Type'] == 'AWS::Lambda::EventSourceMapping'
+    ]
+
+    assert len(mappings) == 2
+    for mapping in mappings:
+        assert mapping['BatchSize'] == 500
+        assert mapping['MaximumBatchingWindowInSeconds'] == 1
+        assert mapping['FunctionResponseTypes'] == ['ReportBatchItemFailures']
+
+    stream_mapping, = [mapping for mapping in mappings if 'ParallelizationFactor' in mapping]
+    assert stream_mapping['ParallelizationFactor'] == 4
+    assert stream_mapping['BisectBatchOnFunctionError'] is True
+    # Provisioned concurrency lives on the alias, hence the alias consumes the stream.
+    assert 'StreamConsumerFunctionAlias' in json.dumps(stream_mapping['FunctionName'])
+
+    # Consumers are not invoked by the API.
+    assert not [resource for resource in resources.values() if resource['Type'] == 'AWS::Lambda::Permission']
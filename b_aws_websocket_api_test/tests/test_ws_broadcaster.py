@@ -0,0 +1,56 @@
+import json
+
+from b_aws_websocket_api.runtime.ws_broadcaster import WsBroadcaster
+from b_aws_websocket_api.runtime.ws_payload import WsPayload, WsField
+from b_aws_websocket_api.runtime.ws_sigv4 import WsSigV4Signer
+from b_aws_websocket_api_test.stand_ins.connections import ConnectionsStandIn
+
+
+def test_ws_broadcaster() -> None:
+    """
+    Broadcasts a message through a local stand-in endpoint and checks statistics.
+
+    :return: No return.
+    """
+    with ConnectionsStandIn() as stand_in:
+        broadcaster = WsBroadcaster(
+            connections_url=stand_in.connections_url,
+            signer=WsSigV4Signer('eu-central-1', 'AKIDEXAMPLE', 'secret'),
+            max_in_flight=8,
+            backoff_base=0.001,
+        )
+
+        ids = [f'live{i}=' for i in range(200)] + ['gone1', 'gone2'] + [f'slow{i}' for i in range(5)]
+        stats = broadcaster.broadcast('{"message": "hello"}', (i for i in ids))
+
+    assert stats.sent == 205
+    assert stats.gone == 2
+    assert sorted(stats.gone_connection_ids) == ['gone1', 'gone2']
+    assert stats.throttled == 5
+    assert stats.failed == 0
+    assert 0 < stats.p50 <= stats.p99
+
+    assert len(stand_in.received) == 205
+    assert all(item['body'] == b'{"message": "hello"}' for item in stand_in.received)
+    assert all(item['authorization'].startswith('AWS4-HMAC-SHA256') for item in stand_in.received)
+    assert {item['connection_id'] for item in stand_in.received} >= {'live0='}
+
+
+def test_ws_broadcaster_templated_payload() -> None:
+    """
+    Broadcasts a pre-encoded payload with a per-recipient field and checks that only the field differs.
+
+    :return: No return.
+    """
+    payload = WsPayload(
+        dict(message='hello', seq=WsField('seq')),
+        variables=lambda connection_id, sequence: dict(seq=sequence)
+    )
+
+    with ConnectionsStandIn() as stand_in:
+        broadcaster = WsBroadcaster(connections_url=stand_in.connections_url, max_in_flight=4)
+        stats = broadcaster.broadcast(payload, [f'conn{i}' for i in range(50)])
+
+    assert stats.sent == 50
+    assert sorted(json.loads(item['body'])['seq'] for item in stand_in.received) == list(range(50))
+    assert all(json.loads(item['body'])['message'] == 'hello' for item in stand_in.received)
@@ -0,0 +1,104 @@
+import json
+import os
+import random
+
+import pytest
+
+from b_aws_websocket_api.runtime.ws_chunk_store_client import WsChunkStoreClient
+from b_aws_websocket_api.runtime.ws_chunking import (
+    MAX_FRAME_BYTES,
+    WsChunkError,
+    WsChunkSender,
+    WsReassembler,
+    split_message,
+)
+from b_aws_websocket_api.runtime.ws_sigv4 import WsSigV4Signer
+from b_aws_websocket_api_test.stand_ins.connections import ConnectionsStandIn
+from b_aws_websocket_api_test.stand_ins.dynamodb import DynamoDbStandIn
+
+
+def test_ws_chunking_reassembly() -> None:
+    """
+    Reassembles shuffled and duplicated chunk frames and rejects corrupted ones.
+
+    :return: No return.
+    """
+    message = os.urandom(300 * 1024)
+    frames = list(split_message(message, fields={'action': 'upload'}))
+
+    assert len(frames) == 13
+    assert all(len(frame) <= MAX_FRAME_BYTES for frame in frames)
+    assert json.loads(frames[0])['action'] == 'upload'
+
+    shuffled = frames + frames[:3]
+    random.Random(0).shuffle(shuffled)
+
+    reassembler = WsReassembler()
+    results = [result for result in map(reassembler.feed, shuffled) if result is not None]
+
+    assert results == [message]
+    assert reassembler.pending == 0 and reassembler.buffered_bytes == 0
+
+    assert reassembler.feed('{"type": "other"}') == '{"type": "other"}'
+
+    corrupted = json.loads(frames[0])
+    corrupted['crc32'] += 1
+    with pytest.raises(WsChunkError):
+        reassembler.feed(corrupted)
+
+    # Incomplete messages beyond the memory bound are evicted, oldest first.
+    bounded = WsReassembler(max_message_bytes=200 * 1024, max_buffered_bytes=250 * 1024)
+    first, second = os.urandom(150 * 1024), os.urandom(150 * 1024)
+    bounded.feed(next(split_message(first)))
+    bounded.feed(next(split_message(second)))
+    assert bounded.pending == 1 and bounded.buffered_bytes == 150 * 1024
+
+    with pytest.raises(WsChunkError):
+        bounded.feed(next(split_message(message)))
+
+
+def test_ws_chunk_sender() -> None:
+    """
+    Sends a large message pipelined through a local stand-in endpoint and reassembles what arrived.
+
+    :return: No return.
+    """
+    message = os.urandom(1024 * 1024)
+
+    with ConnectionsStandIn() as stand_in:
+        sender = WsChunkSender(
+            connections_url=stand_in.connections_url,
+            signer=WsSigV4Signer('eu-central-1', 'AKIDEXAMPLE', 'secret'),
+            max_in_flight=4,
+            backoff_base=0.001,
+        )
+
+        stats = sender.send('live1=', message)
+        gone = sender.send('gone1', message)
+
+    assert stats.ok and stats.frames == 44 and stats.sent == 44
+    assert gone.gone and gone.sent == 0 and not gone.ok
+
+    reassembler = WsReassembler()
+    results = [reassembler.feed(item['body']) for item in stand_in.received]
+    assert [result for result in results if result is not None] == [message]
+
+
+def test_ws_chunk_store() -> None:
+    """
+    Reassembles an upload across invocations exactly once, with retried frames.
+
+    :return: No return.
+    """
+    store = WsChunkStoreClient(table_name='Chunks', client=DynamoDbStandIn({'Chunks': ('messageKey', 'seq')}))
+
+    message = os.urandom(100 * 1024)
+    frames = list(split_message(message))
+    frames = frames + frames[:2]
+    random.Random(1).shuffle(frames)
+
+    results = [store.add('conn=', frame) for frame in frames]
+    assert [result for result in results if result is not None] == [message]
+
+    # The same upload id of another connection is a separate upload.
+    assert store.add('other=', frames[0]) is None
@@ -0,0 +1,70 @@
+import json
+import time
+
+from b_aws_websocket_api.runtime.ws_coalescer import WsCoalescer, pack_batch, unpack_batch
+from b_aws_websocket_api.runtime.ws_sigv4 import WsSigV4Signer
+from b_aws_websocket_api_test.stand_ins.connections import ConnectionsStandIn
+
+
+def test_ws_coalescer() -> None:
+    """
+    Coalesces messages per connection into ordered batch frames within count and size limits.
+
+    :return: No return.
+    """
+    assert unpack_batch(pack_batch([b'{"a":1}', b'[2]'])) == [{'a': 1}, [2]]
+    assert unpack_batch(pack_batch([b'{"a":1}'])) == [{'a': 1}]
+
+    with ConnectionsStandIn() as stand_in:
+        coalescer = WsCoalescer(
+            connections_url=stand_in.connections_url,
+            signer=WsSigV4Signer('eu-central-1', 'AKIDEXAMPLE', 'secret'),
+            window=10.0,
+            max_messages=40,
+            max_bytes=4096,
+            backoff_base=0.001,
+        )
+
+        with coalescer:
+            for i in range(100):
+                for connection_id in ('live1=', 'live2=', 'gone1', 'slow1'):
+                    coalescer.send(connection_id, json.dumps({'seq': i}))
+            coalescer.send('large=', json.dumps({'data': 'x' * 5000}))
+
+        stats = coalescer.stats
+
+    assert stats.messages == 401
+    assert stats.sent == 301 and stats.gone == 100 and stats.failed == 0
+    assert stats.gone_connection_ids == ['gone1']
+    # 3 batches for every live connection, one request for the gone connection and a retried throttled one.
+    assert stats.batches == 11 and stats.requests == 12 and stats.throttled == 1
+
+    received = {}
+    for item in stand_in.received:
+        received.setdefault(item['connection_id'], []).extend(unpack_batch(item['body']))
+        assert len(item['body']) <= 4096 or item['connection_id'] == 'large='
+
+    for connection_id in ('live1=', 'live2=', 'slow1'):
+        assert received[connection_id] == [{'seq': i} for i in range(100)]
+
+
+def test_ws_coalescer_window() -> None:
+    """
+    Sends buffered messages once the window expired, without an explicit flush.
+
+    :return: No return.
+    """
+    with ConnectionsStandIn() as stand_in:
+        with WsCoalescer(stand_in.connections_url, window=0.05) as coalescer:
+            coalescer.send('live1=', '{"seq": 0}')
+            coalescer.send('live1=', '{"seq": 1}')
+
+            deadline = time.time() + 5
+            while not stand_in.received and time.time() < deadline:
+                time.sleep(0.01)
+
+            assert len(stand_in.received) == 1
+            assert unpack_batch(stand_in.received[0]['body']) == [{'seq': 0}, {'seq': 1}]
+
+    assert coalescer.stats.requests == 1
+    assert min(coalescer.stats.latencies) >= 0.05
@@ -0,0 +1,112 @@
+import base64
+import json
+import os
+import zlib
+
+import pytest
+
+from b_aws_websocket_api.runtime import ws_codec
+from b_aws_websocket_api.runtime.handlers import ws_connection_registry
+from b_aws_websocket_api.runtime.ws_broadcaster import WsBroadcaster
+from b_aws_websocket_api.runtime.ws_codec import CODECS, WsCodecError, WsCompressedCodec, WsJsonCodec
+from b_aws_websocket_api.runtime.ws_connection_registry_client import WsConnectionRegistryClient, CODECS_ENV
+from b_aws_websocket_api.runtime.ws_event import WsEvent
+from b_aws_websocket_api.runtime.ws_sigv4 import WsSigV4Signer
+from b_aws_websocket_api_test.stand_ins.connections import ConnectionsStandIn
+from b_aws_websocket_api_test.stand_ins.dynamodb import DynamoDbStandIn
+
+DOCUMENT = {'type': 'quote', 'symbols': ['A', 'B'] * 100, 'price': 12.5, 'volume': 1000, 'final': True}
+
+
+def test_ws_codecs() -> None:
+    """
+    Round-trips a document through every codec, detects codecs of received frames and guards against
+    decompression bombs.
+
+    :return: No return.
+    """
+    assert sorted(CODECS) == ['json', 'json+zlib', 'json+zstd', 'msgpack', 'msgpack+zlib', 'msgpack+zstd']
+
+    for name, codec in CODECS.items():
+        frame = codec.encode(DOCUMENT)
+        assert codec.decode(frame) == DOCUMENT
+        assert ws_codec.detect_codec(frame) is codec
+        assert ws_codec.decode(frame) == DOCUMENT
+
+        event = dict(body=base64.b64encode(frame).decode(), isBase64Encoded=True)
+        assert WsEvent(event).document() == DOCUMENT
+
+    assert len(CODECS['msgpack+zstd'].encode(DOCUMENT)) < len(CODECS['msgpack'].encode(DOCUMENT))
+    assert WsEvent(dict(body=json.dumps(DOCUMENT))).document() == DOCUMENT
+
+    bomb = zlib.compress(b'[' + b' ' * 1024 * 1024 + b']')
+    with pytest.raises(WsCodecError):
+        WsCompressedCodec(WsJsonCodec(), 'zlib', max_decoded_bytes=64 * 1024).decode(bomb)
+
+    with pytest.raises(WsCodecError):
+        ws_codec.get_codec('xml')
+
+    # Incomplete codecs fail when they are created rather than on the first frame.
+    class EncodeOnlyCodec(ws_codec.WsCodec):
+        name = 'xml'
+
+        def encode(self, document):
+            return b''
+
+    with pytest.raises(TypeError):
+        ws_codec.register_codec(EncodeOnlyCodec())
+
+
+def test_ws_codec_negotiation() -> None:
+    """
+    Negotiates codecs at $connect and broadcasts a document encoded per connection.
+
+    :return: No return.
+    """
+    assert ws_codec.negotiate(None).name == 'json'
+    assert ws_codec.negotiate('msgpack zstd, json').name == 'msgpack+zstd'
+    assert ws_codec.negotiate('msgpack+zstd,json', ['json']).name == 'json'
+    assert ws_codec.negotiate('xml') is None
+
+    dynamodb = DynamoDbStandIn({'Registry': ('pk', 'connectionId')})
+    ws_connection_registry._registry = WsConnectionRegistryClient(table_name='Registry', client=dynamodb)
+    os.environ[CODECS_ENV] = 'json,msgpack,msgpack+zstd'
+
+    try:
+        def connect(connection_id, **kwargs):
+            return ws_connection_registry.connect(dict(
+                requestContext=dict(connectionId=connection_id, eventType='CONNECT'),
+                **kwargs
+            ))
+
+        assert connect('plain=') == dict(statusCode=200)
+        assert connect('packed=', queryStringParameters={'codec': 'msgpack zstd'}) == dict(statusCode=200)
+        assert connect('protocol=', headers={'sec-websocket-protocol': 'msgpack+zlib, msgpack'}) == dict(
+            statusCode=200,
+            headers={'Sec-WebSocket-Protocol': 'msgpack'}
+        )
+        assert connect('rejected=', queryStringParameters={'codec': 'json+zlib'})['statusCode'] == 400
+    finally:
+        del os.environ[CODECS_ENV]
+
+    connections = list(ws_connection_registry._registry.connection_codecs(total_segments=2))
+    assert {item['connectionId']: item['codec'] for item in connections} == {
+        'plain=': 'json',
+        'packed=': 'msgpack+zstd',
+        'protocol=': 'msgpack',
+    }
+
+    with ConnectionsStandIn() as stand_in:
+        broadcaster = WsBroadcaster(
+            connections_url=stand_in.connections_url,
+            signer=WsSigV4Signer('eu-central-1', 'AKIDEXAMPLE', 'secret'),
+            backoff_base=0.001,
+        )
+        stats = broadcaster.broadcast_document(DOCUMENT, connections + ['gone1'])
+
+    assert stats.sent == 3 and stats.gone_connection_ids == ['gone1']
+
+    received = {item['connection_id']: item['body'] for item in stand_in.received}
+    assert received['plain='] == json.dumps(DOCUMENT, separators=(',', ':')).encode()
+    assert ws_codec.detect_codec(received['packed=']).name == 'msgpack+zstd'
+    assert all(ws_codec.decode(body) == DOCUMENT for body in received.values())
@@ -0,0 +1,108 @@
+import time
+
+from b_aws_websocket_api.runtime.handlers import ws_connection_registry
+from b_aws_websocket_api.runtime.ws_connection_cache import WsConnectionCache
+from b_aws_websocket_api.runtime.ws_connection_registry_client import WsConnectionRegistryClient, VERSION_ATTRIBUTE
+from b_aws_websocket_api.runtime.ws_subscription_index_client import WsSubscriptionIndexClient
+from b_aws_websocket_api_test.stand_ins.dynamodb import DynamoDbStandIn
+
+
+def test_ws_connection_cache() -> None:
+    """
+    Serves metadata of chatty connections from memory, revalidates it with version-only reads and
+    reloads it when another container changed subscriptions or the connection is gone.
+
+    :return: No return.
+    """
+    dynamodb = DynamoDbStandIn({'Registry': ('pk', 'connectionId'), 'Index': ('pk', 'connectionId')})
+    registry = WsConnectionRegistryClient(table_name='Registry', client=dynamodb)
+    index = WsSubscriptionIndexClient(table_name='Index', client=dynamodb)
+
+    for i in range(10):
+        registry.register(f'conn{i}', {'principalId': f'user{i}'})
+
+    cache = WsConnectionCache(registry, index, max_size=8, ttl=0.3)
+    other = WsConnectionCache(registry, index, ttl=0.3)
+
+    cache.subscribe('conn0', 'news')
+    calls = dict(dynamodb.calls)
+
+    for _ in range(100):
+        for i in range(5):
+            assert cache.get(f'conn{i}')['principalId'] == f'user{i}'
+
+    # Each connection is loaded once, every other frame is served without I/O.
+    assert cache.stats.misses == 5 and cache.stats.hits == 495
+    assert dynamodb.calls['get_item'] - calls.get('get_item', 0) == 5
+    assert cache.get('conn0')['topics'] == ['news']
+
+    # Subscription changes of this container update its entry in place.
+    cache.subscribe('conn1', 'sports')
+    assert cache.get('conn1')['topics'] == ['sports']
+    assert cache.stats.misses == 5
+
+    # Changes of another container are noticed by the version stamp once the TTL elapsed.
+    assert other.get('conn0')['topics'] == ['news']
+    other.unsubscribe('conn0', 'news')
+    assert cache.get('conn0')['topics'] == ['news']
+
+    time.sleep(0.3)
+    calls = dict(dynamodb.calls)
+
+    assert cache.get('conn0')['topics'] == []
+    assert cache.get('conn2')['principalId'] == 'user2'
+    assert cache.stats.stale == 1 and cache.stats.revalidations == 1
+    assert dynamodb.calls['get_item'] - calls['get_item'] == 3 and dynamodb.calls['query'] - calls['query'] == 1
+
+    # Gone connections are dropped, and the least recently used connections are evicted.
+    registry.unregister('conn3')
+    time.sleep(0.3)
+    assert cache.get('conn3') is None
+
+    for i in range(10):
+        cache.get(f'conn{i}')
+    assert len(cache) == 8 and cache.stats.evictions == 1
+    assert 0.9 < cache.stats.hit_rate < 1.0
+
+
+def test_ws_connection_cache_concurrent_changes() -> None:
+    """
+    Reloads instead of patching cached metadata when another container changed subscriptions since it was loaded.
+
+    :return: No return.
+    """
+    dynamodb = DynamoDbStandIn({'Registry': ('pk', 'connectionId'), 'Index': ('pk', 'connectionId')})
+    registry = WsConnectionRegistryClient(table_name='Registry', client=dynamodb)
+    index = WsSubscriptionIndexClient(table_name='Index', client=dynamodb)
+    registry.register('conn0', {'principalId': 'user0'})
+
+    cache = WsConnectionCache(registry, index, ttl=60)
+    other = WsConnectionCache(registry, index, ttl=60)
+
+    assert cache.get('conn0')['topics'] == [] and other.get('conn0')['topics'] == []
+
+    other.subscribe('conn0', 'sports')
+    cache.subscribe('conn0', 'news')
+
+    assert sorted(cache.get('conn0')['topics']) == ['news', 'sports'] and cache.stats.misses == 2
+    assert other.get('conn0')['topics'] == ['sports']
+    assert cache.get('conn0')[VERSION_ATTRIBUTE] == registry.version('conn0')
+
+
+def test_ws_connection_cache_handlers() -> None:
+    """
+    Drops cached metadata at $disconnect.
+
+    :return: No return.
+    """
+    dynamodb = DynamoDbStandIn({'Registry': ('pk', 'connectionId')})
+    ws_connection_registry._registry = WsConnectionRegistryClient(table_name='Registry', client=dynamodb)
+    ws_connection_registry._connection_cache = None
+
+    ws_connection_registry.connect(dict(requestContext=dict(connectionId='conn', eventType='CONNECT')))
+
+    cache = ws_connection_registry.get_connection_cache()
+    assert cache.get('conn')['version'] > 0 and len(cache) == 1
+
+    ws_connection_registry.disconnect(dict(requestContext=dict(connectionId='conn', eventType='DISCONNECT')))
+    assert len(cache) == 0 and cache.get('conn') is None
@@ -0,0 +1,100 @@
+import json
+import time
+
+from aws_cdk import App, Stack
+
+from b_aws_websocket_api.runtime.ws_broadcaster import WsBroadcaster
+from b_aws_websocket_api.runtime.ws_connection_pruner import WsConnectionPruner
+from b_aws_websocket_api.runtime.ws_connection_registry_client import WsConnectionRegistryClient
+from b_aws_websocket_api.runtime.ws_sigv4 import WsSigV4Signer
+from b_aws_websocket_api.runtime.ws_subscription_index_client import WsSubscriptionIndexClient
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_connection_registry import WsConnectionRegistry
+from b_aws_websocket_api.ws_connection_sweeper import WsConnectionSweeper
+from b_aws_websocket_api.ws_stage import WsStage
+from b_aws_websocket_api.ws_subscription_index import WsSubscriptionIndex
+from b_aws_websocket_api_test.stand_ins.connections import ConnectionsStandIn
+from b_aws_websocket_api_test.stand_ins.dynamodb import DynamoDbStandIn
+
+
+def test_ws_connection_pruner() -> None:
+    """
+    Removes connections reported gone by a broadcast and found gone by a sweep from the registry and index.
+
+    :return: No return.
+    """
+    dynamodb = DynamoDbStandIn({'Registry': ('pk', 'connectionId'), 'Index': ('pk', 'connectionId')})
+    registry = WsConnectionRegistryClient(table_name='Registry', shard_count=4, client=dynamodb)
+    index = WsSubscriptionIndexClient(table_name='Index', shard_count=2, client=dynamodb)
+
+    old = int(time.time()) - 3600
+    ids = [f'live{i}=' for i in range(50)] + [f'gone{i}' for i in range(30)]
+    for connection_id in ids:
+        registry.register(connection_id, {'connectedAt': old})
+        index.subscribe(connection_id, 'news')
+    registry.register('gone-recent')
+
+    with ConnectionsStandIn() as stand_in:
+        pruner = WsConnectionPruner(
+            registry=registry,
+            subscription_index=index,
+            connections_url=stand_in.connections_url,
+            signer=WsSigV4Signer('eu-central-1', 'AKIDEXAMPLE', 'secret'),
+            max_in_flight=8,
+        )
+        broadcaster = WsBroadcaster(stand_in.connections_url, max_in_flight=8, pruner=pruner)
+
+        stats = broadcaster.broadcast('{"message": "hello"}', index.subscriber_ids('news'))
+        assert stats.gone == 30 and stats.pruned == 30
+        assert sorted(registry.connection_ids()) == sorted(ids[:50] + ['gone-recent'])
+        assert sorted(index.subscriber_ids('news')) == sorted(ids[:50])
+
+        # Connections that are never broadcast to are found by a sweep, recent ones are left alone.
+        for i in range(30, 40):
+            registry.register(f'gone{i}', {'connectedAt': old})
+
+        sweep = pruner.sweep(min_age_seconds=600, page_size=16)
+        assert sweep.checked == 60 and sweep.live == 50 and sweep.gone == 10 and sweep.pruned == 10
+        assert sweep.complete
+
+        assert pruner.sweep(min_age_seconds=600, deadline=time.time() - 1).complete is False
+
+    assert sorted(registry.connection_ids()) == sorted(ids[:50] + ['gone-recent'])
+    assert dynamodb.calls['batch_write_item'] >= 2
+
+
+def test_ws_connection_sweeper() -> None:
+    """
+    Schedules a single sweeper with permissions to validate and remove connections.
+
+    :return: No return.
+    """
+    app = App()
+    stack = Stack(app, 'TestStack', env={'region': 'eu-central-1', 'account': '123456789012'})
+    api = WsApi(stack, 'Api', name='Api', route_selection_expression='$request.body.action')
+    stage = WsStage(stack, 'Stage', ws_api=api, stage_name='prod')
+    index = WsSubscriptionIndex(stack, 'Index')
+    registry = WsConnectionRegistry(stack, 'Registry', ws_api=api, subscription_index=index)
+
+    WsConnectionSweeper(stack, 'Sweeper', ws_stage=stage, registry=registry)
+
+    resources = app.synth().get_stack_by_name('TestStack').template['Resources']
+
+    rule, = [resource for resource in resources.values() if resource['Type'] == 'AWS::Events::Rule']
+    assert rule['Properties']['ScheduleExpression'] == 'rate(30 minutes)'
+
+    function, = [
+        resource['Properties'] for key, resource in resources.items()
+        if resource['Type'] == 'AWS::Lambda::Function' and key.startswith('SweeperFunction')
+    ]
+    assert function['ReservedConcurrentExecutions'] == 1
+    assert function['Environment']['Variables']['WS_SWEEPER_MIN_AGE'] == '600'
+
+    policies = json.dumps([
+        resource['Properties'] for key, resource in resources.items()
+        if resource['Type'] == 'AWS::IAM::Policy' and key.startswith('SweeperFunction')
+    ])
+    assert 'execute-api:ManageConnections' in policies
+    assert '/prod/GET/@connections/*' in policies and '/POST/@connections/' not in policies
+    assert 'dynamodb:BatchWriteItem' in policies
+    assert 'IndexTable' in policies
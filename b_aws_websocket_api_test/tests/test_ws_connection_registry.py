@@ -0,0 +1,43 @@
+import time
+
+from b_aws_websocket_api.runtime.handlers import ws_connection_registry
+from b_aws_websocket_api.runtime.ws_connection_registry_client import WsConnectionRegistryClient
+from b_aws_websocket_api_test.stand_ins.dynamodb import DynamoDbStandIn
+
+
+def test_ws_connection_registry() -> None:
+    """
+    Registers connections through the route handlers against a local DynamoDB stand-in,
+    then streams them with a parallel scan and resolves them with batched lookups.
+
+    :return: No return.
+    """
+    dynamodb = DynamoDbStandIn({'Registry': ('pk', 'connectionId')})
+    registry = WsConnectionRegistryClient(table_name='Registry', shard_count=8, ttl_seconds=60, client=dynamodb)
+    ws_connection_registry._registry = registry
+
+    for i in range(1000):
+        ws_connection_registry.connect(dict(requestContext=dict(
+            connectionId=f'conn{i}=',
+            eventType='CONNECT',
+            requestTimeEpoch=int(time.time() * 1000),
+            identity=dict(sourceIp='127.0.0.1'),
+        )))
+
+    ws_connection_registry.disconnect(dict(requestContext=dict(connectionId='conn0=', eventType='DISCONNECT')))
+
+    # An expired connection which TTL has not removed yet.
+    registry.register('expired', ttl_seconds=-1)
+
+    shards = {key[0] for key in dynamodb.tables['Registry']}
+    assert len(shards) == 8
+
+    assert sorted(registry.connection_ids(total_segments=4)) == sorted(f'conn{i}=' for i in range(1, 1000))
+
+    ids = [f'conn{i}=' for i in range(500)] + ['expired', 'missing']
+    found = list(registry.batch_get(ids))
+    assert sorted(item['connectionId'] for item in found) == sorted(f'conn{i}=' for i in range(1, 500))
+    assert all(item['sourceIp'] == '127.0.0.1' for item in found)
+
+    assert registry.get('conn1=')['connectionId'] == 'conn1='
+    assert registry.get('expired') is None
@@ -0,0 +1,58 @@
+from typing import List
+
+from aws_cdk import App, Stack
+from aws_cdk.aws_lambda import Code, Runtime
+
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_deployment import WsDeployment
+from b_aws_websocket_api.ws_function import WsFunction
+from b_aws_websocket_api.ws_router import WsRouter
+from b_aws_websocket_api.ws_stage import WsStage
+
+
+def synthesize_deployment(route_keys: List[str], code: str = 'def handler(event, context): pass') -> dict:
+    app = App()
+    stack = Stack(app, 'TestStack', env={'region': 'eu-central-1', 'account': '123456789012'})
+
+    api = WsApi(scope=stack, id='TestApi', name='TestApi', route_selection_expression='$request.body.action')
+    stage = WsStage(scope=stack, id='TestStage', ws_api=api, stage_name='test', auto_deploy=False)
+    WsDeployment(scope=stack, id='TestDeployment', ws_stage=stage)
+
+    function = WsFunction(
+        scope=stack,
+        id='TestFunction',
+        function_name='TestFunction',
+        code=Code.from_inline(code),
+        handler='index.handler',
+        runtime=Runtime.PYTHON_3_11,
+    )
+
+    WsRouter(scope=stack, id='TestRouter', ws_api=api, function=function, route_keys=route_keys)
+
+    resources = app.synth().get_stack_by_name('TestStack').template['Resources']
+    deployments = {
+        logical_id: resource for logical_id, resource in resources.items()
+        if resource['Type'] == 'AWS::ApiGatewayV2::Deployment'
+    }
+
+    assert len(deployments) == 1
+
+    return deployments
+
+
+def test_ws_deployment_content_hash() -> None:
+    """
+    Checks that a new deployment (logical id) is created only when the API content changes.
+
+    :return: No return.
+    """
+    deployment = synthesize_deployment(['a', 'b'])
+    (logical_id, resource), = deployment.items()
+
+    assert logical_id.startswith('TestDeploymentResource')
+    assert set(resource['DependsOn']) == {'TestRouterARoute', 'TestRouterBRoute', 'TestStage'}
+
+    assert list(synthesize_deployment(['a', 'b'])) == [logical_id]
+    # Function code is not a part of the API, hence it does not redeploy the stage.
+    assert list(synthesize_deployment(['a', 'b'], code='def handler(event, context): return 1')) == [logical_id]
+    assert list(synthesize_deployment(['a', 'c'])) != [logical_id]
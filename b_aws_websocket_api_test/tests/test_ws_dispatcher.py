@@ -0,0 +1,78 @@
+import json
+
+from b_aws_websocket_api.runtime.ws_dispatcher import WsDispatcher
+
+
+def message(route_key: str, body: str) -> dict:
+    return dict(requestContext=dict(routeKey=route_key, eventType='MESSAGE', connectionId='conn='), body=body)
+
+
+def test_ws_dispatcher_selection() -> None:
+    """
+    Routes messages of a collapsed $default route by the precompiled route selection expression.
+
+    :return: No return.
+    """
+    dispatcher = WsDispatcher(
+        default_handler=lambda event, context: {'route': 'fallback'},
+        selection_expression='$request.body.action',
+    )
+
+    @dispatcher.route('sendMessage')
+    def send_message(event, context):
+        return {'route': 'sendMessage', 'text': event.json()['text']}
+
+    @dispatcher.route('$connect')
+    def connect(event, context):
+        return None
+
+    response = dispatcher(message('$default', json.dumps({'action': 'sendMessage', 'text': 'hi'})))
+    assert json.loads(response['body']) == {'route': 'sendMessage', 'text': 'hi'}
+
+    # Routes created in API Gateway are dispatched by their route key without parsing the body.
+    response = dispatcher(message('sendMessage', json.dumps({'text': 'direct'})))
+    assert json.loads(response['body']) == {'route': 'sendMessage', 'text': 'direct'}
+
+    for body in ('{"action": "unknown"}', 'not json', '[1, 2]', '{"action": {"nested": 1}}'):
+        assert json.loads(dispatcher(message('$default', body))['body']) == {'route': 'fallback'}
+
+    connect_event = dict(requestContext=dict(routeKey='$connect', eventType='CONNECT', connectionId='conn='))
+    assert dispatcher(connect_event) == {'statusCode': 200}
+
+
+def test_ws_dispatcher_selection_with_default_handler() -> None:
+    """
+    Selects routes of $default messages before falling back to a registered $default handler.
+
+    :return: No return.
+    """
+    dispatcher = WsDispatcher(selection_expression='$request.body.action')
+    dispatcher.add_route('sendMessage', lambda event, context: {'route': 'sendMessage'})
+    dispatcher.add_route('$default', lambda event, context: {'route': '$default'})
+
+    response = dispatcher(message('$default', json.dumps({'action': 'sendMessage'})))
+    assert json.loads(response['body']) == {'route': 'sendMessage'}
+
+    response = dispatcher(message('$default', json.dumps({'action': 'unknown'})))
+    assert json.loads(response['body']) == {'route': '$default'}
+
+
+def test_ws_dispatcher_ignores_predefined_route_keys() -> None:
+    """
+    Never selects $connect, $disconnect or $default for a message.
+
+    :return: No return.
+    """
+    calls = []
+
+    dispatcher = WsDispatcher(
+        default_handler=lambda event, context: calls.append(('fallback', event.event_type)),
+        selection_expression='$request.body.action',
+    )
+    dispatcher.add_route('$connect', lambda event, context: calls.append(('$connect', event.event_type)))
+    dispatcher.add_route('$disconnect', lambda event, context: calls.append(('$disconnect', event.event_type)))
+
+    for action in ('$connect', '$disconnect', '$default'):
+        assert dispatcher(message('$default', json.dumps({'action': action}))) == {'statusCode': 200}
+
+    assert calls == [('fallback', 'MESSAGE')] * 3
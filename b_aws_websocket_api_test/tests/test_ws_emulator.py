@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import urllib.error
+import urllib.request
+
+import pytest
+import websockets
+from aws_cdk import App, Stack
+from aws_cdk.aws_lambda import Code, Runtime
+
+from b_aws_websocket_api.emulator.ws_emulator import WsEmulator
+from b_aws_websocket_api.emulator.ws_template import WsTemplate
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_function import WsFunction
+from b_aws_websocket_api.ws_lambda_integration import WsLambdaIntegration
+from b_aws_websocket_api.ws_route import WsRoute
+from b_aws_websocket_api_test.stand_ins.templates import echo_template
+
+# Pushes a message back through the @connections url of the event, then answers the route.
+PUSH_HANDLER = '''
+import json
+import os
+
+from b_aws_websocket_api.runtime.ws_broadcaster import WsBroadcaster
+from b_aws_websocket_api.runtime.ws_event import WsEvent
+
+def handler(event, context):
+    ws_event = WsEvent(event)
+    if ws_event.event_type != 'MESSAGE':
+        return {'statusCode': 200}
+    stats = WsBroadcaster.from_event(ws_event).broadcast('{"pushed": true}', [ws_event.connection_id])
+    return {'statusCode': 200, 'body': json.dumps({'sent': stats.sent, 'greeting': os.environ['GREETING']})}
+'''
+
+
+def test_ws_emulator() -> None:
+    """
+    Runs the emulator on a small synthesized template, routes a message and posts via @connections.
+
+    :return: No return.
+    """
+    async def run() -> None:
+        reject = {'$connect': lambda event, context: {'statusCode': 403}}
+        rejected = WsEmulator(WsTemplate(echo_template()), handlers=reject)
+
+        async with rejected:
+            try:
+                async with websockets.connect(rejected.url):
+                    raise AssertionError('Connection should have been rejected.')
+            except websockets.InvalidStatusCode as ex:
+                assert ex.status_code == 403
+
+        async with WsEmulator(WsTemplate(echo_template())) as emulator:
+            assert emulator.route_keys == ['$connect', 'test']
+
+            async with websockets.connect(emulator.url) as socket:
+                await socket.send(json.dumps({'action': 'test', 'value': 1}))
+                reply = json.loads(await asyncio.wait_for(socket.recv(), 5))
+                assert reply == {'route': 'test', 'echo': {'action': 'test', 'value': 1}}
+
+                await socket.send(json.dumps({'action': 'unknown'}))
+                reply = json.loads(await asyncio.wait_for(socket.recv(), 5))
+                assert reply['message'] == 'Forbidden'
+
+                connection_id = reply['connectionId']
+                url = f'{emulator.connections_url}/{connection_id}'
+
+                def post(target: str) -> int:
+                    request = urllib.request.Request(target, data=b'{"pushed": true}', method='POST')
+                    try:
+                        with urllib.request.urlopen(request, timeout=5) as response:
+                            return response.status
+                    except urllib.error.HTTPError as error:
+                        return error.code
+
+                loop = asyncio.get_running_loop()
+                assert await loop.run_in_executor(None, post, url) == 200
+                assert json.loads(await asyncio.wait_for(socket.recv(), 5)) == {'pushed': True}
+                assert await loop.run_in_executor(None, post, f'{emulator.connections_url}/missing') == 410
+
+    asyncio.run(run())
+
+
+def synthesize_stack(greetings) -> dict:
+    app = App()
+    stack = Stack(app, 'TestStack', env={'region': 'eu-central-1', 'account': '123456789012'})
+    api = WsApi(scope=stack, id='TestApi', name='TestApi', route_selection_expression='$request.body.action')
+
+    for index, (route_key, greeting) in enumerate(greetings.items()):
+        function = WsFunction(
+            scope=stack,
+            id=f'Function{index}',
+            function_name=f'Function{index}',
+            code=Code.from_inline(PUSH_HANDLER),
+            handler='index.handler',
+            runtime=Runtime.PYTHON_3_11,
+            environment={'GREETING': greeting},
+        )
+
+        integration = WsLambdaIntegration(
+            scope=stack,
+            id=f'Integration{index}',
+            integration_name=f'Integration{index}',
+            ws_api=api,
+            function=function,
+        )
+
+        WsRoute(
+            scope=stack,
+            id=f'Route{index}',
+            ws_api=api,
+            route_key=route_key,
+            authorization_type='NONE',
+            route_response_selection_expression='$default',
+            default_route_response=True,
+            target=f'integrations/{integration.ref}',
+        )
+
+    return app.synth().get_stack_by_name('TestStack').template
+
+
+def test_ws_emulator_synthesized_stack() -> None:
+    """
+    Runs the emulator on a synthesized WsApi, WsRoute and WsLambdaIntegration stack. Functions post to their
+    connection through the url of their event, and predefined routes are never selected for messages.
+
+    :return: No return.
+    """
+    connections_url = os.environ.get('WS_CONNECTIONS_URL')
+
+    async def run() -> None:
+        template = WsTemplate(synthesize_stack({'$connect': 'hello', 'push': 'hello'}))
+
+        async with WsEmulator(template) as emulator:
+            assert emulator.route_keys == ['$connect', 'push']
+
+            async with websockets.connect(emulator.url) as socket:
+                await socket.send(json.dumps({'action': 'push'}))
+                replies = [json.loads(await asyncio.wait_for(socket.recv(), 5)) for _ in range(2)]
+                assert {'pushed': True} in replies and {'sent': 1, 'greeting': 'hello'} in replies
+
+                await socket.send(json.dumps({'action': '$connect'}))
+                reply = json.loads(await asyncio.wait_for(socket.recv(), 5))
+                assert reply['message'] == 'Forbidden'
+
+        # Function environments applied to the emulator process are restored on exit.
+        assert 'GREETING' not in os.environ and os.environ.get('WS_CONNECTIONS_URL') == connections_url
+
+        # Functions invoked in-process share one environment, hence conflicting values need process pools.
+        conflicting = WsTemplate(synthesize_stack({'$connect': 'hello', 'push': 'bye'}))
+        with pytest.raises(ValueError):
+            async with WsEmulator(conflicting):
+                pass
+
+    asyncio.run(run())
@@ -0,0 +1,194 @@
+import json
+
+import pytest
+from aws_cdk import App, Stack
+
+from b_aws_websocket_api.runtime.ws_broadcaster import WsBroadcaster
+from b_aws_websocket_api.runtime.ws_fanout import WsFanoutSplitter, WsFanoutSender, WsFanoutProgress, records
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_connection_registry import WsConnectionRegistry
+from b_aws_websocket_api.ws_fanout import WsFanout
+from b_aws_websocket_api.ws_stage import WsStage
+from b_aws_websocket_api_test.benchmarks.bench_fanout import run_fanout
+from b_aws_websocket_api_test.stand_ins.connections import ConnectionsStandIn
+from b_aws_websocket_api_test.stand_ins.dynamodb import DynamoDbStandIn
+from b_aws_websocket_api_test.stand_ins.sqs import SqsStandIn
+
+
+def test_ws_fanout() -> None:
+    """
+    Runs the fan-out pipeline in-process against stand-in queues and endpoints.
+
+    :return: No return.
+    """
+    result = run_fanout(connections=1200, workers=3, batch_size=100)
+
+    assert result['shards'] == 12
+    assert result['sent'] == 1200
+    assert result['received'] == 1200
+    assert result['failed'] == 0
+
+
+def test_ws_fanout_split_redelivery() -> None:
+    """
+    Skips shards enqueued by a failed split when the publish is redelivered.
+
+    :return: No return.
+    """
+    class FlakySqs(SqsStandIn):
+        batches = 0
+
+        def send_message_batch(self, QueueUrl, Entries):
+            self.batches += 1
+            if self.batches == 2:
+                raise OSError('Connection reset.')
+            return super().send_message_batch(QueueUrl, Entries)
+
+    sqs = FlakySqs()
+    progress = WsFanoutProgress('Progress', DynamoDbStandIn({'Progress': ('publishId', 'progressKey')}))
+    splitter = WsFanoutSplitter('shards', 2, progress=progress, sqs_client=sqs)
+    message = dict(id='publish', data='hi', encoding='text', connectionIds=[f'conn{i}' for i in range(45)])
+
+    with pytest.raises(OSError):
+        splitter.split(message)
+
+    assert progress.enqueued_shards('publish') == set(range(10))
+    assert splitter.split(message) == 23
+
+    shards = []
+    while True:
+        event = sqs.receive_event('shards', timeout=0)
+        if event is None:
+            break
+        shards.extend(shard['shard'] for shard in records(event))
+
+    assert sorted(shards) == list(range(23))
+
+
+def test_ws_fanout_large_payload() -> None:
+    """
+    Splits a large payload into batches within the byte limit of SQS batch requests.
+
+    :return: No return.
+    """
+    sqs = SqsStandIn()
+    splitter = WsFanoutSplitter('shards', 500, sqs_client=sqs)
+    message = dict(id='publish', data='x' * 50_000, encoding='text', connectionIds=[f'conn{i}' for i in range(10_000)])
+
+    assert splitter.split(message) == 20
+
+    shards = []
+    while True:
+        event = sqs.receive_event('shards', timeout=0)
+        if event is None:
+            break
+        shards.extend(records(event))
+
+    assert sorted(shard['shard'] for shard in shards) == list(range(20))
+    assert sum(len(shard['connectionIds']) for shard in shards) == 10_000
+
+
+def test_ws_fanout_enqueue_failures() -> None:
+    """
+    Retries shards failed by SQS, but raises on sender faults right away.
+
+    :return: No return.
+    """
+    class FailingSqs(SqsStandIn):
+        def __init__(self, sender_fault: bool) -> None:
+            super().__init__()
+            self.sender_fault = sender_fault
+            self.batches = 0
+
+        def send_message_batch(self, QueueUrl, Entries):
+            self.batches += 1
+            if self.batches > 1:
+                return super().send_message_batch(QueueUrl, Entries)
+            failed = dict(Id=Entries[0]['Id'], SenderFault=self.sender_fault, Code='Failed', Message='Failed.')
+            response = super().send_message_batch(QueueUrl, Entries[1:])
+            return dict(response, Failed=[failed])
+
+    message = dict(id='publish', data='hi', encoding='text', connectionIds=['conn1', 'conn2'])
+
+    sqs = FailingSqs(sender_fault=False)
+    assert WsFanoutSplitter('shards', 1, sqs_client=sqs).split(message) == 2
+    assert sqs.batches == 2 and sqs.sent == 2
+
+    sqs = FailingSqs(sender_fault=True)
+    with pytest.raises(RuntimeError):
+        WsFanoutSplitter('shards', 1, sqs_client=sqs).split(message)
+    assert sqs.batches == 1
+
+
+def test_ws_fanout_retry_shards() -> None:
+    """
+    Re-enqueues transiently failed connections as a smaller retry shard up to the maximum attempts,
+    and records every attempt.
+
+    :return: No return.
+    """
+    sqs = SqsStandIn()
+    progress = WsFanoutProgress('Progress', DynamoDbStandIn({'Progress': ('publishId', 'progressKey')}))
+
+    with ConnectionsStandIn() as stand_in:
+        sender = WsFanoutSender(
+            broadcaster=WsBroadcaster(stand_in.connections_url, max_attempts=2, backoff_base=0.001),
+            shard_queue_url='shards',
+            max_attempts=2,
+            progress=progress,
+            sqs_client=sqs,
+        )
+
+        stats = sender.send(dict(
+            id='publish', data='hi', encoding='text', shard=3, attempt=0, connectionIds=['live1', 'fail1', 'gone1'],
+        ))
+        assert (stats.sent, stats.gone, stats.failed) == (1, 1, 1)
+
+        retry, = records(sqs.receive_event('shards', timeout=0))
+        assert (retry['shard'], retry['attempt'], retry['connectionIds']) == (3, 1, ['fail1'])
+
+        assert sender.send(retry).failed == 1
+        assert sqs.receive_event('shards', timeout=0) is None
+
+    items = {item['progressKey']: item for item in progress.shards('publish')}
+    assert set(items) == {'shard#000003#0', 'shard#000003#1'}
+    assert items['shard#000003#0']['sent'] == 1 and items['shard#000003#0']['failedConnectionIds'] == ['fail1']
+
+
+def test_ws_fanout_construct() -> None:
+    """
+    Synthesizes the pipeline with dead letter queues, sender concurrency and least-privilege grants.
+
+    :return: No return.
+    """
+    app = App()
+    stack = Stack(app, 'TestStack', env={'region': 'eu-central-1', 'account': '123456789012'})
+    api = WsApi(stack, 'Api', name='Api', route_selection_expression='$request.body.action')
+    stage = WsStage(stack, 'Stage', ws_api=api, stage_name='prod')
+    registry = WsConnectionRegistry(stack, 'Registry', ws_api=api)
+
+    WsFanout(stack, 'Fanout', ws_stage=stage, registry=registry, sender_concurrency=7, batch_size=250)
+
+    resources = app.synth().get_stack_by_name('TestStack').template['Resources']
+
+    def of(resource_type: str, prefix: str) -> dict:
+        properties, = [
+            resource['Properties'] for key, resource in resources.items()
+            if resource['Type'] == resource_type and key.startswith(prefix)
+        ]
+        return properties
+
+    for queue in ('FanoutPublishQueue', 'FanoutShardQueue'):
+        assert of('AWS::SQS::Queue', queue)['RedrivePolicy']['maxReceiveCount'] == 3
+
+    sender = of('AWS::Lambda::Function', 'FanoutSenderFunction')
+    assert sender['ReservedConcurrentExecutions'] == 7
+    assert sender['Environment']['Variables']['WS_FANOUT_BATCH_SIZE'] == '250'
+
+    sender_policy = json.dumps(of('AWS::IAM::Policy', 'FanoutSenderFunction'))
+    assert 'execute-api:ManageConnections' in sender_policy and 'sqs:SendMessage' in sender_policy
+    assert 'dynamodb:BatchWriteItem' in sender_policy
+
+    splitter_policy = json.dumps(of('AWS::IAM::Policy', 'FanoutSplitterFunction'))
+    assert 'dynamodb:Query' in splitter_policy and 'sqs:SendMessage' in splitter_policy
+    assert 'execute-api:ManageConnections' not in splitter_policy
@@ -0,0 +1,87 @@
+import pytest
+from aws_cdk import App, Stack
+from aws_cdk.aws_applicationautoscaling import Schedule, ScalingSchedule
+from aws_cdk.aws_lambda import Architecture, Code, Runtime
+
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_function import WsFunction
+from b_aws_websocket_api.ws_lambda_integration import WsLambdaIntegration
+
+
+def test_ws_function_low_latency_options() -> None:
+    """
+    Synthesizes an arm64 function whose alias, with autoscaled provisioned concurrency, is invoked by integrations
+    and permitted to API Gateway.
+
+    :return: No return.
+    """
+    app = App()
+    stack = Stack(app, 'TestStack', env={'region': 'eu-central-1', 'account': '123456789012'})
+    api = WsApi(scope=stack, id='TestApi', name='TestApi', route_selection_expression='$request.body.action')
+
+    function = WsFunction(
+        scope=stack,
+        id='TestFunction',
+        function_name='TestFunction',
+        code=Code.from_inline('def handler(event, context): pass'),
+        handler='index.handler',
+        runtime=Runtime.PYTHON_3_11,
+        architecture=Architecture.ARM_64,
+        provisioned_concurrent_executions=2,
+        autoscaling_max_capacity=10,
+    )
+
+    WsLambdaIntegration(
+        scope=stack,
+        id='TestIntegration',
+        integration_name='TestIntegration',
+        ws_api=api,
+        function=function,
+    )
+
+    resources = app.synth().get_stack_by_name('TestStack').template['Resources']
+
+    def of(resource_type: str) -> list:
+        return [resource['Properties'] for resource in resources.values() if resource['Type'] == resource_type]
+
+    lambda_function, = of('AWS::Lambda::Function')
+    assert lambda_function['Architectures'] == ['arm64']
+
+    alias_id, = [key for key, resource in resources.items() if resource['Type'] == 'AWS::Lambda::Alias']
+    alias, = of('AWS::Lambda::Alias')
+    assert alias['Name'] == 'live'
+    assert alias['ProvisionedConcurrencyConfig'] == {'ProvisionedConcurrentExecutions': 2}
+
+    integration, = of('AWS::ApiGatewayV2::Integration')
+    assert {'Ref': alias_id} in integration['IntegrationUri']['Fn::Join'][1]
+
+    permission, = of('AWS::Lambda::Permission')
+    assert permission['FunctionName'] == {'Ref': alias_id}
+    assert permission['Principal'] == 'apigateway.amazonaws.com'
+
+    target, = of('AWS::ApplicationAutoScaling::ScalableTarget')
+    assert (target['MinCapacity'], target['MaxCapacity']) == (2, 10)
+    assert target['ScalableDimension'] == 'lambda:function:ProvisionedConcurrency'
+
+    policy, = of('AWS::ApplicationAutoScaling::ScalingPolicy')
+    assert policy['TargetTrackingScalingPolicyConfiguration']['TargetValue'] == 0.7
+
+
+def test_ws_function_autoscaling_requires_max_capacity() -> None:
+    """
+    Rejects autoscaling settings that would be ignored without a maximum capacity.
+
+    :return: No return.
+    """
+    stack = Stack(App(), 'TestStack')
+    code = Code.from_inline('def handler(event, context): pass')
+
+    with pytest.raises(ValueError):
+        WsFunction(stack, 'Target', code=code, handler='index.handler', runtime=Runtime.PYTHON_3_11,
+                   function_name='Target', provisioned_concurrent_executions=2, autoscaling_utilization_target=0.5)
+
+    with pytest.raises(ValueError):
+        WsFunction(stack, 'Schedule', code=code, handler='index.handler', runtime=Runtime.PYTHON_3_11,
+                   function_name='Schedule', autoscaling_schedules={
+                       'Morning': ScalingSchedule(schedule=Schedule.cron(hour='8', minute='0'), min_capacity=5),
+                   })
@@ -0,0 +1,144 @@
+import json
+
+import pytest
+
+from b_aws_websocket_api.runtime import ws_metrics
+from b_aws_websocket_api.runtime.ws_broadcaster import WsBroadcaster
+from b_aws_websocket_api.runtime.ws_dispatcher import WsDispatcher
+from b_aws_websocket_api.runtime.ws_fanout import WsFanoutSender
+from b_aws_websocket_api.runtime.ws_metrics import WsMemorySink, WsMetrics
+from b_aws_websocket_api.runtime.ws_sigv4 import WsSigV4Signer
+from b_aws_websocket_api_test.stand_ins.connections import ConnectionsStandIn
+from b_aws_websocket_api_test.stand_ins.sqs import SqsStandIn
+
+
+def test_ws_metrics() -> None:
+    """
+    Buffers counters, timers and histograms and flushes them as Embedded Metric Format documents.
+
+    :return: No return.
+    """
+    sink = WsMemorySink()
+    metrics = WsMetrics(namespace='Chat', dimensions={'Service': 'chat'}, sink=sink, max_samples=250)
+
+    @metrics.timer('Work', {'Step': 'decorated'})
+    def work() -> int:
+        return 42
+
+    for i in range(300):
+        metrics.count('Requests')
+        metrics.record('Size', i, unit='Bytes', dimensions={'Route': 'send'})
+
+    with metrics.timer('Work', {'Step': 'block'}):
+        assert work() == 42
+
+    metrics.set_property('requestId', 'abc')
+
+    assert sink.documents == []
+    assert metrics.flush() == 6 and metrics.flush() == 0
+
+    for document in sink.documents:
+        definition, = document['_aws']['CloudWatchMetrics']
+        assert definition['Namespace'] == 'Chat' and document['requestId'] == 'abc'
+        for dimension in definition['Dimensions'][0]:
+            assert isinstance(document[dimension], str)
+        for metric in definition['Metrics']:
+            values = document[metric['Name']]
+            assert len(values) <= 100 if isinstance(values, list) else isinstance(values, (int, float))
+
+    assert sink.values('Requests') == [300]
+    assert len(sink.values('Size', {'Route': 'send', 'Service': 'chat'})) == 250
+    assert len(sink.values('Work', {'Step': 'block'})) == 1 and len(sink.values('Work', {'Step': 'decorated'})) == 1
+
+    disabled = WsMetrics(sink=sink, enabled=False)
+    disabled.count('Requests')
+    with disabled.timer('Work'):
+        pass
+    assert disabled.flush() == 0
+
+
+def test_ws_metrics_instrumentation() -> None:
+    """
+    Records dispatch and management API metrics of the runtime helpers, flushed once per invocation.
+
+    :return: No return.
+    """
+    sink = WsMemorySink()
+    ws_metrics.set_metrics(WsMetrics(sink=sink))
+
+    try:
+        dispatcher = WsDispatcher()
+
+        @dispatcher.route('broadcast')
+        def broadcast(event, context):
+            with ConnectionsStandIn() as stand_in:
+                broadcaster = WsBroadcaster(
+                    connections_url=stand_in.connections_url,
+                    signer=WsSigV4Signer('eu-central-1', 'AKIDEXAMPLE', 'secret'),
+                )
+                broadcaster.broadcast('hello', [f'live{i}' for i in range(20)] + ['gone1'])
+
+        @dispatcher.route('fail')
+        def fail(event, context):
+            raise RuntimeError()
+
+        dispatcher(dict(requestContext=dict(routeKey='broadcast', eventType='MESSAGE', connectionId='a')))
+        assert len(sink.documents) == 2
+
+        with pytest.raises(RuntimeError):
+            dispatcher(dict(requestContext=dict(routeKey='fail', eventType='MESSAGE', connectionId='a')))
+
+        assert sink.values('ConnectionsSent') == [20] and sink.values('ConnectionsGone') == [1]
+        assert len(sink.values('SendLatency')) == 20
+        assert sink.values('Messages', {'Route': 'broadcast'}) == [1]
+        assert sink.values('HandlerErrors', {'Route': 'fail'}) == [1]
+        assert len(sink.values('DispatchLatency')) == 2
+    finally:
+        ws_metrics.set_metrics(None)
+
+
+def test_ws_metrics_bounded_dimensions() -> None:
+    """
+    Records client-supplied route keys and topics under shared dimension values unless they are known.
+
+    :return: No return.
+    """
+    sink = WsMemorySink()
+    ws_metrics.set_metrics(WsMetrics(sink=sink))
+
+    try:
+        dispatcher = WsDispatcher(
+            default_handler=lambda event, context: None,
+            selection_expression='$request.body.action',
+        )
+        dispatcher.add_route('send', lambda event, context: None)
+
+        for action in ('x-1', 'x-2', 'x-3', 'send'):
+            body = json.dumps(dict(action=action))
+            dispatcher(dict(requestContext=dict(routeKey='$default', eventType='MESSAGE', connectionId='a'), body=body))
+
+        routes = {document['Route'] for document in sink.documents}
+        assert routes == {'$default', 'send'} and sink.values('Messages', {'Route': '$default'}) == [1, 1, 1]
+
+        sink.clear()
+
+        with ConnectionsStandIn() as stand_in:
+            sender = WsFanoutSender(
+                broadcaster=WsBroadcaster(
+                    connections_url=stand_in.connections_url,
+                    signer=WsSigV4Signer('eu-central-1', 'AKIDEXAMPLE', 'secret'),
+                ),
+                shard_queue_url='shards',
+                sqs_client=SqsStandIn(),
+                metric_topics=['news'],
+            )
+
+            for topic in ('news', 'user-1', 'user-2'):
+                shard = dict(id='p', data='hi', encoding='text', topic=topic, shard=0, attempt=0, connectionIds=['a'])
+                sender.send(shard)
+
+        ws_metrics.get_metrics().flush()
+        assert sink.values('FanoutShards', {'Topic': 'news'}) == [1]
+        assert sink.values('FanoutShards', {'Topic': '*'}) == [2]
+    finally:
+        ws_metrics.set_metrics(None)
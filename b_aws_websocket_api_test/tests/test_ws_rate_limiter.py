@@ -0,0 +1,117 @@
+import time
+
+from aws_cdk import App, Stack
+from aws_cdk.aws_apigatewayv2 import CfnStage
+
+from b_aws_websocket_api.runtime.ws_connection_registry_client import WsConnectionRegistryClient
+from b_aws_websocket_api.runtime.ws_dispatcher import WsDispatcher
+from b_aws_websocket_api.runtime.ws_rate_limiter import WsRateLimiter
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_route_throttling import WsRouteThrottling
+from b_aws_websocket_api.ws_stage import WsStage
+from b_aws_websocket_api_test.stand_ins.dynamodb import DynamoDbStandIn
+
+
+def message(connection_id: str, action: str) -> dict:
+    return dict(
+        requestContext=dict(connectionId=connection_id, routeKey='$default', eventType='MESSAGE'),
+        body=f'{{"action": "{action}"}}',
+    )
+
+
+def test_ws_rate_limiter() -> None:
+    """
+    Rejects a noisy connection in memory while other connections keep being served, and enforces the limit
+    of a connection across containers through the shared registry counters.
+
+    :return: No return.
+    """
+    dynamodb = DynamoDbStandIn({'Registry': ('pk', 'connectionId')})
+    registry = WsConnectionRegistryClient(table_name='Registry', client=dynamodb)
+    registry.register('noisy')
+    registry.register('quiet')
+
+    limiter = WsRateLimiter(rate=5, burst=10, route_limits={'upload': (1, 2)}, registry=registry)
+
+    handled = []
+    dispatcher = WsDispatcher(selection_expression='$request.body.action', rate_limiter=limiter)
+    dispatcher.add_route('send', lambda event, context: handled.append(event.connection_id))
+    dispatcher.add_route('upload', lambda event, context: handled.append(event.connection_id))
+
+    statuses = [dispatcher(message('noisy', 'send'))['statusCode'] for _ in range(1000)]
+    assert statuses.count(200) == 10 and statuses.count(429) == 990
+    assert dispatcher(message('quiet', 'send'))['statusCode'] == 200
+    assert handled == ['noisy'] * 10 + ['quiet']
+
+    # Rejections do no I/O: only the first message of each connection reconciled.
+    assert dynamodb.calls['update_item'] == 2 and limiter.stats.rejected == 990
+
+    started = time.perf_counter()
+    for _ in range(10000):
+        limiter.allow('noisy', 'send')
+    assert (time.perf_counter() - started) / 10000 < 50e-6
+
+    # Route limits apply on top of the connection limit.
+    assert [limiter.allow('quiet', 'upload') for _ in range(3)] == [True, True, False]
+
+    # Containers serving the same connection deduct usage of each other, hence the connection gets about one
+    # burst in total rather than one per container.
+    registry.register('shared')
+    containers = [WsRateLimiter(rate=0.001, burst=10, registry=registry, reconcile_interval=0.0) for _ in range(2)]
+
+    allowed = sum(containers[i % 2].allow('shared') for i in range(40))
+    assert 10 <= allowed <= 12
+    assert registry.get('shared')['usage'] == allowed
+
+    # State of gone connections is dropped at reconciliation.
+    registry.unregister('shared')
+    containers[0].reconcile('shared')
+    assert containers[0].allow('shared')
+
+
+def test_ws_route_throttling() -> None:
+    """
+    Merges typed route throttling into stage route settings.
+
+    :return: No return.
+    """
+    app = App()
+    stack = Stack(app, 'TestStack')
+    api = WsApi(stack, 'Api', name='Api', route_selection_expression='$request.body.action')
+
+    stage = WsStage(
+        stack,
+        'Stage',
+        ws_api=api,
+        stage_name='prod',
+        route_settings={
+            'send': {'LoggingLevel': 'ERROR'},
+            'receive': CfnStage.RouteSettingsProperty(logging_level='ERROR', throttling_burst_limit=10),
+        },
+        default_throttling=WsRouteThrottling(rate_limit=1000, burst_limit=500),
+        route_throttling={'send': WsRouteThrottling(rate_limit=100, burst_limit=50)},
+    )
+    stage.throttle('upload', WsRouteThrottling(rate_limit=1.5, burst_limit=2, detailed_metrics_enabled=True))
+    stage.throttle('receive', WsRouteThrottling(rate_limit=10, burst_limit=20))
+
+    properties = app.synth().get_stack_by_name('TestStack').template['Resources']['Stage']['Properties']
+
+    assert properties['DefaultRouteSettings'] == {
+        'ThrottlingRateLimit': 1000,
+        'ThrottlingBurstLimit': 500,
+        'LoggingLevel': 'INFO',
+        'DataTraceEnabled': True,
+        'DetailedMetricsEnabled': True,
+    }
+    assert properties['RouteSettings'] == {
+        'send': {'LoggingLevel': 'ERROR', 'ThrottlingRateLimit': 100, 'ThrottlingBurstLimit': 50},
+        'upload': {'ThrottlingRateLimit': 1.5, 'ThrottlingBurstLimit': 2, 'DetailedMetricsEnabled': True},
+        'receive': {'LoggingLevel': 'ERROR', 'ThrottlingRateLimit': 10, 'ThrottlingBurstLimit': 20},
+    }
+
+    for rate_limit, burst_limit in [(-1, 1), (1, 1.5), (1, 10000)]:
+        try:
+            WsRouteThrottling(rate_limit=rate_limit, burst_limit=burst_limit)
+        except ValueError:
+            continue
+        raise AssertionError('Invalid throttling accepted.')
@@ -0,0 +1,29 @@
+import os
+
+from aws_cdk import App, Stack
+
+from b_aws_websocket_api.ws_runtime_layer import WsRuntimeLayer
+
+
+def test_ws_runtime_layer() -> None:
+    """
+    Builds the runtime bundle once per process and prefix, without CDK modules of the package.
+
+    :return: No return.
+    """
+    build_dir = WsRuntimeLayer.source_path()
+    package_dir = os.path.join(build_dir, 'b_aws_websocket_api')
+
+    assert WsRuntimeLayer.source_path() == build_dir
+    assert WsRuntimeLayer.source_path(prefix='python') != build_dir
+    assert sorted(os.listdir(package_dir)) == ['__init__.py', 'runtime']
+
+    app = App()
+    stack = Stack(app, 'TestStack', env={'region': 'eu-central-1', 'account': '123456789012'})
+    WsRuntimeLayer(stack, 'Layer')
+    WsRuntimeLayer(stack, 'OtherLayer')
+
+    resources = app.synth().get_stack_by_name('TestStack').template['Resources']
+    layers = [resource for resource in resources.values() if resource['Type'] == 'AWS::Lambda::LayerVersion']
+
+    assert len(layers) == 2 and layers[0]['Properties']['Content'] == layers[1]['Properties']['Content']
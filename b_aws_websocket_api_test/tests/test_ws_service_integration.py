@@ -0,0 +1,130 @@
+import json
+
+from aws_cdk import App, Stack, Duration
+from aws_cdk.aws_dynamodb import Table, Attribute, AttributeType
+from aws_cdk.aws_events import EventBus
+from aws_cdk.aws_kinesis import Stream
+from aws_cdk.aws_sqs import Queue
+
+from b_aws_websocket_api.ws_api import WsApi
+from b_aws_websocket_api.ws_dynamodb_integration import WsDynamoDbIntegration
+from b_aws_websocket_api.ws_eventbridge_integration import WsEventBridgeIntegration
+from b_aws_websocket_api.ws_kinesis_integration import WsKinesisIntegration
+from b_aws_websocket_api.ws_route import WsRoute
+from b_aws_websocket_api.ws_sqs_integration import WsSqsIntegration
+
+
+def test_ws_service_integrations() -> None:
+    """
+    Checks that service integrations call the service directly with the connection and route in the request,
+    through a role allowed to call only the integrated action.
+
+    :return: No return.
+    """
+    app = App()
+    stack = Stack(app, 'TestStack', env={'region': 'eu-central-1', 'account': '123456789012'})
+    api = WsApi(scope=stack, id='TestApi', name='TestApi', route_selection_expression='$request.body.action')
+
+    table = Table(
+        scope=stack,
+        id='TestTable',
+        partition_key=Attribute(name='pk', type=AttributeType.STRING),
+        sort_key=Attribute(name='sk', type=AttributeType.STRING),
+    )
+
+    integrations = dict(
+        sqs=WsSqsIntegration(
+            scope=stack,
+            id='TestSqs',
+            integration_name='TestSqs',
+            ws_api=api,
+            queue=Queue(scope=stack, id='TestQueue', fifo=True),
+        ),
+        kinesis=WsKinesisIntegration(
+            scope=stack,
+            id='TestKinesis',
+            integration_name='TestKinesis',
+            ws_api=api,
+            stream=Stream(scope=stack, id='TestStream'),
+        ),
+        dynamodb=WsDynamoDbIntegration(
+            scope=stack,
+            id='TestDynamoDb',
+            integration_name='TestDynamoDb',
+            ws_api=api,
+            table=table,
+            time_to_live=Duration.days(1),
+        ),
+        events=WsEventBridgeIntegration(
+            scope=stack,
+            id='TestEvents',
+            integration_name='TestEvents',
+            ws_api=api,
+            event_bus=EventBus(scope=stack, id='TestBus'),
+            default_integration_response=False,
+        ),
+    )
+
+    for route_key, integration in integrations.items():
+        WsRoute(
+            scope=stack,
+            id=f'{route_key}Route',
+            ws_api=api,
+            route_key=route_key,
+            target=f'integrations/{integration.ref}',
+        )
+
+    template = app.synth().get_stack_by_name('TestStack').template
+    resources = template['Resources']
+
+    for name, integration in integrations.items():
+        properties = resources[stack.get_logical_id(integration)]['Properties']
+        role_id = stack.get_logical_id(integration.role.node.default_child)
+        # Templates referencing resource names are joins.
+        request_template = json.dumps(properties['RequestTemplates']['$default'])
+
+        assert properties['IntegrationType'] == 'AWS'
+        assert properties['PassthroughBehavior'] == 'NEVER'
+        assert properties['CredentialsArn'] == {'Fn::GetAtt': [role_id, 'Arn']}
+        assert '$context.connectionId' in request_template
+        assert '$context.routeKey' in request_template
+
+        policies = [
+            resource['Properties'] for resource in resources.values()
+            if resource['Type'] == 'AWS::IAM::Policy'
+            and resource['Properties']['Roles'] == [{'Ref': role_id}]
+        ]
+        actions = {
+            action
+            for policy in policies
+            for statement in policy['PolicyDocument']['Statement']
+            for action in (statement['Action'] if isinstance(statement['Action'], list) else [statement['Action']])
+        }
+
+        assert actions == {
+            'sqs': {'sqs:SendMessage', 'sqs:GetQueueAttributes', 'sqs:GetQueueUrl'},
+            'kinesis': {'kinesis:PutRecord'},
+            'dynamodb': {'dynamodb:PutItem'},
+            'events': {'events:PutEvents'},
+        }[name]
+
+    sqs = resources[stack.get_logical_id(integrations['sqs'])]['Properties']
+    assert 'MessageGroupId' in json.dumps(sqs['RequestTemplates']['$default'])
+    assert sqs['RequestParameters'] == {
+        'integration.request.header.Content-Type': "'application/x-www-form-urlencoded'"
+    }
+
+    events = resources[stack.get_logical_id(integrations['events'])]['Properties']
+    assert events['RequestParameters']['integration.request.header.X-Amz-Target'] == "'AWSEvents.PutEvents'"
+
+    dynamodb = resources[stack.get_logical_id(integrations['dynamodb'])]['Properties']
+    assert '$expires' in json.dumps(dynamodb['RequestTemplates']['$default'])
+
+    # Accepted and error frames for three integrations, none for the fire-and-forget event bus integration.
+    responses = [
+        resource['Properties'] for resource in resources.values()
+        if resource['Type'] == 'AWS::ApiGatewayV2::IntegrationResponse'
+    ]
+    assert len(responses) == 6
+    assert {response['IntegrationResponseKey'] for response in responses} == {'$default', '/[45]\\d\\d/'}
+    assert integrations['events'].response is None and integrations['events'].error_response is None
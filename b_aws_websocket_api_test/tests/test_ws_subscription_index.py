@@ -0,0 +1,29 @@
+from b_aws_websocket_api.runtime.ws_subscription_index_client import WsSubscriptionIndexClient
+from b_aws_websocket_api_test.stand_ins.dynamodb import DynamoDbStandIn
+
+
+def test_ws_subscription_index() -> None:
+    """
+    Subscribes connections to topics against a local DynamoDB stand-in and streams subscribers.
+
+    :return: No return.
+    """
+    dynamodb = DynamoDbStandIn({'Index': ('pk', 'connectionId')})
+    index = WsSubscriptionIndexClient(table_name='Index', shard_count=4, ttl_seconds=60, client=dynamodb)
+
+    for i in range(300):
+        index.subscribe(f'conn{i}', 'news')
+        if i % 3 == 0:
+            index.subscribe(f'conn{i}', 'sports')
+
+    assert len({key[0] for key in dynamodb.tables['Index'] if 'news' in key[0]}) == 4
+
+    index.unsubscribe('conn1', 'news')
+    assert index.unsubscribe_all(['conn0', 'conn3']) == 4
+
+    pages = list(index.subscribers('news', page_size=100))
+    assert [len(page) for page in pages] == [100, 100, 97]
+    assert sorted(index.subscriber_ids('news')) == sorted(f'conn{i}' for i in range(300) if i not in (0, 1, 3))
+    assert len(list(index.subscriber_ids('sports'))) == 98
+
+    assert sorted(index.topics('conn6')) == ['news', 'sports']
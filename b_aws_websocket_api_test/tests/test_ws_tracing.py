@@ -0,0 +1,105 @@
+from b_aws_websocket_api.runtime import ws_tracing
+from b_aws_websocket_api.runtime.ws_broadcaster import WsBroadcaster
+from b_aws_websocket_api.runtime.ws_dispatcher import WsDispatcher
+from b_aws_websocket_api.runtime.ws_fanout import WsFanoutPublisher, WsFanoutSplitter, WsFanoutSender, records
+from b_aws_websocket_api.runtime.ws_sigv4 import WsSigV4Signer
+from b_aws_websocket_api.runtime.ws_tracing import WsInMemoryExporter, WsTraceContext, WsTracer
+from b_aws_websocket_api_test.stand_ins.connections import ConnectionsStandIn
+from b_aws_websocket_api_test.stand_ins.sqs import SqsStandIn
+
+
+def test_ws_trace_context() -> None:
+    """
+    Parses and serializes X-Ray trace headers and exports sampled spans only.
+
+    :return: No return.
+    """
+    header = 'Root=1-5759e988-bd862e3fe1be46a994272793;Parent=53995c3f42cd8ad8;Sampled=1'
+    context = WsTraceContext.parse(header)
+
+    assert context.trace_id == '1-5759e988-bd862e3fe1be46a994272793' and context.parent_id == '53995c3f42cd8ad8'
+    assert context.sampled and context.to_header() == header
+    assert WsTraceContext.parse('Parent=53995c3f42cd8ad8') is None
+
+    exporter = WsInMemoryExporter()
+    tracer = WsTracer(exporter)
+
+    with tracer.span('outer') as outer:
+        with tracer.span('inner', annotations={'route-key': 'send'}) as inner:
+            assert tracer.inject({})['traceHeader'] == inner.context.to_header()
+
+    assert inner.parent_id == outer.id and inner.trace_id == outer.trace_id
+    assert inner.to_document()['type'] == 'subsegment' and 'type' not in outer.to_document()
+    assert inner.annotations == {'route_key': 'send'}
+
+    with tracer.span('unsampled', parent=WsTraceContext.parse(header.replace('Sampled=1', 'Sampled=0'))):
+        pass
+
+    assert [span.name for span in exporter.spans] == ['inner', 'outer']
+
+    disabled = WsTracer(exporter, enabled=False)
+    with disabled.span('ignored'):
+        assert disabled.inject({}) == {}
+    assert len(exporter.spans) == 2
+
+
+def test_ws_trace_propagation() -> None:
+    """
+    Continues a single trace from a route handler through the fan-out queues to management API calls.
+
+    :return: No return.
+    """
+    exporter = WsInMemoryExporter()
+    ws_tracing.set_tracer(WsTracer(exporter))
+    sqs = SqsStandIn()
+
+    try:
+        with ConnectionsStandIn() as stand_in:
+            dispatcher = WsDispatcher()
+
+            @dispatcher.route('publish')
+            def publish(event, context):
+                connection_ids = [f'live{i}' for i in range(6)] + ['slow1', 'gone1']
+                return WsFanoutPublisher('publish', sqs).publish('hello', topic='news', connection_ids=connection_ids)
+
+            dispatcher(dict(requestContext=dict(routeKey='publish', eventType='MESSAGE', connectionId='a')))
+
+            splitter = WsFanoutSplitter('shards', 3, sqs_client=sqs)
+            for message in records(sqs.receive_event('publish')):
+                assert splitter.split(message) == 3
+
+            sender = WsFanoutSender(
+                broadcaster=WsBroadcaster(
+                    connections_url=stand_in.connections_url,
+                    signer=WsSigV4Signer('eu-central-1', 'AKIDEXAMPLE', 'secret'),
+                ),
+                shard_queue_url='shards',
+                sqs_client=sqs,
+            )
+            for _ in range(3):
+                for shard in records(sqs.receive_event('shards')):
+                    sender.send(shard)
+    finally:
+        ws_tracing.set_tracer(None)
+
+    dispatch, = exporter.find('ws.dispatch')
+    publish, = exporter.find('ws.fanout.publish')
+    split, = exporter.find('ws.fanout.split')
+    sends = exporter.find('ws.fanout.send')
+    broadcasts = exporter.find('ws.broadcast')
+    call, = exporter.find('ws.post_to_connection')
+
+    assert {span.trace_id for span in exporter.spans} == {dispatch.trace_id}
+    assert dispatch.annotations['route_key'] == 'publish'
+    assert publish.parent_id == dispatch.id and split.parent_id == publish.id and split.remote
+    assert split.annotations['shards'] == 3 and split.annotations['connections'] == 8
+    assert {send.parent_id for send in sends} == {split.id} and len(sends) == 3
+    assert {broadcast.parent_id for broadcast in broadcasts} == {send.id for send in sends}
+
+    # The throttled call points at its broadcast and the shard that sent it.
+    broadcast, = [broadcast for broadcast in broadcasts if broadcast.id == call.parent_id]
+    send, = [send for send in sends if send.id == broadcast.parent_id]
+    assert call.annotations['connection_id'] == 'slow1' and call.annotations['throttled'] == 1 and call.throttled
+    assert send.annotations['shard'] == 2 and send.annotations['topic'] == 'news'
+    assert send.annotations['batch_size'] == 2 and send.annotations['gone'] == 1
+    assert broadcast.annotations['throttled'] == 1 and broadcast.annotations['sent'] == 1
@@ -31,15 +31,19 @@ setup(
         'aws-cdk-lib>=2.0.0,<3.0.0',
         'aws-cdk-constructs>=2.0.0,<3.0.0',
 
-        # Our.
-        'b-stage-deployment>=1.0.0,<2.0.0',
-
         # Other.
         'websockets>=11.0.0,<12.0.0',
         'pytest>=6.0.2,<7.0.0',
         'pytest-cov>=2.10.1,<3.0.0',
         'pytest-timeout>=1.3.4,<1.5.0'
     ],
+    extras_require={
+        # Binary codecs of the runtime helpers (see b_aws_websocket_api.runtime.ws_codec).
+        'codecs': [
+            'msgpack>=1.0.0,<2.0.0',
+            'zstandard>=0.21.0,<1.0.0',
+        ],
+    },
     author='Laimonas Sutkus',
     author_email='laimonas.sutkus@biomapas.com',
     keywords='AWS CDK API WebSocket',